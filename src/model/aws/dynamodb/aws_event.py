@@ -63,6 +63,16 @@ class SQSMessage(BaseModel):
                 ),
                 Field(None, alias="sqs-dlq-replay-nb"),
             ),
+            sqs_first_receive_timestamp=(
+                create_model(
+                    "SQSFirstReceiveTimestampMessageAttribute",
+                    string_value=(str, Field(None, alias="stringValue")),
+                    string_list_values=(List, Field(None, alias="stringListValues")),
+                    binary_list_values=(List, Field(None, alias="binaryListValues")),
+                    data_type=(str, Field(None, alias="dataType")),
+                ),
+                Field(None, alias="sqs-first-receive-timestamp"),
+            ),
         )
     ] = Field(None, alias="messageAttributes")
     md5_of_body: str = Field(None, alias="md5OfBody")
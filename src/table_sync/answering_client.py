@@ -0,0 +1,64 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# boto3 clients whose calls are answered locally instead of by AWS, for the offline plan of a sync.
+# The Lambda function only creates real clients with the client factory, and doesn't import this module.
+from table_sync.config import REGION
+
+
+def create_answering_client(service_name: str, answer, region_name: str = None):
+    """Creates a boto3 client whose calls are answered by a callable instead of AWS, e.g. to plan a sync offline.
+
+    The client is a real boto3 client, so the parameters are validated and the botocore event hooks run. The
+    calls are short circuited by a before-call handler, as with the botocore Stubber.
+
+    Args:
+        service_name: The boto3 service name, e.g. dynamodb.
+        answer: A callable taking the <service>.<Operation> name and the API parameters, and returning the
+            HTTP status code and the parsed response. An error response has an Error key.
+        region_name: The region of the client. Defaults to the region of the function, or us-east-1.
+
+    Returns:
+      A boto3 client.
+
+    Raises:
+    """
+    import boto3
+    from botocore.awsrequest import AWSResponse
+
+    client = boto3.client(
+        service_name,
+        region_name=region_name or REGION or "us-east-1",
+        aws_access_key_id="answered",
+        aws_secret_access_key="answered",
+    )
+
+    def keep_params(params: dict, context: dict, **kwargs):
+        # The before-call handler only sees the serialized request, so the API parameters are kept aside.
+        context["answered_params"] = dict(params)
+
+    def handle(event_name: str, context: dict, **kwargs):
+        status_code, parsed = answer(event_name.split(".", 1)[1], context.get("answered_params", {}))
+        parsed.setdefault("ResponseMetadata", {"HTTPStatusCode": status_code, "RetryAttempts": 0})
+        return AWSResponse(None, status_code, {}, None), parsed
+
+    client.meta.events.register("before-parameter-build.*.*", keep_params, unique_id="answered-client-params")
+    client.meta.events.register("before-call.*.*", handle, unique_id="answered-client")
+    return client
@@ -20,8 +20,12 @@
 
 from aws_lambda_powertools import Logger
 from table_sync.cfn_yaml_template import create_basic_scaling_policy_cfn, create_basic_scalable_target_cfn
+from table_sync.cfn_projection import SCALABLE_TARGET_TYPE, SCALING_POLICY_TYPE, project_cfn_properties
+from table_sync.table_config import CfnResource
+from table_sync.payload_logging import bounded
 
 LOG: Logger = Logger(service=__name__)
+SCALING_POLICY_TARGET_PROPERTIES = ("ResourceId", "ScalableDimension", "ServiceNamespace")
 
 
 def build_dynamodb_auto_scaling(
@@ -41,6 +45,8 @@ def build_dynamodb_auto_scaling(
         source_table: The describe table API response for the source DynamoDB table.
 
     Returns:
+      A tuple of CfnResource for the scalable targets and the scaling policies, None if the source table and its
+      indexes have no scalable target.
 
     Raises:
     """
@@ -70,13 +76,18 @@ def build_dynamodb_auto_scaling(
     # Check if the DynamoDB table is a scaling target.
     # If not, return. If yes, retrieve the scaling policies for the target.
     # Get the scaling policies associated with the source table.
-    source_table_scalable_targets_response = app_auto_scaling_client.describe_scalable_targets(
-        ServiceNamespace="dynamodb",
-        ResourceIds=[
-            f"table/{source_table_name}",
-        ],
+    # The describe calls are paginated, a table with many policies has more than one page of them.
+    source_table_scalable_targets_response = (
+        app_auto_scaling_client.get_paginator("describe_scalable_targets")
+        .paginate(
+            ServiceNamespace="dynamodb",
+            ResourceIds=[
+                f"table/{source_table_name}",
+            ],
+        )
+        .build_full_result()
     )
-    LOG.info(f"Source table scalable targets: {source_table_scalable_targets_response}")
+    LOG.info("Source table scalable targets: %s", bounded(source_table_scalable_targets_response))
     source_table_scalable_targets: dict = {}
     for target in source_table_scalable_targets_response.get("ScalableTargets", []):
         if target.get("ScalableDimension") == "dynamodb:table:WriteCapacityUnits":
@@ -88,9 +99,10 @@ def build_dynamodb_auto_scaling(
     common_index_scalable_targets = {}
     if common_index_names:
         for index_name in common_index_names:
-            response = app_auto_scaling_client.describe_scalable_targets(
-                ServiceNamespace="dynamodb",
-                ResourceIds=[f"table/{source_table_name}/index/{index_name}"],
+            response = (
+                app_auto_scaling_client.get_paginator("describe_scalable_targets")
+                .paginate(ServiceNamespace="dynamodb", ResourceIds=[f"table/{source_table_name}/index/{index_name}"])
+                .build_full_result()
             )
             index_scalable_target: dict = {}
             for target in response.get("ScalableTargets", []):
@@ -101,7 +113,7 @@ def build_dynamodb_auto_scaling(
             if index_scalable_target:
                 common_index_scalable_targets.update({index_name: index_scalable_target})
 
-    LOG.info(f"Common index names scalable targets: {common_index_scalable_targets}")
+    LOG.info("Common index names scalable targets: %s", bounded(common_index_scalable_targets))
 
     # Return if no scalable targets for the table or the common indexes.
     if not source_table_scalable_targets and not common_index_scalable_targets:
@@ -112,17 +124,16 @@ def build_dynamodb_auto_scaling(
         scalable_target_cfn = create_basic_scalable_target_cfn()
         scalable_target_cfn_properties = scalable_target_cfn.get("Properties")
 
-        # Remove creation date as it is not required in CFN.
-        del value["CreationTime"]
+        # Only the CFN properties of the target are kept, e.g. CreationTime is dropped.
+        scalable_target_cfn_properties.update(project_cfn_properties(SCALABLE_TARGET_TYPE, value))
 
         # Add scalable dimension as it is required in CFN.
-        value.update(ScalableDimension=key)
+        scalable_target_cfn_properties.update(ScalableDimension=key)
 
         # Replace the table name in the resourceId.
-        value.update(ResourceId=value.get("ResourceId").replace(source_table_name, target_table_name))
-
-        # Update the CFN properties.
-        scalable_target_cfn_properties.update(value)
+        scalable_target_cfn_properties.update(
+            ResourceId=value.get("ResourceId").replace(source_table_name, target_table_name)
+        )
         resources.update(
             {
                 f"{target_table_name.replace('_','').replace('.','').replace('-','')}"
@@ -136,19 +147,16 @@ def build_dynamodb_auto_scaling(
             scalable_target_cfn = create_basic_scalable_target_cfn()
             scalable_target_cfn_properties = scalable_target_cfn.get("Properties")
 
-            # Remove creation date as it is not required in CFN.
-            del target_object["CreationTime"]
+            # Only the CFN properties of the target are kept, e.g. CreationTime is dropped.
+            scalable_target_cfn_properties.update(project_cfn_properties(SCALABLE_TARGET_TYPE, target_object))
 
             # Add scalable dimension as it is required in CFN.
-            target_object.update(ScalableDimension=scalable_dimension)
+            scalable_target_cfn_properties.update(ScalableDimension=scalable_dimension)
 
             # Replace the table name in the resourceId.
-            target_object.update(
+            scalable_target_cfn_properties.update(
                 ResourceId=target_object.get("ResourceId").replace(source_table_name, target_table_name)
             )
-
-            # Update the CFN properties.
-            scalable_target_cfn_properties.update(target_object)
             resources.update(
                 {
                     f"{index_name.replace('_','').replace('.','').replace('-','')}"
@@ -159,33 +167,26 @@ def build_dynamodb_auto_scaling(
     # Use describe scaling policies API to get the policies and then create CFN for the same.
     source_table_scaling_policies: dict = {}
     for dimension, scaling_target in source_table_scalable_targets.items():
-        response = app_auto_scaling_client.describe_scaling_policies(
-            ServiceNamespace="dynamodb",
-            ResourceId=f"table/{source_table_name}",
-            ScalableDimension=dimension,
+        response = (
+            app_auto_scaling_client.get_paginator("describe_scaling_policies")
+            .paginate(ServiceNamespace="dynamodb", ResourceId=f"table/{source_table_name}", ScalableDimension=dimension)
+            .build_full_result()
         )
         source_table_scaling_policies.update({dimension: response.get("ScalingPolicies", [])})
-    LOG.info(f"Source table scaling policies: {source_table_scaling_policies}")
+    LOG.info("Source table scaling policies: %s", bounded(source_table_scaling_policies))
 
     # Build CFN for all the scaling policies on the table read and write capacity.
     for dimension, scaling_policies in source_table_scaling_policies.items():
         for i, policy in enumerate(scaling_policies):
             scaling_policy_cfn = create_basic_scaling_policy_cfn()
             scaling_policy_cfn_properties = scaling_policy_cfn.get("Properties")
-            scaling_policy_cfn_properties.update(policy)
-
-            # Remove policy ARN.
-            # Remove creation time.
-            # Remove alarms.
-            # Remove ResourceId.
-            # Remove ScalableDimension.
-            # Remove ServiceNamespace.
-            del scaling_policy_cfn_properties["PolicyARN"]
-            del scaling_policy_cfn_properties["CreationTime"]
-            del scaling_policy_cfn_properties["Alarms"]
-            del scaling_policy_cfn_properties["ResourceId"]
-            del scaling_policy_cfn_properties["ScalableDimension"]
-            del scaling_policy_cfn_properties["ServiceNamespace"]
+
+            # Only the CFN properties of the policy are kept, e.g. PolicyARN, CreationTime or Alarms are dropped.
+            # The target is referenced with ScalingTargetId, so ResourceId, ScalableDimension and ServiceNamespace
+            # are left out.
+            scaling_policy_cfn_properties.update(
+                project_cfn_properties(SCALING_POLICY_TYPE, policy, exclude=SCALING_POLICY_TARGET_PROPERTIES)
+            )
 
             # Update policy name if it contains any references to the source table name.
             scaling_policy_cfn_properties.update(
@@ -212,14 +213,18 @@ def build_dynamodb_auto_scaling(
     for index_name, index_targets in common_index_scalable_targets.items():
         index_policies: dict = {}
         for dimension, target in index_targets.items():
-            response = app_auto_scaling_client.describe_scaling_policies(
-                ServiceNamespace="dynamodb",
-                ResourceId=f"table/{source_table_name}/index/{index_name}",
-                ScalableDimension=dimension,
+            response = (
+                app_auto_scaling_client.get_paginator("describe_scaling_policies")
+                .paginate(
+                    ServiceNamespace="dynamodb",
+                    ResourceId=f"table/{source_table_name}/index/{index_name}",
+                    ScalableDimension=dimension,
+                )
+                .build_full_result()
             )
             index_policies.update({dimension: response.get("ScalingPolicies", [])})
         common_index_scaling_policies.update({index_name: index_policies})
-    LOG.info(f"Common indexes scaling policies: {common_index_scaling_policies}")
+    LOG.info("Common indexes scaling policies: %s", bounded(common_index_scaling_policies))
 
     # Build CFN for all the scaling policies on the table index's read and write capacity.
     for index, scaling_dimension in common_index_scaling_policies.items():
@@ -227,20 +232,13 @@ def build_dynamodb_auto_scaling(
             for i, policy in enumerate(policies):
                 scaling_policy_cfn = create_basic_scaling_policy_cfn()
                 scaling_policy_cfn_properties = scaling_policy_cfn.get("Properties")
-                scaling_policy_cfn_properties.update(policy)
-
-                # Remove policy ARN.
-                # Remove creation time.
-                # Remove alarms.
-                # Remove ResourceId.
-                # Remove ScalableDimension.
-                # Remove ServiceNamespace.
-                del scaling_policy_cfn_properties["PolicyARN"]
-                del scaling_policy_cfn_properties["CreationTime"]
-                del scaling_policy_cfn_properties["Alarms"]
-                del scaling_policy_cfn_properties["ResourceId"]
-                del scaling_policy_cfn_properties["ScalableDimension"]
-                del scaling_policy_cfn_properties["ServiceNamespace"]
+
+                # Only the CFN properties of the policy are kept, e.g. PolicyARN, CreationTime or Alarms are dropped.
+                # The target is referenced with ScalingTargetId, so ResourceId, ScalableDimension and ServiceNamespace
+                # are left out.
+                scaling_policy_cfn_properties.update(
+                    project_cfn_properties(SCALING_POLICY_TYPE, policy, exclude=SCALING_POLICY_TARGET_PROPERTIES)
+                )
 
                 # Update policy name if it contains any references to the source table name.
                 scaling_policy_cfn_properties.update(
@@ -264,4 +262,4 @@ def build_dynamodb_auto_scaling(
                     }
                 )
 
-    return resources
+    return tuple(CfnResource.from_cfn(logical_id, resource) for logical_id, resource in resources.items())
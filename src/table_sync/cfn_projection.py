@@ -0,0 +1,133 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Projection of describe API responses into CFN resource properties.
+# The allow-list of every resource type is compiled once from its bundled resource schema, so fields that
+# AWS adds to a describe response are dropped instead of breaking the change set.
+import copy
+import functools
+from table_sync.cfn_template_validator import load_resource_schemas
+
+DYNAMODB_TABLE_TYPE = "AWS::DynamoDB::Table"
+EVENT_SOURCE_MAPPING_TYPE = "AWS::Lambda::EventSourceMapping"
+SCALABLE_TARGET_TYPE = "AWS::ApplicationAutoScaling::ScalableTarget"
+SCALING_POLICY_TYPE = "AWS::ApplicationAutoScaling::ScalingPolicy"
+# Values the describe APIs return for a setting that isn't set, e.g. the OnDemandThroughput of an on-demand GSI
+# without a maximum. CFN rejects them, they are dropped as if the setting was missing.
+UNSET_VALUES = {"MaxReadRequestUnits": -1, "MaxWriteRequestUnits": -1}
+
+
+def project_cfn_properties(resource_type: str, response: dict, exclude: tuple = ()):
+    """Projects a describe API response item into the CFN properties of a resource type.
+
+    Only the properties of the resource schema are kept, read-only properties excluded. Values that are None,
+    empty or UNSET_VALUES are dropped as CFN doesn't accept them. The response is not mutated.
+
+    Args:
+        resource_type: The CFN resource type, e.g. AWS::ApplicationAutoScaling::ScalingPolicy.
+        response: The describe API response item, e.g. one of the ScalingPolicies of describe_scaling_policies.
+        exclude: Top level properties to leave out of the projection.
+
+    Returns:
+      A new dict with the CFN properties.
+
+    Raises:
+      KeyError: No schema is bundled for the resource type.
+    """
+    projection = get_resource_projection(resource_type)
+    properties = _project({key: value for key, value in response.items() if key not in exclude}, projection)
+    return properties if properties is not None else {}
+
+
+def project_cfn_property(resource_type: str, property_name: str, value):
+    """Projects a describe API response value into a single CFN property of a resource type.
+
+    Args:
+        resource_type: The CFN resource type, e.g. AWS::DynamoDB::Table.
+        property_name: The CFN property, e.g. GlobalSecondaryIndexes.
+        value: The describe API response value of the property.
+
+    Returns:
+      The projected value, or None if the value is None or empty.
+
+    Raises:
+      KeyError: No schema is bundled for the resource type or the property isn't in it.
+    """
+    return _project(value, get_resource_projection(resource_type)[property_name])
+
+
+@functools.lru_cache(maxsize=None)
+def get_resource_projection(resource_type: str):
+    """Gets the compiled projection of a resource type.
+
+    A projection is a dict of the allowed properties to the projection of their value. A list value is
+    projected with a one item tuple holding the projection of its items. None keeps the value as is.
+
+    Args:
+        resource_type: The CFN resource type.
+
+    Returns:
+      The projection of the resource properties.
+
+    Raises:
+      KeyError: No schema is bundled for the resource type.
+    """
+    schema = load_resource_schemas()[resource_type]
+    read_only_properties = {pointer.split("/")[-1] for pointer in schema.get("readOnlyProperties", [])}
+    projection = _compile(schema, schema)
+    return {key: value for key, value in projection.items() if key not in read_only_properties}
+
+
+def _compile(schema: dict, root_schema: dict):
+    if "$ref" in schema:
+        return _compile(root_schema["definitions"][schema["$ref"].split("/")[-1]], root_schema)
+    if "properties" in schema:
+        return {
+            property_name: _compile(property_schema, root_schema)
+            for property_name, property_schema in schema["properties"].items()
+        }
+    if "items" in schema:
+        return (_compile(schema["items"], root_schema),)
+    return None
+
+
+def _project(value, projection):
+    if value is None:
+        return None
+    if projection is None:
+        projected = copy.deepcopy(value)
+    elif isinstance(projection, dict) and isinstance(value, dict):
+        projected = {}
+        for key, item in value.items():
+            if key in projection and not (key in UNSET_VALUES and item == UNSET_VALUES[key]):
+                projected_item = _project(item, projection[key])
+                if projected_item is not None:
+                    projected[key] = projected_item
+    elif isinstance(projection, tuple) and isinstance(value, list):
+        projected = [
+            projected_item
+            for projected_item in (_project(item, projection[0]) for item in value)
+            if projected_item is not None
+        ]
+    else:
+        projected = copy.deepcopy(value)
+    if isinstance(projected, (dict, list)) and not projected:
+        return None
+    return projected
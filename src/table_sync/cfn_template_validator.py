@@ -0,0 +1,260 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Local preflight of generated CFN templates against the bundled CloudFormation resource schemas.
+# The schemas are compiled once per resource type into nested validator functions and kept for the
+# lifetime of the execution environment, so warm invocations only pay for the walk of the template.
+import functools
+import json
+import os
+import re
+
+SCHEMAS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas")
+JSON_TYPES = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+}
+
+
+def validate_cfn_template(cfn_template_dict: dict):
+    """Validates the properties of every resource of a CFN template against the bundled resource schemas.
+
+    Resources with a type that has no bundled schema are skipped.
+
+    Args:
+        cfn_template_dict: The CFN template dict.
+
+    Returns:
+
+    Raises:
+      TemplateValidationError: The first property that doesn't match its resource schema.
+    """
+    for logical_id, resource in (cfn_template_dict.get("Resources") or {}).items():
+        validator = get_resource_validator(resource.get("Type", ""))
+        if validator is not None:
+            validator(resource.get("Properties", {}), f"Resources.{logical_id}.Properties")
+
+
+@functools.lru_cache(maxsize=None)
+def get_resource_validator(resource_type: str):
+    """Gets the compiled validator of a resource type.
+
+    Args:
+        resource_type: The CFN resource type, e.g. AWS::DynamoDB::Table.
+
+    Returns:
+      A function validating the resource properties, or None if no schema is bundled for the type.
+
+    Raises:
+    """
+    schema = load_resource_schemas().get(resource_type)
+    if schema is None:
+        return None
+    validator = _compile(schema, schema)
+    read_only_properties = [pointer.split("/")[-1] for pointer in schema.get("readOnlyProperties", [])]
+    if not read_only_properties:
+        return validator
+
+    def validate_resource(properties, path):
+        for property_name in read_only_properties:
+            if isinstance(properties, dict) and property_name in properties:
+                raise TemplateValidationError(f"{path}.{property_name}", "is a read-only property")
+        validator(properties, path)
+
+    return validate_resource
+
+
+@functools.lru_cache(maxsize=None)
+def load_resource_schemas():
+    """Loads the bundled resource schemas.
+
+    Args:
+
+    Returns:
+      A dict of the resource schemas by resource type.
+
+    Raises:
+    """
+    schemas = {}
+    for file_name in sorted(os.listdir(SCHEMAS_DIRECTORY)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(SCHEMAS_DIRECTORY, file_name), encoding="utf-8") as schema_file:
+                schema = json.load(schema_file)
+            schemas[schema["typeName"]] = schema
+    return schemas
+
+
+def is_intrinsic_function(value):
+    """Checks if a template value is a CFN intrinsic function, e.g. Ref or Fn::GetAtt, resolved at deployment.
+
+    Args:
+        value: The template value.
+
+    Returns:
+      A boolean indicating whether the value is an intrinsic function.
+
+    Raises:
+    """
+    if not isinstance(value, dict) or len(value) != 1:
+        return False
+    key = next(iter(value))
+    return key == "Ref" or key == "Condition" or key.startswith("Fn::")
+
+
+def _compile(schema: dict, root_schema: dict):
+    # Compiles a (sub)schema into a list of checks run against the value at a given path.
+    if "$ref" in schema:
+        definition_name = schema["$ref"].split("/")[-1]
+        compiled_definition = []
+
+        def validate_ref(value, path):
+            # Definitions are compiled on first use, which also keeps recursive definitions finite.
+            if not compiled_definition:
+                compiled_definition.append(_compile(root_schema["definitions"][definition_name], root_schema))
+            compiled_definition[0](value, path)
+
+        return validate_ref
+
+    checks = []
+    schema_type = schema.get("type")
+    if schema_type:
+        type_names = schema_type if isinstance(schema_type, list) else [schema_type]
+        type_checks = [JSON_TYPES[type_name] for type_name in type_names]
+
+        def check_type(value, path):
+            if not any(type_check(value) for type_check in type_checks):
+                raise TemplateValidationError(path, f"expected {' or '.join(type_names)}, got {type(value).__name__}")
+
+        checks.append(check_type)
+    if "enum" in schema:
+        allowed_values = schema["enum"]
+
+        def check_enum(value, path):
+            if value not in allowed_values:
+                raise TemplateValidationError(path, f"{value!r} is not one of {allowed_values}")
+
+        checks.append(check_enum)
+    checks.extend(_compile_bounds(schema))
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        checks.append(_compile_object(schema, root_schema))
+    if "items" in schema:
+        item_validator = _compile(schema["items"], root_schema)
+
+        def check_items(value, path):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_validator(item, f"{path}[{i}]")
+
+        checks.append(check_items)
+
+    def validate(value, path):
+        if is_intrinsic_function(value):
+            return
+        for check in checks:
+            check(value, path)
+
+    return validate
+
+
+def _compile_object(schema: dict, root_schema: dict):
+    property_validators = {
+        property_name: _compile(property_schema, root_schema)
+        for property_name, property_schema in schema.get("properties", {}).items()
+    }
+    required_properties = schema.get("required", [])
+    additional_properties = schema.get("additionalProperties", True)
+
+    def check_object(value, path):
+        if not isinstance(value, dict):
+            return
+        for property_name in required_properties:
+            if property_name not in value:
+                raise TemplateValidationError(f"{path}.{property_name}", "is a required property")
+        for property_name, property_value in value.items():
+            property_validator = property_validators.get(property_name)
+            if property_validator is not None:
+                property_validator(property_value, f"{path}.{property_name}")
+            elif additional_properties is False:
+                raise TemplateValidationError(f"{path}.{property_name}", "is not a property of the resource schema")
+
+    return check_object
+
+
+def _compile_bounds(schema: dict):
+    checks = []
+    if "minimum" in schema or "maximum" in schema:
+        minimum, maximum = schema.get("minimum"), schema.get("maximum")
+
+        def check_range(value, path):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                    raise TemplateValidationError(path, f"{value} is outside of [{minimum}, {maximum}]")
+
+        checks.append(check_range)
+    for keyword, kind, measure in (
+        ("minLength", str, "characters"),
+        ("maxLength", str, "characters"),
+        ("minItems", list, "items"),
+        ("maxItems", list, "items"),
+        ("minProperties", dict, "properties"),
+    ):
+        if keyword in schema:
+            checks.append(_compile_size(keyword, schema[keyword], kind, measure))
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, path):
+            if isinstance(value, str) and not pattern.search(value):
+                raise TemplateValidationError(path, f"{value!r} doesn't match {pattern.pattern}")
+
+        checks.append(check_pattern)
+    if schema.get("uniqueItems"):
+
+        def check_unique_items(value, path):
+            if isinstance(value, list):
+                serialized_items = [json.dumps(item, sort_keys=True, default=str) for item in value]
+                if len(set(serialized_items)) != len(serialized_items):
+                    raise TemplateValidationError(path, "has duplicate items")
+
+        checks.append(check_unique_items)
+    return checks
+
+
+def _compile_size(keyword: str, bound: int, kind: type, measure: str):
+    is_minimum = keyword.startswith("min")
+
+    def check_size(value, path):
+        if isinstance(value, kind) and (len(value) < bound if is_minimum else len(value) > bound):
+            raise TemplateValidationError(
+                path, f"has {len(value)} {measure}, {'at least' if is_minimum else 'at most'} {bound} expected"
+            )
+
+    return check_size
+
+
+class TemplateValidationError(Exception):
+    def __init__(self, path: str, reason: str):
+        super().__init__(f"{path} {reason}")
+        self.path = path
+        self.reason = reason
@@ -18,6 +18,12 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import json
+from table_sync.table_config import TableConfig
+
+RESTORED_TABLE_LOGICAL_ID = "PITRRestoredTable"
+
+
 def create_basic_cfn_yaml(cfn_template_description: str = "Basic CFN template"):
     """Builds the basic CFN template dict.
 
@@ -89,3 +95,65 @@ def create_basic_scaling_policy_cfn():
     Raises:
     """
     return {"Type": "AWS::ApplicationAutoScaling::ScalingPolicy", "Properties": {}}
+
+
+def serialize_cfn_template(cfn_template_dict: dict):
+    """Serializes a CFN template dict to its compact canonical JSON body.
+
+    The keys are sorted and the separators carry no whitespace, so the same template always gives the
+    same, smallest, body.
+
+    Args:
+      cfn_template_dict: The CFN template dict.
+
+    Returns:
+      A string with the JSON template body.
+
+    Raises:
+    """
+    return json.dumps(cfn_template_dict, separators=(",", ":"), sort_keys=True)
+
+
+def render_cfn_resources(cfn_resources: tuple):
+    """Renders CFN resources to the Resources section of a CFN template.
+
+    Args:
+      cfn_resources: The CfnResource items to render.
+
+    Returns:
+      A new dict of the resources by logical id.
+
+    Raises:
+    """
+    return {resource.logical_id: resource.to_cfn() for resource in cfn_resources}
+
+
+def render_cfn_template(
+    table_config: TableConfig,
+    cfn_template_description: str = None,
+    include_table_resources: bool = True,
+):
+    """Renders the CFN template of the restored table stack from its configuration.
+
+    Args:
+      table_config: The configuration of the restored table.
+      cfn_template_description: The template description. Defaults to the restored table deployment one.
+      include_table_resources: Whether the triggers and the scaling resources are rendered in the template.
+          They are left out when they are deployed in sibling stacks.
+
+    Returns:
+      A new dict for the CFN template.
+
+    Raises:
+    """
+    if cfn_template_description is None:
+        cfn_template_description = f"{table_config.table_name} Cloudformation deployment"
+    template_dict = create_basic_cfn_yaml(cfn_template_description=cfn_template_description)
+    dynamodb_table_cfn = create_basic_dynamodb_cfn()
+    dynamodb_table_cfn.update(Properties=table_config.to_cfn_properties())
+    resources = template_dict.get("Resources")
+    resources.update({RESTORED_TABLE_LOGICAL_ID: dynamodb_table_cfn})
+    if include_table_resources:
+        resources.update(render_cfn_resources(table_config.triggers))
+        resources.update(render_cfn_resources(table_config.scaling))
+    return template_dict
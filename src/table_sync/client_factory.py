@@ -0,0 +1,207 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# boto3 clients shared by the functions and the threads of a Lambda execution environment.
+# boto3 is only imported and a client only created the first time a service is used, so the services of
+# disabled settings don't add to the cold start. All the clients come from one boto3 session, which loads
+# the credentials and the service models once, and are tuned per service with a botocore Config.
+# Each client is instrumented to collect the API call statistics of the sync.
+import contextlib
+import functools
+import threading
+from aws_lambda_powertools import Logger
+from table_sync.instrumentation import instrument_client
+from table_sync.config import (
+    LOG_LEVEL,
+    CLIENT_MAX_POOL_CONNECTIONS,
+    CLIENT_CONNECT_TIMEOUT,
+    CLIENT_READ_TIMEOUT,
+    CLIENT_MAX_ATTEMPTS,
+)
+
+LOG: Logger = Logger(service=__name__)
+LOG.setLevel(LOG_LEVEL)
+DEFAULT_CLIENT_CONFIG = {
+    "max_pool_connections": CLIENT_MAX_POOL_CONNECTIONS,
+    "connect_timeout": CLIENT_CONNECT_TIMEOUT,
+    "read_timeout": CLIENT_READ_TIMEOUT,
+    # Adaptive retries add client side rate limiting on top of the standard retries, so that the threads
+    # deploying sibling stacks back off together when CloudFormation throttles them.
+    "retries": {"mode": "adaptive", "max_attempts": CLIENT_MAX_ATTEMPTS},
+    "tcp_keepalive": True,
+}
+# Per service values that are merged over the default ones.
+# The DynamoDB and Lambda describe/list calls are short, CloudFormation waits on bigger responses.
+SERVICE_CLIENT_CONFIGS = {
+    "cloudformation": {"read_timeout": 60},
+    "dynamodb": {"connect_timeout": 2, "read_timeout": 10},
+    "lambda": {"connect_timeout": 2, "read_timeout": 10},
+    "application-autoscaling": {"connect_timeout": 2, "read_timeout": 10},
+    "s3": {"read_timeout": 60},
+}
+
+CLIENTS: dict = {}
+_SESSION = None
+_CLIENT_CREATOR = None
+_LOCK = threading.Lock()
+
+
+def build_client_config(service_name: str):
+    """Builds the botocore Config of an AWS service client.
+
+    Args:
+        service_name: The boto3 service name, e.g. dynamodb.
+
+    Returns:
+      A botocore Config with the default values and the service ones merged over them.
+
+    Raises:
+    """
+    from botocore.config import Config
+
+    values = {**DEFAULT_CLIENT_CONFIG, **SERVICE_CLIENT_CONFIGS.get(service_name, {})}
+    if not tcp_keepalive_supported():
+        values.pop("tcp_keepalive", None)
+    return Config(**values)
+
+
+@functools.lru_cache(maxsize=None)
+def tcp_keepalive_supported():
+    """Tells whether botocore knows the TCP keep-alive option, only known to recent versions.
+
+    The first client created logs a warning when it doesn't, e.g. with the botocore pinned by the Pipfile.
+
+    Args:
+
+    Returns:
+      True if the clients are created with TCP keep-alive.
+
+    Raises:
+    """
+    import botocore
+    from botocore.config import Config
+
+    if "tcp_keepalive" in Config.OPTION_DEFAULTS:
+        return True
+    LOG.warning(
+        f"TCP keep-alive is unavailable with botocore {botocore.__version__}, the clients are created without it. "
+        "Idle connections may be dropped between the calls of a long sync."
+    )
+    return False
+
+
+def get_session():
+    """Returns the boto3 session shared by all the clients, created on first use.
+
+    Args:
+
+    Returns:
+      A boto3 Session.
+
+    Raises:
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _LOCK:
+            if _SESSION is None:
+                import boto3
+
+                _SESSION = boto3.session.Session()
+    return _SESSION
+
+
+def set_client_creator(client_creator=None):
+    """Replaces the creation of the clients from the shared session, e.g. by a local emulator of the AWS APIs.
+
+    The clients already created are dropped, so the next calls get clients from the new creator.
+
+    Args:
+        client_creator: A callable returning the boto3 client of a service name. None restores the creation
+            from the shared session.
+
+    Returns:
+
+    Raises:
+    """
+    global _CLIENT_CREATOR
+    with _LOCK:
+        _CLIENT_CREATOR = client_creator
+        CLIENTS.clear()
+
+
+def _create_client(service_name: str):
+    if _CLIENT_CREATOR is not None:
+        return _CLIENT_CREATOR(service_name)
+    return get_session().client(service_name, config=build_client_config(service_name))
+
+
+def get_client(service_name: str):
+    """Returns the boto3 client of an AWS service, created on first use.
+
+    boto3 clients are thread safe but their creation from a shared session isn't, so a client is created
+    under a lock and only once, whatever the number of threads asking for it.
+
+    Args:
+        service_name: The boto3 service name, e.g. dynamodb.
+
+    Returns:
+      A boto3 client reused by the next invocations of the execution environment.
+
+    Raises:
+    """
+    client = CLIENTS.get(service_name)
+    if client is None:
+        if _CLIENT_CREATOR is None:
+            get_session()
+        with _LOCK:
+            client = CLIENTS.get(service_name)
+            if client is None:
+                client = instrument_client(_create_client(service_name))
+                CLIENTS[service_name] = client
+    return client
+
+
+@contextlib.contextmanager
+def install_client_creator(client_creator):
+    """Makes the client factory create its clients with client_creator, until the context exits.
+
+    The client creator and the clients set before are restored when the context exits. The swaps are made under
+    the lock of the factory, so that a thread creating a client sees either set of clients, never a mix.
+
+    Args:
+        client_creator: A callable returning the boto3 client of a service name.
+
+    Returns:
+
+    Raises:
+    """
+    global _CLIENT_CREATOR
+    with _LOCK:
+        saved_client_creator = _CLIENT_CREATOR
+        saved_clients = dict(CLIENTS)
+        _CLIENT_CREATOR = client_creator
+        CLIENTS.clear()
+    try:
+        yield
+    finally:
+        with _LOCK:
+            _CLIENT_CREATOR = saved_client_creator
+            CLIENTS.clear()
+            CLIENTS.update(saved_clients)
@@ -24,14 +24,40 @@ import os
 
 CFN_IMPORT_CHANGE_SET_TYPE = "IMPORT"
 CFN_UPDATE_CHANGE_SET_TYPE = "UPDATE"
+CFN_CREATE_CHANGE_SET_TYPE = "CREATE"
+CFN_REVERT_DRIFT_DEPLOYMENT_MODE = "REVERT_DRIFT"
+CFN_TEMPLATE_BODY_MAX_BYTES = 51200
+RESTORED_TABLE_STACK_NAME = "Restored-DynamoDB-Table-{target_table_name}-Stack"
+TRIGGERS_STACK_NAME = "Restored-DynamoDB-Table-{target_table_name}-Triggers-Stack"
+AUTO_SCALING_STACK_NAME = "Restored-DynamoDB-Table-{target_table_name}-AutoScaling-Stack"
+MAIN_QUEUE_NAME = "PITR-Event-Queue"
+SECONDARY_DLQ_NAME = "PITR-Event-Queue-Secondary-DLQ"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 REGION = os.getenv("AWS_REGION")
 ACCOUNT_ID = os.getenv("ACCOUNT_ID")
 PARTITION = os.getenv("PARTITION")
-ENABLE_TAG_SETTINGS = os.getenv("ENABLE_TAG_SETTINGS").lower() == "true"
-ENABLE_KINESIS_SETTINGS = os.getenv("ENABLE_KINESIS_SETTINGS").lower() == "true"
-ENABLE_DYNAMODB_STREAM_SETTINGS = os.getenv("ENABLE_DYNAMODB_STREAM_SETTINGS").lower() == "true"
-ENABLE_TTL_SETTINGS = os.getenv("ENABLE_TTL_SETTINGS").lower() == "true"
-ENABLE_PITR_SETTINGS = os.getenv("ENABLE_PITR_SETTINGS").lower() == "true"
-ENABLE_AUTO_SCALING_SETTINGS = os.getenv("ENABLE_AUTO_SCALING_SETTINGS").lower() == "true"
-ENABLE_DYNAMODB_LAMBDA_TRIGGERS = os.getenv("ENABLE_DYNAMODB_LAMBDA_TRIGGERS").lower() == "true"
+ENABLE_TAG_SETTINGS = os.getenv("ENABLE_TAG_SETTINGS", "true").lower() == "true"
+ENABLE_KINESIS_SETTINGS = os.getenv("ENABLE_KINESIS_SETTINGS", "true").lower() == "true"
+ENABLE_DYNAMODB_STREAM_SETTINGS = os.getenv("ENABLE_DYNAMODB_STREAM_SETTINGS", "true").lower() == "true"
+ENABLE_TTL_SETTINGS = os.getenv("ENABLE_TTL_SETTINGS", "true").lower() == "true"
+ENABLE_PITR_SETTINGS = os.getenv("ENABLE_PITR_SETTINGS", "true").lower() == "true"
+ENABLE_AUTO_SCALING_SETTINGS = os.getenv("ENABLE_AUTO_SCALING_SETTINGS", "true").lower() == "true"
+ENABLE_DYNAMODB_LAMBDA_TRIGGERS = os.getenv("ENABLE_DYNAMODB_LAMBDA_TRIGGERS", "true").lower() == "true"
+ENABLE_SIBLING_STACKS = os.getenv("ENABLE_SIBLING_STACKS", "false").lower() == "true"
+CFN_TEMPLATE_BUCKET = os.getenv("CFN_TEMPLATE_BUCKET", "")
+CFN_TEMPLATE_PREFIX = os.getenv("CFN_TEMPLATE_PREFIX", "templates")
+ENABLE_TEMPLATE_VALIDATION = os.getenv("ENABLE_TEMPLATE_VALIDATION", "true").lower() == "true"
+CLIENT_MAX_POOL_CONNECTIONS = int(os.getenv("CLIENT_MAX_POOL_CONNECTIONS", "50"))
+CLIENT_CONNECT_TIMEOUT = int(os.getenv("CLIENT_CONNECT_TIMEOUT", "5"))
+CLIENT_READ_TIMEOUT = int(os.getenv("CLIENT_READ_TIMEOUT", "30"))
+CLIENT_MAX_ATTEMPTS = int(os.getenv("CLIENT_MAX_ATTEMPTS", "10"))
+CONFIG_FILE = os.getenv("CONFIG_FILE", "")
+CONFIG_PARAMETER_NAME = os.getenv("CONFIG_PARAMETER_NAME", "")
+CONFIG_TTL_SECONDS = int(os.getenv("CONFIG_TTL_SECONDS", "60"))
+METRICS_NAMESPACE = os.getenv("POWERTOOLS_METRICS_NAMESPACE", "DynamoDBPITRTableSync")
+SYNC_LEDGER_TABLE = os.getenv("SYNC_LEDGER_TABLE", "")
+SYNC_LEDGER_PATH = os.getenv("SYNC_LEDGER_PATH", "")
+ENABLE_PROFILING = os.getenv("ENABLE_PROFILING", "false").lower() == "true"
+PROFILING_TOP_N = int(os.getenv("PROFILING_TOP_N", "25"))
+PROFILING_OUTPUT = os.getenv("PROFILING_OUTPUT", "")
+LOG_PAYLOAD_MAX_BYTES = int(os.getenv("LOG_PAYLOAD_MAX_BYTES", "2048"))
@@ -18,12 +18,43 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import json
+import contextlib
+import hashlib
+import time
 import botocore
+from concurrent.futures import Future, ThreadPoolExecutor
 from aws_lambda_powertools import Logger
-from table_sync.config import CFN_IMPORT_CHANGE_SET_TYPE, CFN_UPDATE_CHANGE_SET_TYPE
+from table_sync.cfn_yaml_template import create_basic_cfn_yaml, serialize_cfn_template
+from table_sync.cfn_template_validator import validate_cfn_template
+from table_sync.helpers import does_cfn_stack_exist
+from table_sync.payload_logging import bounded, full
+from table_sync.template_uploader import get_default_template_uploader
+from table_sync.sync_metrics import (
+    CHANGE_SET_CREATE_WAIT_PHASE,
+    CHANGE_SET_EXECUTE_WAIT_PHASE,
+    TEMPLATE_PREPARATION_PHASE,
+    measure_phase,
+)
+from table_sync.sync_tracing import (
+    CFN_STATUS_ANNOTATION,
+    CHANGE_SET_TYPE_ANNOTATION,
+    POLL_COUNT_ANNOTATION,
+    TARGET_TABLE_ANNOTATION,
+    put_annotation,
+    trace_subsegment,
+)
+from table_sync.config import (
+    CFN_UPDATE_CHANGE_SET_TYPE,
+    CFN_CREATE_CHANGE_SET_TYPE,
+    CFN_TEMPLATE_BODY_MAX_BYTES,
+    ENABLE_TEMPLATE_VALIDATION,
+)
 
 LOG: Logger = Logger(service=__name__)
+CHANGE_SET_CREATE_WAITER_CONFIG = {"Delay": 6, "MaxAttempts": 10}  # 1 minute wait.
+STACK_WAITER_CONFIG = {"Delay": 6, "MaxAttempts": 30}  # 3 minute wait.
+# A restored table has two sibling stacks at most, the triggers and the auto scaling ones.
+SIBLING_STACK_WORKERS = 2
 
 
 def create_and_execute_change_set(
@@ -33,71 +64,329 @@ def create_and_execute_change_set(
     cfn_template_dict=None,
     cfn_change_set_type: str = "",
     cfn_resources_to_import=None,
+    cfn_template_uploader=None,
+    target_table_name: str = "",
+    cfn_deployment_mode: str = "",
 ):
     """Creates and executes a change set for a given CFN stack.
 
+    The template is validated against the bundled resource schemas first, so a malformed property fails
+    before any API call. It is then sent inline when it fits in the TemplateBody limit. Above the limit it
+    is uploaded with the template uploader and passed as a TemplateURL. The create, wait, execute and wait
+    stages are each traced as an X-Ray subsegment.
+
     Args:
         cfn_client: Authenticated CloudFormation boto3 client.
         cfn_change_set_name: The name of the change set.
         cfn_template_dict: The updated CFN template for the change set.
-        cfn_change_set_type: The type of change set. Can be UPDATE or IMPORT.
+        cfn_change_set_type: The type of change set. Can be CREATE, UPDATE or IMPORT.
         cfn_resources_to_import: If the type of the change set is IMPORT, then a list of resources to be imported.
         cfn_stack_name: The name of the CloudFormation stack.
+        cfn_template_uploader: Uploader for templates above the TemplateBody limit. Defaults to the uploader
+            configured for the function.
+        target_table_name: The restored table name, annotated on the subsegments.
+        cfn_deployment_mode: The deployment mode of the change set, e.g. REVERT_DRIFT to also give back the
+            template values to the drifted resources. Defaults to a change set of the template differences.
 
     Returns:
 
     Raises:
       ClientError: Boto3 error
+      WaiterError: The change set or the stack ended in a failed status, or didn't settle in time.
+      TemplateTooLarge: The template is above the TemplateBody limit and no uploader is configured.
+      TemplateValidationError: A resource property doesn't match its resource schema.
     """
     LOG.info(
         f"Change set type: {cfn_change_set_type}\n"
         f"Change set name: {cfn_change_set_name}\n"
-        f"Change set template: {cfn_template_dict}\n"
         f"Change set resource import (if applicable): {cfn_resources_to_import}"
     )
+    LOG.info("Change set template: %s", bounded(cfn_template_dict))
     if cfn_resources_to_import is None:
         cfn_resources_to_import = []
     if cfn_template_dict is None:
         cfn_template_dict = {}
-    change_set_type_waiter_dict = {
-        CFN_IMPORT_CHANGE_SET_TYPE: "stack_import_complete",
-        CFN_UPDATE_CHANGE_SET_TYPE: "stack_update_complete",
+    annotations = {
+        TARGET_TABLE_ANNOTATION: target_table_name,
+        CHANGE_SET_TYPE_ANNOTATION: cfn_change_set_type,
     }
 
+    # Validate the template locally before creating the change set.
+    # Build the template parameters, uploading the template if it is too large.
+    with measure_phase(TEMPLATE_PREPARATION_PHASE):
+        if ENABLE_TEMPLATE_VALIDATION:
+            validate_cfn_template(cfn_template_dict)
+        template_params = build_template_params(
+            cfn_template_dict=cfn_template_dict,
+            cfn_template_key=f"{cfn_stack_name}/{cfn_change_set_name}",
+            cfn_template_uploader=cfn_template_uploader,
+        )
+
     # Create a CFN change set.
     try:
         create_change_set_params = {
             "StackName": cfn_stack_name,
-            "TemplateBody": json.dumps(cfn_template_dict),
             "ChangeSetName": cfn_change_set_name,
             "Description": "Change set to update the PITR restored DynamoDB table",
             "ChangeSetType": cfn_change_set_type,
         }
+        create_change_set_params.update(template_params)
         if cfn_resources_to_import:
             create_change_set_params.update(ResourcesToImport=cfn_resources_to_import)
-        import_change_set_response = cfn_client.create_change_set(**create_change_set_params)
-        import_change_set_arn = import_change_set_response.get("Id")
-
-        # Wait for the change set to be in the CREATE_COMPLETE state.
-        LOG.info(f"Change set creation successful. Waiting for change set to be in CREATE_COMPLETE state.")
-        waiter = cfn_client.get_waiter("change_set_create_complete")
-        waiter.wait(
-            ChangeSetName=import_change_set_arn,
-            StackName=cfn_stack_name,
-            WaiterConfig={"Delay": 6, "MaxAttempts": 10},  # 1 minute wait.
-        )
+        if cfn_deployment_mode:
+            create_change_set_params.update(DeploymentMode=cfn_deployment_mode)
+        with measure_phase(CHANGE_SET_CREATE_WAIT_PHASE):
+            with trace_subsegment("ChangeSetCreate", annotations):
+                import_change_set_response = cfn_client.create_change_set(**create_change_set_params)
+                import_change_set_arn = import_change_set_response.get("Id")
+
+            # Wait for the change set to be in the CREATE_COMPLETE state.
+            LOG.info(f"Change set creation successful. Waiting for change set to be in CREATE_COMPLETE state.")
+            with trace_subsegment("ChangeSetCreateWait", annotations) as subsegment:
+                try:
+                    cfn_status, poll_count = wait_for_change_set(
+                        cfn_client=cfn_client,
+                        cfn_change_set_arn=import_change_set_arn,
+                        cfn_stack_name=cfn_stack_name,
+                    )
+                except botocore.exceptions.WaiterError as error:
+                    put_annotation(subsegment, CFN_STATUS_ANNOTATION, error.last_response.get("Status"))
+                    raise
+                put_annotation(subsegment, CFN_STATUS_ANNOTATION, cfn_status)
+                put_annotation(subsegment, POLL_COUNT_ANNOTATION, poll_count)
+
+        with measure_phase(CHANGE_SET_EXECUTE_WAIT_PHASE):
+            # Execute the change set.
+            with trace_subsegment("ChangeSetExecute", annotations):
+                cfn_client.execute_change_set(
+                    ChangeSetName=import_change_set_arn,
+                    StackName=cfn_stack_name,
+                )
+
+            # Wait for the stack to be in the IMPORT_COMPLETE / UPDATE_COMPLETE / CREATE_COMPLETE state.
+            LOG.info(f"Change set execution successful. Waiting for stack in the UPDATE / IMPORT / CREATE COMPLETE state.")
+            with trace_subsegment("ChangeSetExecuteWait", annotations) as subsegment:
+                try:
+                    cfn_status, poll_count = wait_for_stack(
+                        cfn_client=cfn_client,
+                        cfn_stack_name=cfn_stack_name,
+                        cfn_change_set_type=cfn_change_set_type,
+                    )
+                except botocore.exceptions.WaiterError as error:
+                    stacks = error.last_response.get("Stacks") or [{}]
+                    put_annotation(subsegment, CFN_STATUS_ANNOTATION, stacks[0].get("StackStatus"))
+                    raise
+                put_annotation(subsegment, CFN_STATUS_ANNOTATION, cfn_status)
+                put_annotation(subsegment, POLL_COUNT_ANNOTATION, poll_count)
+    except Exception:
+        LOG.error("Template of the failed change set %s: %s", cfn_change_set_name, full(cfn_template_dict))
+        raise
+
+
+def wait_for_change_set(
+    cfn_client: object, cfn_change_set_arn: str, cfn_stack_name: str, waiter_config: dict = None
+):
+    """Polls a change set until it leaves the CREATE_PENDING / CREATE_IN_PROGRESS states.
+
+    It polls like the change_set_create_complete waiter, but returns the final status and the number of
+    polls, so that they can be annotated on the trace.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_change_set_arn: The ARN of the change set.
+        cfn_stack_name: The name of the CloudFormation stack.
+        waiter_config: A dict with the Delay in seconds and the MaxAttempts. Defaults to a 1 minute wait.
+
+    Returns:
+      A tuple of the change set status and the number of polls.
+
+    Raises:
+      ClientError: Boto3 error
+      WaiterError: The change set creation failed or didn't complete in time.
+    """
+    if waiter_config is None:
+        waiter_config = CHANGE_SET_CREATE_WAITER_CONFIG
+    response = {}
+    for poll_count in range(1, waiter_config.get("MaxAttempts") + 1):
+        response = cfn_client.describe_change_set(ChangeSetName=cfn_change_set_arn, StackName=cfn_stack_name)
+        status = response.get("Status")
+        if status == "CREATE_COMPLETE":
+            return status, poll_count
+        if not status.endswith(("_PENDING", "_IN_PROGRESS")):
+            raise botocore.exceptions.WaiterError(
+                name="ChangeSetCreateComplete",
+                reason=f"Change set in {status} status: {response.get('StatusReason')}",
+                last_response=response,
+            )
+        if poll_count < waiter_config.get("MaxAttempts"):
+            time.sleep(waiter_config.get("Delay"))
+    raise botocore.exceptions.WaiterError(
+        name="ChangeSetCreateComplete", reason="Max attempts exceeded", last_response=response
+    )
+
+
+def wait_for_stack(cfn_client: object, cfn_stack_name: str, cfn_change_set_type: str, waiter_config: dict = None):
+    """Polls a stack until it leaves the in progress states of an executed change set.
+
+    It polls like the stack_import_complete, stack_update_complete and stack_create_complete waiters, but
+    returns the final status and the number of polls, so that they can be annotated on the trace. A rolling
+    back stack is polled until the rollback completes, so that a retried event finds the stack settled.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+        cfn_change_set_type: The type of the executed change set. Can be CREATE, UPDATE or IMPORT.
+        waiter_config: A dict with the Delay in seconds and the MaxAttempts. Defaults to a 3 minute wait.
+
+    Returns:
+      A tuple of the stack status and the number of polls.
+
+    Raises:
+      ClientError: Boto3 error
+      WaiterError: The stack ended in a status other than <CHANGE SET TYPE>_COMPLETE or didn't settle in time.
+    """
+    if waiter_config is None:
+        waiter_config = STACK_WAITER_CONFIG
+    complete_status = f"{cfn_change_set_type}_COMPLETE"
+    response = {}
+    for poll_count in range(1, waiter_config.get("MaxAttempts") + 1):
+        response = cfn_client.describe_stacks(StackName=cfn_stack_name)
+        status = response.get("Stacks")[0].get("StackStatus")
+        if status == complete_status:
+            return status, poll_count
+        if not status.endswith("_IN_PROGRESS"):
+            raise botocore.exceptions.WaiterError(
+                name=f"Stack{cfn_change_set_type.capitalize()}Complete",
+                reason=f"Stack in {status} status",
+                last_response=response,
+            )
+        if poll_count < waiter_config.get("MaxAttempts"):
+            time.sleep(waiter_config.get("Delay"))
+    raise botocore.exceptions.WaiterError(
+        name=f"Stack{cfn_change_set_type.capitalize()}Complete",
+        reason="Max attempts exceeded",
+        last_response=response,
+    )
+
+
+def build_template_params(cfn_template_dict: dict, cfn_template_key: str = "", cfn_template_uploader=None):
+    """Builds the template parameters of a create change set request.
 
-        # Execute the change set.
-        cfn_client.execute_change_set(
-            ChangeSetName=import_change_set_arn,
-            StackName=cfn_stack_name,
+    Args:
+        cfn_template_dict: The CFN template dict.
+        cfn_template_key: The key to upload the template under, without extension.
+        cfn_template_uploader: Uploader for templates above the TemplateBody limit. Defaults to the uploader
+            configured for the function.
+
+    Returns:
+      A dict with either the TemplateBody or the TemplateURL parameter.
+
+    Raises:
+      TemplateTooLarge: The template is above the TemplateBody limit and no uploader is configured.
+    """
+    cfn_template_body = serialize_cfn_template(cfn_template_dict)
+    cfn_template_size = len(cfn_template_body.encode("utf-8"))
+    LOG.info(f"Change set template size: {cfn_template_size} bytes")
+    if cfn_template_size <= CFN_TEMPLATE_BODY_MAX_BYTES:
+        return {"TemplateBody": cfn_template_body}
+
+    if cfn_template_uploader is None:
+        cfn_template_uploader = get_default_template_uploader()
+    if cfn_template_uploader is None:
+        raise TemplateTooLarge(
+            f"Template is {cfn_template_size} bytes, above the {CFN_TEMPLATE_BODY_MAX_BYTES} bytes TemplateBody "
+            f"limit, and no template bucket is configured."
         )
 
-        # Wait for the stack to be in the IMPORT_COMPLETE / UPDATE_COMPLETE state.
-        LOG.info(f"Change set execution successful. Waiting for stack in the UPDATE / IMPORT COMPLETE state.")
-        waiter = cfn_client.get_waiter(change_set_type_waiter_dict.get(cfn_change_set_type))
-        waiter.wait(StackName=cfn_stack_name, WaiterConfig={"Delay": 6, "MaxAttempts": 30})  # 3 minute wait.
-    except botocore.exceptions.ClientError as error:
-        raise error
-    except Exception as error:
-        raise error
+    # The digest keeps the template of a retried change set from overwriting the one being read.
+    digest = hashlib.sha256(cfn_template_body.encode("utf-8")).hexdigest()[:16]
+    cfn_template_url = cfn_template_uploader.upload(f"{cfn_template_key}-{digest}.json", cfn_template_body)
+    return {"TemplateURL": cfn_template_url}
+
+
+def deploy_sibling_stack(
+    cfn_client: object, cfn_stack_name: str, cfn_change_set_name: str, cfn_resources: dict, target_table_name: str = ""
+):
+    """Creates or updates a sibling stack of the restored table stack.
+
+    The sibling stacks hold resources that don't need to share the update lock of the imported table,
+    e.g. the scaling targets, the scaling policies and the event source mappings. The stack is created
+    on the first deployment and updated on the next ones.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the sibling stack.
+        cfn_change_set_name: The name of the change set.
+        cfn_resources: The CFN resources of the stack, by logical id.
+        target_table_name: The restored table name, annotated on the subsegments.
+
+    Returns:
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    cfn_template_dict = create_basic_cfn_yaml(cfn_template_description=f"{cfn_stack_name} Cloudformation deployment")
+    cfn_template_dict.get("Resources").update(cfn_resources)
+    if does_cfn_stack_exist(cfn_client=cfn_client, cfn_stack_name=cfn_stack_name):
+        cfn_change_set_type = CFN_UPDATE_CHANGE_SET_TYPE
+    else:
+        cfn_change_set_type = CFN_CREATE_CHANGE_SET_TYPE
+    create_and_execute_change_set(
+        cfn_client=cfn_client,
+        cfn_stack_name=cfn_stack_name,
+        cfn_change_set_name=cfn_change_set_name,
+        cfn_template_dict=cfn_template_dict,
+        cfn_change_set_type=cfn_change_set_type,
+        target_table_name=target_table_name,
+    )
+
+
+@contextlib.contextmanager
+def sibling_stack_deployment(cfn_client: object, target_table_name: str = "", sequential: bool = False):
+    """Deploys the sibling stacks submitted in the with block in the background, alongside the block.
+
+    The with block gets a submit(cfn_stack_name, cfn_change_set_name, cfn_resources) callable that starts the
+    deployment of a sibling stack right away. On exit, every stack is waited for before surfacing the first
+    error, so that no change set is left half way through when the event is sent back to the queue. An error
+    of the with block itself is raised after the stacks settled.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        target_table_name: The restored table name, annotated on the subsegments.
+        sequential: Whether submit deploys the stack before returning, e.g. for the offline plan, whose change
+            sets are then created in a deterministic order.
+
+    Returns:
+
+    Raises:
+      ClientError: Boto3 error raised by the first sibling stack that failed.
+    """
+    futures = []
+    with ThreadPoolExecutor(max_workers=SIBLING_STACK_WORKERS) as executor:
+
+        def submit(cfn_stack_name: str, cfn_change_set_name: str, cfn_resources: dict):
+            LOG.info(f"Deploying the sibling stack {cfn_stack_name}")
+            deploy_args = {
+                "cfn_client": cfn_client,
+                "cfn_stack_name": cfn_stack_name,
+                "cfn_change_set_name": cfn_change_set_name,
+                "cfn_resources": cfn_resources,
+                "target_table_name": target_table_name,
+            }
+            if not sequential:
+                futures.append(executor.submit(deploy_sibling_stack, **deploy_args))
+                return
+            future = Future()
+            try:
+                future.set_result(deploy_sibling_stack(**deploy_args))
+            except Exception as error:
+                future.set_exception(error)
+            futures.append(future)
+
+        yield submit
+    for future in futures:
+        future.result()
+
+
+class TemplateTooLarge(Exception):
+    pass
@@ -0,0 +1,500 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Bulk replay of the restore events of the secondary DLQ to the main queue.
+#
+# Usage:
+#   python -m table_sync.dlq_replay --dry-run
+#   python -m table_sync.dlq_replay --target-table 'Orders-*' --error-class TableNotActive --sqlite sync-ledger.db
+#   python -m table_sync.dlq_replay --max-age 86400 --rate 5 --readers 8 --format json
+#
+# After an outage the restore events that failed every retry pile up in the secondary DLQ. The replay reads the
+# DLQ with parallel long polling readers and replays it batch by batch: each message is decoded with the AWSEvent
+# model and the messages are selected by target table, error class of their last sync in the ledger, or age of the
+# restore. The selected messages are sent to the main queue at a controlled rate, once per CloudTrail event id, and
+# deleted from the DLQ. The other messages are made visible again in the DLQ at the end.
+import argparse
+import fnmatch
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional
+from aws_lambda_powertools import Logger
+from table_sync.client_factory import get_client
+from table_sync.event_decoder import DLQ_REPLAY_MESSAGE_ATTRIBUTE, FIRST_RECEIVE_MESSAGE_ATTRIBUTE, decode_event
+from table_sync.helpers import RateLimiter
+from table_sync.sync_ledger import DynamoDBSyncLedger, SQLiteSyncLedger
+from table_sync.sync_metrics import SUCCESS_OUTCOME
+from table_sync.config import LOG_LEVEL, MAIN_QUEUE_NAME, SECONDARY_DLQ_NAME
+
+LOG: Logger = Logger(service=__name__)
+LOG.setLevel(LOG_LEVEL)
+REPLAYED = "Replayed"
+DUPLICATE = "Duplicate"
+FILTERED = "Filtered"
+UNDECODABLE = "Undecodable"
+FAILED = "Failed"
+REPLAY_STATUSES = (REPLAYED, DUPLICATE, FILTERED, UNDECODABLE, FAILED)
+# SQS returns at most 10 messages per receive and takes at most 10 entries per batch.
+RECEIVE_BATCH_SIZE = 10
+# The readers long poll the DLQ, and stop after a few empty receives in a row.
+RECEIVE_WAIT_TIME_SECONDS = 5
+EMPTY_RECEIVES_TO_STOP = 2
+# The received messages stay hidden from the other readers until the replay is over.
+DEFAULT_VISIBILITY_TIMEOUT_SECONDS = 900
+
+
+@dataclass(frozen=True)
+class ReplayFilter:
+    """Selects the DLQ messages to replay. A criterion left to None selects every message.
+
+    The error classes are the ones of the last failed sync of the restore event in the ledger. The ages are in
+    seconds since the restore event, or since the message was first sent if the event has no time.
+    """
+
+    __slots__ = ("target_table_pattern", "error_classes", "min_age_s", "max_age_s")
+    target_table_pattern: Optional[str]
+    error_classes: Optional[frozenset]
+    min_age_s: Optional[float]
+    max_age_s: Optional[float]
+
+    def rejects(self, restore_request, error_class: str = None, now_ms: int = None):
+        """Returns the reason the restore request of a message isn't replayed, None if it is selected."""
+        if self.target_table_pattern is not None and not fnmatch.fnmatchcase(
+            restore_request.target_table_name, self.target_table_pattern
+        ):
+            return f"Target table doesn't match {self.target_table_pattern}"
+        if self.error_classes is not None and error_class not in self.error_classes:
+            return f"Error class {error_class} not selected"
+        if self.min_age_s is not None or self.max_age_s is not None:
+            if restore_request.event_time is not None:
+                event_time_ms = restore_request.event_time.timestamp() * 1000
+            elif restore_request.sent_timestamp is not None:
+                event_time_ms = restore_request.sent_timestamp
+            else:
+                return "No event time"
+            age_s = (now_ms - event_time_ms) / 1000
+            if self.min_age_s is not None and age_s < self.min_age_s:
+                return f"Restored {age_s:.0f}s ago, less than {self.min_age_s:.0f}s"
+            if self.max_age_s is not None and age_s > self.max_age_s:
+                return f"Restored {age_s:.0f}s ago, more than {self.max_age_s:.0f}s"
+        return None
+
+
+@dataclass(frozen=True)
+class ReplayResult:
+    """The outcome of the replay of a DLQ message."""
+
+    __slots__ = ("message_id", "event_id", "target_table_name", "status", "reason")
+    message_id: str
+    event_id: Optional[str]
+    target_table_name: Optional[str]
+    status: str
+    reason: str
+
+
+def to_lambda_record(message: dict, queue_arn: str = ""):
+    """Converts a message of the receive_message response to a record of the SQS event of a Lambda function.
+
+    Args:
+        message: A Messages item of the receive_message response.
+        queue_arn: The ARN of the queue the message was received from.
+
+    Returns:
+      A dict with the SQS record.
+
+    Raises:
+    """
+    return {
+        "messageId": message.get("MessageId"),
+        "receiptHandle": message.get("ReceiptHandle"),
+        "body": message.get("Body"),
+        "attributes": message.get("Attributes") or {},
+        "messageAttributes": {
+            name: {
+                "stringValue": attribute.get("StringValue"),
+                "stringListValues": [],
+                "binaryListValues": [],
+                "dataType": attribute.get("DataType"),
+            }
+            for name, attribute in (message.get("MessageAttributes") or {}).items()
+        },
+        "md5OfBody": message.get("MD5OfBody"),
+        "eventSource": "aws:sqs",
+        "eventSourceARN": queue_arn,
+        "awsRegion": queue_arn.split(":")[3] if queue_arn.count(":") >= 3 else "",
+    }
+
+
+def receive_messages(
+    sqs_client: object,
+    queue_url: str,
+    handle_batch,
+    readers: int = 4,
+    max_messages: int = None,
+    **receive_args,
+):
+    """Receives the messages of a queue with parallel long polling readers, handing each batch over as it arrives.
+
+    A reader stops after EMPTY_RECEIVES_TO_STOP empty receives in a row. Before each receive, a reader reserves
+    its share of max_messages and gives back what it didn't receive, so no message is received beyond the cap. The
+    received messages are hidden from the other readers for the visibility timeout, so each message is received
+    once.
+
+    Args:
+        sqs_client: Authenticated SQS boto3 client.
+        queue_url: The URL of the queue.
+        handle_batch: Called by the reader with the list of the messages of each receive.
+        readers: The number of parallel readers.
+        max_messages: The number of messages to receive at most. Defaults to every message.
+        receive_args: The other receive_message arguments, e.g. the VisibilityTimeout.
+
+    Returns:
+      The number of received messages.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    lock = threading.Lock()
+    counts = {"received": 0, "reserved": 0}
+
+    def read():
+        empty_receives = 0
+        while empty_receives < EMPTY_RECEIVES_TO_STOP:
+            with lock:
+                if max_messages is None:
+                    reserved = RECEIVE_BATCH_SIZE
+                else:
+                    reserved = min(RECEIVE_BATCH_SIZE, max_messages - counts["received"] - counts["reserved"])
+                if reserved <= 0:
+                    return
+                counts["reserved"] += reserved
+            batch = []
+            try:
+                response = sqs_client.receive_message(
+                    QueueUrl=queue_url,
+                    MaxNumberOfMessages=reserved,
+                    WaitTimeSeconds=RECEIVE_WAIT_TIME_SECONDS,
+                    AttributeNames=["All"],
+                    MessageAttributeNames=["All"],
+                    **receive_args,
+                )
+                batch = response.get("Messages") or []
+            finally:
+                with lock:
+                    counts["reserved"] -= reserved
+                    counts["received"] += len(batch)
+            empty_receives = 0 if batch else empty_receives + 1
+            if batch:
+                handle_batch(batch)
+
+    with ThreadPoolExecutor(max_workers=readers) as executor:
+        futures = [executor.submit(read) for _ in range(readers)]
+    for future in futures:
+        future.result()
+    return counts["received"]
+
+
+def get_failed_error_classes(ledger):
+    """Returns the error class of the last sync of each restore event in the ledger, by event id.
+
+    The restore events whose last sync succeeded, e.g. on a later retry, are left out.
+    """
+    error_classes = {}
+    for record in sorted(ledger.query(), key=lambda record: record.finished_ms):
+        if record.event_id is None:
+            continue
+        if record.status == SUCCESS_OUTCOME:
+            error_classes.pop(record.event_id, None)
+        else:
+            error_classes[record.event_id] = record.error_class
+    return error_classes
+
+
+def build_replay_attributes(message: dict, replay_attempt: int):
+    """Builds the message attributes of a replayed message, with its replay attempt number.
+
+    The replayed message is a new message, so the first receive of the original one is carried as an attribute,
+    for the timeline of the sync in the ledger.
+    """
+    attributes = {}
+    for name, attribute in (message.get("MessageAttributes") or {}).items():
+        value_key = "BinaryValue" if attribute.get("DataType", "").startswith("Binary") else "StringValue"
+        attributes[name] = {"DataType": attribute.get("DataType"), value_key: attribute.get(value_key)}
+    attributes[DLQ_REPLAY_MESSAGE_ATTRIBUTE] = {"DataType": "Number", "StringValue": str(replay_attempt)}
+    first_receive_timestamp = (message.get("Attributes") or {}).get("ApproximateFirstReceiveTimestamp")
+    if FIRST_RECEIVE_MESSAGE_ATTRIBUTE not in attributes and first_receive_timestamp:
+        attributes[FIRST_RECEIVE_MESSAGE_ATTRIBUTE] = {"DataType": "Number", "StringValue": first_receive_timestamp}
+    return attributes
+
+
+def replay_dlq(
+    replay_filter: ReplayFilter,
+    error_classes: dict = None,
+    source_queue_name: str = SECONDARY_DLQ_NAME,
+    target_queue_name: str = MAIN_QUEUE_NAME,
+    readers: int = 4,
+    senders: int = 4,
+    rate_per_second: float = None,
+    max_messages: int = None,
+    visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT_SECONDS,
+    dry_run: bool = False,
+    now_ms: int = None,
+):
+    """Replays the selected restore events of the DLQ to the main queue.
+
+    Each batch received from the DLQ is replayed while the readers go on, so the DLQ is never held in memory. A
+    restore event is sent once, with the replay attempt number following the one of the DLQ message, and its
+    duplicates, e.g. the copies of an event delivered twice by EventBridge, are deleted once it was sent, whichever
+    batch they arrive in. The messages that aren't replayed are made visible again at the end.
+
+    Args:
+        replay_filter: Selects the messages to replay.
+        error_classes: The error class of the last failed sync of the restore events, by event id. Required by an
+            error class filter.
+        source_queue_name: The name of the DLQ.
+        target_queue_name: The name of the queue the messages are replayed to.
+        readers: The number of parallel DLQ readers.
+        senders: The number of parallel senders.
+        rate_per_second: The rate of the messages sent, shared by the senders. Defaults to no limit.
+        max_messages: The number of DLQ messages to read at most. Defaults to every message.
+        visibility_timeout: The seconds the read messages are hidden for. Longer than the replay.
+        dry_run: Whether the selected messages are only reported.
+        now_ms: The time the ages are computed at, in milliseconds since the epoch. Defaults to the current time.
+
+    Returns:
+      A list of ReplayResult, one per DLQ message, in the order their batches were replayed.
+
+    Raises:
+      ClientError: Boto3 error raised while reading the DLQ.
+    """
+    if error_classes is None:
+        error_classes = {}
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    sqs_client = get_client("sqs")
+    source_queue_url = sqs_client.get_queue_url(QueueName=source_queue_name).get("QueueUrl")
+    target_queue_url = sqs_client.get_queue_url(QueueName=target_queue_name).get("QueueUrl")
+    source_queue_arn = (
+        sqs_client.get_queue_attributes(QueueUrl=source_queue_url, AttributeNames=["QueueArn"])
+        .get("Attributes", {})
+        .get("QueueArn", "")
+    )
+    rate_limiter = RateLimiter(rate_per_second=rate_per_second)
+    lock = threading.Lock()
+    results = []
+    kept_receipt_handles = []
+    # The first message of each selected restore event, with the future of its send, by event id.
+    first_messages = {}
+
+    def send(restore_request, message: dict):
+        if dry_run:
+            return
+        rate_limiter.acquire()
+        sqs_client.send_message(
+            QueueUrl=target_queue_url,
+            MessageBody=message.get("Body"),
+            MessageAttributes=build_replay_attributes(message, int(restore_request.replay_attempt or 0) + 1),
+        )
+
+    def replay(restore_request, message: dict, first_message_id: str, sent):
+        message_id = message.get("MessageId")
+        try:
+            sent.result()
+        except Exception as error:
+            if first_message_id != message_id:
+                reason = f"Replay of {first_message_id} failed"
+            else:
+                LOG.error(f"Unable to replay {message_id}: {error}")
+                reason = f"{type(error).__name__}: {error}"
+            return ReplayResult(message_id, restore_request.event_id, restore_request.target_table_name, FAILED, reason)
+        status = REPLAYED if first_message_id == message_id else DUPLICATE
+        reason = "" if status == REPLAYED else f"Replayed with {first_message_id}"
+        if dry_run:
+            return ReplayResult(message_id, restore_request.event_id, restore_request.target_table_name, status, reason)
+        # The copies of a restore event are deleted only once it was sent.
+        try:
+            sqs_client.delete_message(QueueUrl=source_queue_url, ReceiptHandle=message.get("ReceiptHandle"))
+        except Exception as error:
+            LOG.error(f"Unable to delete {message_id}: {error}")
+            return ReplayResult(
+                message_id,
+                restore_request.event_id,
+                restore_request.target_table_name,
+                FAILED,
+                f"{type(error).__name__}: {error}",
+            )
+        return ReplayResult(message_id, restore_request.event_id, restore_request.target_table_name, status, reason)
+
+    def replay_batch(messages: list):
+        # Decode and select the messages, sending the first copy of each restore event right away.
+        batch_results = {}
+        pending = []
+        for message in messages:
+            message_id = message.get("MessageId")
+            try:
+                record = to_lambda_record(message, source_queue_arn)
+                (restore_request,) = decode_event({"Records": [record]}, validate=True)
+            except Exception as error:
+                batch_results[message_id] = ReplayResult(message_id, None, None, UNDECODABLE, f"{type(error).__name__}")
+                continue
+            reason = replay_filter.rejects(restore_request, error_classes.get(restore_request.event_id), now_ms)
+            if reason is not None:
+                batch_results[message_id] = ReplayResult(
+                    message_id, restore_request.event_id, restore_request.target_table_name, FILTERED, reason
+                )
+                continue
+            group_key = restore_request.event_id or message_id
+            with lock:
+                if group_key not in first_messages:
+                    first_messages[group_key] = (message_id, sender_executor.submit(send, restore_request, message))
+                first_message_id, sent = first_messages[group_key]
+            pending.append((restore_request, message, first_message_id, sent))
+        for restore_request, message, first_message_id, sent in pending:
+            result = replay(restore_request, message, first_message_id, sent)
+            batch_results[result.message_id] = result
+
+        with lock:
+            results.extend(batch_results[message.get("MessageId")] for message in messages)
+            # Only the receipt handles of the messages that stay in the DLQ are kept. They stay hidden until the
+            # end of the replay, so that the readers don't receive them again.
+            kept_receipt_handles.extend(
+                message.get("ReceiptHandle")
+                for message in messages
+                if dry_run or batch_results[message.get("MessageId")].status not in (REPLAYED, DUPLICATE)
+            )
+
+    with ThreadPoolExecutor(max_workers=senders) as sender_executor:
+        received = receive_messages(
+            sqs_client,
+            source_queue_url,
+            replay_batch,
+            readers=readers,
+            max_messages=max_messages,
+            VisibilityTimeout=visibility_timeout,
+        )
+
+    # Give back the messages that stay in the DLQ, e.g. the filtered ones, rather than hiding them until the
+    # visibility timeout.
+    for start in range(0, len(kept_receipt_handles), RECEIVE_BATCH_SIZE):
+        sqs_client.change_message_visibility_batch(
+            QueueUrl=source_queue_url,
+            Entries=[
+                {"Id": str(index), "ReceiptHandle": receipt_handle, "VisibilityTimeout": 0}
+                for index, receipt_handle in enumerate(kept_receipt_handles[start : start + RECEIVE_BATCH_SIZE])
+            ],
+        )
+    LOG.info(
+        f"Replayed {sum(result.status == REPLAYED for result in results)} restore events of {received} messages "
+        f"from {source_queue_name} to {target_queue_name}"
+    )
+    return results
+
+
+def format_replay_report(results: list, dry_run: bool = False):
+    """Formats the results of the replay as text, with a line per message that wasn't filtered and the totals."""
+    lines = [
+        f"{result.status:<11} {result.message_id} {result.target_table_name or '-'}: {result.reason or result.event_id}"
+        for result in results
+        if result.status != FILTERED
+    ]
+    counts = {status: sum(result.status == status for result in results) for status in REPLAY_STATUSES}
+    lines.append(
+        f"{'Would replay' if dry_run else 'Replayed'} {counts[REPLAYED]} of {len(results)} messages: "
+        + ", ".join(f"{counts[status]} {status.lower()}" for status in REPLAY_STATUSES[1:])
+    )
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """Replays the restore events of the secondary DLQ to the main queue.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv.
+
+    Returns:
+      The exit code, 1 if a message failed to be replayed.
+
+    Raises:
+    """
+    parser = argparse.ArgumentParser(description="Replays the restore events of the DLQ to the main queue.")
+    parser.add_argument("--source-queue", default=SECONDARY_DLQ_NAME, help="Name of the DLQ to replay.")
+    parser.add_argument("--target-queue", default=MAIN_QUEUE_NAME, help="Name of the queue to replay to.")
+    parser.add_argument("--target-table", help="Glob pattern of the restored table names, e.g. 'Orders-*'.")
+    parser.add_argument(
+        "--error-class", action="append", help="Error class of the last failed sync in the ledger, e.g. TableNotActive."
+    )
+    parser.add_argument("--min-age", type=float, help="Seconds since the restore event, at least.")
+    parser.add_argument("--max-age", type=float, help="Seconds since the restore event, at most.")
+    ledger_group = parser.add_mutually_exclusive_group()
+    ledger_group.add_argument("--sqlite", help="Path of the SQLite ledger of the past syncs.")
+    ledger_group.add_argument("--dynamodb-table", help="Name of the DynamoDB ledger table of the past syncs.")
+    parser.add_argument("--readers", type=int, default=4, help="Number of parallel DLQ readers.")
+    parser.add_argument("--senders", type=int, default=4, help="Number of parallel senders.")
+    parser.add_argument("--rate", type=float, help="Messages replayed per second, across the senders.")
+    parser.add_argument("--max-messages", type=int, help="Number of DLQ messages to read at most.")
+    parser.add_argument(
+        "--visibility-timeout",
+        type=int,
+        default=DEFAULT_VISIBILITY_TIMEOUT_SECONDS,
+        help="Seconds the read messages are hidden for, longer than the replay.",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Reports the messages to replay, sending nothing.")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    error_classes = None
+    if args.error_class:
+        if args.sqlite:
+            ledger = SQLiteSyncLedger(args.sqlite)
+        elif args.dynamodb_table:
+            ledger = DynamoDBSyncLedger(dynamodb_client=get_client("dynamodb"), table_name=args.dynamodb_table)
+        else:
+            parser.error("--error-class needs the ledger, --sqlite or --dynamodb-table")
+        error_classes = get_failed_error_classes(ledger)
+    results = replay_dlq(
+        replay_filter=ReplayFilter(
+            target_table_pattern=args.target_table,
+            error_classes=frozenset(args.error_class) if args.error_class else None,
+            min_age_s=args.min_age,
+            max_age_s=args.max_age,
+        ),
+        error_classes=error_classes,
+        source_queue_name=args.source_queue,
+        target_queue_name=args.target_queue,
+        readers=args.readers,
+        senders=args.senders,
+        rate_per_second=args.rate,
+        max_messages=args.max_messages,
+        visibility_timeout=args.visibility_timeout,
+        dry_run=args.dry_run,
+    )
+    if args.format == "json":
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(format_replay_report(results, dry_run=args.dry_run))
+    return 1 if any(result.status == FAILED for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Drift repair of the restored table stacks.
+#
+# A setting changed outside CloudFormation, e.g. a TTL turned off or a scalable target deregistered by hand, makes
+# the next change set fail or silently keeps the drift: CFN only deploys the differences between two templates.
+# The drift detection of the stack tells the resources that were modified or deleted. They are repaired towards the
+# template built from the desired TableConfig, with a single change set in the REVERT_DRIFT deployment mode: CFN
+# gives back their template values to the modified resources and re-creates the deleted ones, while deploying the
+# differences of the desired template. The repair runs from the reconciler only, the integration in the sync of a
+# restore (sync_restored_table) is out of scope: a stack deployed by the sync has had no time to drift.
+import copy
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Tuple
+import botocore.exceptions
+from aws_lambda_powertools import Logger
+from table_sync.client_factory import get_client
+from table_sync.cfn_yaml_template import RESTORED_TABLE_LOGICAL_ID
+from table_sync.deploy_cfn_resources import create_and_execute_change_set
+from table_sync.config import (
+    LOG_LEVEL,
+    CFN_UPDATE_CHANGE_SET_TYPE,
+    CFN_REVERT_DRIFT_DEPLOYMENT_MODE,
+)
+
+LOG: Logger = Logger(service=__name__)
+LOG.setLevel(LOG_LEVEL)
+DRIFT_DETECTION_WAITER_CONFIG = {"Delay": 5, "MaxAttempts": 36}  # 3 minute wait.
+DRIFTED_STATUSES = ("MODIFIED", "DELETED")
+# The provisioned capacity moves with the auto scaling, it isn't a drift to repair. It is kept at its live value.
+IGNORED_DRIFT_PATHS = {
+    "AWS::DynamoDB::Table": re.compile(r"/(GlobalSecondaryIndexes/\d+/)?ProvisionedThroughput(/.*)?"),
+}
+
+
+@dataclass(frozen=True)
+class ResourceDrift:
+    """A resource of a stack that drifted from the deployed template.
+
+    The drifted paths are the properties to revert, the kept paths the ignored ones, kept at their live value.
+    """
+
+    __slots__ = (
+        "logical_id",
+        "resource_type",
+        "physical_id",
+        "status",
+        "expected_properties",
+        "actual_properties",
+        "paths",
+        "kept_paths",
+    )
+    logical_id: str
+    resource_type: str
+    physical_id: str
+    status: str
+    expected_properties: dict
+    actual_properties: dict
+    paths: Tuple[str, ...]
+    kept_paths: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class DriftRepairPlan:
+    """The repair of the drifted resources of a stack, deployed with the template of the desired TableConfig.
+
+    The reverted resources get back their desired properties and the re-created ones are deployed again. The
+    drifted resources that the desired template doesn't have anymore are removed from the stack.
+    """
+
+    __slots__ = ("stack_name", "reverts", "recreates", "removes", "cfn_template_dict")
+    stack_name: str
+    reverts: Tuple[ResourceDrift, ...]
+    recreates: Tuple[str, ...]
+    removes: Tuple[str, ...]
+    cfn_template_dict: dict
+
+    def describe(self):
+        """Returns a line per repaired resource."""
+        lines = [f"Revert {drift.logical_id}: {', '.join(drift.paths)}" for drift in self.reverts]
+        lines.extend(f"Re-create {logical_id}" for logical_id in self.recreates)
+        lines.extend(f"Remove {logical_id}" for logical_id in self.removes)
+        return tuple(lines)
+
+
+def detect_stack_drift(cfn_client: object, cfn_stack_name: str, waiter_config: dict = None):
+    """Detects the drift of a stack and lists its modified and deleted resources.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+        waiter_config: A dict with the Delay in seconds and the MaxAttempts. Defaults to a 3 minute wait.
+
+    Returns:
+      A list of ResourceDrift. A resource modified only on the ignored properties has no drifted paths.
+
+    Raises:
+      ClientError: Boto3 error
+      WaiterError: The drift detection failed or didn't complete in time.
+    """
+    if waiter_config is None:
+        waiter_config = DRIFT_DETECTION_WAITER_CONFIG
+    detection_id = cfn_client.detect_stack_drift(StackName=cfn_stack_name).get("StackDriftDetectionId")
+    response = {}
+    for poll_count in range(1, waiter_config.get("MaxAttempts") + 1):
+        response = cfn_client.describe_stack_drift_detection_status(StackDriftDetectionId=detection_id)
+        status = response.get("DetectionStatus")
+        if status == "DETECTION_COMPLETE":
+            break
+        if status != "DETECTION_IN_PROGRESS":
+            raise botocore.exceptions.WaiterError(
+                name="StackDriftDetectionComplete",
+                reason=f"Drift detection in {status} status: {response.get('DetectionStatusReason')}",
+                last_response=response,
+            )
+        if poll_count < waiter_config.get("MaxAttempts"):
+            time.sleep(waiter_config.get("Delay"))
+    else:
+        raise botocore.exceptions.WaiterError(
+            name="StackDriftDetectionComplete", reason="Max attempts exceeded", last_response=response
+        )
+    LOG.info(f"Drift status of {cfn_stack_name}: {response.get('StackDriftStatus')}")
+
+    # botocore has no paginator for describe_stack_resource_drifts.
+    resource_drifts = []
+    params = {"StackName": cfn_stack_name, "StackResourceDriftStatusFilters": list(DRIFTED_STATUSES)}
+    while True:
+        response = cfn_client.describe_stack_resource_drifts(**params)
+        resource_drifts.extend(response.get("StackResourceDrifts", []))
+        if not response.get("NextToken"):
+            break
+        params["NextToken"] = response.get("NextToken")
+    return [
+        ResourceDrift(
+            logical_id=resource_drift.get("LogicalResourceId"),
+            resource_type=resource_drift.get("ResourceType"),
+            physical_id=resource_drift.get("PhysicalResourceId"),
+            status=resource_drift.get("StackResourceDriftStatus"),
+            expected_properties=json.loads(resource_drift.get("ExpectedProperties") or "{}"),
+            actual_properties=json.loads(resource_drift.get("ActualProperties") or "{}"),
+            paths=drifted_paths(resource_drift),
+            kept_paths=drifted_paths(resource_drift, ignored=True),
+        )
+        for resource_drift in resource_drifts
+    ]
+
+
+def drifted_paths(resource_drift: dict, ignored: bool = False):
+    """Lists the drifted properties of a resource.
+
+    Args:
+        resource_drift: A StackResourceDrifts item of the describe_stack_resource_drifts response.
+        ignored: Whether the ignored properties whose live value differs are listed, rather than the other ones.
+
+    Returns:
+      A tuple of the JSON pointers of the properties, e.g. /TimeToLiveSpecification/Enabled.
+
+    Raises:
+    """
+    ignored_paths = IGNORED_DRIFT_PATHS.get(resource_drift.get("ResourceType"))
+    paths = []
+    for difference in resource_drift.get("PropertyDifferences") or []:
+        path = difference.get("PropertyPath")
+        is_ignored = ignored_paths is not None and ignored_paths.fullmatch(path) is not None
+        if not ignored and not is_ignored:
+            paths.append(path)
+        elif ignored and is_ignored and difference.get("DifferenceType") == "NOT_EQUAL":
+            paths.append(path)
+    return tuple(paths)
+
+
+def resolve_pointer(document, pointer: str):
+    """Returns the value at a JSON pointer, e.g. /TimeToLiveSpecification/Enabled."""
+    value = document
+    for token in pointer.split("/")[1:]:
+        token = token.replace("~1", "/").replace("~0", "~")
+        value = value[int(token)] if isinstance(value, list) else value[token]
+    return value
+
+
+def find_live_identifier(drift: ResourceDrift):
+    """Finds the live resource that took the place of a deleted resource, e.g. a trigger re-created by hand.
+
+    Args:
+        drift: The drift of the deleted resource.
+
+    Returns:
+      The ResourceIdentifier of the live resource, None if there is none.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    properties = drift.expected_properties
+    if drift.resource_type == "AWS::Lambda::EventSourceMapping":
+        response = get_client("lambda").list_event_source_mappings(
+            EventSourceArn=properties.get("EventSourceArn"), FunctionName=properties.get("FunctionName")
+        )
+        mappings = response.get("EventSourceMappings") or []
+        return {"Id": mappings[0].get("UUID")} if mappings else None
+    if drift.resource_type == "AWS::ApplicationAutoScaling::ScalableTarget":
+        response = get_client("application-autoscaling").describe_scalable_targets(
+            ServiceNamespace=properties.get("ServiceNamespace"),
+            ResourceIds=[properties.get("ResourceId")],
+            ScalableDimension=properties.get("ScalableDimension"),
+        )
+        if not response.get("ScalableTargets"):
+            return None
+        return {key: properties.get(key) for key in ("ResourceId", "ScalableDimension", "ServiceNamespace")}
+    return None
+
+
+def keep_live_values(cfn_template_dict: dict, drifts: list):
+    """Returns a copy of a CFN template with the live values of the ignored properties of the drifted resources.
+
+    A change set in the REVERT_DRIFT deployment mode reverts every property to its template value, the
+    provisioned capacity of an auto scaled table included.
+
+    Args:
+        cfn_template_dict: The CFN template dict.
+        drifts: The ResourceDrift items of the stack.
+
+    Returns:
+      The CFN template dict. The properties that the template doesn't have are left out.
+
+    Raises:
+    """
+    cfn_template_dict = copy.deepcopy(cfn_template_dict)
+    resources = cfn_template_dict.get("Resources", {})
+    for drift in drifts:
+        properties = (resources.get(drift.logical_id) or {}).get("Properties")
+        for path in drift.kept_paths:
+            parent_pointer, _, token = path.rpartition("/")
+            try:
+                parent = resolve_pointer(properties, parent_pointer)
+                value = resolve_pointer(drift.actual_properties, path)
+                if isinstance(parent, list):
+                    parent[int(token)] = value
+                elif token in parent:
+                    parent[token] = value
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+    return cfn_template_dict
+
+
+def plan_drift_repair(cfn_stack_name: str, drifts: list, desired_template: dict):
+    """Plans the repair of the drifted resources of a stack towards its desired template.
+
+    Args:
+        cfn_stack_name: The name of the CloudFormation stack.
+        drifts: The ResourceDrift items of the stack.
+        desired_template: The template built from the desired TableConfig.
+
+    Returns:
+      A DriftRepairPlan.
+
+    Raises:
+      ClientError: Boto3 error
+      DriftNotRepairable: The restored table itself was deleted, or a live resource took the place of a deleted
+        one, e.g. a trigger re-created by hand. The change set would fail to re-create it.
+    """
+    desired_resources = desired_template.get("Resources", {})
+    reverts = []
+    recreates = []
+    removes = []
+    for drift in drifts:
+        if drift.logical_id not in desired_resources:
+            removes.append(drift.logical_id)
+        elif drift.status == "MODIFIED":
+            if drift.paths:
+                reverts.append(drift)
+        elif drift.logical_id == RESTORED_TABLE_LOGICAL_ID:
+            raise DriftNotRepairable(f"The restored table of {cfn_stack_name} was deleted")
+        else:
+            identifier = find_live_identifier(drift)
+            if identifier is not None:
+                raise DriftNotRepairable(
+                    f"{drift.logical_id} of {cfn_stack_name} was deleted and {identifier} took its place, "
+                    f"delete it to re-create {drift.logical_id}"
+                )
+            recreates.append(drift.logical_id)
+    return DriftRepairPlan(
+        stack_name=cfn_stack_name,
+        reverts=tuple(reverts),
+        recreates=tuple(recreates),
+        removes=tuple(removes),
+        cfn_template_dict=keep_live_values(desired_template, drifts),
+    )
+
+
+def repair_stack_drift(
+    cfn_client: object,
+    cfn_stack_name: str,
+    desired_template: dict,
+    target_table_name: str = "",
+    rate_limiter=None,
+    dry_run: bool = False,
+):
+    """Repairs the drift of a stack, so that its resources match the desired template.
+
+    The repair is a single UPDATE change set of the desired template in the REVERT_DRIFT deployment mode. It
+    also deploys the differences between the desired template and the deployed one. A stack without drift to
+    repair gets no change set.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+        desired_template: The template built from the desired TableConfig.
+        target_table_name: The restored table name, annotated on the subsegments.
+        rate_limiter: Spaces out the change sets. Defaults to no limit.
+        dry_run: Whether the repair is only planned.
+
+    Returns:
+      A tuple of a line per repaired resource, empty when there was nothing to repair.
+
+    Raises:
+      ClientError: Boto3 error
+      WaiterError: The drift detection or the change set failed.
+      DriftNotRepairable: The restored table itself was deleted, or a live resource took the place of a deleted one.
+    """
+    plan = plan_drift_repair(cfn_stack_name, detect_stack_drift(cfn_client, cfn_stack_name), desired_template)
+    repairs = plan.describe()
+    if dry_run or not repairs:
+        return repairs
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    LOG.info(f"Repairing the drift of {cfn_stack_name}: {repairs}")
+    create_and_execute_change_set(
+        cfn_client=cfn_client,
+        cfn_stack_name=cfn_stack_name,
+        cfn_change_set_name=f"Repair-DynamoDB-{target_table_name}-Change-Set",
+        cfn_template_dict=plan.cfn_template_dict,
+        cfn_change_set_type=CFN_UPDATE_CHANGE_SET_TYPE,
+        target_table_name=target_table_name,
+        cfn_deployment_mode=CFN_REVERT_DRIFT_DEPLOYMENT_MODE,
+    )
+    return repairs
+
+
+class DriftNotRepairable(Exception):
+    pass
@@ -20,12 +20,18 @@
 
 from aws_lambda_powertools import Logger
 from table_sync.cfn_yaml_template import create_basic_event_source_mapping_cfn
+from table_sync.cfn_projection import EVENT_SOURCE_MAPPING_TYPE, project_cfn_properties
+from table_sync.table_config import CfnResource, StreamSpecification
+from table_sync.payload_logging import bounded
 
 LOG: Logger = Logger(service=__name__)
 
 
 def build_dynamodb_stream_triggers(
-    lambda_client: object, source_table_describe_response: dict, restored_table_cfn_logical_name: str = ""
+    lambda_client: object,
+    source_table_describe_response: dict,
+    restored_table_cfn_logical_name: str = "",
+    restored_table_stream_arn: str = "",
 ):
     """Builds CFN template for the DynamoDB table stream triggers.
 
@@ -33,47 +39,33 @@ def build_dynamodb_stream_triggers(
         lambda_client: Authenticated AWS Lambda boto3 client.
         source_table_describe_response: The DynamoDB describe_table API response for the source table.
         restored_table_cfn_logical_name: The logical name of the restored DynamoDB table in the CFN template.
+        restored_table_stream_arn: The stream ARN of the restored table. Used instead of the logical name when
+            the triggers are deployed in a stack that doesn't hold the restored table.
 
     Returns:
-      A yaml for the valid CFN template for DynamoDB stream triggers.
+      A tuple of CfnResource for the DynamoDB stream triggers, None if the source table has none.
 
     Raises:
+      RestoredTableStreamNotFound: Neither the logical name nor the stream ARN of the restored table is set.
     """
-    resources = {}
+    if not restored_table_cfn_logical_name and not restored_table_stream_arn:
+        raise RestoredTableStreamNotFound("The triggers need the logical name or the stream ARN of the restored table")
+    resources = []
     # Get the latest stream arn.
     # List the event source mappings for the source table stream using the latest stream arn.
     latest_stream_arn = source_table_describe_response.get("Table").get("LatestStreamArn", "")
     if not latest_stream_arn:
         return None
 
-    # Define all the event source mappings properties.
-    event_source_properties = [
-        "BatchSize",
-        "BisectBatchOnFunctionError",
-        "DestinationConfig",
-        "Enabled",
-        "EventSourceArn",
-        "FilterCriteria",
-        "FunctionResponseTypes",
-        "MaximumBatchingWindowInSeconds",
-        "MaximumRecordAgeInSeconds",
-        "MaximumRetryAttempts",
-        "ParallelizationFactor",
-        "Queues",
-        "SelfManagedEventSource",
-        "SourceAccessConfigurations",
-        "StartingPosition",
-        "StartingPositionTimestamp",
-        "Topics",
-        "TumblingWindowInSeconds",
-    ]
-
     # Create list of all the event source mappings for the DynamoDB stream.
     # Retrieve all the event source mappings.
     event_source_mappings: list = []
+    # The mappings are listed 100 at a time.
     if latest_stream_arn:
-        response = lambda_client.list_event_source_mappings(
-            EventSourceArn=latest_stream_arn,
+        response = (
+            lambda_client.get_paginator("list_event_source_mappings")
+            .paginate(EventSourceArn=latest_stream_arn)
+            .build_full_result()
         )
         event_source_mappings = response.get("EventSourceMappings", [])
 
@@ -81,28 +73,26 @@ def build_dynamodb_stream_triggers(
         return None
 
     # Create CFN resources for all the event source mappings.
-    LOG.info(f"Source table DynamoDB stream triggers: {event_source_mappings}")
+    LOG.info("Source table DynamoDB stream triggers: %s", bounded(event_source_mappings))
     for i, event_source in enumerate(event_source_mappings):
         # Create CFN resource for each event source.
+        # Only the CFN properties of the event source are kept, e.g. UUID or State are dropped.
         basic_cfn = create_basic_event_source_mapping_cfn()
         properties = basic_cfn.get("Properties")
-        for cfn_property in event_source_properties:
-            if event_source.get(cfn_property):
-                properties.update({cfn_property: event_source.get(cfn_property)})
+        properties.update(project_cfn_properties(EVENT_SOURCE_MAPPING_TYPE, event_source))
 
         # Replace the event source arn as it will be the target table stream.
-        properties.update(EventSourceArn={"Fn::GetAtt": [restored_table_cfn_logical_name, "StreamArn"]})
+        if restored_table_stream_arn:
+            properties.update(EventSourceArn=restored_table_stream_arn)
+        else:
+            properties.update(EventSourceArn={"Fn::GetAtt": [restored_table_cfn_logical_name, "StreamArn"]})
 
         # Add the function name.
         properties.update(FunctionName=event_source.get("FunctionArn"))
 
-        # Destination config (even if empty) is included in the boto3 response but empty values aren't allowed in CFN.
-        if not properties.get("DestinationConfig").get("OnFailure"):
-            del properties["DestinationConfig"]
-
         # Add the resource.
-        resources.update({f"EventSourceMapping{i+1}": basic_cfn})
-    return resources
+        resources.append(CfnResource.from_cfn(f"EventSourceMapping{i+1}", basic_cfn))
+    return tuple(resources)
 
 
 def build_dynamodb_stream_template(
@@ -114,7 +104,7 @@ def build_dynamodb_stream_template(
       source_table_describe_response: The DynamoDB describe_table API response for source DynamoDB table.
 
     Returns:
-      A valid dict for the CFN template YAML for the DynamoDB Table stream settings.
+      A StreamSpecification for the DynamoDB Table stream settings, None if the stream is disabled.
 
     Raises:
     """
@@ -124,13 +114,17 @@ def build_dynamodb_stream_template(
     stream_enabled: bool = False
     stream_view_type: str = ""
     stream_specification = source_table_describe_response.get("Table").get("StreamSpecification", {})
-    LOG.info(f"Source table stream settings: {stream_specification}")
+    LOG.info("Source table stream settings: %s", bounded(stream_specification))
     if stream_specification:
         stream_enabled = stream_specification.get("StreamEnabled")
         stream_view_type = stream_specification.get("StreamViewType")
 
     # If present, use the view type to enable DDB streams in CFN
     if stream_enabled and stream_view_type:
-        return {"StreamViewType": stream_view_type}
+        return StreamSpecification(stream_view_type=stream_view_type)
     else:
         return None
+
+
+class RestoredTableStreamNotFound(Exception):
+    pass
@@ -0,0 +1,244 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Decoding of the SQS records that carry the RestoreTableToPointInTime CloudTrail events.
+# The fast path only reads the fields that the table sync uses. The pydantic AWSEvent model, which validates
+# the whole CloudTrail payload, is only used with the DEBUG log level and for the records the fast path
+# can't decode.
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from aws_lambda_powertools import Logger
+from table_sync.config import LOG_LEVEL
+
+LOG: Logger = Logger(service=__name__)
+DLQ_REPLAY_MESSAGE_ATTRIBUTE = "sqs-dlq-replay-nb"
+# The first receive of the original message, carried by the messages replayed from the DLQ, which are new
+# messages with a first receive of their own.
+FIRST_RECEIVE_MESSAGE_ATTRIBUTE = "sqs-first-receive-timestamp"
+
+
+@dataclass(frozen=True)
+class RestoreRequest:
+    """The fields of a restore event that the table sync needs.
+
+    The index overrides are None when the restore request has none, and hold CFN index properties otherwise.
+    The first receive timestamp is the one of the original message, for a message replayed from the DLQ.
+    """
+
+    __slots__ = (
+        "message_id",
+        "event_id",
+        "event_time",
+        "sent_timestamp",
+        "first_receive_timestamp",
+        "receive_count",
+        "replay_attempt",
+        "source_table_name",
+        "target_table_name",
+        "global_secondary_indexes",
+        "local_secondary_indexes",
+    )
+    message_id: str
+    event_id: str
+    event_time: Optional[datetime]
+    sent_timestamp: Optional[int]
+    first_receive_timestamp: Optional[int]
+    receive_count: Optional[int]
+    replay_attempt: Optional[str]
+    source_table_name: str
+    target_table_name: str
+    global_secondary_indexes: Optional[tuple]
+    local_secondary_indexes: Optional[tuple]
+
+
+def decode_event(event: dict, validate: bool = None):
+    """Decodes the restore requests of an SQS event.
+
+    Args:
+        event: The SQS event received by the Lambda function.
+        validate: Whether the whole payload is validated with the AWSEvent model. Defaults to True with the
+            DEBUG log level.
+
+    Returns:
+      A list of RestoreRequest, one per record.
+
+    Raises:
+      ValidationError: If the fast path failed and the event doesn't match the AWSEvent model.
+    """
+    if validate is None:
+        validate = LOG_LEVEL.upper() == "DEBUG"
+    if validate:
+        return decode_event_with_model(event)
+    try:
+        return [decode_record(record) for record in event["Records"]]
+    except (KeyError, IndexError, TypeError, ValueError) as error:
+        LOG.warning(f"Fast path decoding failed, validating the event with the model: {error!r}")
+        return decode_event_with_model(event)
+
+
+def decode_record(record: dict):
+    """Decodes the restore request of an SQS record without validating the rest of the payload.
+
+    Args:
+        record: An SQS record whose body is the EventBridge event of the CloudTrail API call.
+
+    Returns:
+      A RestoreRequest.
+
+    Raises:
+      KeyError: If a field needed by the table sync is missing.
+      ValueError: If the body isn't valid JSON.
+    """
+    detail = json.loads(record["body"])["detail"]
+    request_parameters = detail["requestParameters"]
+    target_table_name = request_parameters["targetTableName"]
+    source_table_name = request_parameters.get("sourceTableName")
+    if not source_table_name:
+        # arn:partition:dynamodb:region:account:table/name
+        source_table_name = request_parameters["sourceTableArn"].split(":", 5)[5].split("/")[1]
+    if not isinstance(target_table_name, str) or not isinstance(source_table_name, str):
+        raise TypeError("The table names must be strings")
+
+    event_time = detail.get("eventTime")
+    attributes = record.get("attributes") or {}
+    sent_timestamp = attributes.get("SentTimestamp")
+    receive_count = attributes.get("ApproximateReceiveCount")
+    message_attributes = record.get("messageAttributes") or {}
+    replay_attribute = message_attributes.get(DLQ_REPLAY_MESSAGE_ATTRIBUTE) or {}
+    first_receive_attribute = message_attributes.get(FIRST_RECEIVE_MESSAGE_ATTRIBUTE) or {}
+    first_receive_timestamp = first_receive_attribute.get("stringValue") or attributes.get(
+        "ApproximateFirstReceiveTimestamp"
+    )
+    return RestoreRequest(
+        message_id=record.get("messageId"),
+        event_id=detail.get("eventID"),
+        event_time=datetime.fromisoformat(event_time.replace("Z", "+00:00")) if event_time else None,
+        sent_timestamp=int(sent_timestamp) if sent_timestamp else None,
+        first_receive_timestamp=int(first_receive_timestamp) if first_receive_timestamp else None,
+        receive_count=int(receive_count) if receive_count else None,
+        replay_attempt=replay_attribute.get("stringValue"),
+        source_table_name=source_table_name,
+        target_table_name=target_table_name,
+        global_secondary_indexes=decode_index_override(request_parameters.get("globalSecondaryIndexOverride")),
+        local_secondary_indexes=decode_index_override(request_parameters.get("localSecondaryIndexOverride")),
+    )
+
+
+def decode_index_override(index_override: list = None):
+    """Converts the secondary index override of a restore request to CFN index properties.
+
+    The CloudTrail request parameters are camel cased and the capacity units are strings, CFN expects pascal
+    cased properties and integers.
+
+    Args:
+        index_override: The globalSecondaryIndexOverride or localSecondaryIndexOverride request parameter.
+
+    Returns:
+      A tuple of CFN index dicts, None if the request parameter is missing.
+
+    Raises:
+    """
+    if index_override is None:
+        return None
+    indexes = []
+    for index in index_override:
+        cfn_index = {
+            "IndexName": index["indexName"],
+            "KeySchema": [
+                {"AttributeName": key["attributeName"], "KeyType": key["keyType"]} for key in index["keySchema"]
+            ],
+            "Projection": _pascal_case_keys(index["projection"]),
+        }
+        provisioned_throughput = index.get("provisionedThroughput")
+        if provisioned_throughput is not None:
+            cfn_index["ProvisionedThroughput"] = {
+                "ReadCapacityUnits": int(provisioned_throughput["readCapacityUnits"]),
+                "WriteCapacityUnits": int(provisioned_throughput["writeCapacityUnits"]),
+            }
+        contributor_insights_specification = index.get("contributorInsightsSpecification")
+        if contributor_insights_specification is not None:
+            cfn_index["ContributorInsightsSpecification"] = _pascal_case_keys(contributor_insights_specification)
+        indexes.append(cfn_index)
+    return tuple(indexes)
+
+
+def decode_event_with_model(event: dict):
+    """Decodes the restore requests of an SQS event after validating it with the AWSEvent model.
+
+    Args:
+        event: The SQS event received by the Lambda function.
+
+    Returns:
+      A list of RestoreRequest, one per record.
+
+    Raises:
+      ValidationError: If the event doesn't match the AWSEvent model.
+    """
+    # The pydantic models are slow to build, they are only imported when needed.
+    from model.aws.dynamodb.aws_event import AWSEvent
+
+    restore_requests = []
+    for record in AWSEvent(**event).records:
+        detail = record.body.detail
+        request_parameters = detail.request_parameters
+        if "source_table_name" in request_parameters.__fields_set__:
+            source_table_name = request_parameters.source_table_name
+        else:
+            source_table_name = request_parameters.source_table_arn.split(":", 5)[5].split("/")[1]
+        replay_attempt = None
+        if record.message_attributes and "sqs_dlq_replay_nb" in record.message_attributes.__fields_set__:
+            replay_attempt = record.message_attributes.sqs_dlq_replay_nb.string_value
+        global_secondary_indexes = None
+        if "global_secondary_index_override" in request_parameters.__fields_set__:
+            global_secondary_indexes = tuple(
+                index.to_dict() for index in request_parameters.global_secondary_index_override or []
+            )
+        local_secondary_indexes = None
+        if "local_secondary_index_override" in request_parameters.__fields_set__:
+            local_secondary_indexes = tuple(
+                index.to_dict() for index in request_parameters.local_secondary_index_override or []
+            )
+        sent_timestamp = record.attributes.sent_timestamp if record.attributes else None
+        first_receive_timestamp = record.attributes.approximate_first_receive_timestamp if record.attributes else None
+        if record.message_attributes and "sqs_first_receive_timestamp" in record.message_attributes.__fields_set__:
+            first_receive_timestamp = record.message_attributes.sqs_first_receive_timestamp.string_value
+        receive_count = record.attributes.approximate_receive_count if record.attributes else None
+        restore_requests.append(
+            RestoreRequest(
+                message_id=record.message_id,
+                event_id=detail.event_id,
+                event_time=detail.event_time,
+                sent_timestamp=int(sent_timestamp) if sent_timestamp else None,
+                first_receive_timestamp=int(first_receive_timestamp) if first_receive_timestamp else None,
+                receive_count=receive_count,
+                replay_attempt=replay_attempt,
+                source_table_name=source_table_name,
+                target_table_name=request_parameters.target_table_name,
+                global_secondary_indexes=global_secondary_indexes,
+                local_secondary_indexes=local_secondary_indexes,
+            )
+        )
+    return restore_requests
+
+
+def _pascal_case_keys(dictionary: dict):
+    return {key[:1].upper() + key[1:]: value for key, value in dictionary.items()}
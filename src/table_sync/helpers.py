@@ -18,11 +18,16 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import threading
+import time
+import botocore.exceptions
 from pydantic import BaseModel
-from botocore.utils import ArnParser
 
 
 def parse_arn(arn: str = None):
+    # botocore.utils is slow to import and only needed when the restore request holds the source table ARN.
+    from botocore.utils import ArnParser
+
     return Arn(**ArnParser.parse_arn(None, arn))
 
 
@@ -48,6 +53,91 @@ def is_dynamodb_table_available(dynamodb_client, target_table_name: str = ""):
         raise error
 
 
+def list_table_tags(dynamodb_client, table_arn: str = ""):
+    """Lists every tag of a DynamoDB table, following the pages of list_tags_of_resource.
+
+    Args:
+        dynamodb_client: Authenticated DynamoDB boto3 client.
+        table_arn: The ARN of the table.
+
+    Returns:
+      A list of the CFN tag dicts of the table, with the Key and Value keys.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    tags = []
+    for page in dynamodb_client.get_paginator("list_tags_of_resource").paginate(ResourceArn=table_arn):
+        tags.extend(page.get("Tags") or [])
+    return tags
+
+
+def does_cfn_stack_exist(cfn_client, cfn_stack_name: str = ""):
+    """Checks if a CloudFormation stack has already been created.
+
+    A stack left in REVIEW_IN_PROGRESS only holds a change set that was never executed, so it is
+    reported as not existing and can still receive a CREATE change set.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+
+    Returns:
+      A boolean indicating whether the stack exists.
+
+    Raises:
+      ClientError: Boto3 error other than the stack not existing.
+    """
+    try:
+        response = cfn_client.describe_stacks(StackName=cfn_stack_name)
+    except botocore.exceptions.ClientError as error:
+        if "does not exist" in error.response.get("Error", {}).get("Message", ""):
+            return False
+        raise error
+    stacks = response.get("Stacks", [])
+    return bool(stacks) and stacks[0].get("StackStatus") != "REVIEW_IN_PROGRESS"
+
+
+class RateLimiter:
+    """Token bucket shared by threads, e.g. to space out the change sets of a bulk update.
+
+    A caller takes a token, or waits for its turn if the bucket is empty. Turns are handed out in order of
+    arrival, so a burst of callers is spread over time at rate_per_second.
+    """
+
+    def __init__(self, rate_per_second: float = None, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, waiting until one is available. A limiter without a rate never waits.
+
+        Args:
+
+        Returns:
+          The time waited, in seconds.
+
+        Raises:
+        """
+        if not self.rate_per_second:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            # The token is taken now, a negative balance reserves the turn of the caller.
+            self._tokens -= 1
+            wait_s = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+        if wait_s:
+            self.sleep(wait_s)
+        return wait_s
+
+
 class Arn(BaseModel):
     partition: str
     service: str
@@ -0,0 +1,243 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Per operation statistics of the AWS API calls of a sync, collected with botocore event hooks.
+# Every client of the client factory is instrumented: before-call starts the clock of a call, after-call
+# counts it with its retries and records its latency, and needs-retry counts the throttled attempts.
+# The statistics are reset at the start of each invocation and logged as one summary record at its end.
+import math
+import threading
+import time
+from aws_lambda_powertools import Logger
+
+LOG: Logger = Logger(service=__name__)
+# Error codes botocore retries as throttling errors.
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottledException",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+        "TransactionInProgressException",
+        "RequestLimitExceeded",
+        "BandwidthLimitExceeded",
+        "LimitExceededException",
+        "RequestThrottled",
+        "SlowDown",
+        "PriorRequestNotComplete",
+        "EC2ThrottledException",
+    }
+)
+# Each power of two of milliseconds is split in this many linear buckets, which bounds the relative error
+# of a recorded latency to 1 / LATENCY_SUB_BUCKETS whatever its magnitude.
+LATENCY_SUB_BUCKETS = 8
+LATENCY_PERCENTILES = (50, 90, 99)
+_START_CONTEXT_KEY = "table_sync_start"
+
+
+class LatencyHistogram:
+    """HDR style latency histogram, with log-linear buckets and a bounded relative error."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def bucket_index(value_ms: float):
+        if value_ms < 1:
+            return 0
+        mantissa, exponent = math.frexp(value_ms)
+        # value_ms = mantissa * 2 ** exponent, with mantissa in [0.5, 1).
+        return 1 + (exponent - 1) * LATENCY_SUB_BUCKETS + int((mantissa * 2 - 1) * LATENCY_SUB_BUCKETS)
+
+    @staticmethod
+    def bucket_upper_bound(index: int):
+        if index == 0:
+            return 1.0
+        exponent, sub_bucket = divmod(index - 1, LATENCY_SUB_BUCKETS)
+        return 2**exponent * (1 + (sub_bucket + 1) / LATENCY_SUB_BUCKETS)
+
+    def record(self, value_ms: float):
+        index = self.bucket_index(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, percentile: float):
+        """Returns the upper bound of the bucket holding the percentile, capped by the max latency."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percentile / 100)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        summary = {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+        for percentile in LATENCY_PERCENTILES:
+            summary[f"p{percentile}_ms"] = round(self.percentile(percentile), 3)
+        summary["buckets"] = {
+            f"{self.bucket_upper_bound(index):g}": self.counts[index] for index in sorted(self.counts)
+        }
+        return summary
+
+
+class OperationStats:
+    """Counters and latency histogram of one API operation, e.g. cloudformation.DescribeStacks."""
+
+    __slots__ = ("calls", "errors", "retries", "throttles", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "latency": self.latency.to_dict(),
+        }
+
+
+_OPERATION_STATS: dict = {}
+_LOCK = threading.Lock()
+
+
+def instrument_client(client: object):
+    """Registers the event handlers collecting the API call statistics on a boto3 client.
+
+    Registering the handlers again on the same client is a no-op.
+
+    Args:
+        client: A boto3 client.
+
+    Returns:
+      The instrumented client.
+
+    Raises:
+    """
+    events = client.meta.events
+    events.register_first("before-call.*.*", _before_call, unique_id="table-sync-before-call")
+    events.register("after-call.*.*", _after_call, unique_id="table-sync-after-call")
+    events.register_first("needs-retry.*.*", _needs_retry, unique_id="table-sync-needs-retry")
+    return client
+
+
+def reset_api_call_stats():
+    """Starts the API call statistics of a new invocation.
+
+    Args:
+
+    Returns:
+
+    Raises:
+    """
+    with _LOCK:
+        _OPERATION_STATS.clear()
+
+
+def get_api_call_summary():
+    """Returns the API call statistics since the start of the invocation.
+
+    Args:
+
+    Returns:
+      A dict of the statistics of each operation, keyed by <service>.<Operation>.
+
+    Raises:
+    """
+    with _LOCK:
+        return {operation: stats.to_dict() for operation, stats in sorted(_OPERATION_STATS.items())}
+
+
+def log_api_call_summary():
+    """Logs the API call statistics of the invocation as one record.
+
+    Args:
+
+    Returns:
+
+    Raises:
+    """
+    summary = get_api_call_summary()
+    LOG.info(
+        "API call summary",
+        extra={"api_calls": summary, "api_call_count": sum(stats.get("calls") for stats in summary.values())},
+    )
+
+
+def _operation_key(event_name: str):
+    # e.g. after-call.cloudformation.DescribeStacks
+    return event_name.split(".", 1)[1]
+
+
+def _operation_stats(operation: str):
+    stats = _OPERATION_STATS.get(operation)
+    if stats is None:
+        stats = _OPERATION_STATS[operation] = OperationStats()
+    return stats
+
+
+def _before_call(context: dict = None, **kwargs):
+    if context is not None:
+        context[_START_CONTEXT_KEY] = time.perf_counter()
+
+
+def _after_call(event_name: str, parsed: dict = None, context: dict = None, **kwargs):
+    start = (context or {}).get(_START_CONTEXT_KEY)
+    parsed = parsed or {}
+    with _LOCK:
+        stats = _operation_stats(_operation_key(event_name))
+        stats.calls += 1
+        stats.retries += parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        if "Error" in parsed:
+            stats.errors += 1
+        if start is not None:
+            stats.latency.record((time.perf_counter() - start) * 1000)
+
+
+def _needs_retry(event_name: str, response: tuple = None, **kwargs):
+    # Called for every attempt, before the retry handler of botocore, and never changes its decision.
+    if response is None:
+        return None
+    error_code = (response[1] or {}).get("Error", {}).get("Code")
+    if error_code in THROTTLING_ERROR_CODES:
+        with _LOCK:
+            _operation_stats(_operation_key(event_name)).throttles += 1
+    return None
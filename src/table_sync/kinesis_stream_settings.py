@@ -19,6 +19,8 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from aws_lambda_powertools import Logger
+from table_sync.table_config import KinesisStreamSpecification
+from table_sync.payload_logging import bounded
 
 LOG: Logger = Logger(service=__name__)
 
@@ -31,24 +33,25 @@ def build_kinesis_stream_template(dynamodb_client: object, source_table_name: st
         source_table_name: The name of the source table.
 
     Returns:
-      A dictionary representing CFN yaml for the Kinesis Stream settings of a DynamoDB table
+      A KinesisStreamSpecification for the Kinesis Stream settings of a DynamoDB table, None if the table has
+      no Kinesis stream destination.
 
     Raises:
     """
     kinesis_stream_arn = ""
-    kinesis_stream_specification = {}
+    kinesis_stream_specification = None
     response = dynamodb_client.describe_kinesis_streaming_destination(
         TableName=source_table_name
     )
     kinesis_stream_destinations = response.get("KinesisDataStreamDestinations", [])
-    LOG.info(f"Source table kinesis stream destinations: {kinesis_stream_destinations}")
+    LOG.info("Source table kinesis stream destinations: %s", bounded(kinesis_stream_destinations))
 
     if kinesis_stream_destinations:
         kinesis_stream_arn = kinesis_stream_destinations[0].get("StreamArn", None)
     LOG.info(f"Kinesis stream ARN: {kinesis_stream_arn}")
 
     if kinesis_stream_arn:
-        kinesis_stream_specification.update(StreamArn=kinesis_stream_arn)
-    LOG.info(f"Kinesis stream specification: {kinesis_stream_specification}")
+        kinesis_stream_specification = KinesisStreamSpecification(stream_arn=kinesis_stream_arn)
+    LOG.info("Kinesis stream specification: %s", bounded(kinesis_stream_specification))
 
     return kinesis_stream_specification
@@ -0,0 +1,126 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Bounded logging of large payloads: events, templates and describe responses.
+# A payload is passed to the logger as a %s argument, so it is only serialized when the record is emitted.
+# Above LOG_PAYLOAD_MAX_BYTES it is truncated, with its length and a hash to tell payloads apart. Past the cap,
+# the serialized pieces are only counted and hashed, rather than joined into the full text.
+# It is logged in full with the DEBUG log level, and by the error handlers when a sync fails.
+import hashlib
+import json
+
+# Serializes compact JSON piece by piece, so that a truncated payload is never held as a whole.
+COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), default=str)
+
+
+class BoundedPayload:
+    """A log argument that serializes a payload on demand, truncated to a size cap."""
+
+    __slots__ = ("payload", "max_bytes")
+
+    def __init__(self, payload, max_bytes: int = None):
+        self.payload = payload
+        self.max_bytes = max_bytes
+
+    def __str__(self):
+        if self.max_bytes is None:
+            return serialize_payload(self.payload)
+        try:
+            return truncate_chunks(iterencode_payload(self.payload), self.max_bytes)
+        except (TypeError, ValueError):
+            return truncate_chunks([str(self.payload)], self.max_bytes)
+
+
+def serialize_payload(payload):
+    """Serializes a payload as compact JSON, falling back to str for the values JSON doesn't know."""
+    if isinstance(payload, str):
+        return payload
+    try:
+        return json.dumps(payload, separators=(",", ":"), default=str)
+    except (TypeError, ValueError):
+        return str(payload)
+
+
+def iterencode_payload(payload):
+    """Serializes a payload as compact JSON, piece by piece. A string is a single piece."""
+    if isinstance(payload, str):
+        return [payload]
+    return COMPACT_ENCODER.iterencode(payload)
+
+
+def truncate_chunks(chunks, max_bytes: int):
+    """Joins the serialized pieces of a payload up to max_bytes, then only counts and hashes the other pieces.
+
+    Args:
+        chunks: The serialized pieces of the payload.
+        max_bytes: The size cap of the joined text, in UTF-8 bytes.
+
+    Returns:
+      The joined text, truncated to max_bytes with its length and a SHA-256 prefix if the pieces exceed it.
+
+    Raises:
+    """
+    text = []
+    size = 0
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        encoded = chunk.encode("utf-8")
+        if size <= max_bytes:
+            text.append(encoded)
+        size += len(encoded)
+        digest.update(encoded)
+    if size <= max_bytes:
+        return b"".join(text).decode("utf-8")
+    truncated = b"".join(text)[:max_bytes].decode("utf-8", errors="ignore")
+    return f"{truncated}... [truncated, {size} bytes, sha256 {digest.hexdigest()[:16]}]"
+
+
+def bounded(payload, max_bytes: int = None):
+    """Wraps a payload to log it truncated, or in full with the DEBUG log level.
+
+    Args:
+        payload: The payload to log, e.g. the event or a CFN template.
+        max_bytes: The size cap of the logged payload. Defaults to LOG_PAYLOAD_MAX_BYTES.
+
+    Returns:
+      A BoundedPayload to pass as a %s logger argument.
+
+    Raises:
+    """
+    # The setting builders import this module on their own, the config is only read once a payload is logged.
+    from table_sync.config import LOG_LEVEL, LOG_PAYLOAD_MAX_BYTES
+
+    if LOG_LEVEL.upper() == "DEBUG":
+        return BoundedPayload(payload)
+    return BoundedPayload(payload, LOG_PAYLOAD_MAX_BYTES if max_bytes is None else max_bytes)
+
+
+def full(payload):
+    """Wraps a payload to log it in full, e.g. when a sync failed.
+
+    Args:
+        payload: The payload to log.
+
+    Returns:
+      A BoundedPayload without size cap, to pass as a %s logger argument.
+
+    Raises:
+    """
+    return BoundedPayload(payload)
@@ -19,6 +19,8 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from aws_lambda_powertools import Logger
+from table_sync.table_config import PointInTimeRecoverySpecification
+from table_sync.payload_logging import bounded
 
 LOG: Logger = Logger(service=__name__)
 
@@ -31,7 +33,7 @@ def build_point_in_time_recovery_template(dynamodb_client: object, source_table_
         source_table_name: The name of the source table.
 
     Returns:
-      A dictionary representing CFN yaml for the PITR settings of a DynamoDB table
+      A PointInTimeRecoverySpecification for the PITR settings of a DynamoDB table
 
     Raises:
     """
@@ -41,6 +43,6 @@ def build_point_in_time_recovery_template(dynamodb_client: object, source_table_
         .get("PointInTimeRecoveryDescription")
         .get("PointInTimeRecoveryStatus")
     )
-    pitr_specification = {"PointInTimeRecoveryEnabled": pitr_status == "ENABLED"}
-    LOG.info(f"PITR settings: {pitr_specification}")
+    pitr_specification = PointInTimeRecoverySpecification(point_in_time_recovery_enabled=pitr_status == "ENABLED")
+    LOG.info("PITR settings: %s", bounded(pitr_specification))
     return pitr_specification
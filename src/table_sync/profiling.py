@@ -0,0 +1,177 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Opt-in profiling of an invocation with cProfile and tracemalloc.
+# Profiling is turned on for every invocation with ENABLE_PROFILING, or for one message with the
+# table-sync-profile message attribute. The top cumulative functions and allocation sites are logged, and the
+# raw cProfile stats are written to the PROFILING_OUTPUT directory, or to the template bucket with "s3".
+# When profiling is off, the wrapper only looks up the message attributes and the profilers aren't imported.
+import functools
+import io
+import os
+import time
+from aws_lambda_powertools import Logger
+from table_sync.config import ENABLE_PROFILING, PROFILING_OUTPUT, PROFILING_TOP_N
+
+LOG: Logger = Logger(service=__name__)
+PROFILE_MESSAGE_ATTRIBUTE = "table-sync-profile"
+S3_PROFILING_OUTPUT = "s3"
+TRACEMALLOC_FRAMES = 10
+
+
+def is_profiling_requested(event: dict):
+    """Checks if an invocation is profiled.
+
+    Args:
+        event: The SQS event received by the Lambda function.
+
+    Returns:
+      True with ENABLE_PROFILING, or when a record has the table-sync-profile message attribute set to true.
+
+    Raises:
+    """
+    if ENABLE_PROFILING:
+        return True
+    for record in (event or {}).get("Records") or []:
+        attribute = (record.get("messageAttributes") or {}).get(PROFILE_MESSAGE_ATTRIBUTE) or {}
+        if str(attribute.get("stringValue", "")).lower() == "true":
+            return True
+    return False
+
+
+def profile_handler(handler):
+    """Decorates a Lambda handler to profile the invocations that request it.
+
+    Args:
+        handler: The Lambda handler.
+
+    Returns:
+      The decorated handler.
+
+    Raises:
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if not is_profiling_requested(event):
+            return handler(event, context)
+        return run_profiled(handler, event, context)
+
+    return wrapper
+
+
+def run_profiled(handler, event: dict, context: object, top_n: int = None, output: str = None):
+    """Runs a Lambda handler under cProfile and tracemalloc, and logs the profile whatever the outcome.
+
+    Args:
+        handler: The Lambda handler.
+        event: The Lambda event.
+        context: The Lambda context.
+        top_n: The number of functions and allocation sites to log. Defaults to PROFILING_TOP_N.
+        output: The directory to write the raw profile to, or "s3". Defaults to PROFILING_OUTPUT.
+
+    Returns:
+      The value returned by the handler.
+
+    Raises:
+      Exception: The error raised by the handler.
+    """
+    import cProfile
+    import tracemalloc
+
+    if top_n is None:
+        top_n = PROFILING_TOP_N
+    if output is None:
+        output = PROFILING_OUTPUT
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return handler(event, context)
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        LOG.info(
+            "Invocation profile",
+            extra={
+                "top_functions": format_top_functions(profiler, top_n),
+                "top_allocations": format_top_allocations(snapshot, top_n),
+                "peak_traced_memory_bytes": peak_bytes,
+            },
+        )
+        if output:
+            try:
+                write_profile(profiler, output, getattr(context, "aws_request_id", None) or f"local-{time.time_ns()}")
+            except Exception as error:
+                LOG.warning(f"Raw profile not written: {error!r}")
+
+
+def format_top_functions(profiler: object, top_n: int):
+    """Returns the pstats report of the top cumulative time functions of a profile."""
+    import pstats
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top_n)
+    return stream.getvalue()
+
+
+def format_top_allocations(snapshot: object, top_n: int):
+    """Returns the top allocation sites of a tracemalloc snapshot, one line per site."""
+    return [str(statistic) for statistic in snapshot.statistics("lineno")[:top_n]]
+
+
+def write_profile(profiler: object, output: str, request_id: str):
+    """Writes the raw cProfile stats of an invocation, to be opened with pstats or snakeviz.
+
+    Args:
+        profiler: The cProfile profiler of the invocation.
+        output: A local directory, e.g. /tmp/profiles, or "s3" for the template bucket.
+        request_id: The Lambda request id, used as the file name.
+
+    Returns:
+      The path or the URL of the written profile.
+
+    Raises:
+      ClientError: Boto3 error
+      ValueError: The output is "s3" and no template bucket is configured.
+    """
+    if output != S3_PROFILING_OUTPUT:
+        os.makedirs(output, exist_ok=True)
+        path = os.path.join(output, f"{request_id}.prof")
+        profiler.dump_stats(path)
+        LOG.info(f"Raw profile written to {path}")
+        return path
+
+    from table_sync.template_uploader import get_default_template_uploader
+
+    uploader = get_default_template_uploader()
+    if uploader is None:
+        raise ValueError("No template bucket is configured to upload the profile to")
+    import marshal
+
+    profiler.create_stats()
+    url = uploader.upload(f"profiles/{request_id}.prof", marshal.dumps(profiler.stats))
+    LOG.info(f"Raw profile uploaded to {url}")
+    return url
@@ -0,0 +1,529 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Reconciler of the restored table stacks with their source tables.
+#
+# Usage:
+#   python -m table_sync.reconciler
+#   python -m table_sync.reconciler --max-workers 8 --rate 0.5 --dry-run --format json
+#
+# The source tables keep changing after a restore, e.g. their tags, triggers or auto scaling, and the restored
+# tables kept for weeks drift from them. The reconciler lists the restored table stacks and builds the templates
+# that a sync of each source table would deploy today. A stack whose template changed gets one change set, the
+# other stacks are skipped. The source table is read from the RestoreSummary of the restored table, and the
+# indexes and the provisioned throughput of the restored table are kept as deployed.
+import argparse
+import hashlib
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+import botocore.exceptions
+from aws_lambda_powertools import Logger
+from table_sync.client_factory import get_client
+from table_sync.cfn_yaml_template import (
+    RESTORED_TABLE_LOGICAL_ID,
+    create_basic_cfn_yaml,
+    render_cfn_resources,
+    render_cfn_template,
+    serialize_cfn_template,
+)
+from table_sync.deploy_cfn_resources import create_and_execute_change_set
+from table_sync.drift_repair import repair_stack_drift
+from table_sync.helpers import RateLimiter, list_table_tags, parse_arn
+from table_sync.setting_steps import build_setting_steps
+from table_sync.sync_settings import FileSettingsSource, SyncSettings, apply_table_overrides
+from table_sync.table_config import ProvisionedThroughput, TableConfig, Tag
+from table_sync.config import (
+    LOG_LEVEL,
+    CFN_CREATE_CHANGE_SET_TYPE,
+    CFN_UPDATE_CHANGE_SET_TYPE,
+    RESTORED_TABLE_STACK_NAME,
+    TRIGGERS_STACK_NAME,
+    AUTO_SCALING_STACK_NAME,
+)
+
+LOG: Logger = Logger(service=__name__)
+LOG.setLevel(LOG_LEVEL)
+RECONCILED = "Reconciled"
+SKIPPED = "Skipped"
+FAILED = "Failed"
+# The stacks in progress are left to the sync or to the reconciliation deploying them.
+SETTLED_STACK_STATUSES = (
+    "CREATE_COMPLETE",
+    "UPDATE_COMPLETE",
+    "IMPORT_COMPLETE",
+    "UPDATE_ROLLBACK_COMPLETE",
+    "IMPORT_ROLLBACK_COMPLETE",
+)
+RESTORED_TABLE_STACK_PATTERN = re.compile(
+    re.escape(RESTORED_TABLE_STACK_NAME).replace(re.escape("{target_table_name}"), "(?P<target_table_name>.+)")
+)
+# The reason of the failed change sets of a template that CFN finds equal to the deployed one.
+NO_CHANGES_REASON = "didn't contain changes"
+
+
+@dataclass(frozen=True)
+class ReconcileResult:
+    """The outcome of the reconciliation of a restored table stack and of its sibling stacks."""
+
+    __slots__ = ("stack_name", "target_table_name", "status", "updated_stacks", "repaired_drifts", "reason")
+    stack_name: str
+    target_table_name: str
+    status: str
+    updated_stacks: tuple
+    repaired_drifts: tuple
+    reason: str
+
+
+def fingerprint(cfn_template_dict: dict):
+    """Returns the SHA-256 digest of the canonical body of a CFN template, None without a template."""
+    if cfn_template_dict is None:
+        return None
+    return hashlib.sha256(serialize_cfn_template(cfn_template_dict).encode("utf-8")).hexdigest()
+
+
+def list_restored_table_stacks(cfn_client: object):
+    """Lists the settled restored table stacks.
+
+    The sibling stacks of a listed stack, e.g. Restored-DynamoDB-Table-orders-Triggers-Stack next to
+    Restored-DynamoDB-Table-orders-Stack, are left out.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+
+    Returns:
+      A dict of the restored table names by stack name.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    response = (
+        cfn_client.get_paginator("list_stacks")
+        .paginate(StackStatusFilter=list(SETTLED_STACK_STATUSES))
+        .build_full_result()
+    )
+    candidates = {}
+    for summary in response.get("StackSummaries", []):
+        match = RESTORED_TABLE_STACK_PATTERN.fullmatch(summary.get("StackName"))
+        if match is not None:
+            candidates[summary.get("StackName")] = match.group("target_table_name")
+    sibling_stack_names = {
+        stack_name.format(target_table_name=target_table_name)
+        for target_table_name in candidates.values()
+        for stack_name in (TRIGGERS_STACK_NAME, AUTO_SCALING_STACK_NAME)
+    }
+    return {
+        stack_name: target_table_name
+        for stack_name, target_table_name in sorted(candidates.items())
+        if stack_name not in sibling_stack_names
+    }
+
+
+def get_deployed_template(cfn_client: object, cfn_stack_name: str):
+    """Gets the template a stack was last deployed with.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+
+    Returns:
+      The CFN template dict, None if the stack doesn't exist.
+
+    Raises:
+      ClientError: Boto3 error other than the stack not existing.
+    """
+    try:
+        response = cfn_client.get_template(StackName=cfn_stack_name, TemplateStage="Original")
+    except botocore.exceptions.ClientError as error:
+        if "does not exist" in error.response.get("Error", {}).get("Message", ""):
+            return None
+        raise error
+    # botocore parses the JSON template bodies, other bodies are left as strings.
+    template_body = response.get("TemplateBody")
+    return json.loads(template_body) if isinstance(template_body, str) else template_body
+
+
+def build_desired_table_config(target_table: dict, deployed_template: dict, settings: SyncSettings):
+    """Builds the configuration that a sync of the source table of a restored table would deploy today.
+
+    The setting builders of the sync run, with the table-sync:skip tag of the source table. The indexes and
+    the provisioned throughput of the restored table are kept as deployed: they may come from the overrides of
+    the restore request, and the provisioned throughput of the source table moves with its auto scaling.
+
+    Args:
+        target_table: The describe_table response of the restored table.
+        deployed_template: The template the restored table stack was last deployed with.
+        settings: The feature flags of the sync.
+
+    Returns:
+      A tuple of the source table name, the TableConfig and the settings with the overrides of the source table.
+
+    Raises:
+      ClientError: Boto3 error
+      NotARestoredTable: The table has no RestoreSummary, or its stack has no restored table resource.
+    """
+    dynamodb_client = get_client("dynamodb")
+    target_table_name = target_table.get("Table").get("TableName")
+    source_table_arn = (target_table.get("Table").get("RestoreSummary") or {}).get("SourceTableArn")
+    deployed_table = (deployed_template or {}).get("Resources", {}).get(RESTORED_TABLE_LOGICAL_ID)
+    if not source_table_arn or deployed_table is None:
+        raise NotARestoredTable(f"{target_table_name} isn't a restored table deployed by the table sync")
+    source_table_name = parse_arn(source_table_arn).resource.split("/", 1)[1]
+    source_table = dynamodb_client.describe_table(TableName=source_table_name)
+
+    deployed_properties = deployed_table.get("Properties", {})
+    table_config = TableConfig.from_describe_table(
+        source_table,
+        table_name=target_table_name,
+        global_secondary_indexes=deployed_properties.get("GlobalSecondaryIndexes", []),
+        local_secondary_indexes=deployed_properties.get("LocalSecondaryIndexes", []),
+    )
+    if table_config.provisioned_throughput is not None and deployed_properties.get("ProvisionedThroughput"):
+        table_config = replace(
+            table_config,
+            provisioned_throughput=ProvisionedThroughput.from_cfn(deployed_properties.get("ProvisionedThroughput")),
+        )
+
+    source_table_tags = tuple(
+        Tag.from_cfn(tag) for tag in list_table_tags(dynamodb_client=dynamodb_client, table_arn=source_table_arn)
+    )
+    settings = apply_table_overrides(settings, source_table_tags)
+    for step in build_setting_steps(
+        dynamodb_client=dynamodb_client,
+        table_config=table_config,
+        source_table_name=source_table_name,
+        source_table=source_table,
+        source_table_tags=source_table_tags,
+        settings=settings,
+    ):
+        table_config = step.table_config
+    return source_table_name, table_config, settings
+
+
+def build_sibling_templates(table_config: TableConfig):
+    """Builds the templates of the sibling stacks of a restored table, as the sync deploys them.
+
+    Args:
+        table_config: The desired configuration of the restored table.
+
+    Returns:
+      A dict of the (change set name, CFN template dict) tuples by stack name. A sibling stack without
+      resources is left out.
+
+    Raises:
+    """
+    target_table_name = table_config.table_name
+    sibling_templates = {}
+    for stack_name, change_set_suffix, cfn_resources in (
+        (TRIGGERS_STACK_NAME, "Triggers", table_config.triggers),
+        (AUTO_SCALING_STACK_NAME, "Scalable-Targets-Settings", table_config.scaling),
+    ):
+        if not cfn_resources:
+            continue
+        cfn_stack_name = stack_name.format(target_table_name=target_table_name)
+        cfn_template_dict = create_basic_cfn_yaml(
+            cfn_template_description=f"{cfn_stack_name} Cloudformation deployment"
+        )
+        cfn_template_dict.get("Resources").update(render_cfn_resources(cfn_resources))
+        sibling_templates[cfn_stack_name] = (
+            f"Reconcile-DynamoDB-{target_table_name}-{change_set_suffix}-Change-Set",
+            cfn_template_dict,
+        )
+    return sibling_templates
+
+
+def reconcile_template(
+    cfn_client: object,
+    cfn_stack_name: str,
+    cfn_change_set_name: str,
+    cfn_template_dict: dict,
+    deployed_template: dict,
+    target_table_name: str,
+    rate_limiter: RateLimiter,
+    dry_run: bool = False,
+):
+    """Deploys the desired template of a stack if its fingerprint differs from the deployed one.
+
+    Args:
+        cfn_client: Authenticated CloudFormation boto3 client.
+        cfn_stack_name: The name of the CloudFormation stack.
+        cfn_change_set_name: The name of the change set.
+        cfn_template_dict: The desired CFN template dict.
+        deployed_template: The deployed CFN template dict, None if the stack doesn't exist.
+        target_table_name: The restored table name, annotated on the subsegments.
+        rate_limiter: Spaces out the change sets.
+        dry_run: Whether the change is only reported.
+
+    Returns:
+      A boolean indicating whether the stack is, or would be, updated.
+
+    Raises:
+      ClientError: Boto3 error
+      WaiterError: The change set or the stack failed.
+    """
+    if fingerprint(cfn_template_dict) == fingerprint(deployed_template):
+        return False
+    if dry_run:
+        return True
+    rate_limiter.acquire()
+    try:
+        create_and_execute_change_set(
+            cfn_client=cfn_client,
+            cfn_stack_name=cfn_stack_name,
+            cfn_change_set_name=cfn_change_set_name,
+            cfn_template_dict=cfn_template_dict,
+            cfn_change_set_type=CFN_CREATE_CHANGE_SET_TYPE if deployed_template is None else CFN_UPDATE_CHANGE_SET_TYPE,
+            target_table_name=target_table_name,
+        )
+    except botocore.exceptions.WaiterError as error:
+        # The templates differ only in a way CFN ignores, e.g. the formatting of a hand edited stack.
+        if NO_CHANGES_REASON in str(error):
+            return False
+        raise error
+    return True
+
+
+def reconcile_stack(
+    cfn_stack_name: str,
+    target_table_name: str,
+    settings: SyncSettings,
+    rate_limiter: RateLimiter = None,
+    dry_run: bool = False,
+    repair_drift: bool = False,
+):
+    """Reconciles a restored table stack, and its sibling stacks, with the source table.
+
+    The table stack is updated first: a trigger in a sibling stack references the stream of the restored
+    table, which a stream change of the table stack replaces. With repair_drift, the drift of each stack is
+    detected first. A drifted stack is repaired towards its desired template, the repair change set taking the
+    place of its reconcile change set.
+
+    Args:
+        cfn_stack_name: The name of the restored table stack.
+        target_table_name: The name of the restored table.
+        settings: The feature flags of the sync.
+        rate_limiter: Spaces out the reconciliations and the change sets. Defaults to no limit.
+        dry_run: Whether the stacks to update are only reported.
+        repair_drift: Whether the drift of the stacks is detected and repaired.
+
+    Returns:
+      A ReconcileResult. An error is reported in the result, with the Failed status.
+
+    Raises:
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    rate_limiter.acquire()
+    cfn_client = get_client("cloudformation")
+    dynamodb_client = get_client("dynamodb")
+    updated_stacks = []
+    repaired_drifts = []
+
+    def reconcile(stack_name: str, change_set_name: str, stack_template: dict, stack_deployed_template: dict):
+        if repair_drift and stack_deployed_template is not None:
+            repairs = repair_stack_drift(
+                cfn_client=cfn_client,
+                cfn_stack_name=stack_name,
+                desired_template=stack_template,
+                target_table_name=target_table_name,
+                rate_limiter=rate_limiter,
+                dry_run=dry_run,
+            )
+            repaired_drifts.extend(f"{stack_name}: {repair}" for repair in repairs)
+            if repairs and not dry_run:
+                # The repair change set deployed the desired template, there is nothing left to reconcile.
+                return fingerprint(stack_template) != fingerprint(stack_deployed_template)
+        return reconcile_template(
+            cfn_client=cfn_client,
+            cfn_stack_name=stack_name,
+            cfn_change_set_name=change_set_name,
+            cfn_template_dict=stack_template,
+            deployed_template=stack_deployed_template,
+            target_table_name=target_table_name,
+            rate_limiter=rate_limiter,
+            dry_run=dry_run,
+        )
+
+    try:
+        deployed_template = get_deployed_template(cfn_client, cfn_stack_name)
+        target_table = dynamodb_client.describe_table(TableName=target_table_name)
+        source_table_name, table_config, table_settings = build_desired_table_config(
+            target_table, deployed_template, settings
+        )
+        include_table_resources = not table_settings.enable_sibling_stacks
+        if reconcile(
+            cfn_stack_name,
+            f"Reconcile-DynamoDB-{target_table_name}-Change-Set",
+            render_cfn_template(table_config, include_table_resources=include_table_resources),
+            deployed_template,
+        ):
+            updated_stacks.append(cfn_stack_name)
+        if not include_table_resources:
+            if updated_stacks and not dry_run and table_settings.enable_dynamodb_lambda_triggers:
+                target_table = dynamodb_client.describe_table(TableName=target_table_name)
+                table_config = build_desired_table_config(target_table, deployed_template, settings)[1]
+            for sibling_stack_name, (change_set_name, cfn_template_dict) in build_sibling_templates(
+                table_config
+            ).items():
+                if reconcile(
+                    sibling_stack_name,
+                    change_set_name,
+                    cfn_template_dict,
+                    get_deployed_template(cfn_client, sibling_stack_name),
+                ):
+                    updated_stacks.append(sibling_stack_name)
+    except NotARestoredTable as error:
+        LOG.warning(f"Skipping {cfn_stack_name}: {error}")
+        return ReconcileResult(cfn_stack_name, target_table_name, SKIPPED, (), (), str(error))
+    except Exception as error:
+        LOG.error(f"Unable to reconcile {cfn_stack_name}: {error}")
+        return ReconcileResult(
+            cfn_stack_name,
+            target_table_name,
+            FAILED,
+            tuple(updated_stacks),
+            tuple(repaired_drifts),
+            f"{type(error).__name__}: {error}",
+        )
+    if not updated_stacks and not repaired_drifts:
+        return ReconcileResult(
+            cfn_stack_name, target_table_name, SKIPPED, (), (), f"In sync with {source_table_name}"
+        )
+    LOG.info(f"Reconciled {', '.join(updated_stacks)} with {source_table_name}, repaired {repaired_drifts}")
+    return ReconcileResult(
+        cfn_stack_name,
+        target_table_name,
+        RECONCILED,
+        tuple(updated_stacks),
+        tuple(repaired_drifts),
+        f"Drifted from {source_table_name}",
+    )
+
+
+def reconcile_stacks(
+    settings: SyncSettings,
+    restored_table_stacks: dict = None,
+    max_workers: int = 4,
+    rate_per_second: float = None,
+    dry_run: bool = False,
+    repair_drift: bool = False,
+):
+    """Reconciles the restored table stacks in parallel.
+
+    Args:
+        settings: The feature flags of the sync.
+        restored_table_stacks: A dict of the restored table names by stack name. Defaults to the listed stacks.
+        max_workers: The number of stacks reconciled at the same time.
+        rate_per_second: The rate of the reconciliations started and of the change sets created, shared by the
+            workers to stay under the CloudFormation API limits. Defaults to no limit.
+        dry_run: Whether the stacks to update are only reported.
+        repair_drift: Whether the drift of the stacks is detected and repaired.
+
+    Returns:
+      A list of ReconcileResult, in the order of the stack names.
+
+    Raises:
+      ClientError: Boto3 error raised while listing the stacks.
+    """
+    if restored_table_stacks is None:
+        restored_table_stacks = list_restored_table_stacks(get_client("cloudformation"))
+    rate_limiter = RateLimiter(rate_per_second=rate_per_second)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                reconcile_stack, stack_name, target_table_name, settings, rate_limiter, dry_run, repair_drift
+            )
+            for stack_name, target_table_name in sorted(restored_table_stacks.items())
+        ]
+    return [future.result() for future in futures]
+
+
+def format_reconcile_report(results: list, dry_run: bool = False):
+    """Formats the results of the reconciliation as text, with a line per stack and the totals."""
+    lines = []
+    for result in results:
+        updated = f" ({', '.join(result.updated_stacks)})" if result.updated_stacks else ""
+        lines.append(f"{result.status:<10} {result.stack_name}{updated}: {result.reason}")
+        lines.extend(f"  {repaired_drift}" for repaired_drift in result.repaired_drifts)
+    counts = {status: sum(result.status == status for result in results) for status in (RECONCILED, SKIPPED, FAILED)}
+    lines.append(
+        f"{'Would reconcile' if dry_run else 'Reconciled'} {counts[RECONCILED]}, skipped {counts[SKIPPED]}, "
+        f"failed {counts[FAILED]} of {len(results)} stacks"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """Reconciles the restored table stacks with their source tables.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv.
+
+    Returns:
+      The exit code, 1 if a stack failed.
+
+    Raises:
+    """
+    parser = argparse.ArgumentParser(description="Reconciles the restored table stacks with their source tables.")
+    parser.add_argument("--stack-name", action="append", help="Restored table stack to reconcile. Defaults to all.")
+    parser.add_argument("--settings", help="JSON file of the feature flags, overriding the environment ones.")
+    parser.add_argument("--max-workers", type=int, default=4, help="Number of stacks reconciled at the same time.")
+    parser.add_argument("--rate", type=float, help="Change sets created per second, across the workers.")
+    parser.add_argument("--dry-run", action="store_true", help="Reports the stacks to update, deploying nothing.")
+    parser.add_argument(
+        "--repair-drift", action="store_true", help="Detects the drift of the stacks and repairs it first."
+    )
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    settings = SyncSettings.from_environment()
+    if args.settings:
+        settings = settings.with_values(FileSettingsSource(args.settings).load())
+    restored_table_stacks = None
+    if args.stack_name:
+        restored_table_stacks = {}
+        for stack_name in args.stack_name:
+            match = RESTORED_TABLE_STACK_PATTERN.fullmatch(stack_name)
+            if match is None:
+                parser.error(f"{stack_name} isn't a restored table stack name")
+            restored_table_stacks[stack_name] = match.group("target_table_name")
+    results = reconcile_stacks(
+        settings=settings,
+        restored_table_stacks=restored_table_stacks,
+        max_workers=args.max_workers,
+        rate_per_second=args.rate,
+        dry_run=args.dry_run,
+        repair_drift=args.repair_drift,
+    )
+    if args.format == "json":
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(format_reconcile_report(results, dry_run=args.dry_run))
+    return 1 if any(result.status == FAILED for result in results) else 0
+
+
+class NotARestoredTable(Exception):
+    pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Recovery time report of a restore group, read from the sync timeline ledger.
+#
+# Usage:
+#   python -m table_sync.rto_report --sqlite sync-ledger.db --group 2023-02-08
+#   python -m table_sync.rto_report --dynamodb-table DynamoDB-Table-Sync-Ledger --group 2023-02-08 --format json
+#
+# The recovery time of a table runs from the restore event to the end of its last sync attempt, and is only
+# known for the tables whose last attempt succeeded.
+import argparse
+import json
+import math
+import sys
+from table_sync.sync_ledger import DynamoDBSyncLedger, SQLiteSyncLedger
+from table_sync.sync_metrics import SUCCESS_OUTCOME, TOTAL_PHASE
+
+REPORT_PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: list, percentile_rank: float):
+    """Returns the nearest rank percentile of a list of numbers, None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * percentile_rank / 100) - 1, 0)]
+
+
+def summarize(values: list):
+    summary = {f"p{rank}": percentile(values, rank) for rank in REPORT_PERCENTILES}
+    summary["max"] = max(values) if values else None
+    summary["count"] = len(values)
+    return summary
+
+
+def build_rto_report(records: list, top: int = 5):
+    """Builds the recovery time report of timeline records.
+
+    Args:
+        records: The TimelineRecord of the restore group, oldest sync first.
+        top: The number of slowest phases and tables to report.
+
+    Returns:
+      A dict with the recovery time percentiles, the slowest phases, the slowest tables and the tables whose
+      last sync attempt failed.
+
+    Raises:
+    """
+    last_records = {}
+    phase_durations = {}
+    for record in records:
+        last_records[record.target_table_name] = record
+        # The Total phase is always the slowest, it is covered by the recovery time.
+        for phase in record.phases:
+            if phase.get("phase") == TOTAL_PHASE:
+                continue
+            phase_durations.setdefault(phase.get("phase"), []).append(phase.get("duration_ms"))
+
+    synced = [
+        record
+        for record in last_records.values()
+        if record.status == SUCCESS_OUTCOME and record.recovery_time_ms is not None
+    ]
+    slowest_tables = sorted(synced, key=lambda record: record.recovery_time_ms, reverse=True)[:top]
+    phases = [{"phase": phase, **summarize(durations)} for phase, durations in phase_durations.items()]
+    return {
+        "tables": len(last_records),
+        "synced_tables": len(synced),
+        "rto_ms": summarize([record.recovery_time_ms for record in synced]),
+        "slowest_phases": sorted(phases, key=lambda phase: phase.get("p90"), reverse=True)[:top],
+        "slowest_tables": [
+            {
+                "target_table_name": record.target_table_name,
+                "rto_ms": record.recovery_time_ms,
+                "active_after_ms": record.active_ms - record.event_time_ms if record.active_ms else None,
+                "retry_count": record.retry_count,
+                "api_calls": sum(record.api_call_counts.values()),
+            }
+            for record in slowest_tables
+        ],
+        "failed_tables": sorted(
+            {
+                record.target_table_name: record.error_class
+                for record in last_records.values()
+                if record.status != SUCCESS_OUTCOME
+            }.items()
+        ),
+    }
+
+
+def format_rto_report(report: dict):
+    """Formats the recovery time report as text."""
+
+    def seconds(value_ms):
+        return "-" if value_ms is None else f"{value_ms / 1000:.1f}s"
+
+    rto = report.get("rto_ms")
+    lines = [
+        f"Tables: {report.get('tables')}, synced: {report.get('synced_tables')}",
+        "RTO: " + ", ".join(f"p{rank} {seconds(rto.get(f'p{rank}'))}" for rank in REPORT_PERCENTILES)
+        + f", max {seconds(rto.get('max'))}",
+        "Slowest phases:",
+    ]
+    for phase in report.get("slowest_phases"):
+        lines.append(
+            f"  {phase.get('phase')}: p50 {seconds(phase.get('p50'))}, p90 {seconds(phase.get('p90'))}, "
+            f"max {seconds(phase.get('max'))} ({phase.get('count')} runs)"
+        )
+    lines.append("Slowest tables:")
+    for table in report.get("slowest_tables"):
+        lines.append(
+            f"  {table.get('target_table_name')}: RTO {seconds(table.get('rto_ms'))}, "
+            f"ACTIVE after {seconds(table.get('active_after_ms'))}, {table.get('retry_count')} retries, "
+            f"{table.get('api_calls')} API calls"
+        )
+    if report.get("failed_tables"):
+        lines.append("Failed tables:")
+        for target_table_name, error_class in report.get("failed_tables"):
+            lines.append(f"  {target_table_name}: {error_class}")
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """Prints the recovery time report of a restore group.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv.
+
+    Returns:
+      The exit code.
+
+    Raises:
+    """
+    parser = argparse.ArgumentParser(description="Recovery time report of the restored table syncs.")
+    ledger_group = parser.add_mutually_exclusive_group(required=True)
+    ledger_group.add_argument("--sqlite", help="Path of the SQLite ledger.")
+    ledger_group.add_argument("--dynamodb-table", help="Name of the DynamoDB ledger table.")
+    parser.add_argument("--group", help="Restore group, the UTC day of the restore events. Defaults to all.")
+    parser.add_argument("--top", type=int, default=5, help="Number of slowest phases and tables to report.")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        ledger = SQLiteSyncLedger(args.sqlite)
+    else:
+        from table_sync.client_factory import get_client
+
+        ledger = DynamoDBSyncLedger(dynamodb_client=get_client("dynamodb"), table_name=args.dynamodb_table)
+    report = build_rto_report(ledger.query(restore_group=args.group), top=args.top)
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_rto_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
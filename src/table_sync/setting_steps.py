@@ -0,0 +1,243 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# The sequence of setting builders shared by the sync of a restored table and the reconciler.
+# Each builder reads a setting of the source table and adds it to the configuration of the restored table. The
+# handler deploys a change set after each step, the reconciler only keeps the configuration of the last one.
+from dataclasses import dataclass, replace
+from typing import Optional
+from aws_lambda_powertools import Logger
+from table_sync.cfn_yaml_template import RESTORED_TABLE_LOGICAL_ID
+from table_sync.client_factory import get_client
+from table_sync.payload_logging import bounded
+from table_sync.sync_metrics import discovery_phase
+from table_sync.sync_settings import SyncSettings
+from table_sync.sync_tracing import traced_phase
+from table_sync.table_config import TableConfig
+from table_sync.config import LOG_LEVEL, TRIGGERS_STACK_NAME, AUTO_SCALING_STACK_NAME
+
+LOG: Logger = Logger(service=__name__)
+LOG.setLevel(LOG_LEVEL)
+
+
+@dataclass(frozen=True)
+class SettingStep:
+    """The configuration of the restored table once a setting of its source table is added.
+
+    A step deployed in a sibling stack carries the stack name and its resources, the other steps update the
+    restored table stack.
+    """
+
+    __slots__ = ("setting", "change_set_suffix", "table_config", "sibling_stack_name", "cfn_resources")
+    setting: str
+    change_set_suffix: str
+    table_config: TableConfig
+    sibling_stack_name: Optional[str]
+    cfn_resources: tuple
+
+
+def build_setting_steps(
+    dynamodb_client: object,
+    table_config: TableConfig,
+    source_table_name: str,
+    source_table: dict,
+    source_table_tags: tuple,
+    settings: SyncSettings,
+    annotations: dict = None,
+):
+    """Builds the settings of a restored table from its source table, one step per setting that is set.
+
+    The builders run lazily, in the order of the change sets of the sync: a step is built once the previous one
+    is deployed, or its sibling stack started. The sibling stacks start as soon as they can: the auto scaling one
+    first, the triggers one once the stream step is deployed, as it reads the stream ARN of the restored table.
+
+    Args:
+        dynamodb_client: Authenticated DynamoDB boto3 client.
+        table_config: The base configuration of the restored table, as imported.
+        source_table_name: The name of the source table.
+        source_table: The describe_table response of the source table.
+        source_table_tags: The Tag tuple of the source table.
+        settings: The feature flags of the sync, with the overrides of the source table.
+        annotations: Annotations to put on the discovery subsegments.
+
+    Returns:
+      A generator of SettingStep.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    target_table_name = table_config.table_name
+
+    # With sibling stacks, the auto scaling resources only need the imported table, their stack goes first.
+    if settings.enable_sibling_stacks:
+        for step in build_auto_scaling_steps(
+            dynamodb_client, table_config, source_table_name, source_table, settings, annotations
+        ):
+            table_config = step.table_config
+            yield step
+
+    # Check if the tag settings need to be copied.
+    LOG.info(f"Is tag setting enabled : {settings.enable_tag_settings}")
+    if settings.enable_tag_settings and source_table_tags:
+        table_config = replace(table_config, tags=source_table_tags)
+        yield SettingStep("Tags", "Tags", table_config, None, ())
+
+    # Check if the DynamoDB table stream settings need to be copied.
+    LOG.info(f"Is DynamoDB stream setting enabled : {settings.enable_dynamodb_stream_settings}")
+    if settings.enable_dynamodb_stream_settings:
+        from table_sync.dynamodb_stream_settings import build_dynamodb_stream_template
+
+        with traced_phase(discovery_phase("Stream"), annotations):
+            stream_specification = build_dynamodb_stream_template(source_table_describe_response=source_table)
+        if stream_specification:
+            table_config = replace(table_config, stream_specification=stream_specification)
+            yield SettingStep("Stream", "Stream", table_config, None, ())
+
+    # Check if the DynamoDB Table AWS Lambda triggers need to be copied.
+    # With sibling stacks, the triggers are deployed in their own stack, so the restored table stream is
+    # referenced with its ARN instead of the logical name.
+    LOG.info(f"Is DynamoDB AWS Lambda trigger setting enabled : {settings.enable_dynamodb_lambda_triggers}")
+    if settings.enable_dynamodb_lambda_triggers:
+        from table_sync.dynamodb_stream_settings import build_dynamodb_stream_triggers
+
+        with traced_phase(discovery_phase("Triggers"), annotations):
+            if settings.enable_sibling_stacks:
+                target_table = dynamodb_client.describe_table(TableName=target_table_name)
+                restored_table_stream_arn = target_table.get("Table").get("LatestStreamArn", "")
+                # The restored table has no stream when the stream settings are skipped, the triggers have
+                # nothing to read from. Without sibling stacks, that's a table config without the Stream step.
+                if restored_table_stream_arn:
+                    triggers = build_dynamodb_stream_triggers(
+                        lambda_client=get_client("lambda"),
+                        source_table_describe_response=source_table,
+                        restored_table_stream_arn=restored_table_stream_arn,
+                    )
+                else:
+                    LOG.warning(f"{target_table_name} has no stream, its triggers are skipped.")
+                    triggers = None
+            elif table_config.stream_specification:
+                triggers = build_dynamodb_stream_triggers(
+                    lambda_client=get_client("lambda"),
+                    source_table_describe_response=source_table,
+                    restored_table_cfn_logical_name=RESTORED_TABLE_LOGICAL_ID,
+                )
+            else:
+                LOG.warning(f"{target_table_name} has no stream in its template, its triggers are skipped.")
+                triggers = None
+        if triggers:
+            table_config = replace(table_config, triggers=triggers)
+            if settings.enable_sibling_stacks:
+                sibling_stack_name = TRIGGERS_STACK_NAME.format(target_table_name=target_table_name)
+                yield SettingStep("Triggers", "Triggers", table_config, sibling_stack_name, triggers)
+            else:
+                yield SettingStep("Triggers", "Triggers", table_config, None, ())
+
+    # Check if the Kinesis stream settings need to be copied.
+    LOG.info(f"Is Kinesis stream setting enabled : {settings.enable_kinesis_settings}")
+    if settings.enable_kinesis_settings:
+        from table_sync.kinesis_stream_settings import build_kinesis_stream_template
+
+        with traced_phase(discovery_phase("Kinesis"), annotations):
+            kinesis_stream_specification = build_kinesis_stream_template(
+                dynamodb_client=dynamodb_client, source_table_name=source_table_name
+            )
+        if kinesis_stream_specification:
+            table_config = replace(table_config, kinesis_stream_specification=kinesis_stream_specification)
+            yield SettingStep("Kinesis", "Kinesis-Settings", table_config, None, ())
+
+    # Check if the PITR settings need to be copied.
+    LOG.info(f"Is PITR setting enabled : {settings.enable_pitr_settings}")
+    if settings.enable_pitr_settings:
+        from table_sync.pitr_settings import build_point_in_time_recovery_template
+
+        with traced_phase(discovery_phase("PITR"), annotations):
+            pitr_specification = build_point_in_time_recovery_template(
+                dynamodb_client=dynamodb_client, source_table_name=source_table_name
+            )
+        if pitr_specification:
+            table_config = replace(table_config, point_in_time_recovery_specification=pitr_specification)
+            yield SettingStep("PITR", "PITR-Settings", table_config, None, ())
+
+    # Check if the TTL settings need to be copied.
+    LOG.info(f"Is TTL setting enabled : {settings.enable_ttl_settings}")
+    if settings.enable_ttl_settings:
+        from table_sync.time_to_live_settings import build_dynamodb_ttl
+
+        with traced_phase(discovery_phase("TTL"), annotations):
+            ttl_specification = build_dynamodb_ttl(dynamodb_client=dynamodb_client, source_table_name=source_table_name)
+        if ttl_specification:
+            table_config = replace(table_config, time_to_live_specification=ttl_specification)
+            yield SettingStep("TTL", "TTL-Settings", table_config, None, ())
+
+    # Without sibling stacks, the auto scaling resources are the last update of the table stack.
+    if not settings.enable_sibling_stacks:
+        yield from build_auto_scaling_steps(
+            dynamodb_client, table_config, source_table_name, source_table, settings, annotations
+        )
+
+
+def build_auto_scaling_steps(
+    dynamodb_client: object,
+    table_config: TableConfig,
+    source_table_name: str,
+    source_table: dict,
+    settings: SyncSettings,
+    annotations: dict = None,
+):
+    """Builds the auto scaling settings of a restored table, as a step if the source table has any.
+
+    Args:
+        dynamodb_client: Authenticated DynamoDB boto3 client.
+        table_config: The configuration of the restored table.
+        source_table_name: The name of the source table.
+        source_table: The describe_table response of the source table.
+        settings: The feature flags of the sync, with the overrides of the source table.
+        annotations: Annotations to put on the discovery subsegment.
+
+    Returns:
+      A generator of SettingStep.
+
+    Raises:
+      ClientError: Boto3 error
+    """
+    target_table_name = table_config.table_name
+
+    # Check if the autoscaling settings need to be copied.
+    # The Scaling Targets and the Scaling Policies go to the table stack, or to their own stack.
+    LOG.info(f"Is auto scaling setting enabled : {settings.enable_auto_scaling_settings}")
+    if settings.enable_auto_scaling_settings:
+        from table_sync.auto_scaling_settings import build_dynamodb_auto_scaling
+
+        with traced_phase(discovery_phase("AutoScaling"), annotations):
+            scaling = build_dynamodb_auto_scaling(
+                dynamodb_client=dynamodb_client,
+                app_auto_scaling_client=get_client("application-autoscaling"),
+                source_table_name=source_table_name,
+                source_table=source_table,
+                target_table_name=target_table_name,
+            )
+        LOG.info("Scalable targets CFN resources: %s", bounded(scaling))
+        if scaling:
+            table_config = replace(table_config, scaling=scaling)
+            if settings.enable_sibling_stacks:
+                sibling_stack_name = AUTO_SCALING_STACK_NAME.format(target_table_name=target_table_name)
+                yield SettingStep("AutoScaling", "Scalable-Targets-Settings", table_config, sibling_stack_name, scaling)
+            else:
+                yield SettingStep("AutoScaling", "Scalable-Targets-Settings", table_config, None, ())
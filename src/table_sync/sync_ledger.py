@@ -0,0 +1,343 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Timeline ledger of the syncs, to reconstruct when each restored table became fully configured.
+# Every sync appends one record: the restore event time, the first SQS delivery, the time the table was seen
+# ACTIVE, the time each phase finished, the retry count, the API call counts and the final status.
+# The records are appended to DynamoDB in production and to SQLite locally, and read by the rto_report CLI.
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from aws_lambda_powertools import Logger
+from table_sync.client_factory import get_client
+from table_sync.config import SYNC_LEDGER_PATH, SYNC_LEDGER_TABLE
+from table_sync.event_decoder import RestoreRequest
+from table_sync.instrumentation import get_api_call_summary
+from table_sync.sync_metrics import READINESS_PHASE, SUCCESS_OUTCOME, get_phase_records
+
+LOG: Logger = Logger(service=__name__)
+# The record fields stored as JSON strings, both in SQLite and in DynamoDB.
+JSON_FIELDS = ("phases", "api_call_counts")
+_DEFAULT_SYNC_LEDGER = None
+
+
+@dataclass(frozen=True)
+class TimelineRecord:
+    """The timeline of one sync attempt of a restored table. The times are in milliseconds since the epoch.
+
+    The records of a restore group, by default the UTC day of the restore events, are stored together.
+    """
+
+    __slots__ = (
+        "restore_group",
+        "sync_id",
+        "event_id",
+        "source_table_name",
+        "target_table_name",
+        "event_time_ms",
+        "first_received_ms",
+        "active_ms",
+        "finished_ms",
+        "phases",
+        "retry_count",
+        "api_call_counts",
+        "status",
+        "error_class",
+    )
+    restore_group: str
+    sync_id: str
+    event_id: Optional[str]
+    source_table_name: str
+    target_table_name: str
+    event_time_ms: Optional[int]
+    first_received_ms: Optional[int]
+    active_ms: Optional[int]
+    finished_ms: int
+    phases: tuple
+    retry_count: int
+    api_call_counts: dict
+    status: str
+    error_class: Optional[str]
+
+    @classmethod
+    def fields(cls):
+        return cls.__slots__
+
+    def to_item(self):
+        """Returns the record as a flat dict, with the phases and the API call counts as JSON strings."""
+        item = {field: getattr(self, field) for field in self.fields()}
+        item["phases"] = json.dumps([dict(phase) for phase in self.phases], separators=(",", ":"))
+        item["api_call_counts"] = json.dumps(self.api_call_counts, separators=(",", ":"), sort_keys=True)
+        return item
+
+    @classmethod
+    def from_item(cls, item: dict):
+        values = {field: item.get(field) for field in cls.fields()}
+        values["phases"] = tuple(json.loads(values.get("phases") or "[]"))
+        values["api_call_counts"] = json.loads(values.get("api_call_counts") or "{}")
+        return cls(**values)
+
+    @property
+    def recovery_time_ms(self):
+        """The time from the restore event to the end of the sync, None without the event time."""
+        if self.event_time_ms is None:
+            return None
+        return self.finished_ms - self.event_time_ms
+
+
+class SQLiteSyncLedger:
+    """Appends the timeline records to a SQLite database. For local runs, the tests and the offline analysis."""
+
+    def __init__(self, path: str):
+        # sqlite3 is only needed by local runs, it isn't imported on the Lambda cold start.
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        columns = ", ".join(TimelineRecord.fields())
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS sync_timeline ({columns}, PRIMARY KEY (restore_group, sync_id))"
+        )
+        self._connection.commit()
+
+    def append(self, record: TimelineRecord):
+        """Appends a timeline record.
+
+        Args:
+            record: The timeline record of a sync attempt.
+
+        Returns:
+
+        Raises:
+          sqlite3.Error: The record couldn't be written.
+        """
+        item = record.to_item()
+        placeholders = ", ".join("?" for _ in item)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO sync_timeline ({', '.join(item)}) VALUES ({placeholders})",
+                list(item.values()),
+            )
+            self._connection.commit()
+
+    def query(self, restore_group: str = None):
+        """Reads the timeline records, oldest sync first.
+
+        Args:
+            restore_group: The restore group to read. Defaults to all the groups.
+
+        Returns:
+          A list of TimelineRecord.
+
+        Raises:
+          sqlite3.Error: The records couldn't be read.
+        """
+        columns = ", ".join(TimelineRecord.fields())
+        sql = f"SELECT {columns} FROM sync_timeline"
+        parameters = []
+        if restore_group is not None:
+            sql += " WHERE restore_group = ?"
+            parameters.append(restore_group)
+        with self._lock:
+            rows = self._connection.execute(f"{sql} ORDER BY finished_ms", parameters).fetchall()
+        return [TimelineRecord.from_item(dict(zip(TimelineRecord.fields(), row))) for row in rows]
+
+
+class DynamoDBSyncLedger:
+    """Appends the timeline records to a DynamoDB table keyed by restore_group and sync_id."""
+
+    def __init__(self, dynamodb_client: object, table_name: str):
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+
+    def append(self, record: TimelineRecord):
+        """Appends a timeline record.
+
+        Args:
+            record: The timeline record of a sync attempt.
+
+        Returns:
+
+        Raises:
+          ClientError: Boto3 error
+        """
+        self.dynamodb_client.put_item(TableName=self.table_name, Item=_to_attribute_values(record.to_item()))
+
+    def query(self, restore_group: str = None):
+        """Reads the timeline records, oldest sync first.
+
+        A restore group is read with a query, all the groups with a scan.
+
+        Args:
+            restore_group: The restore group to read. Defaults to all the groups.
+
+        Returns:
+          A list of TimelineRecord.
+
+        Raises:
+          ClientError: Boto3 error
+        """
+        if restore_group is None:
+            paginator = self.dynamodb_client.get_paginator("scan")
+            pages = paginator.paginate(TableName=self.table_name)
+        else:
+            paginator = self.dynamodb_client.get_paginator("query")
+            pages = paginator.paginate(
+                TableName=self.table_name,
+                KeyConditionExpression="restore_group = :restore_group",
+                ExpressionAttributeValues={":restore_group": {"S": restore_group}},
+            )
+        records = [
+            TimelineRecord.from_item(_from_attribute_values(item)) for page in pages for item in page.get("Items", [])
+        ]
+        return sorted(records, key=lambda record: record.finished_ms)
+
+
+def _to_attribute_values(item: dict):
+    attribute_values = {}
+    for key, value in item.items():
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            attribute_values[key] = {"S": str(value)}
+        else:
+            attribute_values[key] = {"N": str(value)}
+    return attribute_values
+
+
+def _from_attribute_values(attribute_values: dict):
+    item = {}
+    for key, attribute_value in attribute_values.items():
+        if "N" in attribute_value:
+            number = attribute_value.get("N")
+            item[key] = int(number) if number.lstrip("-").isdigit() else float(number)
+        else:
+            item[key] = attribute_value.get("S")
+    return item
+
+
+def get_default_sync_ledger():
+    """Gets the sync ledger configured for the function.
+
+    Args:
+
+    Returns:
+      A DynamoDBSyncLedger for the SYNC_LEDGER_TABLE table, a SQLiteSyncLedger for the SYNC_LEDGER_PATH
+      database, or None if no ledger is configured.
+
+    Raises:
+    """
+    global _DEFAULT_SYNC_LEDGER
+    if _DEFAULT_SYNC_LEDGER is None and SYNC_LEDGER_TABLE:
+        _DEFAULT_SYNC_LEDGER = DynamoDBSyncLedger(dynamodb_client=get_client("dynamodb"), table_name=SYNC_LEDGER_TABLE)
+    elif _DEFAULT_SYNC_LEDGER is None and SYNC_LEDGER_PATH:
+        _DEFAULT_SYNC_LEDGER = SQLiteSyncLedger(SYNC_LEDGER_PATH)
+    return _DEFAULT_SYNC_LEDGER
+
+
+def build_timeline_record(restore_request: RestoreRequest, status: str, error_class: str = None, now: int = None):
+    """Builds the timeline record of the current sync from its phases and its API calls.
+
+    Args:
+        restore_request: The decoded restore request.
+        status: The outcome of the sync, Success or Failure.
+        error_class: The class name of the error that failed the sync.
+        now: The sync completion time, in milliseconds since the epoch. Defaults to the current time.
+
+    Returns:
+      A TimelineRecord.
+
+    Raises:
+    """
+    if now is None:
+        now = int(time.time() * 1000)
+    phase_records = get_phase_records()
+    active_ms = next(
+        (
+            record.finished_ms
+            for record in phase_records
+            if record.phase == READINESS_PHASE and record.outcome == SUCCESS_OUTCOME
+        ),
+        None,
+    )
+    event_time = restore_request.event_time
+    event_time_ms = int(event_time.timestamp() * 1000) if event_time is not None else None
+    restore_day = event_time.astimezone(timezone.utc) if event_time is not None else None
+    if restore_day is None:
+        restore_day = datetime.fromtimestamp(now / 1000, timezone.utc)
+    # Every SQS delivery after the first one and every replay from the DLQ is a retry.
+    retry_count = max((restore_request.receive_count or 1) - 1, 0) + int(restore_request.replay_attempt or 0)
+    return TimelineRecord(
+        restore_group=restore_day.strftime("%Y-%m-%d"),
+        sync_id=f"{restore_request.target_table_name}#{now}",
+        event_id=restore_request.event_id,
+        source_table_name=restore_request.source_table_name,
+        target_table_name=restore_request.target_table_name,
+        event_time_ms=event_time_ms,
+        first_received_ms=restore_request.first_receive_timestamp,
+        active_ms=active_ms,
+        finished_ms=now,
+        phases=tuple(
+            {
+                "phase": record.phase,
+                "outcome": record.outcome,
+                "duration_ms": round(record.duration_ms, 3),
+                "finished_ms": record.finished_ms,
+            }
+            for record in phase_records
+        ),
+        retry_count=retry_count,
+        api_call_counts={operation: stats.get("calls") for operation, stats in get_api_call_summary().items()},
+        status=status,
+        error_class=error_class,
+    )
+
+
+def append_sync_timeline(restore_request: RestoreRequest, status: str, error_class: str = None, ledger=None):
+    """Appends the timeline record of the current sync to the ledger.
+
+    A ledger error is logged and doesn't fail the sync.
+
+    Args:
+        restore_request: The decoded restore request.
+        status: The outcome of the sync, Success or Failure.
+        error_class: The class name of the error that failed the sync.
+        ledger: The ledger to append to. Defaults to the ledger configured for the function.
+
+    Returns:
+      The appended TimelineRecord, None if no ledger is configured or the append failed.
+
+    Raises:
+    """
+    try:
+        if ledger is None:
+            ledger = get_default_sync_ledger()
+        if ledger is None:
+            return None
+        record = build_timeline_record(restore_request, status=status, error_class=error_class)
+        ledger.append(record)
+        return record
+    except Exception as error:
+        LOG.warning(f"Sync timeline not appended to the ledger: {error!r}")
+        return None
@@ -0,0 +1,158 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Embedded Metric Format metrics of the sync phases.
+# Every phase emits a PhaseLatency metric dimensioned by Phase and Outcome, so that CloudWatch can alarm on
+# the p99 of a single phase. The phases of the current invocation are also kept in memory for the logs.
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
+from table_sync.config import METRICS_NAMESPACE
+
+LOG: Logger = Logger(service=__name__)
+SUCCESS_OUTCOME = "Success"
+FAILURE_OUTCOME = "Failure"
+
+READINESS_PHASE = "Readiness"
+SOURCE_TABLE_DISCOVERY_PHASE = "Discovery.SourceTable"
+# Validation, serialization and, above the TemplateBody limit, upload of a rendered change set template.
+TEMPLATE_PREPARATION_PHASE = "TemplatePreparation"
+CHANGE_SET_CREATE_WAIT_PHASE = "ChangeSetCreateWait"
+CHANGE_SET_EXECUTE_WAIT_PHASE = "ChangeSetExecuteWait"
+TOTAL_PHASE = "Total"
+
+
+@dataclass(frozen=True)
+class PhaseRecord:
+    __slots__ = ("phase", "outcome", "duration_ms", "finished_ms")
+    phase: str
+    outcome: str
+    duration_ms: float
+    finished_ms: int
+
+
+_PHASE_RECORDS: list = []
+_LOCK = threading.Lock()
+
+
+def discovery_phase(builder_name: str):
+    return f"Discovery.{builder_name}"
+
+
+def reset_phase_records():
+    """Starts the phase record of a new invocation.
+
+    Args:
+
+    Returns:
+
+    Raises:
+    """
+    with _LOCK:
+        _PHASE_RECORDS.clear()
+
+
+def get_phase_records():
+    """Returns the phases recorded since the start of the invocation.
+
+    Args:
+
+    Returns:
+      A list of PhaseRecord, in the order the phases completed.
+
+    Raises:
+    """
+    with _LOCK:
+        return list(_PHASE_RECORDS)
+
+
+def record_phase(phase: str, duration_ms: float, outcome: str = SUCCESS_OUTCOME):
+    """Records a phase and emits its PhaseLatency metric.
+
+    Args:
+        phase: The phase name, e.g. ChangeSetCreateWait.
+        duration_ms: The phase duration in milliseconds.
+        outcome: Success or Failure.
+
+    Returns:
+
+    Raises:
+    """
+    with _LOCK:
+        _PHASE_RECORDS.append(
+            PhaseRecord(phase=phase, outcome=outcome, duration_ms=duration_ms, finished_ms=int(time.time() * 1000))
+        )
+    with single_metric(
+        name="PhaseLatency", unit=MetricUnit.Milliseconds, value=duration_ms, namespace=METRICS_NAMESPACE
+    ) as metric:
+        metric.add_dimension(name="Phase", value=phase)
+        metric.add_dimension(name="Outcome", value=outcome)
+
+
+@contextmanager
+def measure_phase(phase: str):
+    """Measures the code of a with block as a phase. The outcome is Failure if the block raises.
+
+    Args:
+        phase: The phase name, e.g. Readiness.
+
+    Returns:
+
+    Raises:
+    """
+    outcome = FAILURE_OUTCOME
+    start = time.perf_counter()
+    try:
+        yield
+        outcome = SUCCESS_OUTCOME
+    finally:
+        record_phase(phase, (time.perf_counter() - start) * 1000, outcome)
+
+
+def add_sync_lag_metrics(metrics: object, event_time: datetime = None, sent_timestamp: int = None, now=None):
+    """Adds the end-to-end lag of a sync to the invocation metrics.
+
+    EventLag is measured from the CloudTrail eventTime of the restore and QueueLag from the SQS SentTimestamp
+    of the message, both up to now.
+
+    Args:
+        metrics: The powertools Metrics of the invocation.
+        event_time: The CloudTrail eventTime of the restore request.
+        sent_timestamp: The SQS SentTimestamp of the message, in milliseconds since the epoch.
+        now: The sync completion time. Defaults to the current time.
+
+    Returns:
+
+    Raises:
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if event_time is not None:
+        metrics.add_metric(
+            name="EventLag", unit=MetricUnit.Milliseconds, value=(now - event_time).total_seconds() * 1000
+        )
+    if sent_timestamp is not None:
+        metrics.add_metric(
+            name="QueueLag", unit=MetricUnit.Milliseconds, value=now.timestamp() * 1000 - sent_timestamp
+        )
@@ -0,0 +1,547 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Offline plan of the sync of a restored table.
+#
+# Usage:
+#   python -m table_sync.sync_plan --source-table-file source-table.json --target-table-name Orders-Restored
+#   python -m table_sync.sync_plan --source-table-name Orders --target-table-name Orders-Restored \
+#       --inputs large-table.json --sqlite sync-ledger.db --output-dir plan --format json
+#
+# The plan runs the sync with clients answered locally, so nothing is deployed. The source table description
+# comes from a JSON file or a live describe_table, the other reads of the setting builders from recorded
+# responses, e.g. a cassette, and the change sets are kept in memory instead of being created. It reports the
+# change sets with their templates, the API calls the sync would make and its duration, estimated from the
+# phases of the past syncs in the ledger.
+import argparse
+import copy
+import io
+import json
+import logging
+import math
+import re
+import sys
+import threading
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import asdict, dataclass
+from table_sync.answering_client import create_answering_client
+from table_sync.client_factory import get_client, install_client_creator
+from table_sync.config import CFN_CREATE_CHANGE_SET_TYPE, CFN_IMPORT_CHANGE_SET_TYPE
+from table_sync.deploy_cfn_resources import CHANGE_SET_CREATE_WAITER_CONFIG, STACK_WAITER_CONFIG
+from table_sync.instrumentation import get_api_call_summary, reset_api_call_stats
+from table_sync.rto_report import percentile
+from table_sync.sync_ledger import DynamoDBSyncLedger, SQLiteSyncLedger
+from table_sync.sync_settings import FileSettingsSource, SyncSettings
+from table_sync.template_uploader import LocalDirectoryTemplateUploader
+from table_sync.sync_metrics import (
+    CHANGE_SET_CREATE_WAIT_PHASE,
+    CHANGE_SET_EXECUTE_WAIT_PHASE,
+    READINESS_PHASE,
+    SOURCE_TABLE_DISCOVERY_PHASE,
+    SUCCESS_OUTCOME,
+    TEMPLATE_PREPARATION_PHASE,
+    TOTAL_PHASE,
+    get_phase_records,
+    reset_phase_records,
+)
+
+# Typical phase durations of a sync, used until the ledger holds past syncs.
+DEFAULT_PHASE_DURATIONS_MS = {
+    READINESS_PHASE: 150.0,
+    SOURCE_TABLE_DISCOVERY_PHASE: 300.0,
+    TEMPLATE_PREPARATION_PHASE: 50.0,
+    CHANGE_SET_CREATE_WAIT_PHASE: 12000.0,
+    CHANGE_SET_EXECUTE_WAIT_PHASE: 30000.0,
+}
+DEFAULT_DISCOVERY_DURATION_MS = 300.0
+CHANGE_SET_PHASES = (TEMPLATE_PREPARATION_PHASE, CHANGE_SET_CREATE_WAIT_PHASE, CHANGE_SET_EXECUTE_WAIT_PHASE)
+# Responses of the reads missing from the recorded inputs: a source table without tags, Kinesis destinations,
+# PITR, TTL, triggers or auto scaling.
+DEFAULT_RESPONSES = {
+    "dynamodb.ListTagsOfResource": {"Tags": []},
+    "dynamodb.DescribeKinesisStreamingDestination": {"KinesisDataStreamDestinations": []},
+    "dynamodb.DescribeContinuousBackups": {
+        "ContinuousBackupsDescription": {
+            "ContinuousBackupsStatus": "ENABLED",
+            "PointInTimeRecoveryDescription": {"PointInTimeRecoveryStatus": "DISABLED"},
+        }
+    },
+    "dynamodb.DescribeTimeToLive": {"TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}},
+    "lambda.ListEventSourceMappings": {"EventSourceMappings": []},
+    "application-auto-scaling.DescribeScalableTargets": {"ScalableTargets": []},
+    "application-auto-scaling.DescribeScalingPolicies": {"ScalingPolicies": []},
+}
+# The parameters identifying the resource of a read. A recorded response answers the reads of the same resource.
+MATCHED_PARAMS = (
+    "TableName",
+    "ResourceArn",
+    "EventSourceArn",
+    "ServiceNamespace",
+    "ResourceId",
+    "ResourceIds",
+    "ScalableDimension",
+    "Marker",
+    "NextToken",
+)
+# The recorded responses may come from another account, or have their account ids replaced.
+ACCOUNT_ID_PATTERN = re.compile(r"(?<![0-9])[0-9]{12}(?![0-9])")
+
+
+@dataclass(frozen=True)
+class TimingModel:
+    """The typical duration of each phase of a sync, the p50 of the past syncs or the default durations."""
+
+    __slots__ = ("phase_durations_ms", "source")
+    phase_durations_ms: dict
+    source: str
+
+    @classmethod
+    def from_defaults(cls):
+        return cls(phase_durations_ms=dict(DEFAULT_PHASE_DURATIONS_MS), source="default durations")
+
+    @classmethod
+    def from_timeline_records(cls, records: list):
+        """Builds the timing model of the successful syncs of the ledger.
+
+        Args:
+            records: The TimelineRecord of the past syncs.
+
+        Returns:
+          A TimingModel with the p50 duration of each phase, the default durations without successful syncs.
+
+        Raises:
+        """
+        durations = {}
+        synced = [record for record in records if record.status == SUCCESS_OUTCOME]
+        for record in synced:
+            for phase in record.phases:
+                if phase.get("outcome", SUCCESS_OUTCOME) == SUCCESS_OUTCOME:
+                    durations.setdefault(phase.get("phase"), []).append(phase.get("duration_ms"))
+        if not synced:
+            return cls.from_defaults()
+        return cls(
+            phase_durations_ms={
+                **DEFAULT_PHASE_DURATIONS_MS,
+                **{phase: percentile(values, 50) for phase, values in durations.items()},
+            },
+            source=f"p50 of {len(synced)} past syncs",
+        )
+
+    def duration_ms(self, phase: str):
+        return self.phase_durations_ms.get(phase, DEFAULT_DISCOVERY_DURATION_MS)
+
+
+class OfflineAnswers:
+    """Answers the calls of a planned sync.
+
+    The source and the restored table are described from the source table description, the other reads are
+    answered from the recorded inputs, or with the default responses. The change sets are kept in memory
+    with their templates, and the stacks move to the complete status of their last executed change set.
+    """
+
+    def __init__(self, source_table: dict, target_table_name: str, inputs: dict = None):
+        self.source_table = source_table
+        self.source_table_name = source_table.get("Table").get("TableName")
+        self.target_table = restored_table_description(source_table, target_table_name)
+        self.target_table_name = target_table_name
+        self.inputs = inputs or {}
+        self.change_sets = []
+        self.stacks = {}
+        self.uploads = {}
+        self.defaulted_inputs = set()
+        self._lock = threading.Lock()
+        self._handlers = {
+            "dynamodb.DescribeTable": self._describe_table,
+            "cloudformation.DescribeStacks": self._describe_stacks,
+            "cloudformation.CreateChangeSet": self._create_change_set,
+            "cloudformation.DescribeChangeSet": self._describe_change_set,
+            "cloudformation.ExecuteChangeSet": self._execute_change_set,
+            "s3.PutObject": self._put_object,
+        }
+
+    def create_client(self, service_name: str):
+        return create_answering_client(service_name, self.answer)
+
+    def answer(self, operation: str, params: dict):
+        # The sibling stacks are deployed from parallel threads.
+        with self._lock:
+            handler = self._handlers.get(operation)
+            if handler is not None:
+                return handler(params)
+            return 200, copy.deepcopy(self._recorded_response(operation, params))
+
+    def _recorded_response(self, operation: str, params: dict):
+        identity = _identity(params)
+        for recorded_params, response in self.inputs.get(operation, []):
+            if recorded_params is None or _identity(recorded_params) == identity:
+                return response
+        if operation in DEFAULT_RESPONSES:
+            self.defaulted_inputs.add(operation)
+            return DEFAULT_RESPONSES.get(operation)
+        raise MissingPlanInput(f"No recorded response of {operation} {identity}, it can't be planned offline.")
+
+    def _describe_table(self, params: dict):
+        table_name = params.get("TableName")
+        if table_name == self.source_table_name:
+            return 200, copy.deepcopy(self.source_table)
+        if table_name == self.target_table_name:
+            return 200, copy.deepcopy(self.target_table)
+        return 200, copy.deepcopy(self._recorded_response("dynamodb.DescribeTable", params))
+
+    def _describe_stacks(self, params: dict):
+        stack_name = params.get("StackName")
+        if stack_name not in self.stacks:
+            return 400, {"Error": {"Code": "ValidationError", "Message": f"Stack with id {stack_name} does not exist"}}
+        return 200, {"Stacks": [{"StackName": stack_name, "StackStatus": self.stacks.get(stack_name)}]}
+
+    def _create_change_set(self, params: dict):
+        stack_name = params.get("StackName")
+        if "TemplateBody" in params:
+            template_body = params.get("TemplateBody")
+        else:
+            template_url = params.get("TemplateURL")
+            template_body = next(body for key, body in self.uploads.items() if template_url.endswith(f"/{key}"))
+        change_set_id = f"{stack_name}/{params.get('ChangeSetName')}/{len(self.change_sets) + 1}"
+        self.change_sets.append(
+            {
+                "id": change_set_id,
+                "stack_name": stack_name,
+                "change_set_name": params.get("ChangeSetName"),
+                "change_set_type": params.get("ChangeSetType"),
+                "resources_to_import": params.get("ResourcesToImport", []),
+                "template_size_bytes": len(template_body.encode("utf-8")),
+                "template_url": params.get("TemplateURL"),
+                "template": json.loads(template_body),
+            }
+        )
+        if params.get("ChangeSetType") in (CFN_CREATE_CHANGE_SET_TYPE, CFN_IMPORT_CHANGE_SET_TYPE):
+            self.stacks.setdefault(stack_name, "REVIEW_IN_PROGRESS")
+        return 200, {"Id": change_set_id, "StackId": stack_name}
+
+    def _change_set(self, change_set_name: str):
+        return next(change_set for change_set in self.change_sets if change_set.get("id") == change_set_name)
+
+    def _describe_change_set(self, params: dict):
+        change_set = self._change_set(params.get("ChangeSetName"))
+        return 200, {
+            "ChangeSetId": change_set.get("id"),
+            "ChangeSetName": change_set.get("change_set_name"),
+            "StackName": change_set.get("stack_name"),
+            "Status": "CREATE_COMPLETE",
+            "ExecutionStatus": "AVAILABLE",
+        }
+
+    def _execute_change_set(self, params: dict):
+        change_set = self._change_set(params.get("ChangeSetName"))
+        self.stacks[change_set.get("stack_name")] = f"{change_set.get('change_set_type')}_COMPLETE"
+        return 200, {}
+
+    def _put_object(self, params: dict):
+        body = params.get("Body")
+        self.uploads[f"{params.get('Bucket')}/{params.get('Key')}"] = (
+            body.decode("utf-8") if isinstance(body, bytes) else body
+        )
+        return 200, {}
+
+
+def _identity(params: dict):
+    matched = {name: params.get(name) for name in MATCHED_PARAMS if name in params}
+    return ACCOUNT_ID_PATTERN.sub("<account>", json.dumps(matched, sort_keys=True))
+
+
+def restored_table_description(source_table: dict, target_table_name: str):
+    """Returns the describe_table response of the restored table, an ACTIVE copy of the source table."""
+    table = copy.deepcopy(source_table.get("Table"))
+    source_table_name = table.get("TableName")
+    table.update(TableName=target_table_name, TableStatus="ACTIVE")
+    for key in ("TableArn", "LatestStreamArn"):
+        if key in table:
+            table[key] = table.get(key).replace(f":table/{source_table_name}", f":table/{target_table_name}")
+    return {"Table": table}
+
+
+def load_plan_inputs(path: str):
+    """Loads the recorded responses of the reads of a sync.
+
+    Args:
+        path: A JSON file, either a cassette recorded by tests/emulator/cassette.py, or an object of the
+            responses by <service>.<Operation> name, e.g. {"dynamodb.DescribeTimeToLive": {...}}. A response
+            of the object answers the reads of every resource.
+
+    Returns:
+      A dict of the (params, response) pairs by operation. The params are None when any resource matches.
+
+    Raises:
+    """
+    with open(path) as inputs_file:
+        recorded = json.load(inputs_file)
+    inputs = {}
+    if "interactions" in recorded:
+        for interaction in recorded.get("interactions"):
+            if interaction.get("status_code", 200) < 300:
+                inputs.setdefault(interaction.get("operation"), []).append(
+                    (interaction.get("params"), interaction.get("response"))
+                )
+        return inputs
+    return {operation: [(None, response)] for operation, response in recorded.items()}
+
+
+def waiter_polls(duration_ms: float, waiter_config: dict):
+    """Returns the number of polls of a waiter to see a status change taking duration_ms."""
+    polls = 1 + math.ceil(duration_ms / 1000 / waiter_config.get("Delay"))
+    return min(polls, waiter_config.get("MaxAttempts"))
+
+
+@contextmanager
+def _quiet():
+    # The plan output would be lost among the logs and the metrics of the sync.
+    logging.disable(logging.CRITICAL)
+    try:
+        with redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def build_sync_plan(
+    source_table: dict,
+    target_table_name: str,
+    inputs: dict = None,
+    settings: SyncSettings = None,
+    timing_model: TimingModel = None,
+):
+    """Plans the sync of a restored table without deploying anything.
+
+    Args:
+        source_table: The describe_table response of the source table.
+        target_table_name: The name of the restored table.
+        inputs: The recorded responses of the reads, as returned by load_plan_inputs.
+        settings: The feature flags of the sync. Defaults to the environment ones.
+        timing_model: The phase durations of the estimate. Defaults to the default durations.
+
+    Returns:
+      A dict with the change sets in order with their templates, the last template of each stack, the
+      predicted API calls, the estimated duration and the reads answered with a default response.
+
+    Raises:
+      ClientError: A read of the sync failed.
+      MissingPlanInput: A read has neither a recorded nor a default response.
+      TemplateTooLarge: A template is above the TemplateBody limit and no template bucket is configured.
+      TemplateValidationError: A resource property doesn't match its resource schema.
+    """
+    from table_sync.app import sync_restored_table
+    from table_sync.event_decoder import RestoreRequest
+
+    if settings is None:
+        settings = SyncSettings.from_environment()
+    if timing_model is None:
+        timing_model = TimingModel.from_defaults()
+    answers = OfflineAnswers(source_table=source_table, target_table_name=target_table_name, inputs=inputs)
+    restore_request = RestoreRequest(
+        message_id="sync-plan",
+        event_id=None,
+        event_time=None,
+        sent_timestamp=None,
+        first_receive_timestamp=None,
+        receive_count=None,
+        replay_attempt=None,
+        source_table_name=answers.source_table_name,
+        target_table_name=target_table_name,
+        global_secondary_indexes=None,
+        local_secondary_indexes=None,
+    )
+    reset_phase_records()
+    reset_api_call_stats()
+    # The sibling stacks are deployed in order, so that the change sets are listed in a deterministic order.
+    with install_client_creator(answers.create_client), _quiet():
+        sync_restored_table(restore_request=restore_request, settings=settings, sequential_sibling_stacks=True)
+    change_sets = answers.change_sets
+    phases = [record.phase for record in get_phase_records()]
+
+    # The waits of the offline sync settle at the first poll, the ones of a real sync last their typical time.
+    api_calls = {operation: stats.get("calls") for operation, stats in get_api_call_summary().items()}
+    if change_sets:
+        create_polls = waiter_polls(
+            timing_model.duration_ms(CHANGE_SET_CREATE_WAIT_PHASE), CHANGE_SET_CREATE_WAITER_CONFIG
+        )
+        execute_polls = waiter_polls(timing_model.duration_ms(CHANGE_SET_EXECUTE_WAIT_PHASE), STACK_WAITER_CONFIG)
+        api_calls["cloudformation.DescribeChangeSet"] += len(change_sets) * (create_polls - 1)
+        api_calls["cloudformation.DescribeStacks"] += len(change_sets) * (execute_polls - 1)
+
+    # The change sets of the table stack are deployed one after the other. A sibling stack starts once the
+    # table stack change sets before it are done, and runs alongside the next ones.
+    change_set_ms = sum(timing_model.duration_ms(phase) for phase in CHANGE_SET_PHASES)
+    table_stack_name = change_sets[0].get("stack_name") if change_sets else None
+    table_stack_ms = 0.0
+    sibling_stack_durations_ms = {}
+    sibling_stack_ends_ms = {}
+    for change_set in change_sets:
+        stack_name = change_set.get("stack_name")
+        if stack_name == table_stack_name:
+            table_stack_ms += change_set_ms
+            continue
+        sibling_stack_durations_ms[stack_name] = sibling_stack_durations_ms.get(stack_name, 0.0) + change_set_ms
+        sibling_stack_ends_ms[stack_name] = sibling_stack_ends_ms.get(stack_name, table_stack_ms) + change_set_ms
+    discovery_ms = sum(
+        timing_model.duration_ms(phase) for phase in phases if phase not in CHANGE_SET_PHASES and phase != TOTAL_PHASE
+    )
+    sibling_stacks_ms = max(sibling_stack_durations_ms.values(), default=0.0)
+    deployment_ms = max([table_stack_ms, *sibling_stack_ends_ms.values()])
+    return {
+        "source_table_name": answers.source_table_name,
+        "target_table_name": target_table_name,
+        "settings": asdict(settings),
+        "change_sets": [
+            {key: value for key, value in change_set.items() if key != "id"} for change_set in change_sets
+        ],
+        "templates": {change_set.get("stack_name"): change_set.get("template") for change_set in change_sets},
+        "api_calls": api_calls,
+        "estimated_duration_ms": {
+            "total": round(discovery_ms + deployment_ms, 1),
+            "discovery": round(discovery_ms, 1),
+            "table_stack": round(table_stack_ms, 1),
+            "sibling_stacks": round(sibling_stacks_ms, 1),
+        },
+        "timing_model": timing_model.source,
+        "defaulted_inputs": sorted(answers.defaulted_inputs),
+    }
+
+
+def write_plan_templates(plan: dict, directory: str):
+    """Writes the template of each change set, and the last template of each stack, to a directory.
+
+    Args:
+        plan: The plan returned by build_sync_plan.
+        directory: The output directory.
+
+    Returns:
+      The file URLs of the written templates.
+
+    Raises:
+    """
+    uploader = LocalDirectoryTemplateUploader(directory)
+    urls = []
+    for index, change_set in enumerate(plan.get("change_sets"), start=1):
+        key = f"{change_set.get('stack_name')}/{index:02d}-{change_set.get('change_set_name')}.json"
+        urls.append(uploader.upload(key, json.dumps(change_set.get("template"), indent=2)))
+    for stack_name, template in plan.get("templates").items():
+        urls.append(uploader.upload(f"{stack_name}.json", json.dumps(template, indent=2)))
+    return urls
+
+
+def format_sync_plan(plan: dict):
+    """Formats the plan as text, with the last template of each stack."""
+
+    def seconds(value_ms):
+        return f"{value_ms / 1000:.1f}s"
+
+    duration = plan.get("estimated_duration_ms")
+    lines = [f"Sync of {plan.get('target_table_name')} from {plan.get('source_table_name')}", "Change sets:"]
+    for index, change_set in enumerate(plan.get("change_sets"), start=1):
+        resources = len(change_set.get("template").get("Resources", {}))
+        lines.append(
+            f"  {index}. {change_set.get('change_set_type')} {change_set.get('stack_name')} "
+            f"{change_set.get('change_set_name')}: {resources} resources, {change_set.get('template_size_bytes')} bytes"
+        )
+    lines.append("API calls:")
+    lines.extend(f"  {operation}: {calls}" for operation, calls in plan.get("api_calls").items())
+    lines.append(
+        f"Estimated duration: {seconds(duration.get('total'))} (discovery {seconds(duration.get('discovery'))}, "
+        f"table stack {seconds(duration.get('table_stack'))}, "
+        f"sibling stacks {seconds(duration.get('sibling_stacks'))}) from the {plan.get('timing_model')}"
+    )
+    if plan.get("defaulted_inputs"):
+        lines.append(f"Reads answered with default responses: {', '.join(plan.get('defaulted_inputs'))}")
+    for stack_name, template in plan.get("templates").items():
+        lines.append(f"Template of {stack_name}:")
+        lines.append(json.dumps(template, indent=2))
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """Prints the plan of the sync of a restored table.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv.
+
+    Returns:
+      The exit code, 1 if the sync would fail.
+
+    Raises:
+    """
+    parser = argparse.ArgumentParser(description="Plans the sync of a restored table, deploying nothing.")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--source-table-file", help="JSON file of the describe_table response of the table.")
+    source_group.add_argument("--source-table-name", help="Name of the source table, described live.")
+    parser.add_argument("--target-table-name", required=True, help="Name of the restored table.")
+    parser.add_argument("--inputs", help="Cassette or JSON object of the recorded responses of the reads.")
+    parser.add_argument("--settings", help="JSON file of the feature flags, overriding the environment ones.")
+    ledger_group = parser.add_mutually_exclusive_group()
+    ledger_group.add_argument("--sqlite", help="Path of the SQLite ledger of the past syncs.")
+    ledger_group.add_argument("--dynamodb-table", help="Name of the DynamoDB ledger table of the past syncs.")
+    parser.add_argument("--group", help="Restore group of the past syncs. Defaults to all.")
+    parser.add_argument("--output-dir", help="Directory to write the templates to.")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    if args.source_table_file:
+        with open(args.source_table_file) as source_table_file:
+            source_table = json.load(source_table_file)
+        if "Table" not in source_table:
+            source_table = {"Table": source_table}
+    else:
+        source_table = get_client("dynamodb").describe_table(TableName=args.source_table_name)
+    settings = SyncSettings.from_environment()
+    if args.settings:
+        settings = settings.with_values(FileSettingsSource(args.settings).load())
+    timing_model = TimingModel.from_defaults()
+    if args.sqlite or args.dynamodb_table:
+        if args.sqlite:
+            ledger = SQLiteSyncLedger(args.sqlite)
+        else:
+            ledger = DynamoDBSyncLedger(dynamodb_client=get_client("dynamodb"), table_name=args.dynamodb_table)
+        timing_model = TimingModel.from_timeline_records(ledger.query(restore_group=args.group))
+
+    try:
+        plan = build_sync_plan(
+            source_table=source_table,
+            target_table_name=args.target_table_name,
+            inputs=load_plan_inputs(args.inputs) if args.inputs else None,
+            settings=settings,
+            timing_model=timing_model,
+        )
+    except Exception as error:
+        print(f"The sync would fail: {type(error).__name__}: {error}", file=sys.stderr)
+        return 1
+    if args.output_dir:
+        write_plan_templates(plan, args.output_dir)
+    if args.format == "json":
+        print(json.dumps(plan, indent=2, default=str))
+    else:
+        print(format_sync_plan(plan))
+    return 0
+
+
+class MissingPlanInput(Exception):
+    pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
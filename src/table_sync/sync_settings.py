@@ -0,0 +1,245 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Feature flags of the table sync.
+# The environment variables give the defaults. A JSON file and an SSM parameter can override them, they are
+# read again once their TTL expires so the flags change without redeploying the function. A source table
+# can also skip phases with a tag, e.g. table-sync:skip=autoscaling,triggers.
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from aws_lambda_powertools import Logger
+from table_sync.config import (
+    ENABLE_TAG_SETTINGS,
+    ENABLE_KINESIS_SETTINGS,
+    ENABLE_DYNAMODB_STREAM_SETTINGS,
+    ENABLE_TTL_SETTINGS,
+    ENABLE_PITR_SETTINGS,
+    ENABLE_AUTO_SCALING_SETTINGS,
+    ENABLE_DYNAMODB_LAMBDA_TRIGGERS,
+    ENABLE_SIBLING_STACKS,
+    CONFIG_FILE,
+    CONFIG_PARAMETER_NAME,
+    CONFIG_TTL_SECONDS,
+)
+
+LOG: Logger = Logger(service=__name__)
+SKIP_TAG_KEY = "table-sync:skip"
+# DynamoDB tag values don't allow commas, so the phases can also be separated with spaces, + or /.
+SKIP_TAG_SEPARATORS = re.compile(r"[,+/\s]+")
+# Phase names accepted in the skip tag and the flag they turn off.
+SKIP_PHASES = {
+    "tags": "enable_tag_settings",
+    "kinesis": "enable_kinesis_settings",
+    "stream": "enable_dynamodb_stream_settings",
+    "ttl": "enable_ttl_settings",
+    "pitr": "enable_pitr_settings",
+    "autoscaling": "enable_auto_scaling_settings",
+    "triggers": "enable_dynamodb_lambda_triggers",
+}
+
+
+@dataclass(frozen=True)
+class SyncSettings:
+    """The feature flags of a sync. Each flag is named after its environment variable, lower cased."""
+
+    __slots__ = (
+        "enable_tag_settings",
+        "enable_kinesis_settings",
+        "enable_dynamodb_stream_settings",
+        "enable_ttl_settings",
+        "enable_pitr_settings",
+        "enable_auto_scaling_settings",
+        "enable_dynamodb_lambda_triggers",
+        "enable_sibling_stacks",
+    )
+    enable_tag_settings: bool
+    enable_kinesis_settings: bool
+    enable_dynamodb_stream_settings: bool
+    enable_ttl_settings: bool
+    enable_pitr_settings: bool
+    enable_auto_scaling_settings: bool
+    enable_dynamodb_lambda_triggers: bool
+    enable_sibling_stacks: bool
+
+    @classmethod
+    def from_environment(cls):
+        return cls(
+            enable_tag_settings=ENABLE_TAG_SETTINGS,
+            enable_kinesis_settings=ENABLE_KINESIS_SETTINGS,
+            enable_dynamodb_stream_settings=ENABLE_DYNAMODB_STREAM_SETTINGS,
+            enable_ttl_settings=ENABLE_TTL_SETTINGS,
+            enable_pitr_settings=ENABLE_PITR_SETTINGS,
+            enable_auto_scaling_settings=ENABLE_AUTO_SCALING_SETTINGS,
+            enable_dynamodb_lambda_triggers=ENABLE_DYNAMODB_LAMBDA_TRIGGERS,
+            enable_sibling_stacks=ENABLE_SIBLING_STACKS,
+        )
+
+    def with_values(self, values: dict):
+        """Overrides the flags with the values of a settings source.
+
+        Args:
+            values: A dict of flags by environment variable name, e.g. {"ENABLE_TTL_SETTINGS": false}. The
+                values are booleans or "true"/"false" strings. Unknown names are ignored.
+
+        Returns:
+          A new SyncSettings.
+
+        Raises:
+        """
+        changes = {}
+        for field in fields(self):
+            value = values.get(field.name.upper())
+            if value is not None:
+                changes[field.name] = value if isinstance(value, bool) else str(value).lower() == "true"
+        return replace(self, **changes)
+
+
+class FileSettingsSource:
+    """Reads the flags from a JSON object file, e.g. one shipped in a Lambda layer or an EFS mount."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        with open(self.path) as settings_file:
+            return json.load(settings_file)
+
+
+class ParameterStoreSettingsSource:
+    """Reads the flags from an SSM parameter holding a JSON object. A missing parameter overrides nothing."""
+
+    def __init__(self, ssm_client: object, parameter_name: str):
+        self.ssm_client = ssm_client
+        self.parameter_name = parameter_name
+
+    def load(self):
+        try:
+            response = self.ssm_client.get_parameter(Name=self.parameter_name)
+        except self.ssm_client.exceptions.ParameterNotFound:
+            LOG.debug(f"Settings parameter {self.parameter_name} not found")
+            return {}
+        return json.loads(response.get("Parameter").get("Value"))
+
+
+class SyncSettingsProvider:
+    """Caches the flags built from the defaults and the settings sources for ttl_seconds.
+
+    The sources are read in order, the last one wins. If a source can't be read, the previous flags are kept
+    until the next refresh, or the defaults if the flags were never loaded.
+    """
+
+    def __init__(
+        self,
+        defaults: SyncSettings,
+        sources: tuple = (),
+        ttl_seconds: float = CONFIG_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.defaults = defaults
+        self.sources = tuple(sources)
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._settings = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the current flags, reading the sources again if the TTL expired.
+
+        Args:
+
+        Returns:
+          A SyncSettings.
+
+        Raises:
+        """
+        if self._settings is None or self.clock() >= self._expires_at:
+            with self._lock:
+                if self._settings is None or self.clock() >= self._expires_at:
+                    self._settings = self._load()
+                    self._expires_at = self.clock() + self.ttl_seconds
+        return self._settings
+
+    def _load(self):
+        values = {}
+        for source in self.sources:
+            try:
+                values.update(source.load())
+            except Exception as error:
+                LOG.warning(f"Unable to read the settings from {type(source).__name__}: {error!r}")
+                return self._settings or self.defaults
+        settings = self.defaults.with_values(values)
+        if settings != self._settings:
+            LOG.info(f"Sync settings: {settings}")
+        return settings
+
+
+_DEFAULT_PROVIDER = None
+
+
+def get_sync_settings():
+    """Returns the flags of the default provider, built on first use from the CONFIG_* environment variables.
+
+    Args:
+
+    Returns:
+      A SyncSettings.
+
+    Raises:
+    """
+    global _DEFAULT_PROVIDER
+    if _DEFAULT_PROVIDER is None:
+        sources = []
+        if CONFIG_FILE:
+            sources.append(FileSettingsSource(CONFIG_FILE))
+        if CONFIG_PARAMETER_NAME:
+            from table_sync.client_factory import get_client
+
+            sources.append(ParameterStoreSettingsSource(get_client("ssm"), CONFIG_PARAMETER_NAME))
+        _DEFAULT_PROVIDER = SyncSettingsProvider(defaults=SyncSettings.from_environment(), sources=sources)
+    return _DEFAULT_PROVIDER.get()
+
+
+def apply_table_overrides(settings: SyncSettings, tags: tuple):
+    """Turns off the phases that the source table skips with its table-sync:skip tag, e.g. autoscaling+triggers.
+
+    Args:
+        settings: The flags of the sync.
+        tags: The Tag items of the source table.
+
+    Returns:
+      The settings if the table skips nothing, new SyncSettings otherwise.
+
+    Raises:
+    """
+    skip_tag = next((tag for tag in tags if tag.key == SKIP_TAG_KEY), None)
+    if skip_tag is None:
+        return settings
+    changes = {}
+    for phase in SKIP_TAG_SEPARATORS.split(skip_tag.value.lower()):
+        if phase in SKIP_PHASES:
+            changes[SKIP_PHASES[phase]] = False
+        elif phase:
+            LOG.warning(f"Unknown phase in the {SKIP_TAG_KEY} tag: {phase}")
+    LOG.info(f"Phases skipped by the source table tag: {sorted(changes)}")
+    return replace(settings, **changes)
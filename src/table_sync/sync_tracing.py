@@ -0,0 +1,89 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# X-Ray subsegments of the sync phases.
+# The handler segment covers the whole sync, the subsegments tell the setting builders apart from the
+# change set stages, and their annotations make the traces searchable by table, change set type and status.
+from contextlib import contextmanager
+from aws_lambda_powertools import Tracer
+from table_sync.sync_metrics import measure_phase
+
+TRACER: Tracer = Tracer(service="table_sync")
+
+TARGET_TABLE_ANNOTATION = "target_table"
+CHANGE_SET_TYPE_ANNOTATION = "change_set_type"
+CFN_STATUS_ANNOTATION = "cfn_status"
+POLL_COUNT_ANNOTATION = "poll_count"
+
+
+@contextmanager
+def trace_subsegment(name: str, annotations: dict = None):
+    """Traces the code of a with block as an X-Ray subsegment of the current segment.
+
+    The yielded subsegment takes annotations known only once the block ran, e.g. the CloudFormation status.
+    It is a no-op subsegment when tracing is disabled.
+
+    Args:
+        name: The subsegment name, e.g. ChangeSetCreate.
+        annotations: Annotations to put on the subsegment when it starts.
+
+    Returns:
+
+    Raises:
+    """
+    with TRACER.provider.in_subsegment(f"## {name}") as subsegment:
+        for key, value in (annotations or {}).items():
+            put_annotation(subsegment, key, value)
+        yield subsegment
+
+
+def put_annotation(subsegment: object, key: str, value):
+    """Puts an annotation on a subsegment, skipping empty values and missing subsegments.
+
+    The subsegment is missing when the X-Ray context isn't set, e.g. in a thread started outside of Lambda.
+
+    Args:
+        subsegment: The subsegment yielded by trace_subsegment.
+        key: The annotation key, letters, numbers and underscores only.
+        value: A string, number or boolean.
+
+    Returns:
+
+    Raises:
+    """
+    if subsegment is None or value is None or value == "":
+        return
+    subsegment.put_annotation(key, value)
+
+
+@contextmanager
+def traced_phase(phase: str, annotations: dict = None):
+    """Measures the code of a with block as a phase and traces it as a subsegment of the same name.
+
+    Args:
+        phase: The phase name, e.g. Discovery.TTL.
+        annotations: Annotations to put on the subsegment when it starts.
+
+    Returns:
+
+    Raises:
+    """
+    with measure_phase(phase), trace_subsegment(phase, annotations) as subsegment:
+        yield subsegment
@@ -0,0 +1,385 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from table_sync.cfn_projection import DYNAMODB_TABLE_TYPE, project_cfn_property
+
+
+class FrozenMapping(tuple):
+    """An immutable, hashable mapping kept as (key, value) pairs sorted by key.
+
+    It holds the CFN property blocks that the table sync copies without looking into, so the dataclasses
+    below stay hashable and compare by value.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, mapping: dict):
+        return cls(sorted((key, freeze(value)) for key, value in mapping.items()))
+
+    def get(self, key: str, default=None):
+        for item_key, item_value in self:
+            if item_key == key:
+                return item_value
+        return default
+
+    def to_dict(self):
+        return {key: thaw(value) for key, value in self}
+
+
+def freeze(value):
+    """Converts a CFN property value to its immutable form.
+
+    Args:
+      value: A dict, a list or a scalar.
+
+    Returns:
+      A FrozenMapping for a dict, a tuple for a list, the value itself otherwise.
+
+    Raises:
+    """
+    if isinstance(value, dict):
+        return FrozenMapping.from_dict(value)
+    if isinstance(value, (list, tuple)) and not isinstance(value, FrozenMapping):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Converts a value built by freeze back to plain dicts and lists.
+
+    Args:
+      value: A FrozenMapping, a tuple or a scalar.
+
+    Returns:
+      A new dict, list or the scalar value.
+
+    Raises:
+    """
+    if isinstance(value, FrozenMapping):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class KeySchemaElement:
+    __slots__ = ("attribute_name", "key_type")
+    attribute_name: str
+    key_type: str
+
+    @classmethod
+    def from_cfn(cls, key_schema_element: dict):
+        return cls(
+            attribute_name=key_schema_element.get("AttributeName"),
+            key_type=key_schema_element.get("KeyType"),
+        )
+
+    def to_cfn(self):
+        return {"AttributeName": self.attribute_name, "KeyType": self.key_type}
+
+
+@dataclass(frozen=True)
+class AttributeDefinition:
+    __slots__ = ("attribute_name", "attribute_type")
+    attribute_name: str
+    attribute_type: str
+
+    @classmethod
+    def from_cfn(cls, attribute_definition: dict):
+        return cls(
+            attribute_name=attribute_definition.get("AttributeName"),
+            attribute_type=attribute_definition.get("AttributeType"),
+        )
+
+    def to_cfn(self):
+        return {"AttributeName": self.attribute_name, "AttributeType": self.attribute_type}
+
+
+@dataclass(frozen=True)
+class ProvisionedThroughput:
+    __slots__ = ("read_capacity_units", "write_capacity_units")
+    read_capacity_units: int
+    write_capacity_units: int
+
+    @classmethod
+    def from_cfn(cls, provisioned_throughput: dict):
+        return cls(
+            read_capacity_units=provisioned_throughput.get("ReadCapacityUnits"),
+            write_capacity_units=provisioned_throughput.get("WriteCapacityUnits"),
+        )
+
+    def to_cfn(self):
+        return {
+            "ReadCapacityUnits": self.read_capacity_units,
+            "WriteCapacityUnits": self.write_capacity_units,
+        }
+
+
+@dataclass(frozen=True)
+class SecondaryIndex:
+    """A global or local secondary index. The key schema is typed as it decides the attribute definitions,
+    the other properties, e.g. Projection or ProvisionedThroughput, are copied as they are."""
+
+    __slots__ = ("index_name", "key_schema", "properties")
+    index_name: str
+    key_schema: Tuple[KeySchemaElement, ...]
+    properties: FrozenMapping
+
+    @classmethod
+    def from_cfn(cls, index: dict):
+        return cls(
+            index_name=index.get("IndexName"),
+            key_schema=tuple(KeySchemaElement.from_cfn(key) for key in index.get("KeySchema", [])),
+            properties=FrozenMapping.from_dict(
+                {key: value for key, value in index.items() if key not in ("IndexName", "KeySchema")}
+            ),
+        )
+
+    def to_cfn(self):
+        index = {
+            "IndexName": self.index_name,
+            "KeySchema": [key.to_cfn() for key in self.key_schema],
+        }
+        index.update(self.properties.to_dict())
+        return index
+
+
+@dataclass(frozen=True)
+class StreamSpecification:
+    __slots__ = ("stream_view_type",)
+    stream_view_type: str
+
+    def to_cfn(self):
+        return {"StreamViewType": self.stream_view_type}
+
+
+@dataclass(frozen=True)
+class KinesisStreamSpecification:
+    __slots__ = ("stream_arn",)
+    stream_arn: str
+
+    def to_cfn(self):
+        return {"StreamArn": self.stream_arn}
+
+
+@dataclass(frozen=True)
+class PointInTimeRecoverySpecification:
+    __slots__ = ("point_in_time_recovery_enabled",)
+    point_in_time_recovery_enabled: bool
+
+    def to_cfn(self):
+        return {"PointInTimeRecoveryEnabled": self.point_in_time_recovery_enabled}
+
+
+@dataclass(frozen=True)
+class TimeToLiveSpecification:
+    __slots__ = ("attribute_name", "enabled")
+    attribute_name: str
+    enabled: bool
+
+    def to_cfn(self):
+        return {"AttributeName": self.attribute_name, "Enabled": self.enabled}
+
+
+@dataclass(frozen=True)
+class Tag:
+    __slots__ = ("key", "value")
+    key: str
+    value: str
+
+    @classmethod
+    def from_cfn(cls, tag: dict):
+        return cls(key=tag.get("Key"), value=tag.get("Value"))
+
+    def to_cfn(self):
+        return {"Key": self.key, "Value": self.value}
+
+
+@dataclass(frozen=True)
+class CfnResource:
+    """A CFN resource deployed next to the restored table, e.g. an event source mapping or a scaling policy."""
+
+    __slots__ = ("logical_id", "resource_type", "properties")
+    logical_id: str
+    resource_type: str
+    properties: FrozenMapping
+
+    @classmethod
+    def from_cfn(cls, logical_id: str, resource: dict):
+        return cls(
+            logical_id=logical_id,
+            resource_type=resource.get("Type"),
+            properties=FrozenMapping.from_dict(resource.get("Properties", {})),
+        )
+
+    def to_cfn(self):
+        return {"Type": self.resource_type, "Properties": self.properties.to_dict()}
+
+
+@dataclass(frozen=True)
+class TableConfig:
+    """The settings of the restored table that the table sync deploys with CFN.
+
+    Instances are immutable: a setting is added with dataclasses.replace, which keeps the previous
+    configuration intact and makes two configurations cheap to compare or to use as a cache key.
+    """
+
+    __slots__ = (
+        "table_name",
+        "key_schema",
+        "attribute_definitions",
+        "billing_mode",
+        "provisioned_throughput",
+        "global_secondary_indexes",
+        "local_secondary_indexes",
+        "stream_specification",
+        "time_to_live_specification",
+        "point_in_time_recovery_specification",
+        "kinesis_stream_specification",
+        "tags",
+        "triggers",
+        "scaling",
+    )
+    table_name: str
+    key_schema: Tuple[KeySchemaElement, ...]
+    attribute_definitions: Tuple[AttributeDefinition, ...]
+    billing_mode: str
+    provisioned_throughput: Optional[ProvisionedThroughput]
+    global_secondary_indexes: Tuple[SecondaryIndex, ...]
+    local_secondary_indexes: Tuple[SecondaryIndex, ...]
+    stream_specification: Optional[StreamSpecification]
+    time_to_live_specification: Optional[TimeToLiveSpecification]
+    point_in_time_recovery_specification: Optional[PointInTimeRecoverySpecification]
+    kinesis_stream_specification: Optional[KinesisStreamSpecification]
+    tags: Tuple[Tag, ...]
+    triggers: Tuple[CfnResource, ...]
+    scaling: Tuple[CfnResource, ...]
+
+    @classmethod
+    def from_describe_table(
+        cls,
+        describe_table_response: dict,
+        table_name: str,
+        global_secondary_indexes: list = None,
+        local_secondary_indexes: list = None,
+    ):
+        """Builds the base configuration of a restored table from the describe_table response of its source.
+
+        Only the settings needed to import the restored table are set, the other ones are added by the
+        setting builders. The attribute definitions that no key schema uses are left out, CFN rejects them.
+
+        Args:
+            describe_table_response: The DynamoDB describe_table API response for the source table.
+            table_name: The name of the restored table.
+            global_secondary_indexes: CFN GSIs that override the source table ones, e.g. the restore request
+                GlobalSecondaryIndexOverride.
+            local_secondary_indexes: CFN LSIs that override the source table ones.
+
+        Returns:
+          A TableConfig.
+
+        Raises:
+        """
+        table = describe_table_response.get("Table")
+        if global_secondary_indexes is None:
+            # Only the CFN properties of the indexes are kept, e.g. IndexStatus or NumberOfDecreasesToday are dropped.
+            global_secondary_indexes = project_cfn_property(
+                DYNAMODB_TABLE_TYPE, "GlobalSecondaryIndexes", table.get("GlobalSecondaryIndexes")
+            )
+        if local_secondary_indexes is None:
+            local_secondary_indexes = project_cfn_property(
+                DYNAMODB_TABLE_TYPE, "LocalSecondaryIndexes", table.get("LocalSecondaryIndexes")
+            )
+        key_schema = tuple(KeySchemaElement.from_cfn(key) for key in table.get("KeySchema"))
+        gsis = tuple(SecondaryIndex.from_cfn(index) for index in global_secondary_indexes or [])
+        lsis = tuple(SecondaryIndex.from_cfn(index) for index in local_secondary_indexes or [])
+
+        attribute_names = {key.attribute_name for key in key_schema}
+        for index in gsis + lsis:
+            attribute_names.update(key.attribute_name for key in index.key_schema)
+        attribute_definitions = tuple(
+            AttributeDefinition.from_cfn(definition)
+            for definition in table.get("AttributeDefinitions")
+            if definition.get("AttributeName") in attribute_names
+        )
+
+        billing_mode_summary = table.get("BillingModeSummary") or {}
+        if billing_mode_summary.get("BillingMode", "") == "PAY_PER_REQUEST":
+            billing_mode = "PAY_PER_REQUEST"
+            provisioned_throughput = None
+        else:
+            billing_mode = "PROVISIONED"
+            provisioned_throughput = ProvisionedThroughput.from_cfn(table.get("ProvisionedThroughput"))
+
+        return cls(
+            table_name=table_name,
+            key_schema=key_schema,
+            attribute_definitions=attribute_definitions,
+            billing_mode=billing_mode,
+            provisioned_throughput=provisioned_throughput,
+            global_secondary_indexes=gsis,
+            local_secondary_indexes=lsis,
+            stream_specification=None,
+            time_to_live_specification=None,
+            point_in_time_recovery_specification=None,
+            kinesis_stream_specification=None,
+            tags=(),
+            triggers=(),
+            scaling=(),
+        )
+
+    def to_cfn_properties(self):
+        """Builds the CFN properties of the restored table.
+
+        Args:
+
+        Returns:
+          A new dict with the AWS::DynamoDB::Table properties.
+
+        Raises:
+        """
+        properties = {
+            "TableName": self.table_name,
+            "KeySchema": [key.to_cfn() for key in self.key_schema],
+            "AttributeDefinitions": [definition.to_cfn() for definition in self.attribute_definitions],
+        }
+        if self.billing_mode == "PAY_PER_REQUEST":
+            properties["BillingMode"] = self.billing_mode
+        else:
+            properties["ProvisionedThroughput"] = self.provisioned_throughput.to_cfn()
+        if self.global_secondary_indexes:
+            properties["GlobalSecondaryIndexes"] = [index.to_cfn() for index in self.global_secondary_indexes]
+        if self.local_secondary_indexes:
+            properties["LocalSecondaryIndexes"] = [index.to_cfn() for index in self.local_secondary_indexes]
+        if self.tags:
+            properties["Tags"] = [tag.to_cfn() for tag in self.tags]
+        if self.stream_specification:
+            properties["StreamSpecification"] = self.stream_specification.to_cfn()
+        if self.kinesis_stream_specification:
+            properties["KinesisStreamSpecification"] = self.kinesis_stream_specification.to_cfn()
+        if self.point_in_time_recovery_specification:
+            properties["PointInTimeRecoverySpecification"] = self.point_in_time_recovery_specification.to_cfn()
+        if self.time_to_live_specification:
+            properties["TimeToLiveSpecification"] = self.time_to_live_specification.to_cfn()
+        return properties
@@ -0,0 +1,106 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+from aws_lambda_powertools import Logger
+from table_sync.client_factory import get_client
+from table_sync.config import CFN_TEMPLATE_BUCKET, CFN_TEMPLATE_PREFIX
+
+LOG: Logger = Logger(service=__name__)
+_DEFAULT_TEMPLATE_UPLOADER = None
+
+
+class S3TemplateUploader:
+    """Uploads CFN template bodies to an Amazon S3 bucket CloudFormation can read from."""
+
+    def __init__(self, s3_client: object, bucket_name: str, prefix: str = ""):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip("/")
+
+    def upload(self, key: str, body):
+        """Uploads a template body.
+
+        Args:
+            key: The object key, relative to the uploader prefix.
+            body: The template body. Bytes are uploaded as binary content, e.g. a raw profile.
+
+        Returns:
+          The template URL to pass to CloudFormation.
+
+        Raises:
+          ClientError: Boto3 error
+        """
+        object_key = f"{self.prefix}/{key}" if self.prefix else key
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=object_key,
+            Body=body.encode("utf-8") if isinstance(body, str) else body,
+            ContentType="application/json" if isinstance(body, str) else "application/octet-stream",
+        )
+        LOG.info(f"Template uploaded to s3://{self.bucket_name}/{object_key}")
+        return f"{self.s3_client.meta.endpoint_url}/{self.bucket_name}/{object_key}"
+
+
+class LocalDirectoryTemplateUploader:
+    """Writes CFN template bodies to a local directory. Stand-in for the S3 uploader in tests and local runs."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def upload(self, key: str, body):
+        """Writes a template body.
+
+        Args:
+            key: The file path, relative to the uploader directory.
+            body: The template body. Bytes are written as binary content, e.g. a raw profile.
+
+        Returns:
+          A file URL to the written template.
+
+        Raises:
+        """
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(body, str):
+            with open(path, "w", encoding="utf-8") as template_file:
+                template_file.write(body)
+        else:
+            with open(path, "wb") as template_file:
+                template_file.write(body)
+        return f"file://{os.path.abspath(path)}"
+
+
+def get_default_template_uploader():
+    """Gets the template uploader configured for the function.
+
+    Args:
+
+    Returns:
+      An S3TemplateUploader for the CFN_TEMPLATE_BUCKET bucket, or None if no bucket is configured.
+
+    Raises:
+    """
+    global _DEFAULT_TEMPLATE_UPLOADER
+    if _DEFAULT_TEMPLATE_UPLOADER is None and CFN_TEMPLATE_BUCKET:
+        _DEFAULT_TEMPLATE_UPLOADER = S3TemplateUploader(
+            s3_client=get_client("s3"), bucket_name=CFN_TEMPLATE_BUCKET, prefix=CFN_TEMPLATE_PREFIX
+        )
+    return _DEFAULT_TEMPLATE_UPLOADER
@@ -19,6 +19,8 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from aws_lambda_powertools import Logger
+from table_sync.table_config import TimeToLiveSpecification
+from table_sync.payload_logging import bounded
 
 LOG: Logger = Logger(service=__name__)
 
@@ -31,7 +33,7 @@ def build_dynamodb_ttl(dynamodb_client: object, source_table_name: str):
         source_table_name: The source table name.
 
     Returns:
-      A valid dict for the CFN template YAML for the DynamoDB Table TTL settings.
+      A TimeToLiveSpecification for the DynamoDB Table TTL settings, None if TTL is disabled.
 
     Raises:
     """
@@ -42,8 +44,8 @@ def build_dynamodb_ttl(dynamodb_client: object, source_table_name: str):
         time_to_live_status = response.get("TimeToLiveDescription").get("TimeToLiveStatus", None)
         attribute_name = response.get("TimeToLiveDescription").get("AttributeName", None)
 
-        LOG.info(f"Source table TTL settings: {response.get('TimeToLiveDescription')}")
+        LOG.info("Source table TTL settings: %s", bounded(response.get('TimeToLiveDescription')))
         if time_to_live_status == "ENABLED" or time_to_live_status == "ENABLING":
-            return {"AttributeName": attribute_name, "Enabled": True}
+            return TimeToLiveSpecification(attribute_name=attribute_name, enabled=True)
 
     return None
@@ -0,0 +1,231 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Cold start harness: imports the handler module in fresh interpreters, as a Lambda cold start does.
+#
+#   PYTHONPATH=src python -m tests.benchmark.cold_start --runs 20
+#
+# It reports the import wall time over the runs, the -X importtime breakdown of the slowest modules and the
+# memory allocated at import by each top level package, traced with tracemalloc, and compares them with the
+# baseline of tests/benchmark/baselines/cold_start.json.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE_NAME = "table_sync.app"
+SRC_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "src")
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "cold_start.json")
+# The import time of a host varies a lot, the allocations and the imported modules hardly.
+IMPORT_TIME_TOLERANCE = 1.5
+ALLOCATION_TOLERANCE = 1.10
+TOP_MODULES = 15
+environment = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_REGION": "us-east-1",
+    "ENABLE_TAG_SETTINGS": "false",
+    "ENABLE_KINESIS_SETTINGS": "false",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "false",
+    "ENABLE_TTL_SETTINGS": "false",
+    "ENABLE_PITR_SETTINGS": "false",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "false",
+}
+TIMED_IMPORT = """
+import json, sys, time
+started = time.perf_counter()
+import {module_name}
+print(json.dumps({{"import_ms": (time.perf_counter() - started) * 1000, "modules": len(sys.modules)}}))
+"""
+TRACED_IMPORT = """
+import importlib.abc, json, sys, tracemalloc
+
+
+class MeasuringFinder(importlib.abc.MetaPathFinder):
+    # Wraps the loader of every module imported to charge each module with the memory its execution
+    # retains, nested imports excluded, so that unmarshalled code and parsed data files count for their module.
+    def __init__(self):
+        self.stack = []
+        self.retained = {{}}
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = MeasuringLoader(self, spec.loader)
+                return spec
+        return None
+
+
+class MeasuringLoader(importlib.abc.Loader):
+    def __init__(self, finder, loader):
+        self.finder = finder
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.finder.stack.append(0)
+        started = tracemalloc.get_traced_memory()[0]
+        try:
+            self.loader.exec_module(module)
+        finally:
+            retained = tracemalloc.get_traced_memory()[0] - started
+            nested = self.finder.stack.pop()
+            if self.finder.stack:
+                self.finder.stack[-1] += retained
+            self.finder.retained[module.__name__] = retained - nested
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+finder = MeasuringFinder()
+sys.meta_path.insert(0, finder)
+tracemalloc.start()
+import {module_name}
+blocks = len(tracemalloc.take_snapshot().traces)
+current, peak = tracemalloc.get_traced_memory()
+packages = {{}}
+for name, retained in finder.retained.items():
+    totals = packages.setdefault(name.split(".")[0], {{"modules": 0, "bytes": 0}})
+    totals["modules"] += 1
+    totals["bytes"] += retained
+print(json.dumps({{"allocated_blocks": blocks, "allocated_bytes": current, "peak_bytes": peak, "packages": packages}}))
+"""
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SRC_DIRECTORY,
+        env={**os.environ, **environment},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_import_times(report: str):
+    """Parses the -X importtime report into the self and cumulative times in us of each module."""
+    times = {}
+    for line in report.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[0].startswith("import time:") or "self" in fields[0]:
+            continue
+        times[fields[2].strip()] = {
+            "self_us": int(fields[0].split(":", 1)[1]),
+            "cumulative_us": int(fields[1]),
+        }
+    return times
+
+
+def measure_cold_start(runs: int = 10, module_name: str = MODULE_NAME):
+    """Imports a module in fresh interpreters and returns the cold start report.
+
+    Args:
+        runs: The number of timed imports.
+        module_name: The module to import.
+
+    Returns:
+      A dict with the import wall times, the number of imported modules, the slowest modules of the
+      -X importtime breakdown and the allocations of each top level package.
+    """
+    timed = [
+        json.loads(run_python("-c", TIMED_IMPORT.format(module_name=module_name)).stdout) for _ in range(runs)
+    ]
+    import_ms = sorted(run.get("import_ms") for run in timed)
+    import_times = parse_import_times(run_python("-X", "importtime", "-c", f"import {module_name}").stderr)
+    traced = json.loads(run_python("-c", TRACED_IMPORT.format(module_name=module_name)).stdout)
+    packages = traced.get("packages")
+    slowest = sorted(import_times.items(), key=lambda item: item[1].get("self_us"), reverse=True)[:TOP_MODULES]
+    return {
+        "import_ms": {
+            "min": round(import_ms[0], 2),
+            "p50": round(statistics.median(import_ms), 2),
+            "max": round(import_ms[-1], 2),
+        },
+        "modules": max(run.get("modules") for run in timed),
+        "slowest_modules": {name: times.get("self_us") for name, times in slowest},
+        "allocated_blocks": traced.get("allocated_blocks"),
+        "allocated_bytes": traced.get("allocated_bytes"),
+        "peak_bytes": traced.get("peak_bytes"),
+        "packages": dict(sorted(packages.items(), key=lambda item: item[1].get("bytes"), reverse=True)),
+    }
+
+
+def find_regressions(report: dict, baseline: dict):
+    """Returns the regressions of a cold start report against the baseline, as messages."""
+    regressions = []
+    if report["import_ms"]["p50"] > baseline["import_ms"]["p50"] * IMPORT_TIME_TOLERANCE:
+        regressions.append(f"Import p50 {report['import_ms']['p50']}ms, baseline {baseline['import_ms']['p50']}ms")
+    if report["modules"] > baseline["modules"]:
+        regressions.append(f"{report['modules']} modules imported, baseline {baseline['modules']}")
+    for key in ("allocated_blocks", "allocated_bytes"):
+        if report[key] > baseline[key] * ALLOCATION_TOLERANCE:
+            regressions.append(f"{report[key]} {key.replace('_', ' ')}, baseline {baseline[key]}")
+    return regressions
+
+
+def format_cold_start_report(report: dict):
+    lines = [
+        f"Import of {MODULE_NAME}: min {report['import_ms']['min']}ms p50 {report['import_ms']['p50']}ms "
+        f"max {report['import_ms']['max']}ms, {report['modules']} modules",
+        f"Allocated at import: {report['allocated_blocks']} blocks, {report['allocated_bytes'] / 1024:.0f}KiB, "
+        f"peak {report['peak_bytes'] / 1024:.0f}KiB",
+        "Slowest modules (self time):",
+        *(f"  {name}: {self_us}us" for name, self_us in report["slowest_modules"].items()),
+        "Memory retained by package:",
+        *(
+            f"  {name}: {totals['modules']} modules, {totals['bytes'] / 1024:.0f}KiB"
+            for name, totals in list(report["packages"].items())[:TOP_MODULES]
+        ),
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Measures the cold start imports of the table sync handler.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--update-baseline", action="store_true", help="Writes the report as the new baseline.")
+    args = parser.parse_args(argv)
+    report = measure_cold_start(runs=args.runs)
+    print(json.dumps(report, indent=2) if args.format == "json" else format_cold_start_report(report))
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+            baseline_file.write("\n")
+        return 0
+    with open(BASELINE_FILE) as baseline_file:
+        regressions = find_regressions(report, json.load(baseline_file))
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import glob
+import json
+import os
+import time
+import types
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape, VirtualClock
+from tests.emulator.events import build_restore_event
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+# Cassettes recorded from real syncs, e.g. of the largest production tables, are replayed by the benchmark.
+CASSETTE_DIR = os.getenv("SYNC_CASSETTE_DIR", os.path.join(os.path.dirname(__file__), "cassettes"))
+SHAPE = TableShape(
+    name="indexed-table",
+    gsi_count=5,
+    billing_mode="PROVISIONED",
+    auto_scaling=True,
+    stream=True,
+    trigger_count=2,
+    ttl=True,
+    tag_count=5,
+)
+
+
+def all_settings():
+    from table_sync.sync_settings import SyncSettings
+
+    return SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=False,
+    )
+
+
+def replay(app, cassette: dict):
+    """Replays a cassette through the handler on a virtual clock and returns the replayer and the clock."""
+    from tests.emulator.cassette import CassetteReplayer
+
+    clock = VirtualClock()
+    replayer = CassetteReplayer(cassette, clock=clock)
+    poller_time = types.SimpleNamespace(sleep=clock.sleep)
+    with replayer.install(), mock.patch("table_sync.app.get_sync_settings", return_value=all_settings()):
+        with mock.patch("table_sync.deploy_cfn_resources.time", poller_time):
+            assert app.lambda_handler(replayer.event, None) is True
+    return replayer, clock
+
+
+def test_record_and_replay():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app
+        from tests.emulator.cassette import CassetteRecorder, sanitize
+
+        # The account ids are replaced and the response metadata dropped.
+        assert sanitize(
+            {"RoleARN": "arn:aws:iam::210987654321:role/sync", "ResponseMetadata": {"RequestId": "abc"}}
+        ) == {"RoleARN": "arn:aws:iam::123456789012:role/sync"}
+
+        # Record a sync against the emulated control plane, standing in for AWS.
+        clock = VirtualClock()
+        control_plane = ControlPlane(
+            tables=[SHAPE],
+            latency_model=LatencyModel(default=OperationProfile(latency_ms=2.0)),
+            clock=clock,
+        )
+        control_plane.restore(SHAPE.name, f"restored-{SHAPE.name}")
+        event = build_restore_event(SHAPE.name, f"restored-{SHAPE.name}")
+        recorder = CassetteRecorder(client_creator=control_plane.create_client, event=event)
+        poller_time = types.SimpleNamespace(sleep=clock.sleep)
+        with recorder.install(), mock.patch("table_sync.app.get_sync_settings", return_value=all_settings()):
+            with mock.patch("table_sync.deploy_cfn_resources.time", poller_time):
+                assert app.lambda_handler(event, None) is True
+        cassette = json.loads(json.dumps(recorder.to_cassette()))
+        recorded_latency_s = sum(interaction["latency_ms"] for interaction in cassette["interactions"]) / 1000
+        assert all(interaction["params"] for interaction in cassette["interactions"])
+
+        # The replays make the same calls and take the same virtual time, whatever the real time.
+        first_replayer, first_clock = replay(app, cassette)
+        second_replayer, second_clock = replay(app, cassette)
+        assert first_replayer.replayed == second_replayer.replayed == len(cassette["interactions"])
+        assert first_clock.now() == second_clock.now()
+        assert first_clock.now() >= recorded_latency_s
+
+
+def test_replay_cassettes():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app
+
+        for path in sorted(glob.glob(os.path.join(CASSETTE_DIR, "*.json"))):
+            with open(path) as cassette_file:
+                cassette = json.load(cassette_file)
+            started = time.perf_counter()
+            replayer, clock = replay(app, cassette)
+            print(
+                f"{os.path.basename(path)}: {replayer.replayed} calls, {clock.now():.1f}s modeled, "
+                f"{(time.perf_counter() - started) * 1000:.1f}ms of handler time"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
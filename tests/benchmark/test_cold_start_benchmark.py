@@ -0,0 +1,66 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import pytest
+from tests.benchmark.cold_start import (
+    BASELINE_FILE,
+    find_regressions,
+    format_cold_start_report,
+    measure_cold_start,
+)
+
+UPDATE_BASELINE = os.getenv("UPDATE_BENCHMARK_BASELINE", "false").lower() == "true"
+# The baseline holds absolute numbers of the host, Python and library versions it was recorded with, so the
+# comparison only runs on that host. The default run relies on the relative checks of test_import_time.py.
+RUN_COLD_START_BENCHMARK = os.getenv("RUN_COLD_START_BENCHMARK", "false").lower() == "true"
+RUNS = 5
+
+
+@pytest.mark.skipif(
+    not (RUN_COLD_START_BENCHMARK or UPDATE_BASELINE),
+    reason="Compares with a host specific baseline, set RUN_COLD_START_BENCHMARK=true to run it",
+)
+def test_cold_start_benchmark():
+    report = measure_cold_start(runs=RUNS)
+    print(format_cold_start_report(report))
+    assert report["packages"]["table_sync"]["modules"] > 0
+    if UPDATE_BASELINE:
+        with open(BASELINE_FILE, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+            baseline_file.write("\n")
+        return
+    with open(BASELINE_FILE) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = find_regressions(report, baseline)
+    assert not regressions, "\n".join(regressions)
+
+
+def test_find_regressions():
+    baseline = {"import_ms": {"p50": 100.0}, "modules": 500, "allocated_blocks": 1000, "allocated_bytes": 10000}
+    report = {"import_ms": {"p50": 140.0}, "modules": 500, "allocated_blocks": 1050, "allocated_bytes": 10500}
+    assert find_regressions(report, baseline) == []
+    report = {"import_ms": {"p50": 160.0}, "modules": 501, "allocated_blocks": 1200, "allocated_bytes": 10500}
+    assert find_regressions(report, baseline) == [
+        "Import p50 160.0ms, baseline 100.0ms",
+        "501 modules imported, baseline 500",
+        "1200 allocated blocks, baseline 1000",
+    ]
@@ -0,0 +1,81 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import timeit
+import unittest
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+EVENT_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "events", "event.json")
+BATCH_SIZE = 10
+REPEAT = 5
+NUMBER = 20
+
+
+def build_batch():
+    # A batch of restore events for different tables, as the queue delivers them during a bulk restore.
+    with open(EVENT_FILE) as event_file:
+        record = json.load(event_file)["Records"][0]
+    records = []
+    for i in range(BATCH_SIZE):
+        body = json.loads(record["body"])
+        body["detail"]["requestParameters"]["targetTableName"] = f"restored-table-{i}"
+        body["detail"]["eventID"] = f"{body['detail']['eventID'][:-2]}{i:02d}"
+        records.append({**record, "messageId": f"{record['messageId'][:-2]}{i:02d}", "body": json.dumps(body)})
+    return {"Records": records}
+
+
+def best_batch_time(function):
+    return min(timeit.repeat(function, repeat=REPEAT, number=NUMBER)) / NUMBER
+
+
+def test_event_decoder_benchmark():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import event_decoder
+        from model.aws.dynamodb.aws_event import AWSEvent
+
+        event = build_batch()
+        fast_path = best_batch_time(lambda: event_decoder.decode_event(event, validate=False))
+        model_path = best_batch_time(lambda: AWSEvent(**event))
+        print(
+            f"{BATCH_SIZE} records batch: fast path {fast_path * 1e6:.0f} us, AWSEvent model {model_path * 1e6:.0f} us, "
+            f"speedup x{model_path / fast_path:.1f}"
+        )
+        assert len(event_decoder.decode_event(event)) == BATCH_SIZE
+        assert fast_path < model_path
+
+
+if __name__ == "__main__":
+    unittest.main()
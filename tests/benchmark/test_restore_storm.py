@@ -0,0 +1,62 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from unittest import mock
+from tests.emulator.storm import StormConfig, format_storm_report, simulate_storm
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_restore_storm():
+    with mock.patch.dict(os.environ, environment):
+        config = StormConfig(restores=20, window_s=60.0, max_concurrency=10, seed=7)
+        report = simulate_storm(config)
+        print(format_storm_report(report))
+
+        # Every table gets synced, the tables still CREATING when their event arrives through the DLQ replays.
+        assert report.get("synced") == 20
+        assert report.get("lost") == 0
+        assert report.get("invocations") == 20 + sum(report.get("errors").values())
+        assert report.get("errors").get("TableNotActive") > 0
+        assert report.get("retry_amplification") > 1
+        assert report.get("peak_concurrency") <= 10
+        assert report.get("time_to_last_sync_s") >= report.get("time_to_sync_s").get("max")
+
+        # The storm is on a virtual clock, so a seed always gives the same report.
+        assert simulate_storm(config) == report
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import statistics
+import time
+import types
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape, VirtualClock
+from tests.emulator.events import build_restore_event
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "sync_benchmark.json")
+UPDATE_BASELINE = os.getenv("UPDATE_BENCHMARK_BASELINE", "false").lower() == "true"
+RUNS = 7
+P95_TOLERANCE = 1.10
+SHAPES = (
+    TableShape(name="small-table"),
+    TableShape(name="tagged-table", tag_count=10, ttl=True, pitr=True),
+    TableShape(
+        name="indexed-table",
+        gsi_count=5,
+        lsi_count=2,
+        billing_mode="PROVISIONED",
+        auto_scaling=True,
+        policies_per_target=2,
+        tag_count=5,
+    ),
+    TableShape(
+        name="streaming-table",
+        gsi_count=2,
+        stream=True,
+        trigger_count=3,
+        kinesis=True,
+        ttl=True,
+        pitr=True,
+        tag_count=5,
+    ),
+)
+
+
+def build_latency_model(seed: int):
+    # CloudFormation pollers are the calls throttled the most during a bulk restore.
+    return LatencyModel(
+        operations={
+            "cloudformation.CreateChangeSet": OperationProfile(latency_ms=250.0, jitter_ms=50.0),
+            "cloudformation.ExecuteChangeSet": OperationProfile(latency_ms=200.0, jitter_ms=50.0),
+            "cloudformation.DescribeChangeSet": OperationProfile(
+                latency_ms=80.0, jitter_ms=20.0, throttle_probability=0.05
+            ),
+            "cloudformation.DescribeStacks": OperationProfile(
+                latency_ms=60.0, jitter_ms=20.0, throttle_probability=0.05
+            ),
+        },
+        change_set_creation_s=5.0,
+        stabilization_jitter_s=8.0,
+        seed=seed,
+    )
+
+
+def run_sync(app, shape: TableShape, seed: int):
+    """Runs one sync of the shape against a fresh control plane and returns its modeled time and API calls."""
+    from table_sync.instrumentation import get_api_call_summary
+    from table_sync.sync_settings import SyncSettings
+
+    target_table_name = f"restored-{shape.name}"
+    clock = VirtualClock()
+    control_plane = ControlPlane(tables=[shape], latency_model=build_latency_model(seed), clock=clock)
+    control_plane.restore(shape.name, target_table_name)
+    settings = SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=False,
+    )
+    event = build_restore_event(shape.name, target_table_name)
+    with control_plane.install(), mock.patch(
+        "table_sync.app.get_sync_settings", return_value=settings
+    ), mock.patch("table_sync.deploy_cfn_resources.time", types.SimpleNamespace(sleep=clock.sleep)):
+        started = time.perf_counter()
+        assert app.lambda_handler(event, None) is True
+        real_elapsed_s = time.perf_counter() - started
+    api_calls = {operation: stats.get("calls") for operation, stats in get_api_call_summary().items()}
+    return {
+        "wall_time_s": clock.now() + real_elapsed_s,
+        "api_calls": api_calls,
+        "change_sets": api_calls.get("cloudformation.ExecuteChangeSet", 0),
+        "throttles": sum(control_plane.throttles.values()),
+    }
+
+
+def percentile(values: list, pct: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def summarize_runs(runs: list):
+    wall_times = [run.get("wall_time_s") for run in runs]
+    operations = sorted({operation for run in runs for operation in run.get("api_calls")})
+    return {
+        "p50_s": round(percentile(wall_times, 50), 3),
+        "p95_s": round(percentile(wall_times, 95), 3),
+        "p99_s": round(percentile(wall_times, 99), 3),
+        "api_calls": {
+            operation: statistics.median(run.get("api_calls").get(operation, 0) for run in runs)
+            for operation in operations
+        },
+        "change_sets": statistics.median(run.get("change_sets") for run in runs),
+        "throttles": sum(run.get("throttles") for run in runs),
+    }
+
+
+def find_regressions(results: dict, baseline: dict):
+    regressions = []
+    for shape_name, result in results.items():
+        expected = baseline.get(shape_name)
+        if expected is None:
+            continue
+        for operation, calls in result.get("api_calls").items():
+            expected_calls = expected.get("api_calls").get(operation, 0)
+            if calls > expected_calls:
+                regressions.append(f"{shape_name}: {operation} made {calls} calls, baseline {expected_calls}")
+        if result.get("change_sets") > expected.get("change_sets"):
+            regressions.append(f"{shape_name}: {result['change_sets']} change sets, baseline {expected['change_sets']}")
+        if result.get("p95_s") > expected.get("p95_s") * P95_TOLERANCE:
+            regressions.append(f"{shape_name}: p95 {result['p95_s']}s, baseline {expected['p95_s']}s")
+    return regressions
+
+
+def test_sync_benchmark():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app
+
+        results = {}
+        for shape in SHAPES:
+            results[shape.name] = summarize_runs([run_sync(app, shape, seed) for seed in range(RUNS)])
+        for shape_name, result in results.items():
+            print(
+                f"{shape_name}: p50 {result['p50_s']}s p95 {result['p95_s']}s p99 {result['p99_s']}s, "
+                f"{result['change_sets']} change sets, {sum(result['api_calls'].values())} API calls, "
+                f"{result['throttles']} throttles"
+            )
+
+        if UPDATE_BASELINE:
+            with open(BASELINE_FILE, "w") as baseline_file:
+                json.dump(results, baseline_file, indent=2, sort_keys=True)
+                baseline_file.write("\n")
+            return
+        with open(BASELINE_FILE) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline)
+        assert not regressions, "\n".join(regressions)
+
+
+if __name__ == "__main__":
+    unittest.main()
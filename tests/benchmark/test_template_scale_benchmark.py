@@ -0,0 +1,157 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import timeit
+import tracemalloc
+import unittest
+from dataclasses import replace
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+REPEAT = 5
+# The largest tables: 20 GSIs, 5 LSIs, 100 event source mappings and 210 scaling policies, 5 on each of the 42
+# scalable targets of the table and its indexes. The small ones have about 4 times less of each.
+SMALL = {"gsi_count": 5, "lsi_count": 1, "trigger_count": 25, "policies_per_target": 4}
+LARGE = {"gsi_count": 20, "lsi_count": 5, "trigger_count": 100, "policies_per_target": 5}
+# Budgets of the largest tables. A step is linear when its time and memory per built item, index, resource or
+# template byte, are at most LINEAR_SLACK times the small table ones. The slack covers the fixed costs and the
+# timer noise.
+BUDGET_MS = {"table_config": 5.0, "triggers": 25.0, "auto_scaling": 150.0, "template": 75.0}
+BUDGET_PEAK_BYTES = {"table_config": 256 << 10, "triggers": 2 << 20, "auto_scaling": 8 << 20, "template": 8 << 20}
+LINEAR_SLACK = 2.0
+
+
+def build_shape(name: str, gsi_count: int, lsi_count: int, trigger_count: int, policies_per_target: int):
+    return TableShape(
+        name=name,
+        gsi_count=gsi_count,
+        lsi_count=lsi_count,
+        billing_mode="PROVISIONED",
+        stream=True,
+        trigger_count=trigger_count,
+        auto_scaling=True,
+        policies_per_target=policies_per_target,
+    )
+
+
+def build_steps(shape: TableShape):
+    """Returns the template building steps of a table shape, each a callable without arguments."""
+    from table_sync.auto_scaling_settings import build_dynamodb_auto_scaling
+    from table_sync.cfn_template_validator import validate_cfn_template
+    from table_sync.cfn_yaml_template import RESTORED_TABLE_LOGICAL_ID, render_cfn_template, serialize_cfn_template
+    from table_sync.dynamodb_stream_settings import build_dynamodb_stream_triggers
+    from table_sync.table_config import TableConfig
+
+    target_table_name = f"restored-{shape.name}"
+    control_plane = ControlPlane(
+        tables=[shape], latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0))
+    )
+    control_plane.restore(shape.name, target_table_name)
+    dynamodb_client = control_plane.create_client("dynamodb")
+    lambda_client = control_plane.create_client("lambda")
+    app_auto_scaling_client = control_plane.create_client("application-autoscaling")
+    source_table = shape.describe_table(shape.name)
+
+    def table_config():
+        config = TableConfig.from_describe_table(source_table, table_name=target_table_name)
+        return config, 1 + len(config.global_secondary_indexes) + len(config.local_secondary_indexes)
+
+    def triggers():
+        resources = build_dynamodb_stream_triggers(
+            lambda_client=lambda_client,
+            source_table_describe_response=source_table,
+            restored_table_cfn_logical_name=RESTORED_TABLE_LOGICAL_ID,
+        )
+        return resources, len(resources)
+
+    def auto_scaling():
+        resources = build_dynamodb_auto_scaling(
+            dynamodb_client=dynamodb_client,
+            app_auto_scaling_client=app_auto_scaling_client,
+            source_table_name=shape.name,
+            target_table_name=target_table_name,
+            source_table=source_table,
+        )
+        return resources, len(resources)
+
+    config = replace(table_config()[0], triggers=triggers()[0], scaling=auto_scaling()[0])
+
+    def template():
+        template_dict = render_cfn_template(config)
+        validate_cfn_template(template_dict)
+        template_body = serialize_cfn_template(template_dict)
+        return template_body, len(template_body)
+
+    return {"table_config": table_config, "triggers": triggers, "auto_scaling": auto_scaling, "template": template}
+
+
+def measure(step):
+    """Returns the number of built items, the best time in ms and the peak traced memory in bytes of a step."""
+    best_ms = min(timeit.repeat(step, repeat=REPEAT, number=1)) * 1000
+    tracemalloc.start()
+    try:
+        _, count = step()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return count, best_ms, peak_bytes
+
+
+def test_template_scale_benchmark():
+    with mock.patch.dict(os.environ, environment):
+        small_steps = build_steps(build_shape("small-table", **SMALL))
+        large_steps = build_steps(build_shape("large-table", **LARGE))
+        failures = []
+        for name, large_step in large_steps.items():
+            small_count, small_ms, small_bytes = measure(small_steps[name])
+            large_count, large_ms, large_bytes = measure(large_step)
+            ratio = large_count / small_count
+            print(
+                f"{name}: small {small_count} in {small_ms:.2f}ms {small_bytes / 1024:.0f}KiB, "
+                f"large {large_count} in {large_ms:.2f}ms {large_bytes / 1024:.0f}KiB"
+            )
+            if large_ms > BUDGET_MS[name]:
+                failures.append(f"{name} took {large_ms:.2f}ms, budget {BUDGET_MS[name]}ms")
+            if large_bytes > BUDGET_PEAK_BYTES[name]:
+                failures.append(f"{name} peaked at {large_bytes} bytes, budget {BUDGET_PEAK_BYTES[name]} bytes")
+            if large_ms > ratio * LINEAR_SLACK * small_ms:
+                failures.append(f"{name} isn't linear: {small_ms:.2f}ms small, {large_ms:.2f}ms large")
+            if large_bytes > ratio * LINEAR_SLACK * small_bytes:
+                failures.append(f"{name} memory isn't linear: {small_bytes} bytes small, {large_bytes} bytes large")
+        assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,260 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Record and replay cassettes of control plane responses.
+#
+#   PYTHONPATH=src python -m tests.emulator.cassette record --event event.json --output large-table.json
+#   PYTHONPATH=src python -m tests.emulator.cassette replay --cassette large-table.json
+#
+# The recorder wraps the boto3 clients of a real sync and saves the sanitized responses of the calls with
+# their measured latencies. The replayer answers the same calls from the cassette, waiting the recorded
+# latencies on a virtual clock, in real time, or at a scaled speed, so that the changes to the sync can be
+# benchmarked offline against the responses of production tables.
+import argparse
+import datetime
+import json
+import re
+import threading
+import time
+import types
+from unittest import mock
+from table_sync.instrumentation import THROTTLING_ERROR_CODES
+from tests.emulator.clients import create_answering_client, install_client_creator
+from tests.emulator.clock import VirtualClock
+from tests.emulator.shapes import ACCOUNT_ID
+
+CASSETTE_VERSION = 1
+ACCOUNT_ID_PATTERN = re.compile(r"(?<![0-9])[0-9]{12}(?![0-9])")
+DATETIME_KEY = "__datetime__"
+# The parameters identifying the resource of a call. The others, e.g. TemplateBody, change with the code
+# under benchmark and aren't matched.
+MATCHED_PARAMS = (
+    "TableName",
+    "ResourceArn",
+    "EventSourceArn",
+    "ServiceNamespace",
+    "ResourceId",
+    "ResourceIds",
+    "ScalableDimension",
+    "StackName",
+    "ChangeSetName",
+    "ChangeSetType",
+    "Marker",
+    "NextToken",
+    "Name",
+)
+
+
+def sanitize(value):
+    """Returns a JSON serializable copy of a value, with the account ids replaced by the emulator one.
+
+    The response metadata, e.g. the request ids and the HTTP headers, is dropped.
+    """
+    if isinstance(value, dict):
+        return {key: sanitize(item) for key, item in value.items() if key != "ResponseMetadata"}
+    if isinstance(value, (list, tuple)):
+        return [sanitize(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        return {DATETIME_KEY: value.isoformat()}
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, str):
+        return ACCOUNT_ID_PATTERN.sub(ACCOUNT_ID, value)
+    return value
+
+
+def restore_values(value):
+    """Returns a copy of a sanitized value, with the datetimes parsed back."""
+    if isinstance(value, dict):
+        if set(value) == {DATETIME_KEY}:
+            return datetime.datetime.fromisoformat(value[DATETIME_KEY])
+        return {key: restore_values(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [restore_values(item) for item in value]
+    return value
+
+
+def match_key(operation: str, params: dict):
+    matched = {name: params.get(name) for name in MATCHED_PARAMS if name in params}
+    return f"{operation} {json.dumps(sanitize(matched), sort_keys=True)}"
+
+
+class CassetteRecorder:
+    """Records the calls of the clients it creates, from the creation of the clients of the client factory."""
+
+    def __init__(self, client_creator=None, event: dict = None):
+        self.client_creator = client_creator
+        self.event = event
+        self.interactions = []
+        self._lock = threading.Lock()
+
+    def create_client(self, service_name: str):
+        if self.client_creator is not None:
+            client = self.client_creator(service_name)
+        else:
+            from table_sync.client_factory import build_client_config, get_session
+
+            client = get_session().client(service_name, config=build_client_config(service_name))
+        client.meta.events.register("before-parameter-build.*.*", self._before_call, unique_id="cassette-params")
+        client.meta.events.register("after-call.*.*", self._after_call, unique_id="cassette-record")
+        return client
+
+    def install(self):
+        """Makes the client factory create recorded clients, until the context exits."""
+        return install_client_creator(self.create_client)
+
+    def _before_call(self, params: dict, context: dict, **kwargs):
+        # Once per call, the latency of the throttled attempts and their backoff are part of the call one.
+        context["cassette_params"] = dict(params)
+        context["cassette_started"] = time.perf_counter()
+
+    def _after_call(self, event_name: str, http_response, parsed: dict, context: dict, **kwargs):
+        error_code = (parsed or {}).get("Error", {}).get("Code")
+        if error_code in THROTTLING_ERROR_CODES:
+            return
+        latency_ms = (time.perf_counter() - context.get("cassette_started", time.perf_counter())) * 1000
+        interaction = {
+            "operation": event_name.split(".", 1)[1],
+            "params": sanitize(context.get("cassette_params", {})),
+            "status_code": getattr(http_response, "status_code", 200),
+            "response": sanitize(parsed or {}),
+            "latency_ms": round(latency_ms, 3),
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def to_cassette(self):
+        return {
+            "version": CASSETTE_VERSION,
+            "recorded_at": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+            "event": sanitize(self.event),
+            "interactions": list(self.interactions),
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as cassette_file:
+            json.dump(self.to_cassette(), cassette_file, indent=1, sort_keys=True)
+            cassette_file.write("\n")
+
+
+class CassetteReplayer:
+    """Answers the calls of the clients it creates from a cassette.
+
+    The calls are matched on their operation and the parameters identifying their resource, and get the
+    recorded responses in order. Once the responses of a call are used up, the last one is repeated, so a
+    poller finding a settled stack keeps finding it settled.
+
+    With a clock, the recorded latencies are waited on it. Without, they are slept for real, divided by speed.
+    A speed of None doesn't wait at all.
+    """
+
+    def __init__(self, cassette: dict, speed: float = 1.0, clock: VirtualClock = None):
+        if cassette.get("version") != CASSETTE_VERSION:
+            raise CassetteMismatch(f"Unsupported cassette version {cassette.get('version')}")
+        self.event = cassette.get("event")
+        self.speed = speed
+        self.clock = clock
+        self.replayed = 0
+        self._responses = {}
+        self._lock = threading.Lock()
+        for interaction in cassette.get("interactions", []):
+            key = match_key(interaction.get("operation"), interaction.get("params"))
+            self._responses.setdefault(key, []).append(interaction)
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0, clock: VirtualClock = None):
+        with open(path) as cassette_file:
+            return cls(json.load(cassette_file), speed=speed, clock=clock)
+
+    def create_client(self, service_name: str):
+        return create_answering_client(service_name, self._answer)
+
+    def install(self):
+        """Makes the client factory create replaying clients, until the context exits."""
+        return install_client_creator(self.create_client)
+
+    def _answer(self, operation: str, params: dict):
+        key = match_key(operation, params)
+        with self._lock:
+            interactions = self._responses.get(key)
+            if not interactions:
+                raise CassetteMismatch(f"No recorded response for {key}")
+            interaction = interactions.pop(0) if len(interactions) > 1 else interactions[0]
+            self.replayed += 1
+        self._wait(interaction.get("latency_ms") / 1000)
+        return interaction.get("status_code"), restore_values(interaction.get("response"))
+
+    def _wait(self, seconds: float):
+        if self.speed is None:
+            return
+        if self.clock is not None:
+            self.clock.advance(seconds / self.speed)
+        else:
+            time.sleep(seconds / self.speed)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Records or replays the control plane calls of a sync.")
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("--event", help="SQS event file of the restore to sync, when recording.")
+    parser.add_argument("--output", help="Cassette file to record to.")
+    parser.add_argument("--cassette", help="Cassette file to replay.")
+    parser.add_argument(
+        "--speed", type=float, default=None, help="Replay speed in real time, the waits are virtual without."
+    )
+    args = parser.parse_args(argv)
+    from table_sync import app
+
+    if args.mode == "record":
+        with open(args.event) as event_file:
+            event = json.load(event_file)
+        recorder = CassetteRecorder(event=event)
+        try:
+            with recorder.install():
+                app.lambda_handler(event, None)
+        finally:
+            recorder.save(args.output)
+        print(f"Recorded {len(recorder.interactions)} calls to {args.output}")
+        return
+
+    # Without a speed, the latencies and the poller sleeps are waited on a virtual clock, with a speed they
+    # are slept for real, scaled by the speed.
+    clock = VirtualClock()
+    if args.speed:
+        replayer = CassetteReplayer.load(args.cassette, speed=args.speed)
+        poller_time = types.SimpleNamespace(sleep=lambda seconds: time.sleep(seconds / args.speed))
+    else:
+        replayer = CassetteReplayer.load(args.cassette, clock=clock)
+        poller_time = types.SimpleNamespace(sleep=clock.sleep)
+    started = time.perf_counter()
+    with replayer.install(), mock.patch("table_sync.deploy_cfn_resources.time", poller_time):
+        app.lambda_handler(replayer.event, None)
+    print(
+        f"Replayed {replayer.replayed} calls in {time.perf_counter() - started:.3f}s, "
+        f"{clock.now():.3f}s of virtual time"
+    )
+
+
+class CassetteMismatch(Exception):
+    pass
+
+
+if __name__ == "__main__":
+    main()
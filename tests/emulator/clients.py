@@ -0,0 +1,38 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# boto3 clients answered locally, in the region of the emulated tables.
+# The table sync modules are imported on first use, so that their configuration is read from the environment
+# of the tests and not at collection time.
+from tests.emulator.shapes import REGION
+
+
+def create_answering_client(service_name: str, answer):
+    """Creates a boto3 client of the emulated region whose calls are answered by answer(operation, params)."""
+    from table_sync.answering_client import create_answering_client as create_region_answering_client
+
+    return create_region_answering_client(service_name, answer, region_name=REGION)
+
+
+def install_client_creator(client_creator):
+    """Makes the client factory create its clients with client_creator, until the context exits."""
+    from table_sync.client_factory import install_client_creator as install_factory_client_creator
+
+    return install_factory_client_creator(client_creator)
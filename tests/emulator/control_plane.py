@@ -0,0 +1,668 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import contextlib
+import copy
+import datetime
+import json
+import threading
+import uuid
+from tests.emulator.clients import create_answering_client, install_client_creator
+from tests.emulator.clock import VirtualClock
+from tests.emulator.latency import LatencyModel
+from tests.emulator.events import to_epoch_ms
+from tests.emulator.shapes import ACCOUNT_ID, REGION
+
+# Default page sizes of the paginated list and describe calls.
+TAGS_PAGE_SIZE = 10
+EVENT_SOURCE_MAPPINGS_PAGE_SIZE = 100
+SCALABLE_TARGETS_PAGE_SIZE = 50
+SCALING_POLICIES_PAGE_SIZE = 50
+STACK_SUMMARIES_PAGE_SIZE = 100
+STACK_RESOURCE_DRIFTS_PAGE_SIZE = 100
+
+
+class ControlPlane:
+    """Answers the API calls of boto3 clients from in-memory state instead of AWS.
+
+    The clients are real boto3 clients, so the parameters are validated and the botocore event hooks run. The
+    calls are answered by a before-call handler, as with the botocore Stubber, but from the state of the tables
+    and the stacks instead of a script. Every call advances the virtual clock by its modeled latency, and a
+    throttled call by the backoff of the retries the client would make.
+    """
+
+    def __init__(self, tables: list, latency_model: LatencyModel = None, clock: VirtualClock = None):
+        self.tables = {shape.name: shape for shape in tables}
+        self.latency_model = latency_model or LatencyModel()
+        self.clock = clock or VirtualClock()
+        self.restored_tables = {}
+        self.active_at = {}
+        self.stacks = {}
+        self.change_sets = {}
+        self.throttles = {}
+        self.parameters = {}
+        self.objects = {}
+        self.items = {}
+        self.drifts = {}
+        self.drift_detections = {}
+        self.event_source_mappings = []
+        self.queues = {}
+        self._lock = threading.RLock()
+        self._responders = {
+            "dynamodb.DescribeTable": self.describe_table,
+            "dynamodb.ListTagsOfResource": self.list_tags_of_resource,
+            "dynamodb.DescribeKinesisStreamingDestination": self.describe_kinesis_streaming_destination,
+            "dynamodb.DescribeContinuousBackups": self.describe_continuous_backups,
+            "dynamodb.DescribeTimeToLive": self.describe_time_to_live,
+            "lambda.ListEventSourceMappings": self.list_event_source_mappings,
+            "application-auto-scaling.DescribeScalableTargets": self.describe_scalable_targets,
+            "application-auto-scaling.DescribeScalingPolicies": self.describe_scaling_policies,
+            "cloudformation.CreateChangeSet": self.create_change_set,
+            "cloudformation.DescribeChangeSet": self.describe_change_set,
+            "cloudformation.ExecuteChangeSet": self.execute_change_set,
+            "cloudformation.DescribeStacks": self.describe_stacks,
+            "cloudformation.ListStacks": self.list_stacks,
+            "cloudformation.GetTemplate": self.get_template,
+            "cloudformation.DetectStackDrift": self.detect_stack_drift,
+            "cloudformation.DescribeStackDriftDetectionStatus": self.describe_stack_drift_detection_status,
+            "cloudformation.DescribeStackResourceDrifts": self.describe_stack_resource_drifts,
+            "sqs.GetQueueUrl": self.get_queue_url,
+            "sqs.GetQueueAttributes": self.get_queue_attributes,
+            "sqs.ReceiveMessage": self.receive_message,
+            "sqs.SendMessage": self.send_message,
+            "sqs.DeleteMessage": self.delete_message,
+            "sqs.ChangeMessageVisibilityBatch": self.change_message_visibility_batch,
+            "dynamodb.PutItem": self.put_item,
+            "s3.PutObject": self.put_object,
+            "ssm.GetParameter": self.get_parameter,
+        }
+
+    def add_table(self, shape):
+        """Adds a source table."""
+        with self._lock:
+            self.tables[shape.name] = shape
+
+    def restore(self, source_table_name: str, target_table_name: str, active_at: float = 0.0):
+        """Registers a restored table, with the shape of its source table.
+
+        The table is CREATING until the virtual clock reaches active_at, then ACTIVE.
+        """
+        with self._lock:
+            self.restored_tables[target_table_name] = self.tables[source_table_name]
+            self.active_at[target_table_name] = active_at
+
+    def drift_resource(self, stack_name: str, logical_id: str, properties: dict = None):
+        """Changes a resource of a stack outside CloudFormation.
+
+        The properties override the deployed ones, a None value removes the property. Without properties, the
+        resource is deleted.
+        """
+        with self._lock:
+            if properties is None:
+                self.drifts[(stack_name, logical_id)] = None
+                return
+            actual = self._resolved_properties(stack_name, logical_id)
+            for name, value in properties.items():
+                if value is None:
+                    actual.pop(name, None)
+                else:
+                    actual[name] = value
+            self.drifts[(stack_name, logical_id)] = actual
+
+    def create_event_source_mapping(self, EventSourceArn: str, FunctionName: str):
+        """Adds a live event source mapping created outside CloudFormation, and returns its UUID."""
+        with self._lock:
+            mapping_uuid = str(uuid.uuid4())
+            self.event_source_mappings.append(
+                {
+                    "UUID": mapping_uuid,
+                    "EventSourceArn": EventSourceArn,
+                    "FunctionArn": FunctionName,
+                    "State": "Enabled",
+                }
+            )
+            return mapping_uuid
+
+    def create_queue(self, queue_name: str):
+        """Adds an empty SQS queue."""
+        with self._lock:
+            self.queues.setdefault(queue_name, [])
+
+    def enqueue(self, queue_name: str, record: dict):
+        """Adds a message to a queue from an SQS record of a Lambda event, e.g. a restore event that failed."""
+        with self._lock:
+            self.queues.setdefault(queue_name, []).append(
+                {
+                    "MessageId": record.get("messageId") or str(uuid.uuid4()),
+                    "Body": record["body"],
+                    "Attributes": dict(record.get("attributes") or {}),
+                    "MessageAttributes": {
+                        name: {"DataType": attribute["dataType"], "StringValue": attribute["stringValue"]}
+                        for name, attribute in (record.get("messageAttributes") or {}).items()
+                    },
+                    "visible_at": 0.0,
+                    "receipt_handle": None,
+                }
+            )
+
+    def create_client(self, service_name: str):
+        """Creates a boto3 client whose calls are answered by the control plane."""
+        return create_answering_client(service_name, self._answer)
+
+    @contextlib.contextmanager
+    def install(self):
+        """Makes the client factory create its clients from the control plane, until the context exits."""
+        with install_client_creator(self.create_client):
+            yield self
+
+    def _answer(self, operation: str, params: dict):
+        responder = self._responders.get(operation)
+        try:
+            self._model_latency(operation)
+            if responder is None:
+                raise EmulatedError("InvalidAction", f"{operation} is not emulated")
+            with self._lock:
+                return 200, responder(**params)
+        except EmulatedError as error:
+            return error.status_code, {"Error": {"Code": error.code, "Message": error.message}}
+
+    def _model_latency(self, operation: str):
+        # The retries of a throttled call are made by the emulator on behalf of the client.
+        attempts = 1
+        while self.latency_model.is_throttled(operation):
+            with self._lock:
+                self.throttles[operation] = self.throttles.get(operation, 0) + 1
+            self.clock.advance(self.latency_model.latency_s(operation) + self.latency_model.backoff_s(attempts))
+            attempts += 1
+            if attempts > self.latency_model.max_attempts:
+                raise EmulatedError("ThrottlingException", "Rate exceeded")
+        self.clock.advance(self.latency_model.latency_s(operation))
+
+    def _shape(self, table_name: str):
+        shape = self.tables.get(table_name) or self.restored_tables.get(table_name)
+        if shape is None:
+            raise EmulatedError("ResourceNotFoundException", f"Requested resource not found: Table: {table_name}")
+        return shape
+
+    # DynamoDB
+
+    def describe_table(self, TableName: str):
+        shape = self._shape(TableName)
+        table_status = "CREATING" if self.clock.now() < self.active_at.get(TableName, 0.0) else "ACTIVE"
+        response = shape.describe_table(TableName, table_status)
+        if TableName in self.restored_tables:
+            response["Table"]["RestoreSummary"] = {
+                "SourceTableArn": shape.table_arn(shape.name),
+                "RestoreDateTime": datetime.datetime(2023, 2, 8, 18, 0),
+                "RestoreInProgress": table_status == "CREATING",
+            }
+        return response
+
+    def list_tags_of_resource(self, ResourceArn: str, NextToken: str = "", **kwargs):
+        page, next_token = paginate(self._shape(ResourceArn.rsplit("/", 1)[-1]).tags(), NextToken, TAGS_PAGE_SIZE)
+        return {"Tags": page, "NextToken": next_token} if next_token else {"Tags": page}
+
+    def describe_kinesis_streaming_destination(self, TableName: str):
+        return {"TableName": TableName, "KinesisDataStreamDestinations": self._shape(TableName).kinesis_destinations()}
+
+    def describe_continuous_backups(self, TableName: str):
+        status = "ENABLED" if self._shape(TableName).pitr else "DISABLED"
+        return {
+            "ContinuousBackupsDescription": {
+                "ContinuousBackupsStatus": "ENABLED",
+                "PointInTimeRecoveryDescription": {"PointInTimeRecoveryStatus": status},
+            }
+        }
+
+    def describe_time_to_live(self, TableName: str):
+        if not self._shape(TableName).ttl:
+            return {"TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}}
+        return {"TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED", "AttributeName": "expires_at"}}
+
+    def _queue(self, QueueUrl: str):
+        queue = self.queues.get(QueueUrl.rsplit("/", 1)[-1])
+        if queue is None:
+            raise EmulatedError("AWS.SimpleQueueService.NonExistentQueue", "The specified queue does not exist.")
+        return queue
+
+    def get_queue_url(self, QueueName: str, **kwargs):
+        if QueueName not in self.queues:
+            raise EmulatedError("AWS.SimpleQueueService.NonExistentQueue", "The specified queue does not exist.")
+        return {"QueueUrl": f"https://sqs.{REGION}.amazonaws.com/{ACCOUNT_ID}/{QueueName}"}
+
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames: list = None, **kwargs):
+        queue = self._queue(QueueUrl)
+        queue_name = QueueUrl.rsplit("/", 1)[-1]
+        return {
+            "Attributes": {
+                "QueueArn": f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{queue_name}",
+                "ApproximateNumberOfMessages": str(len(queue)),
+            }
+        }
+
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, VisibilityTimeout: int = 30, **kwargs):
+        now = self.clock.now()
+        messages = []
+        for message in self._queue(QueueUrl):
+            if len(messages) == MaxNumberOfMessages:
+                break
+            if message["visible_at"] > now:
+                continue
+            message["visible_at"] = now + VisibilityTimeout
+            message["receipt_handle"] = str(uuid.uuid4())
+            attributes = message["Attributes"]
+            attributes["ApproximateReceiveCount"] = str(int(attributes.get("ApproximateReceiveCount", 0)) + 1)
+            messages.append(
+                {
+                    "MessageId": message["MessageId"],
+                    "ReceiptHandle": message["receipt_handle"],
+                    "Body": message["Body"],
+                    "Attributes": dict(attributes),
+                    "MessageAttributes": copy.deepcopy(message["MessageAttributes"]),
+                }
+            )
+        return {"Messages": messages} if messages else {}
+
+    def send_message(self, QueueUrl: str, MessageBody: str, MessageAttributes: dict = None, **kwargs):
+        message_id = str(uuid.uuid4())
+        sent_ms = to_epoch_ms(self.clock.now())
+        self._queue(QueueUrl).append(
+            {
+                "MessageId": message_id,
+                "Body": MessageBody,
+                "Attributes": {"SentTimestamp": str(sent_ms), "ApproximateFirstReceiveTimestamp": str(sent_ms)},
+                "MessageAttributes": copy.deepcopy(MessageAttributes or {}),
+                "visible_at": 0.0,
+                "receipt_handle": None,
+            }
+        )
+        return {"MessageId": message_id}
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str):
+        queue = self._queue(QueueUrl)
+        queue[:] = [message for message in queue if message["receipt_handle"] != ReceiptHandle]
+        return {}
+
+    def change_message_visibility_batch(self, QueueUrl: str, Entries: list):
+        queue = self._queue(QueueUrl)
+        successful = []
+        for entry in Entries:
+            for message in queue:
+                if message["receipt_handle"] == entry["ReceiptHandle"]:
+                    message["visible_at"] = self.clock.now() + entry["VisibilityTimeout"]
+                    successful.append({"Id": entry["Id"]})
+        return {"Successful": successful, "Failed": []}
+
+    def put_item(self, TableName: str, Item: dict, **kwargs):
+        self.items.setdefault(TableName, []).append(Item)
+        return {}
+
+    # S3
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", **kwargs):
+        self.objects[(Bucket, Key)] = Body
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    # Systems Manager
+
+    def get_parameter(self, Name: str, **kwargs):
+        if Name not in self.parameters:
+            raise EmulatedError("ParameterNotFound", f"Parameter {Name} not found")
+        return {"Parameter": {"Name": Name, "Type": "String", "Value": self.parameters[Name], "Version": 1}}
+
+    # Lambda
+
+    def list_event_source_mappings(
+        self, EventSourceArn: str = "", FunctionName: str = "", Marker: str = "", MaxItems: int = None, **kwargs
+    ):
+        table_name = EventSourceArn.split(":table/", 1)[-1].split("/", 1)[0]
+        mappings = self._shape(table_name).event_source_mappings(EventSourceArn) + [
+            mapping
+            for mapping in self.event_source_mappings
+            if mapping.get("EventSourceArn") == EventSourceArn and FunctionName in ("", mapping.get("FunctionArn"))
+        ]
+        page, next_marker = paginate(mappings, Marker, MaxItems or EVENT_SOURCE_MAPPINGS_PAGE_SIZE)
+        response = {"EventSourceMappings": page}
+        if next_marker:
+            response["NextMarker"] = next_marker
+        return response
+
+    # Application Auto Scaling
+
+    def describe_scalable_targets(
+        self,
+        ServiceNamespace: str,
+        ResourceIds: list = None,
+        ScalableDimension: str = "",
+        NextToken: str = "",
+        MaxResults: int = None,
+        **kwargs,
+    ):
+        targets = []
+        for resource_id in ResourceIds or []:
+            shape = self._shape(resource_id.split("/")[1])
+            targets.extend(
+                target
+                for target in shape.scalable_targets().get(resource_id, [])
+                if not ScalableDimension or target.get("ScalableDimension") == ScalableDimension
+            )
+        page, next_token = paginate(targets, NextToken, MaxResults or SCALABLE_TARGETS_PAGE_SIZE)
+        response = {"ScalableTargets": page}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def describe_scaling_policies(
+        self,
+        ServiceNamespace: str,
+        ResourceId: str = "",
+        ScalableDimension: str = "",
+        NextToken: str = "",
+        MaxResults: int = None,
+        **kwargs,
+    ):
+        shape = self._shape(ResourceId.split("/")[1])
+        policies = shape.scaling_policies(ResourceId, ScalableDimension)
+        page, next_token = paginate(policies, NextToken, MaxResults or SCALING_POLICIES_PAGE_SIZE)
+        response = {"ScalingPolicies": page}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    # CloudFormation
+
+    def create_change_set(self, StackName: str, ChangeSetName: str, ChangeSetType: str = "UPDATE", **kwargs):
+        stack = self.stacks.get(StackName)
+        if ChangeSetType == "UPDATE" and stack is None:
+            raise EmulatedError("ValidationError", f"Stack [{StackName}] does not exist")
+        if stack is not None and stack.get("StackStatus").endswith("_IN_PROGRESS"):
+            self._refresh_stack(stack)
+            if stack.get("StackStatus").endswith("_IN_PROGRESS") and stack.get("StackStatus") != "REVIEW_IN_PROGRESS":
+                raise EmulatedError("ValidationError", f"Stack:{StackName} is in {stack['StackStatus']} state")
+        if stack is None:
+            stack = self.stacks[StackName] = {
+                "StackName": StackName,
+                "StackId": f"arn:aws:cloudformation:{REGION}:{ACCOUNT_ID}:stack/{StackName}/{uuid.uuid4()}",
+                "CreationTime": datetime.datetime(2023, 2, 8, 18, 0),
+                "StackStatus": "REVIEW_IN_PROGRESS",
+            }
+        change_set_id = f"arn:aws:cloudformation:{REGION}:{ACCOUNT_ID}:changeSet/{ChangeSetName}/{uuid.uuid4()}"
+        self.change_sets[change_set_id] = {
+            "ChangeSetName": ChangeSetName,
+            "ChangeSetId": change_set_id,
+            "ChangeSetType": ChangeSetType,
+            "StackName": StackName,
+            "StackId": stack.get("StackId"),
+            "CreatedAt": self.clock.now(),
+            "ExecutionStatus": "UNAVAILABLE",
+            "TemplateBody": kwargs.get("TemplateBody"),
+            "DeploymentMode": kwargs.get("DeploymentMode"),
+        }
+        return {"Id": change_set_id, "StackId": stack.get("StackId")}
+
+    def _change_set(self, ChangeSetName: str):
+        change_set = self.change_sets.get(ChangeSetName)
+        if change_set is None:
+            raise EmulatedError("ChangeSetNotFound", f"ChangeSet [{ChangeSetName}] does not exist")
+        return change_set
+
+    def describe_change_set(self, ChangeSetName: str, StackName: str = "", **kwargs):
+        change_set = self._change_set(ChangeSetName)
+        elapsed_s = self.clock.now() - change_set.get("CreatedAt")
+        creation_s = self.latency_model.change_set_creation_s
+        if elapsed_s >= creation_s:
+            status = "CREATE_COMPLETE"
+        elif elapsed_s >= creation_s / 2:
+            status = "CREATE_IN_PROGRESS"
+        else:
+            status = "CREATE_PENDING"
+        if status == "CREATE_COMPLETE" and change_set.get("ExecutionStatus") == "UNAVAILABLE":
+            change_set["ExecutionStatus"] = "AVAILABLE"
+        return {
+            "ChangeSetName": change_set.get("ChangeSetName"),
+            "ChangeSetId": change_set.get("ChangeSetId"),
+            "StackId": change_set.get("StackId"),
+            "StackName": change_set.get("StackName"),
+            "Status": status,
+            "ExecutionStatus": change_set.get("ExecutionStatus"),
+        }
+
+    def execute_change_set(self, ChangeSetName: str, StackName: str = "", **kwargs):
+        change_set = self._change_set(ChangeSetName)
+        if change_set.get("ExecutionStatus") != "AVAILABLE":
+            raise EmulatedError(
+                "InvalidChangeSetStatus", f"ChangeSet [{ChangeSetName}] cannot be executed in its current status"
+            )
+        change_set["ExecutionStatus"] = "EXECUTE_IN_PROGRESS"
+        change_set_type = change_set.get("ChangeSetType")
+        stack = self.stacks[change_set.get("StackName")]
+        stack["StackStatus"] = f"{change_set_type}_IN_PROGRESS"
+        stack["CompleteAt"] = self.clock.now() + self.latency_model.stabilization_s(change_set_type)
+        stack["CompleteStatus"] = f"{change_set_type}_COMPLETE"
+        stack["TemplateBody"] = change_set.get("TemplateBody")
+        # The resources removed from the stack take their drift with them, a REVERT_DRIFT change set repairs the
+        # drift of the other ones.
+        resources = self._template(stack.get("StackName")).get("Resources", {})
+        revert_drift = change_set.get("DeploymentMode") == "REVERT_DRIFT"
+        for stack_name, logical_id in list(self.drifts):
+            if stack_name == stack.get("StackName") and (revert_drift or logical_id not in resources):
+                self.drifts.pop((stack_name, logical_id))
+        return {}
+
+    def _refresh_stack(self, stack: dict):
+        if stack.get("CompleteAt") is not None and self.clock.now() >= stack.get("CompleteAt"):
+            stack["StackStatus"] = stack.pop("CompleteStatus")
+            stack.pop("CompleteAt")
+
+    def describe_stacks(self, StackName: str = "", **kwargs):
+        stack = self.stacks.get(StackName)
+        if stack is None:
+            raise EmulatedError("ValidationError", f"Stack with id {StackName} does not exist")
+        self._refresh_stack(stack)
+        return {
+            "Stacks": [
+                {
+                    key: value
+                    for key, value in stack.items()
+                    if key not in ("CompleteAt", "CompleteStatus", "TemplateBody")
+                }
+            ]
+        }
+
+    def list_stacks(self, StackStatusFilter: list = None, NextToken: str = "", **kwargs):
+        summaries = []
+        for stack in self.stacks.values():
+            self._refresh_stack(stack)
+            if not StackStatusFilter or stack.get("StackStatus") in StackStatusFilter:
+                summaries.append(
+                    {key: stack.get(key) for key in ("StackName", "StackId", "CreationTime", "StackStatus")}
+                )
+        page, next_token = paginate(summaries, NextToken, STACK_SUMMARIES_PAGE_SIZE)
+        response = {"StackSummaries": page}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def get_template(self, StackName: str = "", **kwargs):
+        stack = self.stacks.get(StackName)
+        if stack is None or stack.get("TemplateBody") is None:
+            raise EmulatedError("ValidationError", f"Stack with id {StackName} does not exist")
+        return {"TemplateBody": stack.get("TemplateBody"), "StagesAvailable": ["Original", "Processed"]}
+
+
+    def detect_stack_drift(self, StackName: str, **kwargs):
+        if StackName not in self.stacks:
+            raise EmulatedError("ValidationError", f"Stack with id {StackName} does not exist")
+        detection_id = str(uuid.uuid4())
+        self.drift_detections[detection_id] = {"StackName": StackName, "CreatedAt": self.clock.now()}
+        return {"StackDriftDetectionId": detection_id}
+
+    def describe_stack_drift_detection_status(self, StackDriftDetectionId: str):
+        detection = self.drift_detections[StackDriftDetectionId]
+        stack = self.stacks[detection.get("StackName")]
+        response = {
+            "StackId": stack.get("StackId"),
+            "StackDriftDetectionId": StackDriftDetectionId,
+            "DetectionStatus": "DETECTION_IN_PROGRESS",
+            "Timestamp": datetime.datetime(2023, 2, 8, 18, 0),
+        }
+        if self.clock.now() - detection.get("CreatedAt") >= self.latency_model.drift_detection_s:
+            drifted = any(stack_name == detection.get("StackName") for stack_name, _ in self.drifts)
+            response.update(DetectionStatus="DETECTION_COMPLETE", StackDriftStatus="DRIFTED" if drifted else "IN_SYNC")
+        return response
+
+    def describe_stack_resource_drifts(
+        self,
+        StackName: str,
+        StackResourceDriftStatusFilters: list = None,
+        NextToken: str = "",
+        MaxResults: int = None,
+        **kwargs,
+    ):
+        stack = self.stacks.get(StackName)
+        if stack is None:
+            raise EmulatedError("ValidationError", f"Stack with id {StackName} does not exist")
+        resource_drifts = []
+        for logical_id, resource in self._template(StackName).get("Resources", {}).items():
+            expected = self._resolved_properties(StackName, logical_id)
+            resource_drift = {
+                "StackId": stack.get("StackId"),
+                "LogicalResourceId": logical_id,
+                "PhysicalResourceId": self._physical_id(StackName, logical_id),
+                "ResourceType": resource.get("Type"),
+                "ExpectedProperties": json.dumps(expected),
+                "PropertyDifferences": [],
+                "StackResourceDriftStatus": "IN_SYNC",
+                "Timestamp": datetime.datetime(2023, 2, 8, 18, 0),
+            }
+            if (StackName, logical_id) in self.drifts:
+                actual = self.drifts.get((StackName, logical_id))
+                if actual is None:
+                    resource_drift["StackResourceDriftStatus"] = "DELETED"
+                else:
+                    resource_drift["ActualProperties"] = json.dumps(actual)
+                    resource_drift["PropertyDifferences"] = property_differences(expected, actual)
+                    if resource_drift["PropertyDifferences"]:
+                        resource_drift["StackResourceDriftStatus"] = "MODIFIED"
+            if not StackResourceDriftStatusFilters or resource_drift["StackResourceDriftStatus"] in (
+                StackResourceDriftStatusFilters
+            ):
+                resource_drifts.append(resource_drift)
+        page, next_token = paginate(resource_drifts, NextToken, MaxResults or STACK_RESOURCE_DRIFTS_PAGE_SIZE)
+        response = {"StackResourceDrifts": page}
+        if next_token:
+            response["NextToken"] = next_token
+        return response
+
+    def _template(self, stack_name: str):
+        template_body = self.stacks[stack_name].get("TemplateBody")
+        return json.loads(template_body) if template_body else {}
+
+    def _physical_id(self, stack_name: str, logical_id: str):
+        resource = self._template(stack_name).get("Resources", {}).get(logical_id, {})
+        properties = resource.get("Properties", {})
+        if resource.get("Type") == "AWS::DynamoDB::Table":
+            return properties.get("TableName")
+        if resource.get("Type") == "AWS::ApplicationAutoScaling::ScalableTarget":
+            return "|".join(
+                [properties.get("ResourceId"), properties.get("ScalableDimension"), properties.get("ServiceNamespace")]
+            )
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{stack_name}/{logical_id}"))
+
+    def _resolved_properties(self, stack_name: str, logical_id: str):
+        # The intrinsic functions of the templates are resolved, as in the drift results of CloudFormation.
+        resources = self._template(stack_name).get("Resources", {})
+
+        def resolve(value):
+            if isinstance(value, dict) and "Ref" in value:
+                return self._physical_id(stack_name, value.get("Ref"))
+            if isinstance(value, dict) and "Fn::GetAtt" in value:
+                referenced_logical_id, attribute = value.get("Fn::GetAtt")
+                table_name = resources.get(referenced_logical_id).get("Properties").get("TableName")
+                return self._shape(table_name).describe_table(table_name).get("Table").get(f"Latest{attribute}")
+            if isinstance(value, dict):
+                return {key: resolve(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [resolve(item) for item in value]
+            return value
+
+        return resolve(copy.deepcopy(resources.get(logical_id).get("Properties", {})))
+
+
+def property_differences(expected, actual, path: str = ""):
+    """Returns the PropertyDifferences of a drifted resource, one per differing leaf property."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        keys = list(expected) + [key for key in actual if key not in expected]
+    elif isinstance(expected, list) and isinstance(actual, list):
+        keys = range(max(len(expected), len(actual)))
+    else:
+        if expected == actual:
+            return []
+        return [
+            {
+                "PropertyPath": path,
+                "ExpectedValue": json.dumps(expected),
+                "ActualValue": json.dumps(actual),
+                "DifferenceType": "NOT_EQUAL",
+            }
+        ]
+    differences = []
+    for key in keys:
+        key_path = f"{path}/{key}"
+        has_expected = key in expected if isinstance(expected, dict) else key < len(expected)
+        has_actual = key in actual if isinstance(actual, dict) else key < len(actual)
+        if has_expected and has_actual:
+            differences.extend(property_differences(expected[key], actual[key], key_path))
+        elif has_expected:
+            differences.append(
+                {
+                    "PropertyPath": key_path,
+                    "ExpectedValue": json.dumps(expected[key]),
+                    "ActualValue": "null",
+                    "DifferenceType": "REMOVE",
+                }
+            )
+        else:
+            differences.append(
+                {
+                    "PropertyPath": key_path,
+                    "ExpectedValue": "null",
+                    "ActualValue": json.dumps(actual[key]),
+                    "DifferenceType": "ADD",
+                }
+            )
+    return differences
+
+
+def paginate(items: list, token: str, page_size: int):
+    """Returns a page of items and the token of the next page, None on the last page."""
+    start = int(token) if token else 0
+    end = start + page_size
+    return items[start:end], str(end) if end < len(items) else None
+
+
+class EmulatedError(Exception):
+    """An error response of the emulated control plane, raised as a ClientError by the boto3 client."""
+
+    def __init__(self, code: str, message: str = "", status_code: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
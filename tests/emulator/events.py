@@ -0,0 +1,86 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import datetime
+import json
+import os
+from tests.emulator.shapes import ACCOUNT_ID, REGION
+
+EVENT_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "events", "event.json")
+# Virtual time 0 of the emulated restores, 2023-02-08T18:00:00Z.
+EPOCH_MS = 1675879200000
+DLQ_REPLAY_MESSAGE_ATTRIBUTE = "sqs-dlq-replay-nb"
+
+
+def to_epoch_ms(virtual_time_s: float):
+    return EPOCH_MS + int(virtual_time_s * 1000)
+
+
+def build_restore_event(
+    source_table_name: str,
+    target_table_name: str,
+    event_time_s: float = 0.0,
+    sent_time_s: float = 0.0,
+    first_receive_time_s: float = 0.0,
+    receive_count: int = 1,
+    replay_attempt: int = 0,
+    event_id: str = "",
+):
+    """Builds the SQS event of a RestoreTableToPointInTime call from the sample event, at virtual times.
+
+    Args:
+        source_table_name: The name of the source table.
+        target_table_name: The name of the restored table.
+        event_time_s: Virtual time of the restore call.
+        sent_time_s: Virtual time the message was sent to the queue.
+        first_receive_time_s: Virtual time the message was first received.
+        receive_count: Number of receives of the message.
+        replay_attempt: Number of replays of the message from the DLQ, 0 for the original message.
+        event_id: The CloudTrail event id, defaults to the sample one.
+
+    Returns:
+      A dict with the SQS event.
+    """
+    with open(EVENT_FILE) as event_file:
+        event = json.load(event_file)
+    record = event["Records"][0]
+    body = json.loads(record["body"])
+    event_time = datetime.datetime.fromtimestamp(to_epoch_ms(event_time_s) / 1000, tz=datetime.timezone.utc)
+    body["time"] = body["detail"]["eventTime"] = event_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if event_id:
+        body["detail"]["eventID"] = event_id
+    request_parameters = body["detail"]["requestParameters"]
+    request_parameters["sourceTableArn"] = f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{source_table_name}"
+    request_parameters["targetTableName"] = target_table_name
+    request_parameters.pop("globalSecondaryIndexOverride", None)
+    request_parameters.pop("localSecondaryIndexOverride", None)
+    record["body"] = json.dumps(body)
+    record["attributes"]["SentTimestamp"] = str(to_epoch_ms(sent_time_s))
+    record["attributes"]["ApproximateFirstReceiveTimestamp"] = str(to_epoch_ms(first_receive_time_s))
+    record["attributes"]["ApproximateReceiveCount"] = str(receive_count)
+    record["messageAttributes"] = {}
+    if replay_attempt:
+        record["messageAttributes"][DLQ_REPLAY_MESSAGE_ATTRIBUTE] = {
+            "stringValue": str(replay_attempt),
+            "stringListValues": [],
+            "binaryListValues": [],
+            "dataType": "Number",
+        }
+    return event
@@ -0,0 +1,71 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class OperationProfile:
+    """The modeled latency and throttle probability of an API operation."""
+
+    latency_ms: float
+    jitter_ms: float = 0.0
+    throttle_probability: float = 0.0
+
+
+@dataclass
+class LatencyModel:
+    """Per operation latencies, throttle probabilities and CloudFormation stabilization times.
+
+    The operations are keyed by <service>.<Operation>, e.g. cloudformation.DescribeStacks, and fall back to the
+    default profile. Every random draw comes from the seeded generator, so a run is reproducible.
+    """
+
+    operations: dict = field(default_factory=dict)
+    default: OperationProfile = OperationProfile(latency_ms=20.0, jitter_ms=5.0)
+    change_set_creation_s: float = 5.0
+    stack_stabilization_s: dict = field(default_factory=lambda: {"IMPORT": 30.0, "UPDATE": 20.0, "CREATE": 30.0})
+    stabilization_jitter_s: float = 0.0
+    drift_detection_s: float = 10.0
+    max_attempts: int = 10
+    seed: int = 0
+
+    def __post_init__(self):
+        self.random = random.Random(self.seed)
+
+    def profile(self, operation: str):
+        return self.operations.get(operation, self.default)
+
+    def latency_s(self, operation: str):
+        profile = self.profile(operation)
+        return max(self.random.gauss(profile.latency_ms, profile.jitter_ms), 0.0) / 1000
+
+    def is_throttled(self, operation: str):
+        probability = self.profile(operation).throttle_probability
+        return probability > 0 and self.random.random() < probability
+
+    def backoff_s(self, attempt: int):
+        # Full jitter exponential backoff of the botocore standard and adaptive retry modes.
+        return self.random.random() * min(20.0, 2**attempt)
+
+    def stabilization_s(self, change_set_type: str):
+        jitter = self.random.uniform(-self.stabilization_jitter_s, self.stabilization_jitter_s)
+        return max(self.stack_stabilization_s.get(change_set_type, 20.0) + jitter, 0.0)
@@ -0,0 +1,197 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import datetime
+from dataclasses import dataclass
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+STREAM_LABEL = "2023-02-08T18:05:00.000"
+
+
+@dataclass(frozen=True)
+class TableShape:
+    """The settings of a source table, from which the emulator answers the describe and list calls.
+
+    The restored table has the same shape, it only gets its own name, ARNs and stream.
+    """
+
+    name: str
+    gsi_count: int = 0
+    lsi_count: int = 0
+    billing_mode: str = "PAY_PER_REQUEST"
+    stream: bool = False
+    trigger_count: int = 0
+    kinesis: bool = False
+    ttl: bool = False
+    pitr: bool = False
+    auto_scaling: bool = False
+    policies_per_target: int = 1
+    tag_count: int = 0
+
+    @property
+    def provisioned(self):
+        return self.billing_mode == "PROVISIONED"
+
+    def table_arn(self, table_name: str):
+        return f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{table_name}"
+
+    def stream_arn(self, table_name: str):
+        return f"{self.table_arn(table_name)}/stream/{STREAM_LABEL}"
+
+    def describe_table(self, table_name: str, table_status: str = "ACTIVE"):
+        throughput = {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5, "NumberOfDecreasesToday": 0}
+        attribute_definitions = [
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ]
+        table = {
+            "TableName": table_name,
+            "TableArn": self.table_arn(table_name),
+            "TableStatus": table_status,
+            "CreationDateTime": datetime.datetime(2023, 2, 8, 18, 0),
+            "KeySchema": [
+                {"AttributeName": "pk", "KeyType": "HASH"},
+                {"AttributeName": "sk", "KeyType": "RANGE"},
+            ],
+            "AttributeDefinitions": attribute_definitions,
+            "ItemCount": 0,
+            "TableSizeBytes": 0,
+        }
+        if self.provisioned:
+            table["BillingModeSummary"] = {"BillingMode": "PROVISIONED"}
+            table["ProvisionedThroughput"] = dict(throughput)
+        else:
+            table["BillingModeSummary"] = {"BillingMode": "PAY_PER_REQUEST"}
+            table["ProvisionedThroughput"] = {"ReadCapacityUnits": 0, "WriteCapacityUnits": 0}
+        global_secondary_indexes = []
+        for i in range(self.gsi_count):
+            attribute_definitions.append({"AttributeName": f"gsi{i}", "AttributeType": "S"})
+            index = {
+                "IndexName": f"gsi{i}-index",
+                "KeySchema": [{"AttributeName": f"gsi{i}", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+                "IndexStatus": "ACTIVE",
+                "IndexArn": f"{self.table_arn(table_name)}/index/gsi{i}-index",
+            }
+            if self.provisioned:
+                index["ProvisionedThroughput"] = dict(throughput)
+            global_secondary_indexes.append(index)
+        if global_secondary_indexes:
+            table["GlobalSecondaryIndexes"] = global_secondary_indexes
+        local_secondary_indexes = []
+        for i in range(self.lsi_count):
+            attribute_definitions.append({"AttributeName": f"lsi{i}", "AttributeType": "S"})
+            local_secondary_indexes.append(
+                {
+                    "IndexName": f"lsi{i}-index",
+                    "KeySchema": [
+                        {"AttributeName": "pk", "KeyType": "HASH"},
+                        {"AttributeName": f"lsi{i}", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "KEYS_ONLY"},
+                    "IndexArn": f"{self.table_arn(table_name)}/index/lsi{i}-index",
+                }
+            )
+        if local_secondary_indexes:
+            table["LocalSecondaryIndexes"] = local_secondary_indexes
+        if self.stream:
+            table["StreamSpecification"] = {"StreamEnabled": True, "StreamViewType": "NEW_AND_OLD_IMAGES"}
+            table["LatestStreamLabel"] = STREAM_LABEL
+            table["LatestStreamArn"] = self.stream_arn(table_name)
+        return {"Table": table}
+
+    def tags(self):
+        return [{"Key": f"tag-{i}", "Value": f"value-{i}"} for i in range(self.tag_count)]
+
+    def event_source_mappings(self, stream_arn: str):
+        if not self.stream or stream_arn != self.stream_arn(self.name):
+            return []
+        return [
+            {
+                "UUID": f"00000000-0000-0000-0000-{i:012d}",
+                "EventSourceArn": stream_arn,
+                "FunctionArn": f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:consumer-{i}",
+                "StartingPosition": "LATEST",
+                "BatchSize": 100,
+                "MaximumBatchingWindowInSeconds": 0,
+                "ParallelizationFactor": 1,
+                "State": "Enabled",
+                "LastModified": datetime.datetime(2023, 2, 8, 18, 0),
+            }
+            for i in range(self.trigger_count)
+        ]
+
+    def kinesis_destinations(self):
+        if not self.kinesis:
+            return []
+        return [
+            {
+                "StreamArn": f"arn:aws:kinesis:{REGION}:{ACCOUNT_ID}:stream/{self.name}-stream",
+                "DestinationStatus": "ACTIVE",
+            }
+        ]
+
+    def scalable_targets(self):
+        """Returns the scalable targets of the table and of its indexes, keyed by resource id."""
+        if not self.auto_scaling or not self.provisioned:
+            return {}
+        resource_ids = {f"table/{self.name}": "table"}
+        for i in range(self.gsi_count):
+            resource_ids[f"table/{self.name}/index/gsi{i}-index"] = "index"
+        targets = {}
+        for resource_id, resource_type in resource_ids.items():
+            targets[resource_id] = [
+                {
+                    "ServiceNamespace": "dynamodb",
+                    "ResourceId": resource_id,
+                    "ScalableDimension": f"dynamodb:{resource_type}:{capacity}CapacityUnits",
+                    "MinCapacity": 5,
+                    "MaxCapacity": 100,
+                    "RoleARN": f"arn:aws:iam::{ACCOUNT_ID}:role/aws-service-role/dynamodb.application-autoscaling"
+                    ".amazonaws.com/AWSServiceRoleForApplicationAutoScaling_DynamoDBTable",
+                    "CreationTime": datetime.datetime(2023, 2, 8, 18, 0),
+                }
+                for capacity in ("Read", "Write")
+            ]
+        return targets
+
+    def scaling_policies(self, resource_id: str, scalable_dimension: str):
+        if resource_id not in self.scalable_targets():
+            return []
+        capacity = scalable_dimension.split(":")[2].replace("CapacityUnits", "")
+        return [
+            {
+                "PolicyARN": f"arn:aws:autoscaling:{REGION}:{ACCOUNT_ID}:scalingPolicy:{resource_id}:{capacity}-{i}",
+                "PolicyName": f"{self.name}-{capacity}-policy-{i}",
+                "ServiceNamespace": "dynamodb",
+                "ResourceId": resource_id,
+                "ScalableDimension": scalable_dimension,
+                "PolicyType": "TargetTrackingScaling",
+                "TargetTrackingScalingPolicyConfiguration": {
+                    "TargetValue": 70.0 - i,
+                    "PredefinedMetricSpecification": {
+                        "PredefinedMetricType": f"DynamoDB{capacity}CapacityUtilization"
+                    },
+                },
+                "CreationTime": datetime.datetime(2023, 2, 8, 18, 0),
+            }
+            for i in range(self.policies_per_target)
+        ]
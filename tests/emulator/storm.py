@@ -0,0 +1,381 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Restore storm simulator: replays a fleet-scale DR drill through a model of the event pipeline.
+#
+#   PYTHONPATH=src python -m tests.emulator.storm --restores 500 --window 600
+#
+# The restore events go through a modeled SQS queue, its DLQ and the replay function of the
+# amazon-sqs-dlq-replay-backoff application, and are consumed by a modeled Lambda concurrency. Each invocation
+# runs the real lambda_handler against the emulated control plane, on a virtual clock that starts when the
+# invocation does. The invocations are run in the order they start, so the state of the stacks and tables
+# they see is the state at that time.
+import argparse
+import contextlib
+import heapq
+import io
+import json
+import logging
+import math
+import os
+import random
+import types
+from dataclasses import asdict, dataclass
+from unittest import mock
+from tests.emulator.clock import VirtualClock
+from tests.emulator.control_plane import ControlPlane
+from tests.emulator.events import build_restore_event
+from tests.emulator.latency import LatencyModel, OperationProfile
+from tests.emulator.shapes import TableShape
+
+ENVIRONMENT_DEFAULTS = {
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+}
+CFN_POLLED_OPERATIONS = ("cloudformation.DescribeChangeSet", "cloudformation.DescribeStacks")
+
+
+@dataclass
+class StormConfig:
+    """The restore storm and the settings of the pipeline it goes through.
+
+    The queue, DLQ and replay values default to the ones of template.yaml and of the replay application.
+    """
+
+    restores: int = 500
+    window_s: float = 600.0
+    # Restored table sizes are log-normal, a restore takes a fixed time plus a time per GB.
+    median_size_gb: float = 2.0
+    size_sigma: float = 1.2
+    restore_base_s: float = 180.0
+    restore_s_per_gb: float = 30.0
+    max_restore_s: float = 4 * 3600.0
+    # Delay between the restore call and the message being sent to the queue by EventBridge.
+    delivery_delay_s: float = 5.0
+    # Lambda scales the SQS pollers from initial_concurrency by scale_up_per_minute up to max_concurrency.
+    initial_concurrency: int = 5
+    scale_up_per_minute: int = 60
+    max_concurrency: int = 50
+    function_timeout_s: float = 300.0
+    visibility_timeout_s: float = 300.0
+    dlq_delay_s: float = 10.0
+    replay_interval_s: float = 5.0
+    replay_backoff_rate: float = 2.0
+    replay_max_delay_s: float = 900.0
+    replay_max_attempts: int = 50
+    # CloudFormation throttle probability added by each concurrent invocation.
+    cfn_throttle_per_invocation: float = 0.01
+    max_throttle_probability: float = 0.5
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class SyntheticRestore:
+    """A restore of the storm: the source table, the restored table and when it gets ACTIVE."""
+
+    __slots__ = ("shape", "target_table_name", "size_gb", "restore_time_s", "active_at_s")
+    shape: TableShape
+    target_table_name: str
+    size_gb: float
+    restore_time_s: float
+    active_at_s: float
+
+
+@dataclass(order=True)
+class Message:
+    """An SQS message of the main queue, ordered by the time it becomes visible."""
+
+    visible_at_s: float
+    sequence: int
+    restore: SyntheticRestore = None
+    sent_at_s: float = 0.0
+    first_received_at_s: float = None
+    receive_count: int = 0
+    replay_attempt: int = 0
+
+
+def synthetic_shape(rng: random.Random, index: int):
+    """Draws the settings of a source table, most tables being small with a few of the settings."""
+    provisioned = rng.random() < 0.3
+    stream = rng.random() < 0.3
+    return TableShape(
+        name=f"storm-table-{index:04d}",
+        gsi_count=rng.choices((0, 1, 2, 5, 10), weights=(40, 25, 20, 10, 5))[0],
+        lsi_count=rng.choices((0, 1, 3), weights=(80, 15, 5))[0],
+        billing_mode="PROVISIONED" if provisioned else "PAY_PER_REQUEST",
+        stream=stream,
+        trigger_count=rng.randint(1, 3) if stream else 0,
+        kinesis=rng.random() < 0.1,
+        ttl=rng.random() < 0.4,
+        pitr=rng.random() < 0.7,
+        auto_scaling=provisioned and rng.random() < 0.8,
+        tag_count=rng.randint(0, 10),
+    )
+
+
+def generate_restores(config: StormConfig):
+    """Draws the restores of the storm, with uniform restore times over the window."""
+    rng = random.Random(config.seed)
+    restores = []
+    for index in range(config.restores):
+        size_gb = rng.lognormvariate(math.log(config.median_size_gb), config.size_sigma)
+        restore_time_s = rng.uniform(0.0, config.window_s)
+        restore_s = min(config.max_restore_s, config.restore_base_s + size_gb * config.restore_s_per_gb)
+        shape = synthetic_shape(rng, index)
+        restores.append(
+            SyntheticRestore(
+                shape=shape,
+                target_table_name=f"restored-{shape.name}",
+                size_gb=size_gb,
+                restore_time_s=restore_time_s,
+                active_at_s=restore_time_s + restore_s,
+            )
+        )
+    return sorted(restores, key=lambda restore: restore.restore_time_s)
+
+
+def replay_delay_s(config: StormConfig, replay_attempt: int):
+    """Returns the delay of a message replayed from the DLQ, growing with the replay attempts."""
+    return min(config.replay_max_delay_s, config.replay_interval_s * config.replay_backoff_rate ** replay_attempt)
+
+
+def percentile(values: list, pct: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def simulate_storm(config: StormConfig = None):
+    """Runs a restore storm through the modeled pipeline and returns its report.
+
+    Args:
+        config: The storm and the pipeline settings. Defaults to 500 restores within 10 minutes.
+
+    Returns:
+      A dict with the throughput, queue age, retry amplification, throttles and time to the last sync.
+    """
+    if config is None:
+        config = StormConfig()
+    for key, value in ENVIRONMENT_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    from table_sync import app
+    from table_sync.sync_settings import SyncSettings
+
+    restores = generate_restores(config)
+    control_plane = ControlPlane(tables=[])
+    for restore in restores:
+        control_plane.add_table(restore.shape)
+        control_plane.restore(restore.shape.name, restore.target_table_name, active_at=restore.active_at_s)
+    settings = SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=False,
+    )
+
+    # The pollers scale up one by one, the initial ones are there from the start.
+    seconds_per_poller = 60.0 / config.scale_up_per_minute
+    pollers = [
+        max(0.0, (index - config.initial_concurrency + 1) * seconds_per_poller)
+        for index in range(config.max_concurrency)
+    ]
+    heapq.heapify(pollers)
+    queue = []
+    sequence = 0
+    for restore in restores:
+        sent_at_s = restore.restore_time_s + config.delivery_delay_s
+        heapq.heappush(queue, Message(visible_at_s=sent_at_s, sequence=sequence, restore=restore, sent_at_s=sent_at_s))
+        sequence += 1
+
+    invocations = 0
+    timeouts = 0
+    peak_concurrency = 0
+    running = []
+    errors = {}
+    queue_ages = []
+    synced_at = {}
+    lost = []
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(control_plane.install())
+        stack.enter_context(mock.patch("table_sync.app.get_sync_settings", return_value=settings))
+        stack.enter_context(
+            mock.patch(
+                "table_sync.deploy_cfn_resources.time",
+                types.SimpleNamespace(sleep=lambda seconds: control_plane.clock.sleep(seconds)),
+            )
+        )
+        # Thousands of failed invocations would flood the output with their logs and metrics.
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        logging.disable(logging.CRITICAL)
+        stack.callback(logging.disable, logging.NOTSET)
+
+        while queue:
+            message = heapq.heappop(queue)
+            started_at_s = max(message.visible_at_s, heapq.heappop(pollers))
+            running = [finished_at_s for finished_at_s in running if finished_at_s > started_at_s]
+            concurrency = len(running) + 1
+            peak_concurrency = max(peak_concurrency, concurrency)
+            message.receive_count += 1
+            if message.first_received_at_s is None:
+                message.first_received_at_s = started_at_s
+            queue_ages.append(started_at_s - message.sent_at_s)
+
+            throttle_probability = min(
+                config.max_throttle_probability, config.cfn_throttle_per_invocation * concurrency
+            )
+            control_plane.clock = VirtualClock(start=started_at_s)
+            polled_profile = OperationProfile(
+                latency_ms=80.0, jitter_ms=20.0, throttle_probability=throttle_probability
+            )
+            control_plane.latency_model = LatencyModel(
+                operations={operation: polled_profile for operation in CFN_POLLED_OPERATIONS},
+                stabilization_jitter_s=8.0,
+                seed=config.seed * 1000003 + invocations,
+            )
+            restore = message.restore
+            event = build_restore_event(
+                restore.shape.name,
+                restore.target_table_name,
+                event_time_s=restore.restore_time_s,
+                sent_time_s=message.sent_at_s,
+                first_receive_time_s=message.first_received_at_s,
+                receive_count=message.receive_count,
+                replay_attempt=message.replay_attempt,
+            )
+            invocations += 1
+            error_class = None
+            try:
+                app.lambda_handler(event, None)
+            except Exception as error:
+                error_class = type(error).__name__
+            duration_s = control_plane.clock.now() - started_at_s
+            if duration_s > config.function_timeout_s:
+                timeouts += 1
+                error_class = "Timeout"
+                duration_s = config.function_timeout_s
+            finished_at_s = started_at_s + duration_s
+            running.append(finished_at_s)
+            heapq.heappush(pollers, finished_at_s)
+            if error_class is None:
+                synced_at[restore.target_table_name] = finished_at_s
+                continue
+
+            # The failed message is visible again once its visibility timeout expires and, with a
+            # maxReceiveCount of 1, moved to the DLQ, from which it is replayed with a growing delay.
+            errors[error_class] = errors.get(error_class, 0) + 1
+            if message.replay_attempt >= config.replay_max_attempts:
+                lost.append(restore.target_table_name)
+                continue
+            replayed_at_s = started_at_s + config.visibility_timeout_s + config.dlq_delay_s
+            replay_attempt = message.replay_attempt + 1
+            heapq.heappush(
+                queue,
+                Message(
+                    visible_at_s=replayed_at_s + replay_delay_s(config, replay_attempt),
+                    sequence=sequence,
+                    restore=restore,
+                    sent_at_s=replayed_at_s,
+                    replay_attempt=replay_attempt,
+                ),
+            )
+            sequence += 1
+
+    first_restore_s = restores[0].restore_time_s if restores else 0.0
+    last_sync_s = max(synced_at.values(), default=first_restore_s)
+    sync_times = [synced_at[restore.target_table_name] - restore.restore_time_s for restore in restores
+                  if restore.target_table_name in synced_at]
+    active_waits = [synced_at[restore.target_table_name] - restore.active_at_s for restore in restores
+                    if restore.target_table_name in synced_at]
+    duration_min = max(last_sync_s - first_restore_s, 1e-9) / 60
+    return {
+        "config": asdict(config),
+        "restores": len(restores),
+        "synced": len(synced_at),
+        "lost": len(lost),
+        "invocations": invocations,
+        "retry_amplification": round(invocations / max(len(restores), 1), 2),
+        "errors": dict(sorted(errors.items())),
+        "timeouts": timeouts,
+        "throttles": sum(control_plane.throttles.values()),
+        "peak_concurrency": peak_concurrency,
+        "throughput_per_min": round(len(synced_at) / duration_min, 2),
+        "queue_age_s": {
+            "p50": round(percentile(queue_ages, 50), 1),
+            "p95": round(percentile(queue_ages, 95), 1),
+            "max": round(max(queue_ages, default=0.0), 1),
+        },
+        "time_to_sync_s": {
+            "p50": round(percentile(sync_times, 50), 1),
+            "p95": round(percentile(sync_times, 95), 1),
+            "max": round(max(sync_times, default=0.0), 1),
+        },
+        "sync_after_active_s": {
+            "p50": round(percentile(active_waits, 50), 1),
+            "p95": round(percentile(active_waits, 95), 1),
+        },
+        "time_to_last_sync_s": round(last_sync_s - first_restore_s, 1),
+    }
+
+
+def format_storm_report(report: dict):
+    """Formats the report of a restore storm as text."""
+    lines = [
+        f"Restores: {report['restores']} synced: {report['synced']} lost: {report['lost']}",
+        f"Invocations: {report['invocations']} (retry amplification x{report['retry_amplification']}), "
+        f"timeouts: {report['timeouts']}, peak concurrency: {report['peak_concurrency']}",
+        f"Errors: {', '.join(f'{name} {count}' for name, count in report['errors'].items()) or 'none'}",
+        f"CloudFormation throttles: {report['throttles']}",
+        f"Throughput: {report['throughput_per_min']} syncs/min",
+        f"Queue age: p50 {report['queue_age_s']['p50']}s p95 {report['queue_age_s']['p95']}s "
+        f"max {report['queue_age_s']['max']}s",
+        f"Restore call to sync: p50 {report['time_to_sync_s']['p50']}s p95 {report['time_to_sync_s']['p95']}s "
+        f"max {report['time_to_sync_s']['max']}s",
+        f"Table ACTIVE to sync: p50 {report['sync_after_active_s']['p50']}s "
+        f"p95 {report['sync_after_active_s']['p95']}s",
+        f"Time until the last table is synced: {report['time_to_last_sync_s']}s",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Simulates a restore storm through the table sync pipeline.")
+    parser.add_argument("--restores", type=int, default=StormConfig.restores)
+    parser.add_argument("--window", type=float, default=StormConfig.window_s, help="Seconds the restores span.")
+    parser.add_argument("--max-concurrency", type=int, default=StormConfig.max_concurrency)
+    parser.add_argument("--seed", type=int, default=StormConfig.seed)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+    report = simulate_storm(
+        StormConfig(
+            restores=args.restores, window_s=args.window, max_concurrency=args.max_concurrency, seed=args.seed
+        )
+    )
+    print(json.dumps(report, indent=2) if args.format == "json" else format_storm_report(report))
+
+
+if __name__ == "__main__":
+    main()
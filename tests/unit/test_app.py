@@ -19,6 +19,8 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import json
 import os
+import threading
+import types
 import unittest
 from unittest import mock
 from botocore.stub import Stubber
@@ -26,6 +28,12 @@ import boto3
 import datetime
 from dateutil.tz import *
 
+
+def template_body(template):
+    # Change set templates are sent as compact canonical JSON.
+    return json.dumps(template, separators=(",", ":"), sort_keys=True)
+
+
 # Event
 event = {
     "Records": [{
@@ -248,7 +256,8 @@ cfn_stubber.add_response(
         'StackId': 'test-stack-id'
     },
     {
-        'StackName': 'Restored-DynamoDB-Table-target-table-Stack', 'TemplateBody': '{"AWSTemplateFormatVersion": '
+        'StackName': 'Restored-DynamoDB-Table-target-table-Stack', 'TemplateBody': template_body(json.loads(
+                                                                                '{"AWSTemplateFormatVersion": '
                                                                                 '"2010-09-09", "Description": '
                                                                                 '"target-table Cloudformation '
                                                                                 'deployment", "Resources": {'
@@ -267,7 +276,7 @@ cfn_stubber.add_response(
                                                                                 '{"AttributeName": "positionKey", '
                                                                                 '"AttributeType": "S"}], '
                                                                                 '"BillingMode": '
-                                                                                '"PAY_PER_REQUEST"}}}}',
+                                                                                '"PAY_PER_REQUEST"}}}}')),
      'ChangeSetName': 'Import-DynamoDB-target-table-Change-Set', 'Description': 'Change set to update the PITR '
                                                                                 'restored DynamoDB table',
      'ChangeSetType': 'IMPORT', 'ResourcesToImport': [{'ResourceType': 'AWS::DynamoDB::Table', 'LogicalResourceId':
@@ -342,7 +351,7 @@ cfn_stubber.add_response(
     },
     {
         'StackName': 'Restored-DynamoDB-Table-target-table-Stack',
-        'TemplateBody': json.dumps({
+        'TemplateBody': template_body({
             'AWSTemplateFormatVersion': '2010-09-09',
             'Description': 'target-table Cloudformation deployment',
             'Resources': {
@@ -444,7 +453,7 @@ cfn_stubber.add_response(
     },
     {
         'StackName': 'Restored-DynamoDB-Table-target-table-Stack',
-        'TemplateBody': json.dumps({
+        'TemplateBody': template_body({
             'AWSTemplateFormatVersion': '2010-09-09',
             'Description': 'target-table Cloudformation deployment',
             'Resources': {
@@ -549,7 +558,7 @@ cfn_stubber.add_response(
     },
     {
         'StackName': 'Restored-DynamoDB-Table-target-table-Stack',
-        'TemplateBody': json.dumps({
+        'TemplateBody': template_body({
             'AWSTemplateFormatVersion': '2010-09-09',
             'Description': 'target-table Cloudformation deployment',
             'Resources': {
@@ -657,7 +666,7 @@ cfn_stubber.add_response(
     },
     {
         'StackName': 'Restored-DynamoDB-Table-target-table-Stack',
-        'TemplateBody': json.dumps({
+        'TemplateBody': template_body({
             'AWSTemplateFormatVersion': '2010-09-09',
             'Description': 'target-table Cloudformation deployment',
             'Resources': {
@@ -768,7 +777,7 @@ cfn_stubber.add_response(
     },
     {
         'StackName': 'Restored-DynamoDB-Table-target-table-Stack',
-        'TemplateBody': json.dumps({
+        'TemplateBody': template_body({
             'AWSTemplateFormatVersion': '2010-09-09',
             'Description': 'target-table Cloudformation deployment',
             'Resources': {
@@ -897,23 +906,71 @@ def test_app():
                          "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
                          "AWS_DEFAULT_REGION": "us-east-1"}):
         from table_sync import app
-        with mock.patch('table_sync.app.CFN', cfn_client):
-            with mock.patch('table_sync.app.LAMBDA', lambda_client):
-                with mock.patch('table_sync.app.DDB', dynamodb_client):
-                    with mock.patch('table_sync.app.APP_AUTO_SCALING', app_autoscaling_client):
-                        # Activate all stubber.
-                        dynamodb_stubber.activate()
-                        cfn_stubber.activate()
-                        lambda_stubber.activate()
-                        app_autoscaling_stubber.activate()
-                        handler_return = app.lambda_handler(event, None)
-                        assert handler_return == True
+        with mock.patch.dict('table_sync.client_factory.CLIENTS', {
+            "cloudformation": cfn_client,
+            "lambda": lambda_client,
+            "dynamodb": dynamodb_client,
+            "application-autoscaling": app_autoscaling_client,
+        }):
+            # Activate all stubber.
+            dynamodb_stubber.activate()
+            cfn_stubber.activate()
+            lambda_stubber.activate()
+            app_autoscaling_stubber.activate()
+            handler_return = app.lambda_handler(event, None)
+            assert handler_return == True
+
+            # Deactivate all stubber.
+            dynamodb_stubber.deactivate()
+            cfn_stubber.deactivate()
+            lambda_stubber.deactivate()
+            app_autoscaling_stubber.deactivate()
+
+
+def test_app_sibling_stacks_start_alongside_table_stack():
+    from tests.emulator import ControlPlane, LatencyModel, OperationProfile, VirtualClock
+    from tests.emulator.events import build_restore_event
+    from tests.unit.test_reconciler import SHAPE, all_settings, environment
+
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app, deploy_cfn_resources
+
+        clock = VirtualClock()
+        control_plane = ControlPlane(
+            tables=[SHAPE], latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0)), clock=clock
+        )
+        control_plane.restore(SHAPE.name, "orders-restored")
+        started = {"AutoScaling": threading.Event(), "Triggers": threading.Event()}
+        started_before = {}
+        deploy_sibling_stack = deploy_cfn_resources.deploy_sibling_stack
+        create_and_execute_change_set = app.create_and_execute_change_set
+
+        def record_sibling_stack(**kwargs):
+            started["AutoScaling" if kwargs["cfn_stack_name"].endswith("-AutoScaling-Stack") else "Triggers"].set()
+            return deploy_sibling_stack(**kwargs)
+
+        def wait_for_sibling_stacks(**kwargs):
+            # The auto scaling stack starts once the table is imported, the triggers one once its stream is.
+            change_set_name = kwargs["cfn_change_set_name"]
+            if change_set_name.endswith("-Tags-Change-Set"):
+                started_before["Tags"] = started["AutoScaling"].wait(timeout=5)
+            if change_set_name.endswith("-PITR-Settings-Change-Set"):
+                started_before["PITR"] = started["Triggers"].wait(timeout=5)
+            return create_and_execute_change_set(**kwargs)
+
+        with control_plane.install(), mock.patch.multiple(
+            "table_sync.app",
+            get_sync_settings=mock.Mock(return_value=all_settings(enable_sibling_stacks=True)),
+            create_and_execute_change_set=wait_for_sibling_stacks,
+        ), mock.patch.object(deploy_cfn_resources, "deploy_sibling_stack", side_effect=record_sibling_stack):
+            with mock.patch("table_sync.deploy_cfn_resources.time", types.SimpleNamespace(sleep=clock.sleep)):
+                assert app.lambda_handler(build_restore_event(SHAPE.name, "orders-restored"), None) is True
 
-                        # Deactivate all stubber.
-                        dynamodb_stubber.deactivate()
-                        cfn_stubber.deactivate()
-                        lambda_stubber.deactivate()
-                        app_autoscaling_stubber.deactivate()
+        assert started_before == {"Tags": True, "PITR": True}
+        assert {
+            "Restored-DynamoDB-Table-orders-restored-Triggers-Stack",
+            "Restored-DynamoDB-Table-orders-restored-AutoScaling-Stack",
+        } <= set(control_plane.stacks)
 
 
 if __name__ == "__main__":
@@ -22,6 +22,7 @@ import unittest
 from botocore.stub import Stubber
 import boto3
 from src.table_sync import auto_scaling_settings
+from src.table_sync.cfn_yaml_template import render_cfn_resources
 
 
 def test_build_dynamodb_auto_scaling():
@@ -456,7 +457,82 @@ def test_build_dynamodb_auto_scaling():
             }
         },
     )
-    assert cfn_resources.__eq__(expected_cfn_resources)
+    assert render_cfn_resources(cfn_resources) == expected_cfn_resources
+
+
+def test_build_dynamodb_auto_scaling_every_page():
+    dynamodb_client = boto3.client("dynamodb", "us-east-1")
+    dynamodb_stubber = Stubber(dynamodb_client)
+    dynamodb_stubber.add_response("describe_table", {"Table": {}}, {"TableName": "target-table"})
+    dynamodb_stubber.activate()
+    auto_scaling_client = boto3.client("application-autoscaling", "us-east-1")
+    auto_scaling_stubber = Stubber(auto_scaling_client)
+    # Each describe call has a second page, read from the NextToken of the first one.
+    for dimension, next_token in (("ReadCapacityUnits", "page-2"), ("WriteCapacityUnits", None)):
+        response = {
+            "ScalableTargets": [
+                {
+                    "ServiceNamespace": "dynamodb",
+                    "ResourceId": "table/source-table",
+                    "ScalableDimension": f"dynamodb:table:{dimension}",
+                    "MinCapacity": 1,
+                    "MaxCapacity": 2,
+                    "RoleARN": "arn:aws:iam::123456789012:role/scaling-role",
+                    "CreationTime": "2022-07-25T10:08:27.719000-04:00",
+                }
+            ]
+        }
+        expected_params = {"ServiceNamespace": "dynamodb", "ResourceIds": ["table/source-table"]}
+        if next_token:
+            response["NextToken"] = next_token
+        else:
+            expected_params["NextToken"] = "page-2"
+        auto_scaling_stubber.add_response("describe_scalable_targets", response, expected_params)
+    for dimension, policy_names in (
+        ("ReadCapacityUnits", ("read-policy-1", "read-policy-2")),
+        ("WriteCapacityUnits", ("write-policy-1",)),
+    ):
+        for page, policy_name in enumerate(policy_names):
+            response = {
+                "ScalingPolicies": [
+                    {
+                        "PolicyARN": f"arn:aws:autoscaling:us-east-1:123456789012:scalingPolicy:{policy_name}",
+                        "PolicyName": policy_name,
+                        "ServiceNamespace": "dynamodb",
+                        "ResourceId": "table/source-table",
+                        "ScalableDimension": f"dynamodb:table:{dimension}",
+                        "PolicyType": "TargetTrackingScaling",
+                        "TargetTrackingScalingPolicyConfiguration": {"TargetValue": 70.0},
+                        "CreationTime": "2022-07-25T10:08:27.843000-04:00",
+                    }
+                ]
+            }
+            expected_params = {
+                "ServiceNamespace": "dynamodb",
+                "ResourceId": "table/source-table",
+                "ScalableDimension": f"dynamodb:table:{dimension}",
+            }
+            if page < len(policy_names) - 1:
+                response["NextToken"] = f"page-{page + 2}"
+            if page:
+                expected_params["NextToken"] = f"page-{page + 1}"
+            auto_scaling_stubber.add_response("describe_scaling_policies", response, expected_params)
+    auto_scaling_stubber.activate()
+    cfn_resources = auto_scaling_settings.build_dynamodb_auto_scaling(
+        dynamodb_client=dynamodb_client,
+        app_auto_scaling_client=auto_scaling_client,
+        source_table_name="source-table",
+        target_table_name="target-table",
+        source_table={"Table": {"TableName": "source-table"}},
+    )
+    assert list(render_cfn_resources(cfn_resources)) == [
+        "targettableReadCapacityUnitsScalableTarget",
+        "targettableWriteCapacityUnitsScalableTarget",
+        "targettableReadCapacityUnitsScalingPolicy1",
+        "targettableReadCapacityUnitsScalingPolicy2",
+        "targettableWriteCapacityUnitsScalingPolicy1",
+    ]
+    auto_scaling_stubber.assert_no_pending_responses()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import copy
+import unittest
+from src.table_sync import cfn_projection
+
+global_secondary_indexes = [
+    {
+        "IndexName": "salary-department-index",
+        "KeySchema": [
+            {"AttributeName": "salary", "KeyType": "HASH"},
+            {"AttributeName": "department", "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+        "IndexStatus": "ACTIVE",
+        "Backfilling": False,
+        "ProvisionedThroughput": {
+            "LastIncreaseDateTime": "2023-02-08T12:44:54-05:00",
+            "NumberOfDecreasesToday": 0,
+            "ReadCapacityUnits": 1,
+            "WriteCapacityUnits": 1,
+        },
+        "WarmThroughput": {"ReadUnitsPerSecond": 12000, "WriteUnitsPerSecond": 4000, "Status": "ACTIVE"},
+        "SomeFieldAddedLater": {"Value": 1},
+        "IndexSizeBytes": 0,
+        "ItemCount": 0,
+        "IndexArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/index/salary-department-index",
+    }
+]
+
+
+def test_project_cfn_property_global_secondary_indexes():
+    response = copy.deepcopy(global_secondary_indexes)
+    expected_global_secondary_indexes = [
+        {
+            "IndexName": "salary-department-index",
+            "KeySchema": [
+                {"AttributeName": "salary", "KeyType": "HASH"},
+                {"AttributeName": "department", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+            "ProvisionedThroughput": {"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+            "WarmThroughput": {"ReadUnitsPerSecond": 12000, "WriteUnitsPerSecond": 4000},
+        }
+    ]
+    projected = cfn_projection.project_cfn_property(
+        cfn_projection.DYNAMODB_TABLE_TYPE, "GlobalSecondaryIndexes", response
+    )
+    assert projected == expected_global_secondary_indexes
+    # The response is left as is.
+    assert response == global_secondary_indexes
+    assert cfn_projection.project_cfn_property(cfn_projection.DYNAMODB_TABLE_TYPE, "GlobalSecondaryIndexes", None) is None
+
+
+def test_project_cfn_properties_event_source_mapping():
+    event_source = {
+        "UUID": "a73e82f9-d895-45db-b836-108516b49644",
+        "StartingPosition": "LATEST",
+        "BatchSize": 1,
+        "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22.332",
+        "FunctionArn": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
+        "State": "Enabled",
+        "DestinationConfig": {"OnFailure": {}},
+        "FunctionResponseTypes": [],
+        "EventSourceMappingArn": "arn:aws:lambda:us-east-1:123456789012:event-source-mapping:a73e82f9",
+    }
+    assert cfn_projection.project_cfn_properties(cfn_projection.EVENT_SOURCE_MAPPING_TYPE, event_source) == {
+        "StartingPosition": "LATEST",
+        "BatchSize": 1,
+        "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22.332",
+    }
+
+
+def test_project_cfn_properties_scaling_policy():
+    policy = {
+        "PolicyARN": "arn:aws:autoscaling:us-east-1:123456789012:scalingPolicy:5d46fa9c",
+        "PolicyName": "$source-table-scaling-policy",
+        "ServiceNamespace": "dynamodb",
+        "ResourceId": "table/source-table",
+        "ScalableDimension": "dynamodb:table:ReadCapacityUnits",
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": {
+            "TargetValue": 70.0,
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "DynamoDBReadCapacityUtilization"},
+        },
+        "Alarms": [{"AlarmName": "TargetTracking-table/source-table-AlarmHigh", "AlarmARN": "arn"}],
+        "CreationTime": "2022-07-25T10:08:27.843000-04:00",
+    }
+    assert cfn_projection.project_cfn_properties(
+        cfn_projection.SCALING_POLICY_TYPE, policy, exclude=("ResourceId", "ScalableDimension", "ServiceNamespace")
+    ) == {
+        "PolicyName": "$source-table-scaling-policy",
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": {
+            "TargetValue": 70.0,
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "DynamoDBReadCapacityUtilization"},
+        },
+    }
+
+
+def test_get_resource_projection_cached():
+    projection = cfn_projection.get_resource_projection(cfn_projection.SCALABLE_TARGET_TYPE)
+    assert projection is cfn_projection.get_resource_projection(cfn_projection.SCALABLE_TARGET_TYPE)
+    assert "Id" not in projection
+
+
+if __name__ == "__main__":
+    unittest.main()
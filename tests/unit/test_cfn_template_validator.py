@@ -0,0 +1,153 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import copy
+import unittest
+from src.table_sync import cfn_template_validator
+
+template = {
+    "AWSTemplateFormatVersion": "2010-09-09",
+    "Description": "target-table Cloudformation deployment",
+    "Resources": {
+        "PITRRestoredTable": {
+            "Type": "AWS::DynamoDB::Table",
+            "DeletionPolicy": "Retain",
+            "Properties": {
+                "TableName": "target-table",
+                "KeySchema": [
+                    {"AttributeName": "email", "KeyType": "HASH"},
+                    {"AttributeName": "phone_number", "KeyType": "RANGE"},
+                ],
+                "AttributeDefinitions": [
+                    {"AttributeName": "email", "AttributeType": "S"},
+                    {"AttributeName": "phone_number", "AttributeType": "S"},
+                    {"AttributeName": "salary", "AttributeType": "S"},
+                ],
+                "ProvisionedThroughput": {"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+                "GlobalSecondaryIndexes": [
+                    {
+                        "IndexName": "salary-index",
+                        "KeySchema": [{"AttributeName": "salary", "KeyType": "HASH"}],
+                        "Projection": {"ProjectionType": "ALL"},
+                        "ProvisionedThroughput": {"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+                    }
+                ],
+                "StreamSpecification": {"StreamViewType": "NEW_AND_OLD_IMAGES"},
+                "TimeToLiveSpecification": {"AttributeName": "last_working_day", "Enabled": True},
+            },
+        },
+        "EventSourceMapping1": {
+            "Type": "AWS::Lambda::EventSourceMapping",
+            "Properties": {
+                "BatchSize": 1,
+                "EventSourceArn": {"Fn::GetAtt": ["PITRRestoredTable", "StreamArn"]},
+                "MaximumRecordAgeInSeconds": -1,
+                "StartingPosition": "LATEST",
+                "FunctionName": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
+            },
+        },
+        "targettableReadCapacityUnitsScalableTarget": {
+            "Type": "AWS::ApplicationAutoScaling::ScalableTarget",
+            "Properties": {
+                "ServiceNamespace": "dynamodb",
+                "ResourceId": "table/target-table",
+                "ScalableDimension": "dynamodb:table:ReadCapacityUnits",
+                "MinCapacity": 1,
+                "MaxCapacity": 2,
+            },
+        },
+        "targettableReadCapacityUnitsScalingPolicy1": {
+            "Type": "AWS::ApplicationAutoScaling::ScalingPolicy",
+            "Properties": {
+                "PolicyName": "$target-table-scaling-policy",
+                "PolicyType": "TargetTrackingScaling",
+                "TargetTrackingScalingPolicyConfiguration": {
+                    "TargetValue": 70.0,
+                    "PredefinedMetricSpecification": {"PredefinedMetricType": "DynamoDBReadCapacityUtilization"},
+                },
+                "ScalingTargetId": {"Ref": "targettableReadCapacityUnitsScalableTarget"},
+            },
+        },
+        "UnknownResource": {"Type": "AWS::SQS::Queue", "Properties": {"Anything": True}},
+    },
+}
+
+
+def assert_validation_error(invalid_template, expected_path):
+    with unittest.TestCase().assertRaises(cfn_template_validator.TemplateValidationError) as context:
+        cfn_template_validator.validate_cfn_template(invalid_template)
+    assert context.exception.path == expected_path
+
+
+def test_validate_cfn_template_valid():
+    cfn_template_validator.validate_cfn_template(template)
+
+
+def test_validate_cfn_template_gsi_response_field():
+    invalid_template = copy.deepcopy(template)
+    table_properties = invalid_template["Resources"]["PITRRestoredTable"]["Properties"]
+    table_properties["GlobalSecondaryIndexes"][0]["ProvisionedThroughput"]["LastIncreaseDateTime"] = "2023-02-08"
+    assert_validation_error(
+        invalid_template,
+        "Resources.PITRRestoredTable.Properties.GlobalSecondaryIndexes[0].ProvisionedThroughput.LastIncreaseDateTime",
+    )
+
+
+def test_validate_cfn_template_empty_destination_config():
+    invalid_template = copy.deepcopy(template)
+    invalid_template["Resources"]["EventSourceMapping1"]["Properties"]["DestinationConfig"] = {"OnFailure": {}}
+    assert_validation_error(invalid_template, "Resources.EventSourceMapping1.Properties.DestinationConfig.OnFailure")
+
+
+def test_validate_cfn_template_scaling_policy_response_field():
+    invalid_template = copy.deepcopy(template)
+    invalid_template["Resources"]["targettableReadCapacityUnitsScalingPolicy1"]["Properties"]["PolicyARN"] = "arn"
+    assert_validation_error(
+        invalid_template, "Resources.targettableReadCapacityUnitsScalingPolicy1.Properties.PolicyARN"
+    )
+
+
+def test_validate_cfn_template_wrong_type_and_enum():
+    invalid_template = copy.deepcopy(template)
+    invalid_template["Resources"]["targettableReadCapacityUnitsScalableTarget"]["Properties"]["MinCapacity"] = "1"
+    assert_validation_error(
+        invalid_template, "Resources.targettableReadCapacityUnitsScalableTarget.Properties.MinCapacity"
+    )
+    invalid_template = copy.deepcopy(template)
+    invalid_template["Resources"]["PITRRestoredTable"]["Properties"]["BillingMode"] = "ON_DEMAND"
+    assert_validation_error(invalid_template, "Resources.PITRRestoredTable.Properties.BillingMode")
+
+
+def test_validate_cfn_template_required_and_read_only():
+    invalid_template = copy.deepcopy(template)
+    del invalid_template["Resources"]["PITRRestoredTable"]["Properties"]["KeySchema"]
+    assert_validation_error(invalid_template, "Resources.PITRRestoredTable.Properties.KeySchema")
+    invalid_template = copy.deepcopy(template)
+    invalid_template["Resources"]["PITRRestoredTable"]["Properties"]["StreamArn"] = "arn"
+    assert_validation_error(invalid_template, "Resources.PITRRestoredTable.Properties.StreamArn")
+
+
+def test_get_resource_validator_cached():
+    validator = cfn_template_validator.get_resource_validator("AWS::DynamoDB::Table")
+    assert validator is cfn_template_validator.get_resource_validator("AWS::DynamoDB::Table")
+    assert cfn_template_validator.get_resource_validator("AWS::SQS::Queue") is None
+
+
+if __name__ == "__main__":
+    unittest.main()
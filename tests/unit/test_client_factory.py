@@ -0,0 +1,121 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_build_client_config():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import client_factory
+
+        config = client_factory.build_client_config("dynamodb")
+        assert config.retries == {"mode": "adaptive", "max_attempts": 10}
+        assert config.max_pool_connections == 50
+        assert config.connect_timeout == 2
+        assert config.read_timeout == 10
+        assert client_factory.build_client_config("cloudformation").read_timeout == 60
+
+
+def test_build_client_config_without_tcp_keepalive():
+    with mock.patch.dict(os.environ, environment):
+        from botocore.config import Config
+        from table_sync import client_factory
+
+        option_defaults = {key: value for key, value in Config.OPTION_DEFAULTS.items() if key != "tcp_keepalive"}
+        client_factory.tcp_keepalive_supported.cache_clear()
+        try:
+            with mock.patch.object(Config, "OPTION_DEFAULTS", option_defaults):
+                with mock.patch.object(client_factory.LOG, "warning") as warning:
+                    client_factory.build_client_config("dynamodb")
+                    client_factory.build_client_config("lambda")
+            # The missing option is logged once, not per client.
+            assert warning.call_count == 1
+        finally:
+            client_factory.tcp_keepalive_supported.cache_clear()
+
+
+def test_get_client_shares_session_and_clients():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import client_factory
+
+        with mock.patch.dict(client_factory.CLIENTS, clear=True):
+            cfn_client = client_factory.get_client("cloudformation")
+            dynamodb_client = client_factory.get_client("dynamodb")
+            assert client_factory.get_client("cloudformation") is cfn_client
+            assert cfn_client.meta.config.retries["mode"] == "adaptive"
+            assert dynamodb_client.meta.config.connect_timeout == 2
+            assert client_factory.get_session() is client_factory.get_session()
+
+
+def test_get_client_creates_one_client_across_threads():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import client_factory
+
+        session = mock.Mock()
+        session.client.side_effect = lambda service_name, config: mock.Mock()
+        with mock.patch.dict(client_factory.CLIENTS, clear=True):
+            with mock.patch.object(client_factory, "get_session", return_value=session):
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    clients = list(executor.map(lambda _: client_factory.get_client("lambda"), range(32)))
+        assert session.client.call_count == 1
+        assert all(client is clients[0] for client in clients)
+
+
+def test_install_client_creator_restores_clients():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import client_factory
+
+        session = mock.Mock()
+        session.client.side_effect = lambda service_name, config: mock.Mock()
+        with mock.patch.dict(client_factory.CLIENTS, clear=True):
+            with mock.patch.object(client_factory, "get_session", return_value=session):
+                lambda_client = client_factory.get_client("lambda")
+                outer_creator = mock.Mock(side_effect=lambda service_name: mock.Mock())
+                with client_factory.install_client_creator(outer_creator):
+                    outer_client = client_factory.get_client("lambda")
+                    with client_factory.install_client_creator(mock.Mock(side_effect=lambda _: mock.Mock())):
+                        assert client_factory.get_client("lambda") is not outer_client
+                    assert client_factory.get_client("lambda") is outer_client
+                    assert client_factory.get_client("dynamodb") is not None
+                assert outer_creator.call_count == 2
+                assert client_factory.get_client("lambda") is lambda_client
+                assert "dynamodb" not in client_factory.CLIENTS
+
+
+if __name__ == "__main__":
+    unittest.main()
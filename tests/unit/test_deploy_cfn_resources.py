@@ -0,0 +1,232 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import os
+import threading
+import unittest
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+scalable_target_resources = {
+    "targettableReadCapacityUnitsScalableTarget": {
+        "Type": "AWS::ApplicationAutoScaling::ScalableTarget",
+        "Properties": {
+            "MaxCapacity": 10,
+            "MinCapacity": 1,
+            "ResourceId": "table/target-table",
+            "ScalableDimension": "dynamodb:table:ReadCapacityUnits",
+            "ServiceNamespace": "dynamodb",
+        },
+    }
+}
+
+trigger_resources = {
+    "EventSourceMapping1": {
+        "Type": "AWS::Lambda::EventSourceMapping",
+        "Properties": {
+            "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/target-table/stream/2023-02-08T18:05:00.000",
+            "FunctionName": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
+            "StartingPosition": "LATEST",
+        },
+    }
+}
+
+
+def test_sibling_stack_deployment():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        with mock.patch.object(deploy_cfn_resources, "create_and_execute_change_set") as change_set_mock:
+            with mock.patch.object(
+                deploy_cfn_resources,
+                "does_cfn_stack_exist",
+                side_effect=lambda cfn_client, cfn_stack_name: cfn_stack_name.endswith("-Triggers-Stack"),
+            ):
+                with deploy_cfn_resources.sibling_stack_deployment(cfn_client=None) as submit:
+                    submit(
+                        cfn_stack_name="Restored-DynamoDB-Table-target-table-Triggers-Stack",
+                        cfn_change_set_name="Update-DynamoDB-target-table-Triggers-Change-Set",
+                        cfn_resources=trigger_resources,
+                    )
+                    submit(
+                        cfn_stack_name="Restored-DynamoDB-Table-target-table-AutoScaling-Stack",
+                        cfn_change_set_name="Update-DynamoDB-target-table-Scalable-Targets-Settings-Change-Set",
+                        cfn_resources=scalable_target_resources,
+                    )
+        calls = {call.kwargs["cfn_stack_name"]: call.kwargs for call in change_set_mock.call_args_list}
+        assert len(calls) == 2
+        triggers_call = calls["Restored-DynamoDB-Table-target-table-Triggers-Stack"]
+        assert triggers_call["cfn_change_set_type"] == "UPDATE"
+        assert triggers_call["cfn_template_dict"]["Resources"] == trigger_resources
+        auto_scaling_call = calls["Restored-DynamoDB-Table-target-table-AutoScaling-Stack"]
+        assert auto_scaling_call["cfn_change_set_type"] == "CREATE"
+        assert auto_scaling_call["cfn_template_dict"]["Resources"] == scalable_target_resources
+
+
+def test_sibling_stack_deployment_error():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        with mock.patch.object(
+            deploy_cfn_resources, "create_and_execute_change_set", side_effect=RuntimeError("change set failed")
+        ) as change_set_mock:
+            with mock.patch.object(deploy_cfn_resources, "does_cfn_stack_exist", return_value=False):
+                with unittest.TestCase().assertRaises(RuntimeError):
+                    with deploy_cfn_resources.sibling_stack_deployment(cfn_client=None) as submit:
+                        submit(
+                            cfn_stack_name="Restored-DynamoDB-Table-target-table-Triggers-Stack",
+                            cfn_change_set_name="Update-DynamoDB-target-table-Triggers-Change-Set",
+                            cfn_resources=trigger_resources,
+                        )
+                        submit(
+                            cfn_stack_name="Restored-DynamoDB-Table-target-table-AutoScaling-Stack",
+                            cfn_change_set_name="Update-DynamoDB-target-table-Scalable-Targets-Settings-Change-Set",
+                            cfn_resources=scalable_target_resources,
+                        )
+        # Both stacks are attempted even though the first one failed.
+        assert change_set_mock.call_count == 2
+
+
+def test_sibling_stack_deployment_background():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+
+        started = threading.Event()
+
+        def deploy_sibling_stack(**kwargs):
+            started.set()
+
+        with mock.patch.object(deploy_cfn_resources, "deploy_sibling_stack", side_effect=deploy_sibling_stack):
+            with deploy_cfn_resources.sibling_stack_deployment(cfn_client=None) as submit:
+                submit(
+                    cfn_stack_name="Restored-DynamoDB-Table-target-table-Triggers-Stack",
+                    cfn_change_set_name="Update-DynamoDB-target-table-Triggers-Change-Set",
+                    cfn_resources=trigger_resources,
+                )
+                # The stack deploys while the with block goes on.
+                assert started.wait(timeout=5)
+
+            # Sequentially, the stack is deployed before submit returns.
+            started.clear()
+            with deploy_cfn_resources.sibling_stack_deployment(cfn_client=None, sequential=True) as submit:
+                submit(
+                    cfn_stack_name="Restored-DynamoDB-Table-target-table-Triggers-Stack",
+                    cfn_change_set_name="Update-DynamoDB-target-table-Triggers-Change-Set",
+                    cfn_resources=trigger_resources,
+                )
+                assert started.is_set()
+
+
+def large_template():
+    resources = {}
+    for i in range(200):
+        resources[f"EventSourceMapping{i + 1}"] = trigger_resources["EventSourceMapping1"]
+    return {"AWSTemplateFormatVersion": "2010-09-09", "Description": "Large template", "Resources": resources}
+
+
+def test_build_template_params_inline():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        template = {"AWSTemplateFormatVersion": "2010-09-09", "Resources": scalable_target_resources}
+        params = deploy_cfn_resources.build_template_params(cfn_template_dict=template)
+        assert params == {"TemplateBody": json.dumps(template, separators=(",", ":"), sort_keys=True)}
+
+
+def test_build_template_params_upload(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        from table_sync.template_uploader import LocalDirectoryTemplateUploader
+        template = large_template()
+        params = deploy_cfn_resources.build_template_params(
+            cfn_template_dict=template,
+            cfn_template_key="Restored-DynamoDB-Table-target-table-Stack/Update-DynamoDB-target-table-Triggers-Change-Set",
+            cfn_template_uploader=LocalDirectoryTemplateUploader(str(tmp_path)),
+        )
+        assert list(params) == ["TemplateURL"]
+        with open(params["TemplateURL"][len("file://"):], encoding="utf-8") as template_file:
+            assert json.loads(template_file.read()) == template
+
+
+def test_build_template_params_too_large():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        with mock.patch.object(deploy_cfn_resources, "get_default_template_uploader", return_value=None):
+            with unittest.TestCase().assertRaises(deploy_cfn_resources.TemplateTooLarge):
+                deploy_cfn_resources.build_template_params(cfn_template_dict=large_template())
+
+
+def test_wait_for_change_set():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import deploy_cfn_resources
+        cfn_client = mock.Mock()
+        cfn_client.describe_change_set.side_effect = [
+            {"Status": "CREATE_PENDING"},
+            {"Status": "CREATE_IN_PROGRESS"},
+            {"Status": "CREATE_COMPLETE"},
+        ]
+        with mock.patch.object(deploy_cfn_resources.time, "sleep") as sleep_mock:
+            status, poll_count = deploy_cfn_resources.wait_for_change_set(
+                cfn_client=cfn_client,
+                cfn_change_set_arn="test-id",
+                cfn_stack_name="Restored-DynamoDB-Table-target-table-Stack",
+            )
+        assert (status, poll_count) == ("CREATE_COMPLETE", 3)
+        assert sleep_mock.call_count == 2
+        cfn_client.describe_change_set.assert_called_with(
+            ChangeSetName="test-id", StackName="Restored-DynamoDB-Table-target-table-Stack"
+        )
+
+
+def test_wait_for_stack_rollback():
+    with mock.patch.dict(os.environ, environment):
+        import botocore.exceptions
+        from table_sync import deploy_cfn_resources
+        cfn_client = mock.Mock()
+        cfn_client.describe_stacks.side_effect = [
+            {"Stacks": [{"StackStatus": "UPDATE_IN_PROGRESS"}]},
+            {"Stacks": [{"StackStatus": "UPDATE_ROLLBACK_IN_PROGRESS"}]},
+            {"Stacks": [{"StackStatus": "UPDATE_ROLLBACK_COMPLETE"}]},
+        ]
+        with mock.patch.object(deploy_cfn_resources.time, "sleep"):
+            with unittest.TestCase().assertRaises(botocore.exceptions.WaiterError) as context:
+                deploy_cfn_resources.wait_for_stack(
+                    cfn_client=cfn_client,
+                    cfn_stack_name="Restored-DynamoDB-Table-target-table-Stack",
+                    cfn_change_set_type="UPDATE",
+                )
+        # The rollback is waited for, so that a retried event finds the stack settled.
+        assert cfn_client.describe_stacks.call_count == 3
+        assert "UPDATE_ROLLBACK_COMPLETE" in str(context.exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
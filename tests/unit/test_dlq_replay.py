@@ -0,0 +1,206 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import io
+import json
+import os
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, VirtualClock
+from tests.emulator.events import DLQ_REPLAY_MESSAGE_ATTRIBUTE, build_restore_event, to_epoch_ms
+from tests.unit.test_reconciler import environment
+
+DLQ = "PITR-Event-Queue-Secondary-DLQ"
+MAIN_QUEUE = "PITR-Event-Queue"
+HOUR_S = 3600
+
+
+def dlq_control_plane(restores: list):
+    """Creates a control plane whose DLQ holds a restore event per (target table, event id, hours ago) tuple."""
+    control_plane = ControlPlane(
+        tables=[], latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0)), clock=VirtualClock()
+    )
+    control_plane.create_queue(MAIN_QUEUE)
+    control_plane.create_queue(DLQ)
+    for index, (target_table_name, event_id, hours_ago, replay_attempt) in enumerate(restores):
+        event = build_restore_event(
+            "orders",
+            target_table_name,
+            event_time_s=-hours_ago * HOUR_S,
+            sent_time_s=-hours_ago * HOUR_S,
+            replay_attempt=replay_attempt,
+            event_id=event_id,
+        )
+        record = event["Records"][0]
+        record["messageId"] = f"message-{index}"
+        control_plane.enqueue(DLQ, record)
+    return control_plane
+
+
+@mock.patch.dict(os.environ, environment)
+class TestDLQReplay(unittest.TestCase):
+    def test_replay_dlq(self):
+        from table_sync.dlq_replay import DUPLICATE, FILTERED, REPLAYED, UNDECODABLE, ReplayFilter, replay_dlq
+        from table_sync.event_decoder import FIRST_RECEIVE_MESSAGE_ATTRIBUTE
+
+        control_plane = dlq_control_plane(
+            [
+                ("orders-restored-1", "event-1", 1, 0),
+                ("orders-restored-1", "event-1", 1, 0),
+                ("orders-restored-2", "event-2", 2, 2),
+                ("orders-restored-3", "event-3", 48, 0),
+                ("customers-restored", "event-4", 1, 0),
+            ]
+        )
+        control_plane.enqueue(DLQ, {"messageId": "message-5", "body": "not a restore event"})
+        with control_plane.install():
+            results = replay_dlq(
+                ReplayFilter(
+                    target_table_pattern="orders-*", error_classes=None, min_age_s=None, max_age_s=HOUR_S * 24
+                ),
+                readers=3,
+                senders=2,
+                rate_per_second=1000,
+                now_ms=to_epoch_ms(0),
+            )
+
+        self.assertEqual(
+            [REPLAYED, DUPLICATE, REPLAYED, FILTERED, FILTERED, UNDECODABLE], [result.status for result in results]
+        )
+        # The copies of a restore event are replayed once, and every replayed message leaves the DLQ.
+        self.assertEqual(
+            ["message-3", "message-4", "message-5"],
+            sorted(message["MessageId"] for message in control_plane.queues[DLQ]),
+        )
+        self.assertTrue(all(message["visible_at"] == 0.0 for message in control_plane.queues[DLQ]))
+        replayed = control_plane.queues[MAIN_QUEUE]
+        self.assertEqual(2, len(replayed))
+        # The replay attempt follows the one of the DLQ message.
+        replay_attempts = sorted(
+            (
+                json.loads(message["Body"])["detail"]["eventID"],
+                message["MessageAttributes"][DLQ_REPLAY_MESSAGE_ATTRIBUTE]["StringValue"],
+            )
+            for message in replayed
+        )
+        self.assertEqual([("event-1", "1"), ("event-2", "3")], replay_attempts)
+        # The replayed messages carry the first receive of the original ones.
+        self.assertEqual(
+            {str(to_epoch_ms(0))},
+            {message["MessageAttributes"][FIRST_RECEIVE_MESSAGE_ATTRIBUTE]["StringValue"] for message in replayed},
+        )
+
+    def test_replay_dlq_error_classes(self):
+        from table_sync.dlq_replay import FILTERED, REPLAYED, ReplayFilter, replay_dlq
+
+        control_plane = dlq_control_plane(
+            [("orders-restored-1", "event-1", 1, 0), ("orders-restored-2", "event-2", 1, 0)]
+        )
+        with control_plane.install():
+            results = replay_dlq(
+                ReplayFilter(
+                    target_table_pattern=None,
+                    error_classes=frozenset(["TableNotActive"]),
+                    min_age_s=None,
+                    max_age_s=None,
+                ),
+                error_classes={"event-1": "TableNotActive", "event-2": "WaiterError"},
+                dry_run=True,
+            )
+
+        self.assertEqual([REPLAYED, FILTERED], [result.status for result in results])
+        self.assertEqual("Error class WaiterError not selected", results[1].reason)
+        # A dry run sends nothing and gives every message back to the DLQ.
+        self.assertEqual([], control_plane.queues[MAIN_QUEUE])
+        self.assertEqual(2, len(control_plane.queues[DLQ]))
+        self.assertTrue(all(message["visible_at"] == 0.0 for message in control_plane.queues[DLQ]))
+
+    def test_replay_dlq_batches(self):
+        from table_sync.dlq_replay import REPLAYED, RECEIVE_WAIT_TIME_SECONDS, ReplayFilter, replay_dlq
+
+        control_plane = dlq_control_plane([(f"orders-restored-{index}", f"event-{index}", 1, 0) for index in range(25)])
+        receive_message = control_plane.receive_message
+        receives = []
+
+        def recording_receive_message(**params):
+            receives.append((params, len(control_plane.queues[MAIN_QUEUE])))
+            return receive_message(**params)
+
+        with control_plane.install(), mock.patch.dict(
+            control_plane._responders, {"sqs.ReceiveMessage": recording_receive_message}
+        ):
+            results = replay_dlq(
+                ReplayFilter(target_table_pattern=None, error_classes=None, min_age_s=None, max_age_s=None), readers=1
+            )
+
+        self.assertEqual([REPLAYED] * 25, [result.status for result in results])
+        # Each batch is sent before the next one is received, and the readers long poll until the DLQ stays empty.
+        self.assertEqual([0, 10, 20, 25, 25], [sent for _, sent in receives])
+        self.assertTrue(all(params["WaitTimeSeconds"] == RECEIVE_WAIT_TIME_SECONDS for params, _ in receives))
+        self.assertEqual([], control_plane.queues[DLQ])
+
+    def test_replay_dlq_max_messages(self):
+        from table_sync.dlq_replay import ReplayFilter, replay_dlq
+
+        control_plane = dlq_control_plane([(f"orders-restored-{index}", f"event-{index}", 1, 0) for index in range(6)])
+        with control_plane.install():
+            results = replay_dlq(
+                ReplayFilter(target_table_pattern=None, error_classes=None, min_age_s=None, max_age_s=None),
+                readers=3,
+                max_messages=4,
+            )
+
+        # No message is received beyond the cap, so the others are neither reported nor hidden.
+        self.assertEqual(4, len(results))
+        self.assertEqual(4, len(control_plane.queues[MAIN_QUEUE]))
+        self.assertEqual(2, len(control_plane.queues[DLQ]))
+        self.assertTrue(all(message["visible_at"] == 0.0 for message in control_plane.queues[DLQ]))
+        self.assertTrue(all(message["receipt_handle"] is None for message in control_plane.queues[DLQ]))
+
+    def test_get_failed_error_classes(self):
+        from table_sync.dlq_replay import get_failed_error_classes
+        from tests.unit.test_rto_report import timeline_record
+
+        records = [
+            timeline_record("orders-restored-1", rto_s=60, status="Failure"),
+            timeline_record("orders-restored-2", rto_s=60, status="Failure"),
+            timeline_record("orders-restored-2", rto_s=120, status="Success"),
+        ]
+        ledger = mock.Mock(query=mock.Mock(return_value=records))
+
+        self.assertEqual({"orders-restored-1-event": "WaiterError"}, get_failed_error_classes(ledger))
+
+    def test_main(self):
+        from table_sync import dlq_replay
+
+        control_plane = dlq_control_plane(
+            [("orders-restored-1", "event-1", 1, 0), ("orders-restored-1", "event-1", 1, 0)]
+        )
+        with control_plane.install(), mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            exit_code = dlq_replay.main(["--max-messages", "10", "--rate", "100"])
+
+        self.assertEqual(0, exit_code)
+        self.assertIn("Replayed 1 of 2 messages: 1 duplicate, 0 filtered, 0 undecodable, 0 failed", stdout.getvalue())
+        self.assertEqual([], control_plane.queues[DLQ])
+        self.assertEqual(1, len(control_plane.queues[MAIN_QUEUE]))
+
+
+if __name__ == "__main__":
+    unittest.main()
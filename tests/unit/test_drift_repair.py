@@ -0,0 +1,122 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import copy
+import json
+import os
+import types
+import unittest
+from unittest import mock
+import pytest
+from tests.unit.test_reconciler import all_settings, environment, synced_control_plane
+
+STACK_NAME = "Restored-DynamoDB-Table-orders-restored-Stack"
+
+
+def test_drifted_paths():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync.drift_repair import drifted_paths
+
+        resource_drift = {
+            "ResourceType": "AWS::DynamoDB::Table",
+            "ExpectedProperties": json.dumps({"TimeToLiveSpecification": {"Enabled": True}}),
+            "PropertyDifferences": [
+                {"PropertyPath": "/TimeToLiveSpecification/Enabled", "DifferenceType": "NOT_EQUAL"},
+                {"PropertyPath": "/ProvisionedThroughput/ReadCapacityUnits", "DifferenceType": "NOT_EQUAL"},
+                {"PropertyPath": "/GlobalSecondaryIndexes/0/ProvisionedThroughput", "DifferenceType": "REMOVE"},
+                {"PropertyPath": "/Tags/1", "DifferenceType": "ADD"},
+            ],
+        }
+        # The auto scaled capacity isn't reverted, only its changed values are kept.
+        assert drifted_paths(resource_drift) == ("/TimeToLiveSpecification/Enabled", "/Tags/1")
+        assert drifted_paths(resource_drift, ignored=True) == ("/ProvisionedThroughput/ReadCapacityUnits",)
+
+
+def test_repair_stack_drift():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app, drift_repair, reconciler
+
+        with synced_control_plane(app, ["orders-restored"]) as control_plane:
+            sleep = types.SimpleNamespace(sleep=control_plane.clock.sleep)
+            cfn_client = control_plane.create_client("cloudformation")
+            deployed_template = reconciler.get_deployed_template(cfn_client, STACK_NAME)
+            table = deployed_template["Resources"]["PITRRestoredTable"]["Properties"]
+            control_plane.drift_resource(
+                STACK_NAME,
+                "PITRRestoredTable",
+                {
+                    "TimeToLiveSpecification": {**table["TimeToLiveSpecification"], "Enabled": False},
+                    "ProvisionedThroughput": {"ReadCapacityUnits": 40, "WriteCapacityUnits": 40},
+                },
+            )
+            read_target_logical_id = "ordersrestoredReadCapacityUnitsScalableTarget"
+            control_plane.drift_resource(STACK_NAME, read_target_logical_id, {"MaxCapacity": 50})
+            # The desired template doesn't have the second trigger anymore.
+            control_plane.drift_resource(STACK_NAME, "EventSourceMapping2")
+            control_plane.drift_resource(STACK_NAME, "ordersrestoredWriteCapacityUnitsScalableTarget")
+            desired_template = copy.deepcopy(deployed_template)
+            desired_template["Resources"].pop("EventSourceMapping2")
+
+            with mock.patch("table_sync.drift_repair.time", sleep):
+                assert drift_repair.repair_stack_drift(
+                    cfn_client, STACK_NAME, desired_template, "orders-restored", dry_run=True
+                ) == (
+                    "Revert PITRRestoredTable: /TimeToLiveSpecification/Enabled",
+                    f"Revert {read_target_logical_id}: /MaxCapacity",
+                    "Re-create ordersrestoredWriteCapacityUnitsScalableTarget",
+                    "Remove EventSourceMapping2",
+                )
+                change_set_count = len(control_plane.change_sets)
+                drift_repair.repair_stack_drift(cfn_client, STACK_NAME, desired_template, "orders-restored")
+
+                # A single change set reverts the drift and deploys the desired template, with the live capacity.
+                change_sets = list(control_plane.change_sets.values())[change_set_count:]
+                assert [(change_set["ChangeSetName"], change_set["DeploymentMode"]) for change_set in change_sets] == [
+                    ("Repair-DynamoDB-orders-restored-Change-Set", "REVERT_DRIFT")
+                ]
+                desired_template["Resources"]["PITRRestoredTable"]["Properties"]["ProvisionedThroughput"] = {
+                    "ReadCapacityUnits": 40,
+                    "WriteCapacityUnits": 40,
+                }
+                assert reconciler.get_deployed_template(cfn_client, STACK_NAME) == desired_template
+                assert control_plane.drifts == {}
+                assert drift_repair.detect_stack_drift(cfn_client, STACK_NAME) == []
+
+            # The reconciler repairs the drift in place of the reconcile change set.
+            control_plane.drift_resource(STACK_NAME, read_target_logical_id, {"MinCapacity": 1})
+            with mock.patch("table_sync.drift_repair.time", sleep):
+                result = reconciler.reconcile_stack(STACK_NAME, "orders-restored", all_settings(), repair_drift=True)
+            assert result.status == reconciler.RECONCILED
+            assert result.repaired_drifts == (f"{STACK_NAME}: Revert {read_target_logical_id}: /MinCapacity",)
+            assert control_plane.drifts == {}
+
+            # A trigger re-created by hand would make the change set fail.
+            control_plane.drift_resource(STACK_NAME, "EventSourceMapping1")
+            control_plane.create_event_source_mapping(
+                EventSourceArn=control_plane.describe_table("orders-restored")["Table"]["LatestStreamArn"],
+                FunctionName="arn:aws:lambda:us-east-1:123456789012:function:consumer-0",
+            )
+            with mock.patch("table_sync.drift_repair.time", sleep):
+                with pytest.raises(drift_repair.DriftNotRepairable):
+                    drift_repair.repair_stack_drift(cfn_client, STACK_NAME, desired_template, "orders-restored")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,9 +19,11 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import unittest
+import pytest
 from botocore.stub import Stubber
 import boto3
 from src.table_sync import dynamodb_stream_settings
+from src.table_sync.cfn_yaml_template import render_cfn_resources
 
 
 def test_build_dynamodb_stream_triggers():
@@ -124,11 +126,14 @@ def test_build_dynamodb_stream_triggers():
             "Type": "AWS::Lambda::EventSourceMapping",
             "Properties": {
                 "BatchSize": 1,
+                "BisectBatchOnFunctionError": False,
                 "EventSourceArn": {"Fn::GetAtt": ["RestoredTable", "StreamArn"]},
+                "MaximumBatchingWindowInSeconds": 0,
                 "MaximumRecordAgeInSeconds": -1,
                 "MaximumRetryAttempts": -1,
                 "ParallelizationFactor": 1,
                 "StartingPosition": "LATEST",
+                "TumblingWindowInSeconds": 0,
                 "FunctionName": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
             },
         }
@@ -138,10 +143,117 @@ def test_build_dynamodb_stream_triggers():
         lambda_client=lambda_client,
         restored_table_cfn_logical_name="RestoredTable",
     )
-    assert actual_cfn_resources == expected_cfn_resources
+    assert render_cfn_resources(actual_cfn_resources) == expected_cfn_resources
     return
 
 
+def test_build_dynamodb_stream_triggers_restored_table_stream_arn():
+    lambda_client = boto3.client("lambda", "us-east-1")
+    lambda_stubber = Stubber(lambda_client)
+    lambda_stubber.activate()
+    source_table_describe_response = {
+        "Table": {
+            "TableName": "sample-table",
+            "LatestStreamArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22"
+            ".332",
+        }
+    }
+    lambda_stubber.add_response(
+        "list_event_source_mappings",
+        {
+            "EventSourceMappings": [
+                {
+                    "UUID": "a73e82f9-d895-45db-b836-108516b49644",
+                    "StartingPosition": "LATEST",
+                    "BatchSize": 1,
+                    "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05"
+                    "-13T19:00:22.332",
+                    "FunctionArn": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
+                    "DestinationConfig": {"OnFailure": {}},
+                }
+            ]
+        },
+        {
+            "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22"
+            ".332"
+        },
+    )
+    expected_cfn_resources = {
+        "EventSourceMapping1": {
+            "Type": "AWS::Lambda::EventSourceMapping",
+            "Properties": {
+                "BatchSize": 1,
+                "EventSourceArn": "arn:aws:dynamodb:us-east-1:123456789012:table/target-table/stream/2023-02-08T18:05"
+                ":00.000",
+                "StartingPosition": "LATEST",
+                "FunctionName": "arn:aws:lambda:us-east-1:123456789012:function:print-event-paylaod",
+            },
+        }
+    }
+    actual_cfn_resources = dynamodb_stream_settings.build_dynamodb_stream_triggers(
+        source_table_describe_response=source_table_describe_response,
+        lambda_client=lambda_client,
+        restored_table_stream_arn="arn:aws:dynamodb:us-east-1:123456789012:table/target-table/stream/2023-02-08T18"
+        ":05:00.000",
+    )
+    assert render_cfn_resources(actual_cfn_resources) == expected_cfn_resources
+
+
+def test_build_dynamodb_stream_triggers_every_page():
+    lambda_client = boto3.client("lambda", "us-east-1")
+    lambda_stubber = Stubber(lambda_client)
+    lambda_stubber.activate()
+    stream_arn = "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22.332"
+    source_table_describe_response = {"Table": {"TableName": "sample-table", "LatestStreamArn": stream_arn}}
+    # The mappings are listed 100 at a time, the second page starts at the marker of the first one.
+    for page, (marker, next_marker) in enumerate(((None, "page-2"), ("page-2", None))):
+        response = {
+            "EventSourceMappings": [
+                {
+                    "UUID": f"a73e82f9-d895-45db-b836-10851600000{page}",
+                    "StartingPosition": "LATEST",
+                    "BatchSize": 1,
+                    "EventSourceArn": stream_arn,
+                    "FunctionArn": f"arn:aws:lambda:us-east-1:123456789012:function:consumer-{page}",
+                }
+            ]
+        }
+        expected_params = {"EventSourceArn": stream_arn}
+        if next_marker:
+            response["NextMarker"] = next_marker
+        if marker:
+            expected_params["Marker"] = marker
+        lambda_stubber.add_response("list_event_source_mappings", response, expected_params)
+    actual_cfn_resources = dynamodb_stream_settings.build_dynamodb_stream_triggers(
+        source_table_describe_response=source_table_describe_response,
+        lambda_client=lambda_client,
+        restored_table_cfn_logical_name="RestoredTable",
+    )
+    assert [
+        resource["Properties"]["FunctionName"] for resource in render_cfn_resources(actual_cfn_resources).values()
+    ] == [
+        "arn:aws:lambda:us-east-1:123456789012:function:consumer-0",
+        "arn:aws:lambda:us-east-1:123456789012:function:consumer-1",
+    ]
+    lambda_stubber.assert_no_pending_responses()
+
+
+def test_build_dynamodb_stream_triggers_without_restored_table_stream():
+    source_table_describe_response = {
+        "Table": {
+            "TableName": "sample-table",
+            "LatestStreamArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/stream/2022-05-13T19:00:22"
+            ".332",
+        }
+    }
+    with pytest.raises(dynamodb_stream_settings.RestoredTableStreamNotFound):
+        dynamodb_stream_settings.build_dynamodb_stream_triggers(
+            source_table_describe_response=source_table_describe_response,
+            lambda_client=boto3.client("lambda", "us-east-1"),
+            restored_table_stream_arn="",
+        )
+
+
 def test_build_dynamodb_stream_template_stream_enabled():
     source_table_describe_response = {
         "Table": {
@@ -206,7 +318,7 @@ def test_build_dynamodb_stream_template_stream_enabled():
     actual_stream_template = dynamodb_stream_settings.build_dynamodb_stream_template(
         source_table_describe_response=source_table_describe_response
     )
-    assert expected_stream_template == actual_stream_template
+    assert expected_stream_template == actual_stream_template.to_cfn()
 
 
 def test_build_dynamodb_stream_template_stream_disabled():
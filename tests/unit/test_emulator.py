@@ -0,0 +1,122 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from unittest import mock
+import botocore.exceptions
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape, VirtualClock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_state_machines():
+    clock = VirtualClock()
+    control_plane = ControlPlane(
+        tables=[TableShape(name="source-table")],
+        latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0)),
+        clock=clock,
+    )
+    control_plane.restore("source-table", "target-table", active_at=60.0)
+    dynamodb_client = control_plane.create_client("dynamodb")
+    cfn_client = control_plane.create_client("cloudformation")
+
+    # The restored table is CREATING until its restore completes.
+    assert dynamodb_client.describe_table(TableName="target-table")["Table"]["TableStatus"] == "CREATING"
+    clock.advance(60.0)
+    assert dynamodb_client.describe_table(TableName="target-table")["Table"]["TableStatus"] == "ACTIVE"
+
+    # The change set is created in the background, the stack stabilizes once it is executed.
+    with unittest.TestCase().assertRaises(botocore.exceptions.ClientError):
+        cfn_client.describe_stacks(StackName="stack")
+    change_set_id = cfn_client.create_change_set(
+        StackName="stack", ChangeSetName="import", ChangeSetType="IMPORT", TemplateBody="{}"
+    )["Id"]
+    assert cfn_client.describe_change_set(ChangeSetName=change_set_id)["Status"] == "CREATE_PENDING"
+    assert cfn_client.describe_stacks(StackName="stack")["Stacks"][0]["StackStatus"] == "REVIEW_IN_PROGRESS"
+    with unittest.TestCase().assertRaises(botocore.exceptions.ClientError):
+        cfn_client.execute_change_set(ChangeSetName=change_set_id)
+    clock.advance(control_plane.latency_model.change_set_creation_s)
+    assert cfn_client.describe_change_set(ChangeSetName=change_set_id)["Status"] == "CREATE_COMPLETE"
+    cfn_client.execute_change_set(ChangeSetName=change_set_id)
+    assert cfn_client.describe_stacks(StackName="stack")["Stacks"][0]["StackStatus"] == "IMPORT_IN_PROGRESS"
+    clock.advance(control_plane.latency_model.stabilization_s("IMPORT"))
+    assert cfn_client.describe_stacks(StackName="stack")["Stacks"][0]["StackStatus"] == "IMPORT_COMPLETE"
+
+
+def test_pagination_and_throttling():
+    shape = TableShape(name="source-table", stream=True, trigger_count=120)
+    control_plane = ControlPlane(
+        tables=[shape],
+        latency_model=LatencyModel(
+            operations={"dynamodb.DescribeTimeToLive": OperationProfile(latency_ms=100.0, throttle_probability=1.0)},
+            default=OperationProfile(latency_ms=10.0),
+            max_attempts=4,
+        ),
+    )
+    lambda_client = control_plane.create_client("lambda")
+    response = lambda_client.list_event_source_mappings(EventSourceArn=shape.stream_arn(shape.name))
+    assert len(response["EventSourceMappings"]) == 100
+    assert response["NextMarker"] == "100"
+    pages = lambda_client.get_paginator("list_event_source_mappings").paginate(
+        EventSourceArn=shape.stream_arn(shape.name)
+    )
+    assert sum(len(page["EventSourceMappings"]) for page in pages) == 120
+
+    # A throttled call is retried with backoff until the attempts run out.
+    dynamodb_client = control_plane.create_client("dynamodb")
+    started = control_plane.clock.now()
+    with unittest.TestCase().assertRaises(botocore.exceptions.ClientError) as context:
+        dynamodb_client.describe_time_to_live(TableName="source-table")
+    assert context.exception.response["Error"]["Code"] == "ThrottlingException"
+    assert control_plane.throttles == {"dynamodb.DescribeTimeToLive": 4}
+    assert control_plane.clock.now() - started > 4 * 0.1
+
+
+def test_install():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import client_factory
+
+        control_plane = ControlPlane(tables=[TableShape(name="source-table", pitr=True)])
+        with mock.patch.dict(client_factory.CLIENTS, {"dynamodb": mock.Mock()}):
+            with control_plane.install():
+                dynamodb_client = client_factory.get_client("dynamodb")
+                response = dynamodb_client.describe_continuous_backups(TableName="source-table")
+                assert client_factory.get_client("dynamodb") is dynamodb_client
+            assert isinstance(client_factory.get_client("dynamodb"), mock.Mock)
+        description = response["ContinuousBackupsDescription"]["PointInTimeRecoveryDescription"]
+        assert description["PointInTimeRecoveryStatus"] == "ENABLED"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import copy
+import json
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+EVENT_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "events", "event.json")
+
+
+def load_event(request_parameters: dict = None):
+    with open(EVENT_FILE) as event_file:
+        event = json.load(event_file)
+    if request_parameters is not None:
+        body = json.loads(event["Records"][0]["body"])
+        body["detail"]["requestParameters"] = request_parameters
+        event["Records"][0]["body"] = json.dumps(body)
+    return event
+
+
+def test_decode_event_matches_model():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import event_decoder
+
+        event = load_event()
+        restore_requests = event_decoder.decode_event(event)
+        assert restore_requests == event_decoder.decode_event(copy.deepcopy(event), validate=True)
+        restore_request = restore_requests[0]
+        assert restore_request.source_table_name and restore_request.target_table_name
+        assert restore_request.event_time.tzinfo is not None
+        assert restore_request.global_secondary_indexes == ()
+        assert (restore_request.first_receive_timestamp, restore_request.receive_count) == (1658439194197, 1)
+
+
+def test_decode_event_index_override():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import event_decoder
+
+        event = load_event(
+            {
+                "sourceTableArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table",
+                "targetTableName": "target-table",
+                "globalSecondaryIndexOverride": [
+                    {
+                        "indexName": "name-index",
+                        "keySchema": [{"attributeName": "name", "keyType": "HASH"}],
+                        "projection": {"projectionType": "INCLUDE", "nonKeyAttributes": ["email"]},
+                        "provisionedThroughput": {"readCapacityUnits": "5", "writeCapacityUnits": "2"},
+                    }
+                ],
+                "localSecondaryIndexOverride": [],
+            }
+        )
+        restore_request = event_decoder.decode_event(event)[0]
+        assert restore_request.source_table_name == "source-table"
+        assert restore_request.global_secondary_indexes == (
+            {
+                "IndexName": "name-index",
+                "KeySchema": [{"AttributeName": "name", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": ["email"]},
+                "ProvisionedThroughput": {"ReadCapacityUnits": 5, "WriteCapacityUnits": 2},
+            },
+        )
+        assert restore_request.local_secondary_indexes == ()
+        assert [restore_request] == event_decoder.decode_event(event, validate=True)
+
+
+def test_decode_event_replayed_message():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import event_decoder
+
+        event = load_event()
+        # A message replayed from the DLQ keeps the first receive of the original message.
+        event["Records"][0]["messageAttributes"] = {
+            event_decoder.DLQ_REPLAY_MESSAGE_ATTRIBUTE: {
+                "stringValue": "1",
+                "stringListValues": [],
+                "binaryListValues": [],
+                "dataType": "Number",
+            },
+            event_decoder.FIRST_RECEIVE_MESSAGE_ATTRIBUTE: {
+                "stringValue": "1658430000000",
+                "stringListValues": [],
+                "binaryListValues": [],
+                "dataType": "Number",
+            },
+        }
+        restore_request = event_decoder.decode_event(event)[0]
+        assert (restore_request.first_receive_timestamp, restore_request.replay_attempt) == (1658430000000, "1")
+        assert [restore_request] == event_decoder.decode_event(event, validate=True)
+
+
+def test_decode_event_falls_back_to_model():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import event_decoder
+
+        event = load_event()
+        with mock.patch.object(event_decoder, "decode_record", side_effect=KeyError("detail")):
+            restore_requests = event_decoder.decode_event(event)
+        assert restore_requests == event_decoder.decode_event(event)
+        assert restore_requests[0].event_time == datetime.fromisoformat(
+            json.loads(event["Records"][0]["body"])["detail"]["eventTime"].replace("Z", "+00:00")
+        ).astimezone(timezone.utc)
+
+
+if __name__ == "__main__":
+    unittest.main()
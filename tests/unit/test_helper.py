@@ -143,5 +143,110 @@ def test_parse_arn():
     assert cfn_resources.resource == expected_cfn_resources["resource"]
 
 
+def test_does_cfn_stack_exist_stack_exists():
+    cfn_client = boto3.client("cloudformation", "us-east-1")
+    cfn_stubber = Stubber(cfn_client)
+    cfn_stubber.add_response(
+        "describe_stacks",
+        {
+            "Stacks": [
+                {
+                    "StackName": "Restored-DynamoDB-Table-target-table-AutoScaling-Stack",
+                    "CreationTime": datetime.datetime(2015, 1, 1),
+                    "StackStatus": "CREATE_COMPLETE",
+                }
+            ]
+        },
+        {"StackName": "Restored-DynamoDB-Table-target-table-AutoScaling-Stack"},
+    )
+    cfn_stubber.activate()
+    assert helpers.does_cfn_stack_exist(
+        cfn_client=cfn_client, cfn_stack_name="Restored-DynamoDB-Table-target-table-AutoScaling-Stack"
+    )
+    cfn_stubber.deactivate()
+
+
+def test_does_cfn_stack_exist_stack_in_review():
+    cfn_client = boto3.client("cloudformation", "us-east-1")
+    cfn_stubber = Stubber(cfn_client)
+    cfn_stubber.add_response(
+        "describe_stacks",
+        {
+            "Stacks": [
+                {
+                    "StackName": "Restored-DynamoDB-Table-target-table-AutoScaling-Stack",
+                    "CreationTime": datetime.datetime(2015, 1, 1),
+                    "StackStatus": "REVIEW_IN_PROGRESS",
+                }
+            ]
+        },
+        {"StackName": "Restored-DynamoDB-Table-target-table-AutoScaling-Stack"},
+    )
+    cfn_stubber.activate()
+    assert not helpers.does_cfn_stack_exist(
+        cfn_client=cfn_client, cfn_stack_name="Restored-DynamoDB-Table-target-table-AutoScaling-Stack"
+    )
+    cfn_stubber.deactivate()
+
+
+def test_does_cfn_stack_exist_stack_missing():
+    cfn_client = boto3.client("cloudformation", "us-east-1")
+    cfn_stubber = Stubber(cfn_client)
+    cfn_stubber.add_client_error(
+        "describe_stacks",
+        service_error_code="ValidationError",
+        service_message="Stack with id Restored-DynamoDB-Table-target-table-AutoScaling-Stack does not exist",
+        http_status_code=400,
+    )
+    cfn_stubber.activate()
+    assert not helpers.does_cfn_stack_exist(
+        cfn_client=cfn_client, cfn_stack_name="Restored-DynamoDB-Table-target-table-AutoScaling-Stack"
+    )
+    cfn_stubber.deactivate()
+
+
+def test_list_table_tags():
+    dynamodb_client = boto3.client("dynamodb", "us-east-1")
+    dynamodb_stubber = Stubber(dynamodb_client)
+    table_arn = "arn:aws:dynamodb:us-east-1:123456789012:table/source-table"
+    dynamodb_stubber.add_response(
+        "list_tags_of_resource",
+        {"Tags": [{"Key": "team", "Value": "orders"}], "NextToken": "1"},
+        {"ResourceArn": table_arn},
+    )
+    dynamodb_stubber.add_response(
+        "list_tags_of_resource",
+        {"Tags": [{"Key": "table-sync:skip", "Value": "triggers"}]},
+        {"ResourceArn": table_arn, "NextToken": "1"},
+    )
+    dynamodb_stubber.activate()
+    # The skip tag on the second page isn't lost.
+    assert helpers.list_table_tags(dynamodb_client=dynamodb_client, table_arn=table_arn) == [
+        {"Key": "team", "Value": "orders"},
+        {"Key": "table-sync:skip", "Value": "triggers"},
+    ]
+    dynamodb_stubber.assert_no_pending_responses()
+    dynamodb_stubber.deactivate()
+
+
+def test_rate_limiter():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    # The burst is taken at once, the next callers wait for their turn at the rate.
+    limiter = helpers.RateLimiter(rate_per_second=2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+    assert [limiter.acquire() for _ in range(4)] == [0.0, 0.0, 0.5, 0.5]
+    assert now[0] == 1.0
+
+    # Idle time refills the bucket up to the burst.
+    now[0] += 10.0
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.5]
+    assert helpers.RateLimiter().acquire() == 0.0
+
+
 if __name__ == "__main__":
     unittest.main()
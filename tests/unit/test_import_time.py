@@ -0,0 +1,84 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Cumulative import time budget of table_sync.app, in microseconds, as reported by python -X importtime.
+# The handler module imports in well under half of it, it is kept loose so that slow CI hosts don't fail.
+IMPORT_TIME_BUDGET_US = 1000000
+SRC_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "src")
+environment = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "ENABLE_TAG_SETTINGS": "false",
+    "ENABLE_KINESIS_SETTINGS": "false",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "false",
+    "ENABLE_TTL_SETTINGS": "false",
+    "ENABLE_PITR_SETTINGS": "false",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "false",
+}
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=SRC_DIRECTORY,
+        env={**os.environ, **environment},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time_us(module_name: str):
+    # Each line of -X importtime is "import time: self [us] | cumulative | imported package".
+    for line in run_python("-X", "importtime", "-c", f"import {module_name}").stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module_name:
+            return int(fields[1])
+    raise AssertionError(f"{module_name} not found in the import time report")
+
+
+def test_app_import_time_budget():
+    # The best of three runs is kept to leave out the noise of the host.
+    assert min(import_time_us("table_sync.app") for _ in range(3)) < IMPORT_TIME_BUDGET_US
+
+
+def test_app_import_defers_clients_and_disabled_settings():
+    modules = run_python(
+        "-c", "import sys, table_sync.app; print(' '.join(sorted(sys.modules)))"
+    ).stdout.split()
+    for module_name in (
+        "boto3",
+        "model.aws.dynamodb.aws_event",
+        "table_sync.auto_scaling_settings",
+        "table_sync.dynamodb_stream_settings",
+        "table_sync.kinesis_stream_settings",
+        "table_sync.pitr_settings",
+        "table_sync.time_to_live_settings",
+    ):
+        assert module_name not in modules
+
+
+if __name__ == "__main__":
+    unittest.main()
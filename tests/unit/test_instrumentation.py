@@ -0,0 +1,89 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from unittest import mock
+import boto3
+from botocore.stub import Stubber
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_instrument_client():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import instrumentation
+
+        cfn_client = boto3.client("cloudformation", region_name="us-east-1")
+        # Instrumenting twice doesn't count the calls twice.
+        instrumentation.instrument_client(instrumentation.instrument_client(cfn_client))
+        instrumentation.reset_api_call_stats()
+        with Stubber(cfn_client) as cfn_stubber:
+            for _ in range(3):
+                cfn_stubber.add_response("describe_stacks", {"Stacks": []}, {"StackName": "stack"})
+            cfn_stubber.add_client_error("describe_stacks", service_error_code="ValidationError")
+            for _ in range(3):
+                cfn_client.describe_stacks(StackName="stack")
+            with unittest.TestCase().assertRaises(cfn_client.exceptions.ClientError):
+                cfn_client.describe_stacks(StackName="stack")
+        # The retry handler is called for every attempt, with the parsed response of the attempt.
+        instrumentation._needs_retry(
+            event_name="needs-retry.cloudformation.DescribeStacks",
+            response=(None, {"Error": {"Code": "Throttling"}}),
+            attempts=1,
+        )
+
+        summary = instrumentation.get_api_call_summary()
+        assert list(summary) == ["cloudformation.DescribeStacks"]
+        stats = summary["cloudformation.DescribeStacks"]
+        assert (stats["calls"], stats["errors"], stats["throttles"]) == (4, 1, 1)
+        assert stats["latency"]["count"] == 4
+        assert sum(stats["latency"]["buckets"].values()) == 4
+
+        instrumentation.reset_api_call_stats()
+        assert instrumentation.get_api_call_summary() == {}
+
+
+def test_latency_histogram():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync.instrumentation import LATENCY_SUB_BUCKETS, LatencyHistogram
+
+        histogram = LatencyHistogram()
+        for value_ms in [0.5] + [float(value_ms) for value_ms in range(1, 101)] + [6000.0]:
+            histogram.record(value_ms)
+        assert histogram.count == 102
+        assert histogram.max_ms == 6000.0
+        assert histogram.percentile(100) == 6000.0
+        # Every latency is in a bucket whose upper bound is within the relative error of the histogram.
+        for value_ms in (1.0, 3.3, 47.0, 100.0, 6000.0):
+            upper_bound = LatencyHistogram.bucket_upper_bound(LatencyHistogram.bucket_index(value_ms))
+            assert value_ms < upper_bound <= value_ms * (1 + 1 / LATENCY_SUB_BUCKETS) + 1e-9
+        assert 50 <= histogram.percentile(50) <= 50 * (1 + 1 / LATENCY_SUB_BUCKETS)
+        assert histogram.to_dict()["p99_ms"] <= 6000.0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,7 +47,7 @@ def test_build_dynamodb_auto_scaling():
     cfn_resources = kinesis_stream_settings.build_kinesis_stream_template(
         dynamodb_client=dynamodb_client, source_table_name="source-table"
     )
-    assert cfn_resources.__eq__(expected_cfn_resources)
+    assert cfn_resources.to_cfn() == expected_cfn_resources
 
 
 if __name__ == "__main__":
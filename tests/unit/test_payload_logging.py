@@ -0,0 +1,78 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import json
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_bounded_payload():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import payload_logging
+
+        template = {
+            "Resources": {f"EventSourceMapping{i}": {"Type": "AWS::Lambda::EventSourceMapping"} for i in range(100)}
+        }
+        serialized = json.dumps(template, separators=(",", ":"))
+        logged = str(payload_logging.bounded(template, max_bytes=256))
+        assert logged.startswith(serialized[:256])
+        # The length and the hash are the ones of the full payload, as logged when a sync fails.
+        digest = hashlib.sha256(str(payload_logging.full(template)).encode("utf-8")).hexdigest()[:16]
+        assert logged.endswith(f"... [truncated, {len(serialized)} bytes, sha256 {digest}]")
+        # A multi-byte character isn't cut in half.
+        digest = hashlib.sha256(("é" * 10).encode("utf-8")).hexdigest()[:16]
+        assert str(payload_logging.bounded("é" * 10, max_bytes=5)) == f"éé... [truncated, 20 bytes, sha256 {digest}]"
+
+        # Small payloads, payloads logged in full and the DEBUG log level aren't truncated.
+        small_payload = payload_logging.bounded({"TableName": "target-table"}, max_bytes=256)
+        assert str(small_payload) == '{"TableName":"target-table"}'
+        assert str(payload_logging.full(template)) == serialized
+        with mock.patch("table_sync.config.LOG_LEVEL", "DEBUG"):
+            assert str(payload_logging.bounded(template, max_bytes=256)) == serialized
+        assert str(payload_logging.bounded({"CreationDateTime": datetime(2023, 2, 8)})) == (
+            '{"CreationDateTime":"2023-02-08 00:00:00"}'
+        )
+
+
+def test_bounded_payload_is_lazy():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import payload_logging
+
+        from aws_lambda_powertools import Logger
+
+        bounded_payload = payload_logging.BoundedPayload({"TableName": "target-table"}, 16)
+        with mock.patch.object(payload_logging, "serialize_payload") as serialize_mock:
+            Logger(service="test_payload_logging", level="INFO").debug("Payload: %s", bounded_payload)
+        serialize_mock.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
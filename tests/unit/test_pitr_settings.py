@@ -46,7 +46,7 @@ def test_build_point_in_time_recovery_template():
     cfn_resources = pitr_settings.build_point_in_time_recovery_template(
         dynamodb_client=dynamodb_client, source_table_name="source-table"
     )
-    assert cfn_resources.__eq__(expected_cfn_resources)
+    assert cfn_resources.to_cfn() == expected_cfn_resources
 
 
 if __name__ == "__main__":
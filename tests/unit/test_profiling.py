@@ -0,0 +1,101 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import marshal
+import os
+import pstats
+import unittest
+from unittest import mock
+import pytest
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def profiled_event(profile: str = None):
+    record = {"messageId": "c53fe60e-57e0-46a9-a6cd-b13d61ef84c5", "body": "{}", "messageAttributes": {}}
+    if profile is not None:
+        record["messageAttributes"]["table-sync-profile"] = {"stringValue": profile, "dataType": "String"}
+    return {"Records": [record]}
+
+
+def handler(event, context):
+    return sorted(str(number) for number in range(10000))
+
+
+def test_is_profiling_requested():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import profiling
+
+        assert profiling.is_profiling_requested(profiled_event("true"))
+        assert not profiling.is_profiling_requested(profiled_event("false"))
+        assert not profiling.is_profiling_requested(profiled_event())
+        with mock.patch.object(profiling, "ENABLE_PROFILING", True):
+            assert profiling.is_profiling_requested(profiled_event())
+
+
+def test_profile_handler(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import profiling
+
+        profiled_handler = profiling.profile_handler(handler)
+        with mock.patch.object(profiling, "run_profiled") as run_profiled_mock:
+            assert profiled_handler(profiled_event(), None) == handler(None, None)
+        run_profiled_mock.assert_not_called()
+
+        context = mock.Mock(aws_request_id="b2a1f6c4-request")
+        with mock.patch.object(profiling.LOG, "info") as info_mock:
+            with mock.patch.object(profiling, "PROFILING_OUTPUT", str(tmp_path)):
+                assert profiled_handler(profiled_event("true"), context) == handler(None, None)
+        profile = info_mock.call_args_list[0].kwargs["extra"]
+        assert "handler" in profile["top_functions"]
+        assert profile["top_allocations"]
+        assert profile["peak_traced_memory_bytes"] > 0
+        stats = pstats.Stats(str(tmp_path / "b2a1f6c4-request.prof"))
+        assert any(function[2] == "handler" for function in stats.stats)
+
+
+def test_run_profiled_upload_on_error(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import profiling
+        from table_sync.template_uploader import LocalDirectoryTemplateUploader
+
+        def failing_handler(event, context):
+            raise RuntimeError("sync failed")
+
+        with mock.patch(
+            "table_sync.template_uploader.get_default_template_uploader",
+            return_value=LocalDirectoryTemplateUploader(str(tmp_path)),
+        ):
+            with pytest.raises(RuntimeError):
+                profiling.run_profiled(failing_handler, profiled_event("true"), None, top_n=5, output="s3")
+        profiles = list((tmp_path / "profiles").iterdir())
+        assert len(profiles) == 1
+        with open(profiles[0], "rb") as profile_file:
+            assert any(function[2] == "failing_handler" for function in marshal.load(profile_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import types
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape, VirtualClock
+from tests.emulator.events import build_restore_event
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+SHAPE = TableShape(
+    name="orders",
+    gsi_count=2,
+    billing_mode="PROVISIONED",
+    auto_scaling=True,
+    stream=True,
+    trigger_count=2,
+    ttl=True,
+    pitr=True,
+    tag_count=2,
+)
+
+
+def all_settings(enable_sibling_stacks: bool = False):
+    from table_sync.sync_settings import SyncSettings
+
+    return SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=enable_sibling_stacks,
+    )
+
+
+@contextlib.contextmanager
+def synced_control_plane(app, target_table_names: list, enable_sibling_stacks: bool = False):
+    """Syncs restored tables of SHAPE against the emulated control plane, then yields it installed."""
+    clock = VirtualClock()
+    control_plane = ControlPlane(
+        tables=[SHAPE], latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0)), clock=clock
+    )
+    settings = all_settings(enable_sibling_stacks=enable_sibling_stacks)
+    with control_plane.install():
+        with mock.patch("table_sync.deploy_cfn_resources.time", types.SimpleNamespace(sleep=clock.sleep)):
+            for target_table_name in target_table_names:
+                control_plane.restore(SHAPE.name, target_table_name)
+                with mock.patch("table_sync.app.get_sync_settings", return_value=settings):
+                    assert app.lambda_handler(build_restore_event(SHAPE.name, target_table_name), None) is True
+            yield control_plane
+
+
+def test_reconcile_stacks():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app, reconciler
+
+        with synced_control_plane(app, ["orders-restored", "orders-copy"]) as control_plane:
+            stacks = reconciler.list_restored_table_stacks(control_plane.create_client("cloudformation"))
+            assert stacks == {
+                "Restored-DynamoDB-Table-orders-copy-Stack": "orders-copy",
+                "Restored-DynamoDB-Table-orders-restored-Stack": "orders-restored",
+            }
+
+            # The stacks were just synced.
+            results = reconciler.reconcile_stacks(all_settings(), max_workers=2)
+            assert [result.status for result in results] == [reconciler.SKIPPED, reconciler.SKIPPED]
+
+            # The source table gets a tag: a dry run reports the stacks, then one change set updates each stack.
+            control_plane.add_table(dataclasses.replace(SHAPE, tag_count=3))
+            change_set_count = len(control_plane.change_sets)
+            results = reconciler.reconcile_stacks(all_settings(), max_workers=2, dry_run=True)
+            assert [result.status for result in results] == [reconciler.RECONCILED, reconciler.RECONCILED]
+            assert len(control_plane.change_sets) == change_set_count
+            results = reconciler.reconcile_stacks(all_settings(), max_workers=2, rate_per_second=1000.0)
+            assert [result.updated_stacks for result in results] == [(stack_name,) for stack_name in sorted(stacks)]
+            assert len(control_plane.change_sets) == change_set_count + 2
+            template = control_plane.stacks["Restored-DynamoDB-Table-orders-copy-Stack"]["TemplateBody"]
+            assert len(json.loads(template)["Resources"]["PITRRestoredTable"]["Properties"]["Tags"]) == 3
+            results = reconciler.reconcile_stacks(all_settings())
+            assert [result.status for result in results] == [reconciler.SKIPPED, reconciler.SKIPPED]
+
+
+def test_reconcile_sibling_stacks():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app, reconciler
+
+        with synced_control_plane(app, ["orders-restored"], enable_sibling_stacks=True) as control_plane:
+            # The sibling stacks are reconciled with their table stack, not on their own.
+            stacks = reconciler.list_restored_table_stacks(control_plane.create_client("cloudformation"))
+            assert stacks == {"Restored-DynamoDB-Table-orders-restored-Stack": "orders-restored"}
+            result = reconciler.reconcile_stack(
+                "Restored-DynamoDB-Table-orders-restored-Stack", "orders-restored", all_settings(True)
+            )
+            assert result.status == reconciler.SKIPPED
+
+            control_plane.add_table(dataclasses.replace(SHAPE, trigger_count=3))
+            result = reconciler.reconcile_stack(
+                "Restored-DynamoDB-Table-orders-restored-Stack", "orders-restored", all_settings(True)
+            )
+            assert result.status == reconciler.RECONCILED
+            assert result.updated_stacks == ("Restored-DynamoDB-Table-orders-restored-Triggers-Stack",)
+
+            # A table without a restore summary, e.g. a table created by a stack, is skipped.
+            control_plane.restored_tables.pop("orders-restored")
+            control_plane.add_table(dataclasses.replace(SHAPE, name="orders-restored"))
+            result = reconciler.reconcile_stack(
+                "Restored-DynamoDB-Table-orders-restored-Stack", "orders-restored", all_settings(True)
+            )
+            assert result.status == reconciler.SKIPPED
+            assert "isn't a restored table" in result.reason
+
+
+def test_main():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import reconciler
+
+        with ControlPlane(tables=[SHAPE]).install():
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = reconciler.main(["--stack-name", "Restored-DynamoDB-Table-missing-Stack", "--dry-run"])
+            assert exit_code == 1
+            assert "Failed     Restored-DynamoDB-Table-missing-Stack" in output.getvalue()
+            assert "Would reconcile 0, skipped 0, failed 1 of 1 stacks" in output.getvalue()
+
+
+if __name__ == "__main__":
+    unittest.main()
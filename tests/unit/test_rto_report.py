@@ -0,0 +1,103 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import unittest
+from unittest import mock
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+EVENT_TIME_MS = 1675879200000
+
+
+def timeline_record(target_table_name: str, rto_s: int, status: str = "Success", sync_s: int = 0):
+    from table_sync.sync_ledger import TimelineRecord
+
+    return TimelineRecord(
+        restore_group="2023-02-08",
+        sync_id=f"{target_table_name}#{EVENT_TIME_MS + rto_s * 1000}",
+        event_id=f"{target_table_name}-event",
+        source_table_name="source-table",
+        target_table_name=target_table_name,
+        event_time_ms=EVENT_TIME_MS,
+        first_received_ms=EVENT_TIME_MS + 5000,
+        active_ms=EVENT_TIME_MS + 60000,
+        finished_ms=EVENT_TIME_MS + rto_s * 1000,
+        phases=(
+            {"phase": "Readiness", "outcome": "Success", "duration_ms": 100.0, "finished_ms": EVENT_TIME_MS},
+            {"phase": "ChangeSetExecuteWait", "outcome": status, "duration_ms": sync_s * 1000.0, "finished_ms": 0},
+            {"phase": "Total", "outcome": status, "duration_ms": sync_s * 1000.0 + 100, "finished_ms": 0},
+        ),
+        retry_count=0,
+        api_call_counts={"cloudformation.DescribeStacks": 10},
+        status=status,
+        error_class=None if status == "Success" else "WaiterError",
+    )
+
+
+def test_build_rto_report():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import rto_report
+
+        records = [
+            timeline_record("table-1", 100, sync_s=40),
+            timeline_record("table-2", 200, status="Failure", sync_s=30),
+            timeline_record("table-2", 400, sync_s=90),
+            timeline_record("table-3", 300, sync_s=60),
+            timeline_record("table-4", 500, status="Failure", sync_s=20),
+        ]
+        report = rto_report.build_rto_report(records, top=2)
+
+        assert (report["tables"], report["synced_tables"]) == (4, 3)
+        # Only the last attempt of each table counts.
+        assert report["rto_ms"] == {"p50": 300000, "p90": 400000, "p99": 400000, "max": 400000, "count": 3}
+        assert [phase["phase"] for phase in report["slowest_phases"]] == ["ChangeSetExecuteWait", "Readiness"]
+        assert [table["target_table_name"] for table in report["slowest_tables"]] == ["table-2", "table-3"]
+        assert report["slowest_tables"][0]["active_after_ms"] == 60000
+        assert report["failed_tables"] == [("table-4", "WaiterError")]
+
+
+def test_main(tmp_path, capsys):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import rto_report
+        from table_sync.sync_ledger import SQLiteSyncLedger
+
+        path = str(tmp_path / "sync-ledger.db")
+        ledger = SQLiteSyncLedger(path)
+        ledger.append(timeline_record("table-1", 100, sync_s=40))
+        ledger.append(timeline_record("table-2", 250, sync_s=90))
+
+        assert rto_report.main(["--sqlite", path, "--group", "2023-02-08", "--format", "json"]) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report["rto_ms"]["max"] == 250000
+        assert rto_report.main(["--sqlite", path]) == 0
+        output = capsys.readouterr().out
+        assert "RTO: p50 100.0s, p90 250.0s, p99 250.0s, max 250.0s" in output
+        assert "table-2: RTO 250.0s" in output
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import dataclasses
+import os
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane
+from tests.unit.test_reconciler import SHAPE, all_settings, environment
+
+
+@mock.patch.dict(os.environ, environment)
+class TestSettingSteps(unittest.TestCase):
+    def build_steps(self, enable_sibling_stacks: bool, restored_table_stream: bool = True, skip_tag: str = None):
+        from table_sync.client_factory import get_client
+        from table_sync.setting_steps import build_setting_steps
+        from table_sync.sync_settings import SKIP_TAG_KEY, apply_table_overrides
+        from table_sync.table_config import TableConfig, Tag
+
+        control_plane = ControlPlane(tables=[SHAPE])
+        control_plane.restore(SHAPE.name, "orders-restored")
+        control_plane.restored_tables["orders-restored"] = dataclasses.replace(SHAPE, stream=restored_table_stream)
+        with control_plane.install():
+            dynamodb_client = get_client("dynamodb")
+            source_table = dynamodb_client.describe_table(TableName=SHAPE.name)
+            source_table_tags = tuple(Tag.from_cfn(tag) for tag in SHAPE.tags())
+            settings = all_settings(enable_sibling_stacks=enable_sibling_stacks)
+            if skip_tag is not None:
+                settings = apply_table_overrides(settings, (Tag(key=SKIP_TAG_KEY, value=skip_tag),))
+            return list(
+                build_setting_steps(
+                    dynamodb_client=dynamodb_client,
+                    table_config=TableConfig.from_describe_table(source_table, table_name="orders-restored"),
+                    source_table_name=SHAPE.name,
+                    source_table=source_table,
+                    source_table_tags=source_table_tags,
+                    settings=settings,
+                )
+            )
+
+    def test_build_setting_steps(self):
+        steps = self.build_steps(enable_sibling_stacks=False)
+
+        self.assertEqual(
+            ["Tags", "Stream", "Triggers", "PITR", "TTL", "AutoScaling"], [step.setting for step in steps]
+        )
+        self.assertTrue(all(step.sibling_stack_name is None for step in steps))
+        # Each step adds its setting to the configuration of the previous one.
+        last_config = steps[-1].table_config
+        self.assertEqual(len(SHAPE.tags()), len(last_config.tags))
+        self.assertEqual(SHAPE.trigger_count, len(last_config.triggers))
+        self.assertTrue(last_config.scaling)
+        self.assertIsNotNone(last_config.time_to_live_specification)
+
+    def test_build_setting_steps_sibling_stacks(self):
+        steps = self.build_steps(enable_sibling_stacks=True)
+
+        sibling_steps = {step.setting: step for step in steps if step.sibling_stack_name}
+        self.assertEqual(
+            "Restored-DynamoDB-Table-orders-restored-Triggers-Stack", sibling_steps["Triggers"].sibling_stack_name
+        )
+        self.assertEqual(
+            "Restored-DynamoDB-Table-orders-restored-AutoScaling-Stack", sibling_steps["AutoScaling"].sibling_stack_name
+        )
+        # The triggers of a sibling stack reference the stream of the restored table with its ARN.
+        for trigger in sibling_steps["Triggers"].cfn_resources:
+            self.assertTrue(dict(trigger.properties)["EventSourceArn"].startswith("arn:aws:dynamodb:"))
+
+    def test_build_setting_steps_sibling_stacks_without_stream(self):
+        # The stream of the restored table is skipped, e.g. by its table-sync:skip tag, so are its triggers.
+        steps = self.build_steps(enable_sibling_stacks=True, restored_table_stream=False)
+
+        self.assertNotIn("Triggers", [step.setting for step in steps])
+        self.assertFalse(steps[-1].table_config.triggers)
+
+    def test_build_setting_steps_skipped_stream(self):
+        # Without sibling stacks, the triggers would reference the stream of a table template that has none.
+        steps = self.build_steps(enable_sibling_stacks=False, skip_tag="stream")
+
+        self.assertEqual(["Tags", "PITR", "TTL", "AutoScaling"], [step.setting for step in steps])
+        self.assertFalse(steps[-1].table_config.triggers)
+
+
+if __name__ == "__main__":
+    unittest.main()
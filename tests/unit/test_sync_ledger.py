@@ -0,0 +1,131 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+import boto3
+from botocore.stub import Stubber
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def restore_request(target_table_name: str = "target-table", receive_count: int = 2, replay_attempt: str = "1"):
+    from table_sync.event_decoder import RestoreRequest
+
+    return RestoreRequest(
+        message_id="c53fe60e-57e0-46a9-a6cd-b13d61ef84c5",
+        event_id="7d0d3c9f-c5d7-4a3e-9c0a-3f1b1c1d1e1f",
+        event_time=datetime(2023, 2, 8, 18, 0, 0, tzinfo=timezone.utc),
+        sent_timestamp=1675879205000,
+        first_receive_timestamp=1675879210000,
+        receive_count=receive_count,
+        replay_attempt=replay_attempt,
+        source_table_name="source-table",
+        target_table_name=target_table_name,
+        global_secondary_indexes=None,
+        local_secondary_indexes=None,
+    )
+
+
+def test_build_timeline_record():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_ledger, sync_metrics
+
+        sync_metrics.reset_phase_records()
+        sync_metrics.record_phase(sync_metrics.READINESS_PHASE, 120.0)
+        sync_metrics.record_phase(sync_metrics.discovery_phase("TTL"), 80.0)
+        with mock.patch.object(
+            sync_ledger, "get_api_call_summary", return_value={"cloudformation.DescribeStacks": {"calls": 7}}
+        ):
+            record = sync_ledger.build_timeline_record(restore_request(), status="Success", now=1675879500000)
+
+        assert record.restore_group == "2023-02-08"
+        assert record.sync_id == "target-table#1675879500000"
+        assert record.first_received_ms == 1675879210000
+        assert record.active_ms == record.phases[0]["finished_ms"]
+        assert [phase["phase"] for phase in record.phases] == ["Readiness", "Discovery.TTL"]
+        # One SQS redelivery and one replay from the DLQ.
+        assert record.retry_count == 2
+        assert record.api_call_counts == {"cloudformation.DescribeStacks": 7}
+        assert record.recovery_time_ms == 300000
+
+
+def test_sqlite_sync_ledger(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_ledger
+
+        ledger = sync_ledger.SQLiteSyncLedger(str(tmp_path / "sync-ledger.db"))
+        first = sync_ledger.build_timeline_record(restore_request(), status="Failure", error_class="TableNotActive")
+        ledger.append(first)
+        second = sync_ledger.append_sync_timeline(restore_request("other-table"), status="Success", ledger=ledger)
+
+        records = {record.target_table_name: record for record in ledger.query(restore_group="2023-02-08")}
+        assert records == {"target-table": first, "other-table": second}
+        assert records["target-table"].error_class == "TableNotActive"
+        assert ledger.query(restore_group="2023-02-09") == []
+
+
+def test_dynamodb_sync_ledger():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_ledger
+
+        dynamodb_client = boto3.client("dynamodb", region_name="us-east-1")
+        ledger = sync_ledger.DynamoDBSyncLedger(dynamodb_client=dynamodb_client, table_name="sync-ledger")
+        record = sync_ledger.build_timeline_record(restore_request(), status="Success", now=1675879500000)
+        item = sync_ledger._to_attribute_values(record.to_item())
+        assert item["restore_group"] == {"S": "2023-02-08"}
+        assert item["finished_ms"] == {"N": "1675879500000"}
+        assert "error_class" not in item
+
+        with Stubber(dynamodb_client) as dynamodb_stubber:
+            dynamodb_stubber.add_response("put_item", {}, {"TableName": "sync-ledger", "Item": item})
+            dynamodb_stubber.add_response(
+                "query",
+                {"Items": [item]},
+                {
+                    "TableName": "sync-ledger",
+                    "KeyConditionExpression": "restore_group = :restore_group",
+                    "ExpressionAttributeValues": {":restore_group": {"S": "2023-02-08"}},
+                },
+            )
+            ledger.append(record)
+            assert ledger.query(restore_group="2023-02-08") == [record]
+
+
+def test_append_sync_timeline_ledger_error():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_ledger
+
+        ledger = mock.Mock()
+        ledger.append.side_effect = RuntimeError("ledger unavailable")
+        # The sync doesn't fail because of the ledger.
+        assert sync_ledger.append_sync_timeline(restore_request(), status="Success", ledger=ledger) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
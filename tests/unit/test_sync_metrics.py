@@ -0,0 +1,90 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import pytest
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def emf_metrics(output: str):
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{") and '"_aws"' in line]
+
+
+def test_measure_phase(capsys):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_metrics
+
+        sync_metrics.reset_phase_records()
+        with sync_metrics.measure_phase(sync_metrics.READINESS_PHASE):
+            pass
+        with pytest.raises(ValueError):
+            with sync_metrics.measure_phase(sync_metrics.discovery_phase("TTL")):
+                raise ValueError("describe_time_to_live failed")
+
+        records = sync_metrics.get_phase_records()
+        assert [(record.phase, record.outcome) for record in records] == [
+            ("Readiness", "Success"),
+            ("Discovery.TTL", "Failure"),
+        ]
+        assert all(record.duration_ms >= 0 for record in records)
+
+        metrics = emf_metrics(capsys.readouterr().out)
+        assert [(metric["Phase"], metric["Outcome"]) for metric in metrics] == [
+            ("Readiness", "Success"),
+            ("Discovery.TTL", "Failure"),
+        ]
+        directive = metrics[0]["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "DynamoDBPITRTableSync"
+        assert directive["Metrics"][0]["Name"] == "PhaseLatency"
+        assert set(directive["Dimensions"][0]) == {"Phase", "Outcome"}
+
+        sync_metrics.reset_phase_records()
+        assert sync_metrics.get_phase_records() == []
+
+
+def test_add_sync_lag_metrics():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_metrics
+
+        metrics = mock.Mock()
+        now = datetime(2023, 2, 8, 18, 5, 0, tzinfo=timezone.utc)
+        sync_metrics.add_sync_lag_metrics(
+            metrics,
+            event_time=now - timedelta(minutes=4),
+            sent_timestamp=int((now - timedelta(seconds=30)).timestamp() * 1000),
+            now=now,
+        )
+        lags = {call.kwargs["name"]: call.kwargs["value"] for call in metrics.add_metric.call_args_list}
+        assert lags == {"EventLag": 240000, "QueueLag": 30000}
+
+
+if __name__ == "__main__":
+    unittest.main()
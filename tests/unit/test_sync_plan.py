@@ -0,0 +1,285 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+from tests.emulator import ControlPlane, LatencyModel, OperationProfile, TableShape, VirtualClock
+from tests.emulator.events import build_restore_event
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+SHAPE = TableShape(
+    name="indexed-table",
+    gsi_count=3,
+    billing_mode="PROVISIONED",
+    auto_scaling=True,
+    stream=True,
+    trigger_count=2,
+    ttl=True,
+    pitr=True,
+    tag_count=3,
+)
+
+
+def all_settings(enable_sibling_stacks: bool = False):
+    from table_sync.sync_settings import SyncSettings
+
+    return SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=enable_sibling_stacks,
+    )
+
+
+def record_sync(app, target_table_name: str):
+    """Records a sync of SHAPE against the emulated control plane and returns the cassette."""
+    from tests.emulator.cassette import CassetteRecorder
+
+    clock = VirtualClock()
+    control_plane = ControlPlane(
+        tables=[SHAPE], latency_model=LatencyModel(default=OperationProfile(latency_ms=0.0)), clock=clock
+    )
+    control_plane.restore(SHAPE.name, target_table_name)
+    event = build_restore_event(SHAPE.name, target_table_name)
+    recorder = CassetteRecorder(client_creator=control_plane.create_client, event=event)
+    with recorder.install(), mock.patch("table_sync.app.get_sync_settings", return_value=all_settings()):
+        with mock.patch("table_sync.deploy_cfn_resources.time", types.SimpleNamespace(sleep=clock.sleep)):
+            assert app.lambda_handler(event, None) is True
+    return json.loads(json.dumps(recorder.to_cassette()))
+
+
+def test_plan_matches_recorded_sync():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import app, sync_plan
+
+        cassette = record_sync(app, "restored-table")
+        with tempfile.TemporaryDirectory() as directory:
+            inputs_path = os.path.join(directory, "cassette.json")
+            with open(inputs_path, "w") as inputs_file:
+                json.dump(cassette, inputs_file)
+            inputs = sync_plan.load_plan_inputs(inputs_path)
+        source_table = next(
+            interaction["response"]
+            for interaction in cassette["interactions"]
+            if interaction["operation"] == "dynamodb.DescribeTable"
+            and interaction["params"]["TableName"] == SHAPE.name
+        )
+
+        plan = sync_plan.build_sync_plan(
+            source_table=source_table, target_table_name="restored-table", inputs=inputs, settings=all_settings()
+        )
+
+        # The plan has the change sets of the recorded sync, in order and with the same templates.
+        recorded_change_sets = [
+            interaction["params"]
+            for interaction in cassette["interactions"]
+            if interaction["operation"] == "cloudformation.CreateChangeSet"
+        ]
+        assert [change_set["change_set_name"] for change_set in plan["change_sets"]] == [
+            params["ChangeSetName"] for params in recorded_change_sets
+        ]
+        assert [change_set["change_set_type"] for change_set in plan["change_sets"]][:2] == ["IMPORT", "UPDATE"]
+        assert [change_set["template"] for change_set in plan["change_sets"]] == [
+            json.loads(params["TemplateBody"]) for params in recorded_change_sets
+        ]
+        assert plan["templates"] == {
+            "Restored-DynamoDB-Table-restored-table-Stack": plan["change_sets"][-1]["template"]
+        }
+        assert plan["defaulted_inputs"] == []
+
+        # The reads and the writes are the recorded ones, the waits poll for the default durations.
+        recorded_calls = {}
+        for interaction in cassette["interactions"]:
+            recorded_calls[interaction["operation"]] = recorded_calls.get(interaction["operation"], 0) + 1
+        change_set_count = len(recorded_change_sets)
+        assert plan["api_calls"]["cloudformation.CreateChangeSet"] == change_set_count
+        assert plan["api_calls"]["dynamodb.DescribeTimeToLive"] == recorded_calls["dynamodb.DescribeTimeToLive"]
+        assert plan["api_calls"]["cloudformation.DescribeChangeSet"] == change_set_count * 3
+        assert plan["api_calls"]["cloudformation.DescribeStacks"] == change_set_count * 6
+        assert plan["estimated_duration_ms"]["table_stack"] == change_set_count * 42050.0
+        assert plan["estimated_duration_ms"]["sibling_stacks"] == 0.0
+        assert plan["timing_model"] == "default durations"
+
+
+def test_plan_with_sibling_stacks_and_past_syncs():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_plan
+        from table_sync.sync_ledger import TimelineRecord
+
+        # Without recorded inputs, the source table has no tags, triggers or auto scaling.
+        source_table = SHAPE.describe_table(SHAPE.name)
+        records = [
+            TimelineRecord(
+                restore_group="2023-02-08",
+                sync_id=f"table-{i}#0",
+                event_id=None,
+                source_table_name=SHAPE.name,
+                target_table_name=f"table-{i}",
+                event_time_ms=None,
+                first_received_ms=None,
+                active_ms=None,
+                finished_ms=0,
+                phases=(
+                    {"phase": "ChangeSetCreateWait", "outcome": "Success", "duration_ms": 6000.0 * i},
+                    {"phase": "ChangeSetExecuteWait", "outcome": "Success", "duration_ms": 20000.0},
+                    {"phase": "ChangeSetExecuteWait", "outcome": "Failure", "duration_ms": 180000.0},
+                ),
+                retry_count=0,
+                api_call_counts={},
+                status=status,
+                error_class=None,
+            )
+            for i, status in ((1, "Success"), (2, "Success"), (3, "Success"), (4, "Failure"))
+        ]
+        timing_model = sync_plan.TimingModel.from_timeline_records(records)
+        assert timing_model.source == "p50 of 3 past syncs"
+        assert timing_model.duration_ms("ChangeSetCreateWait") == 12000.0
+        assert timing_model.duration_ms("ChangeSetExecuteWait") == 20000.0
+        assert timing_model.duration_ms("Discovery.TTL") == sync_plan.DEFAULT_DISCOVERY_DURATION_MS
+
+        plan = sync_plan.build_sync_plan(
+            source_table=source_table,
+            target_table_name="restored-table",
+            settings=all_settings(enable_sibling_stacks=True),
+            timing_model=timing_model,
+        )
+        assert [change_set["change_set_name"] for change_set in plan["change_sets"]] == [
+            "Import-DynamoDB-restored-table-Change-Set",
+            "Update-DynamoDB-restored-table-Stream-Change-Set",
+            "Update-DynamoDB-restored-table-PITR-Settings-Change-Set",
+        ]
+        assert "dynamodb.ListTagsOfResource" in plan["defaulted_inputs"]
+        assert "lambda.ListEventSourceMappings" in plan["defaulted_inputs"]
+        assert plan["estimated_duration_ms"]["table_stack"] == 3 * 32050.0
+
+        # An auto scaling input puts the scalable targets in a sibling stack. It starts once the table is imported
+        # and runs alongside the next change sets of the table stack.
+        table_resource_id = f"table/{SHAPE.name}"
+        inputs = {
+            "application-auto-scaling.DescribeScalableTargets": [
+                (
+                    {"ServiceNamespace": "dynamodb", "ResourceIds": [table_resource_id]},
+                    {"ScalableTargets": SHAPE.scalable_targets()[table_resource_id]},
+                )
+            ],
+        }
+        plan = sync_plan.build_sync_plan(
+            source_table=source_table,
+            target_table_name="restored-table",
+            inputs=inputs,
+            settings=all_settings(enable_sibling_stacks=True),
+            timing_model=timing_model,
+        )
+        assert [change_set["change_set_type"] for change_set in plan["change_sets"]] == [
+            "IMPORT",
+            "CREATE",
+            "UPDATE",
+            "UPDATE",
+        ]
+        assert plan["change_sets"][1]["stack_name"] == "Restored-DynamoDB-Table-restored-table-AutoScaling-Stack"
+        assert plan["estimated_duration_ms"]["sibling_stacks"] == 32050.0
+        estimated_duration_ms = plan["estimated_duration_ms"]
+        assert estimated_duration_ms["total"] == estimated_duration_ms["discovery"] + 3 * 32050.0
+        assert set(plan["templates"]) == {
+            "Restored-DynamoDB-Table-restored-table-Stack",
+            "Restored-DynamoDB-Table-restored-table-AutoScaling-Stack",
+        }
+
+
+def test_main():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_plan
+
+        with tempfile.TemporaryDirectory() as directory:
+            source_table_path = os.path.join(directory, "source-table.json")
+            with open(source_table_path, "w") as source_table_file:
+                source_table = TableShape(name="source-table").describe_table("source-table")
+                json.dump(source_table, source_table_file, default=str)
+            inputs_path = os.path.join(directory, "inputs.json")
+            with open(inputs_path, "w") as inputs_file:
+                json.dump({"dynamodb.ListTagsOfResource": {"Tags": [{"Key": "team", "Value": "orders"}]}}, inputs_file)
+            output_dir = os.path.join(directory, "plan")
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = sync_plan.main(
+                    [
+                        "--source-table-file",
+                        source_table_path,
+                        "--target-table-name",
+                        "target-table",
+                        "--inputs",
+                        inputs_path,
+                        "--output-dir",
+                        output_dir,
+                    ]
+                )
+            assert exit_code == 0
+            assert "1. IMPORT Restored-DynamoDB-Table-target-table-Stack" in output.getvalue()
+            assert "2. UPDATE Restored-DynamoDB-Table-target-table-Stack" in output.getvalue()
+            assert "Estimated duration:" in output.getvalue()
+            with open(os.path.join(output_dir, "Restored-DynamoDB-Table-target-table-Stack.json")) as template_file:
+                template = json.load(template_file)
+            properties = template["Resources"]["PITRRestoredTable"]["Properties"]
+            assert properties["Tags"] == [{"Key": "team", "Value": "orders"}]
+            assert os.path.exists(
+                os.path.join(
+                    output_dir,
+                    "Restored-DynamoDB-Table-target-table-Stack",
+                    "01-Import-DynamoDB-target-table-Change-Set.json",
+                )
+            )
+
+            # A read without a recorded or a default response fails the plan.
+            errors = io.StringIO()
+            with mock.patch.dict(sync_plan.DEFAULT_RESPONSES, clear=True), contextlib.redirect_stderr(errors):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    exit_code = sync_plan.main(
+                        ["--source-table-file", source_table_path, "--target-table-name", "target-table"]
+                    )
+            assert exit_code == 1
+            assert "The sync would fail: MissingPlanInput" in errors.getvalue()
+
+
+if __name__ == "__main__":
+    unittest.main()
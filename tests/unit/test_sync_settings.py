@@ -0,0 +1,131 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import unittest
+from unittest import mock
+import boto3
+from botocore.stub import Stubber
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def default_settings(sync_settings):
+    return sync_settings.SyncSettings(
+        enable_tag_settings=True,
+        enable_kinesis_settings=True,
+        enable_dynamodb_stream_settings=True,
+        enable_ttl_settings=True,
+        enable_pitr_settings=True,
+        enable_auto_scaling_settings=True,
+        enable_dynamodb_lambda_triggers=True,
+        enable_sibling_stacks=False,
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_provider_refreshes_file_settings_after_ttl(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_settings
+
+        settings_file = tmp_path / "settings.json"
+        settings_file.write_text(json.dumps({"ENABLE_AUTO_SCALING_SETTINGS": False}))
+        clock = FakeClock()
+        provider = sync_settings.SyncSettingsProvider(
+            defaults=default_settings(sync_settings),
+            sources=[sync_settings.FileSettingsSource(str(settings_file))],
+            ttl_seconds=60,
+            clock=clock,
+        )
+        assert provider.get().enable_auto_scaling_settings is False
+        assert provider.get().enable_ttl_settings is True
+
+        settings_file.write_text(json.dumps({"ENABLE_AUTO_SCALING_SETTINGS": "true", "ENABLE_TTL_SETTINGS": "false"}))
+        clock.now = 59
+        assert provider.get().enable_auto_scaling_settings is False
+        clock.now = 60
+        assert provider.get().enable_auto_scaling_settings is True
+        assert provider.get().enable_ttl_settings is False
+
+        # An unreadable source keeps the last settings.
+        settings_file.write_text("{")
+        clock.now = 120
+        assert provider.get().enable_ttl_settings is False
+
+
+def test_provider_parameter_store_source():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_settings
+
+        ssm_client = boto3.client("ssm", "us-east-1")
+        ssm_stubber = Stubber(ssm_client)
+        ssm_stubber.add_response(
+            "get_parameter",
+            {"Parameter": {"Name": "/table-sync/settings", "Value": '{"ENABLE_SIBLING_STACKS": true}'}},
+            {"Name": "/table-sync/settings"},
+        )
+        ssm_stubber.add_client_error("get_parameter", service_error_code="ParameterNotFound")
+        ssm_stubber.activate()
+        source = sync_settings.ParameterStoreSettingsSource(ssm_client, "/table-sync/settings")
+        clock = FakeClock()
+        provider = sync_settings.SyncSettingsProvider(
+            defaults=default_settings(sync_settings), sources=[source], ttl_seconds=60, clock=clock
+        )
+        assert provider.get().enable_sibling_stacks is True
+        clock.now = 60
+        assert provider.get() == default_settings(sync_settings)
+        ssm_stubber.assert_no_pending_responses()
+
+
+def test_apply_table_overrides():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_settings
+        from table_sync.table_config import Tag
+
+        settings = default_settings(sync_settings)
+        assert sync_settings.apply_table_overrides(settings, (Tag(key="team", value="data"),)) is settings
+        overridden = sync_settings.apply_table_overrides(
+            settings,
+            (Tag(key="team", value="data"), Tag(key="table-sync:skip", value="AutoScaling+triggers unknown")),
+        )
+        assert overridden == sync_settings.replace(
+            settings, enable_auto_scaling_settings=False, enable_dynamodb_lambda_triggers=False
+        )
+        assert sync_settings.apply_table_overrides(
+            settings, (Tag(key="table-sync:skip", value="ttl,pitr"),)
+        ).enable_pitr_settings is False
+
+
+if __name__ == "__main__":
+    unittest.main()
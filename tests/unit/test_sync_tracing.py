@@ -0,0 +1,73 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+import pytest
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_traced_phase():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_metrics, sync_tracing
+
+        subsegments = {}
+
+        @contextmanager
+        def in_subsegment(name):
+            subsegments[name] = mock.Mock()
+            yield subsegments[name]
+
+        sync_metrics.reset_phase_records()
+        with mock.patch.object(sync_tracing.TRACER.provider, "in_subsegment", side_effect=in_subsegment):
+            with pytest.raises(ValueError):
+                with sync_tracing.traced_phase("Discovery.TTL", {"target_table": "target-table"}) as subsegment:
+                    sync_tracing.put_annotation(subsegment, "cfn_status", "")
+                    sync_tracing.put_annotation(subsegment, "poll_count", 3)
+                    raise ValueError("describe_time_to_live failed")
+
+        subsegments["## Discovery.TTL"].put_annotation.assert_has_calls(
+            [mock.call("target_table", "target-table"), mock.call("poll_count", 3)]
+        )
+        assert subsegments["## Discovery.TTL"].put_annotation.call_count == 2
+        assert [(record.phase, record.outcome) for record in sync_metrics.get_phase_records()] == [
+            ("Discovery.TTL", "Failure"),
+        ]
+
+
+def test_put_annotation_without_subsegment():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync import sync_tracing
+
+        # Outside of an X-Ray context, e.g. in a thread started outside of Lambda.
+        sync_tracing.put_annotation(None, "target_table", "target-table")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import copy
+import dataclasses
+import unittest
+import pytest
+from src.table_sync.cfn_template_validator import validate_cfn_template
+from src.table_sync.cfn_yaml_template import render_cfn_template
+from src.table_sync.table_config import (
+    CfnResource,
+    FrozenMapping,
+    TableConfig,
+    Tag,
+    freeze,
+    thaw,
+)
+
+SOURCE_TABLE = {
+    "Table": {
+        "TableName": "source-table",
+        "TableStatus": "ACTIVE",
+        "AttributeDefinitions": [
+            {"AttributeName": "department", "AttributeType": "S"},
+            {"AttributeName": "email", "AttributeType": "S"},
+            {"AttributeName": "salary", "AttributeType": "N"},
+            {"AttributeName": "name", "AttributeType": "S"},
+        ],
+        "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
+        "BillingModeSummary": {"BillingMode": "PAY_PER_REQUEST"},
+        "GlobalSecondaryIndexes": [
+            {
+                "IndexName": "name-index",
+                "KeySchema": [{"AttributeName": "name", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+                "IndexStatus": "ACTIVE",
+                "IndexArn": "arn:aws:dynamodb:us-east-1:123456789012:table/source-table/index/name-index",
+            }
+        ],
+    }
+}
+
+
+def test_from_describe_table_drops_unused_attribute_definitions():
+    table_config = TableConfig.from_describe_table(SOURCE_TABLE, table_name="target-table")
+    # department and salary are next to each other and both unused, none of them must be left behind.
+    assert [definition.attribute_name for definition in table_config.attribute_definitions] == ["email", "name"]
+    assert table_config.to_cfn_properties() == {
+        "TableName": "target-table",
+        "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
+        "AttributeDefinitions": [
+            {"AttributeName": "email", "AttributeType": "S"},
+            {"AttributeName": "name", "AttributeType": "S"},
+        ],
+        "BillingMode": "PAY_PER_REQUEST",
+        "GlobalSecondaryIndexes": [
+            {
+                "IndexName": "name-index",
+                "KeySchema": [{"AttributeName": "name", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+    }
+
+
+def test_from_describe_table_on_demand_throughput():
+    source_table = copy.deepcopy(SOURCE_TABLE)
+    # DescribeTable returns -1 for the maximum on-demand throughput of an index that doesn't set one.
+    source_table["Table"]["GlobalSecondaryIndexes"][0].update(
+        OnDemandThroughput={"MaxReadRequestUnits": -1, "MaxWriteRequestUnits": -1},
+        ProvisionedThroughput={"NumberOfDecreasesToday": 0, "ReadCapacityUnits": 0, "WriteCapacityUnits": 0},
+    )
+    source_table["Table"]["GlobalSecondaryIndexes"].append(
+        {
+            "IndexName": "department-index",
+            "KeySchema": [{"AttributeName": "department", "KeyType": "HASH"}],
+            "Projection": {"ProjectionType": "KEYS_ONLY"},
+            "OnDemandThroughput": {"MaxReadRequestUnits": 100, "MaxWriteRequestUnits": -1},
+        }
+    )
+    table_config = TableConfig.from_describe_table(source_table, table_name="target-table")
+    global_secondary_indexes = table_config.to_cfn_properties()["GlobalSecondaryIndexes"]
+    assert "OnDemandThroughput" not in global_secondary_indexes[0]
+    assert global_secondary_indexes[1]["OnDemandThroughput"] == {"MaxReadRequestUnits": 100}
+    validate_cfn_template(render_cfn_template(table_config))
+
+
+def test_from_describe_table_index_override():
+    table_config = TableConfig.from_describe_table(
+        SOURCE_TABLE,
+        table_name="target-table",
+        global_secondary_indexes=[],
+        local_secondary_indexes=[
+            {
+                "IndexName": "salary-index",
+                "KeySchema": [
+                    {"AttributeName": "email", "KeyType": "HASH"},
+                    {"AttributeName": "salary", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "KEYS_ONLY"},
+            }
+        ],
+    )
+    properties = table_config.to_cfn_properties()
+    assert "GlobalSecondaryIndexes" not in properties
+    assert properties["LocalSecondaryIndexes"][0]["IndexName"] == "salary-index"
+    assert [definition["AttributeName"] for definition in properties["AttributeDefinitions"]] == ["email", "salary"]
+
+
+def test_table_config_is_immutable_and_compared_by_value():
+    table_config = TableConfig.from_describe_table(SOURCE_TABLE, table_name="target-table")
+    assert table_config == TableConfig.from_describe_table(SOURCE_TABLE, table_name="target-table")
+    assert hash(table_config) == hash(TableConfig.from_describe_table(SOURCE_TABLE, table_name="target-table"))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        table_config.table_name = "other-table"
+    tagged_table_config = dataclasses.replace(table_config, tags=(Tag(key="team", value="data"),))
+    assert tagged_table_config != table_config
+    assert table_config.tags == ()
+    assert tagged_table_config.to_cfn_properties()["Tags"] == [{"Key": "team", "Value": "data"}]
+
+
+def test_freeze_and_thaw():
+    value = {"b": [1, {"c": None}], "a": {"d": True}}
+    frozen = freeze(value)
+    assert isinstance(frozen, FrozenMapping)
+    assert frozen.get("a") == FrozenMapping.from_dict({"d": True})
+    assert thaw(frozen) == value
+    assert hash(frozen) == hash(freeze({"a": {"d": True}, "b": [1, {"c": None}]}))
+
+
+def test_render_cfn_template():
+    trigger = CfnResource.from_cfn(
+        "EventSourceMapping1",
+        {"Type": "AWS::Lambda::EventSourceMapping", "Properties": {"FunctionName": "function", "BatchSize": 1}},
+    )
+    table_config = dataclasses.replace(
+        TableConfig.from_describe_table(SOURCE_TABLE, table_name="target-table"), triggers=(trigger,)
+    )
+    template = render_cfn_template(table_config)
+    assert template["Description"] == "target-table Cloudformation deployment"
+    assert template["Resources"]["PITRRestoredTable"] == {
+        "Type": "AWS::DynamoDB::Table",
+        "DeletionPolicy": "Retain",
+        "Properties": table_config.to_cfn_properties(),
+    }
+    assert template["Resources"]["EventSourceMapping1"] == {
+        "Type": "AWS::Lambda::EventSourceMapping",
+        "Properties": {"FunctionName": "function", "BatchSize": 1},
+    }
+    assert list(render_cfn_template(table_config, include_table_resources=False)["Resources"]) == [
+        "PITRRestoredTable"
+    ]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# © 2023 Amazon Web Services, Inc. or its affiliates. All Rights Reserved.
+# This AWS Content is provided subject to the terms of the AWS Customer Agreement
+# available at http://aws.amazon.com/agreement or other written agreement between
+# Customer and either Amazon Web Services, Inc. or Amazon Web Services EMEA SARL or both.
+#
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import os
+import unittest
+from unittest import mock
+from botocore.stub import Stubber
+import boto3
+
+environment = {
+    "LOG_LEVEL": "INFO",
+    "AWS_REGION": "us-east-1",
+    "ACCOUNT_ID": "123456789012",
+    "PARTITION": "aws",
+    "ENABLE_TAG_SETTINGS": "true",
+    "ENABLE_KINESIS_SETTINGS": "true",
+    "ENABLE_DYNAMODB_STREAM_SETTINGS": "true",
+    "ENABLE_TTL_SETTINGS": "true",
+    "ENABLE_PITR_SETTINGS": "true",
+    "ENABLE_AUTO_SCALING_SETTINGS": "false",
+    "ENABLE_DYNAMODB_LAMBDA_TRIGGERS": "true",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+def test_s3_template_uploader():
+    with mock.patch.dict(os.environ, environment):
+        from table_sync.template_uploader import S3TemplateUploader
+        s3_client = boto3.client("s3", "us-east-1")
+        s3_stubber = Stubber(s3_client)
+        s3_stubber.add_response(
+            "put_object",
+            {},
+            {
+                "Bucket": "template-bucket",
+                "Key": "templates/Restored-DynamoDB-Table-target-table-Stack/change-set.json",
+                "Body": b'{"Resources":{}}',
+                "ContentType": "application/json",
+            },
+        )
+        s3_stubber.activate()
+        uploader = S3TemplateUploader(s3_client=s3_client, bucket_name="template-bucket", prefix="templates/")
+        template_url = uploader.upload("Restored-DynamoDB-Table-target-table-Stack/change-set.json", '{"Resources":{}}')
+        assert template_url == (
+            "https://s3.amazonaws.com/template-bucket/templates/Restored-DynamoDB-Table-target-table-Stack"
+            "/change-set.json"
+        )
+        s3_stubber.assert_no_pending_responses()
+        s3_stubber.deactivate()
+
+
+def test_local_directory_template_uploader(tmp_path):
+    with mock.patch.dict(os.environ, environment):
+        from table_sync.template_uploader import LocalDirectoryTemplateUploader
+        uploader = LocalDirectoryTemplateUploader(str(tmp_path))
+        template_url = uploader.upload("stack/change-set.json", '{"Resources":{}}')
+        assert template_url == f"file://{tmp_path}/stack/change-set.json"
+        assert (tmp_path / "stack" / "change-set.json").read_text() == '{"Resources":{}}'
+
+
+if __name__ == "__main__":
+    unittest.main()
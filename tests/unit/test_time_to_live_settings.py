@@ -42,7 +42,7 @@ def test_build_dynamodb_ttl():
     cfn_resources = time_to_live_settings.build_dynamodb_ttl(
         dynamodb_client=dynamodb_client, source_table_name="source-table"
     )
-    assert cfn_resources.__eq__(expected_cfn_resources)
+    assert cfn_resources.to_cfn() == expected_cfn_resources
 
 
 if __name__ == "__main__":